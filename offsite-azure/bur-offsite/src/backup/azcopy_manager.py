@@ -7,8 +7,14 @@
 # conditions stipulated in the agreement/contract under which the
 # program(s) have been supplied.
 ##############################################################################
-from subprocess import Popen, PIPE
+from collections import OrderedDict
+from functools import partial
+import io
+import json
+from subprocess import Popen, PIPE, STDOUT
 import os
+import tempfile
+import time
 
 from backup.exceptions import AzCopyException, ExceptionCodes
 
@@ -20,11 +26,107 @@ AZCOPY_CMD = "azcopy"
 azcopy_func_args = "copy"
 azcopy_output_type_args = "--output-type"
 SEP = " "
-azcopy_output_type = "text"
+azcopy_output_type = "json"
+azcopy_from_to_args = "--from-to"
+azcopy_pipe_upload = "PipeBlob"
+azcopy_pipe_download = "BlobPipe"
+azcopy_cap_mbps_args = "--cap-mbps"
+azcopy_jobs_args = "jobs"
+azcopy_resume_args = "resume"
+azcopy_source_sas_args = "--source-sas"
+azcopy_destination_sas_args = "--destination-sas"
+azcopy_include_path_args = "--include-path"
+azcopy_include_path_separator = ";"
+azcopy_all_files = "*"
+azcopy_remove_args = "rm"
+azcopy_recursive_args = "--recursive=true"
+
+AZCOPY_COMPLETED_STATUS = "Completed"
+AZCOPY_IN_PROGRESS_STATUS = "InProgress"
+AZCOPY_JOB_STARTED_PATTERN = re.compile(r"Job (?P<job_id>[0-9a-fA-F-]+) has started")
+JOB_JOURNAL_SUFFIX = ".azcopy_job"
+
+AZCOPY_INIT_MESSAGE = "Init"
+AZCOPY_PROGRESS_MESSAGE = "Progress"
+AZCOPY_END_OF_JOB_MESSAGE = "EndOfJob"
+AZCOPY_ERROR_MESSAGE = "Error"
+
+AZCOPY_SUMMARY_KEYS = OrderedDict([("TotalTransfers", "Total Number Of Transfers"),
+                                   ("TransfersCompleted", "Number of Transfers Completed"),
+                                   ("TransfersFailed", "Number of Transfers Failed"),
+                                   ("TransfersSkipped", "Number of Transfers Skipped"),
+                                   ("TotalBytesTransferred", "TotalBytesTransferred")])
+
+BITS_PER_MEGABIT = 1000 * 1000 / 8.0
 
 sastoken_default = "?sv=2019-02-02&ss=b&srt=sco&sp=rwdlac&se=2021-06-04T23:07:53Z&st=2019-11-18T16:07:53Z&spr=https&sig=NkvWBH3PnrUgEugjWZeUfPKnm8LR1oD9tk728q81w%2FY%3D"
 sastoken = os.environ.get('SAS_TOKEN', sastoken_default)
 
+
+def read_job_journal(journal_path):
+    """
+    Read the id of the azcopy job recorded for an interrupted upload.
+
+    :param journal_path: path of the journal file.
+    :return: job id, or None if there is no job recorded.
+    """
+    try:
+        with open(journal_path) as journal_file:
+            job_id = journal_file.read().strip()
+    except (IOError, OSError):
+        return None
+
+    return job_id or None
+
+
+def write_job_journal(journal_path, job_id):
+    """
+    Record the id of the azcopy job of an upload, so that it can be resumed if interrupted.
+
+    A journal that cannot be written only makes the upload not resumable.
+
+    :param journal_path: path of the journal file.
+    :param job_id: id of the azcopy job.
+    :return: true, if the journal was written; false otherwise.
+    """
+    try:
+        with open(journal_path, 'w') as journal_file:
+            journal_file.write(job_id)
+    except (IOError, OSError):
+        return False
+
+    return True
+
+
+def remove_job_journal(journal_path):
+    """
+    Remove the journal of an upload that completed.
+
+    :param journal_path: path of the journal file.
+    """
+    try:
+        os.remove(journal_path)
+    except OSError:
+        pass
+
+
+def check_transfer_result_dict(result_dict):
+    """
+    Check the results of a list of transfers.
+
+    :param result_dict: dictionary with the error message of each file, None if transferred.
+    :return: true, if all files were transferred.
+    :raise AzCopyException: if any file failed.
+    """
+    error_list = ["{}: {}".format(file_path, error_message) for file_path, error_message
+                  in sorted(result_dict.items()) if error_message is not None]
+
+    if error_list:
+        raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, error_list)
+
+    return True
+
+
 class AzCopyOutput:
     """Class used to store relevant output information of rsync commands."""
 
@@ -43,21 +145,218 @@ class AzCopyOutput:
                "{}".format(str(self.summary_dict))
 
 
+class AzCopyProgress(object):
+    """Progress of an azcopy job, reported while it runs and when it ends."""
+
+    def __init__(self, job_id, job_status, bytes_done, bytes_total, transfers_done,
+                 transfers_failed, transfers_total, elapsed_time, failed_path_list=None):
+        """
+        Initialize AzCopy Progress class.
+
+        :param job_id: id of the azcopy job.
+        :param job_status: status of the job, InProgress until it ends.
+        :param bytes_done: number of bytes transferred so far.
+        :param bytes_total: number of bytes expected to be transferred, 0 if not known yet.
+        :param transfers_done: number of files transferred so far.
+        :param transfers_failed: number of files that failed so far.
+        :param transfers_total: number of files of the job.
+        :param elapsed_time: seconds since the job started.
+        :param failed_path_list: source paths of the files that failed.
+        """
+        self.job_id = job_id
+        self.job_status = job_status
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.transfers_done = transfers_done
+        self.transfers_failed = transfers_failed
+        self.transfers_total = transfers_total
+        self.elapsed_time = elapsed_time
+        self.failed_path_list = failed_path_list or []
+
+    @property
+    def is_finished(self):
+        """Whether this is the last progress of the job."""
+        return self.job_status != AZCOPY_IN_PROGRESS_STATUS
+
+    @property
+    def throughput_mbps(self):
+        """Average rate of the job in megabits per second."""
+        if self.elapsed_time <= 0:
+            return 0.0
+
+        return self.bytes_done / BITS_PER_MEGABIT / self.elapsed_time
+
+    @property
+    def eta_seconds(self):
+        """Seconds left to finish the job at its average rate, None if not known."""
+        if self.bytes_done <= 0 or self.bytes_total <= 0:
+            return None
+
+        return max(0.0, (self.bytes_total - self.bytes_done) * self.elapsed_time /
+                   float(self.bytes_done))
+
+    def __str__(self):
+        """Represent AzCopy Progress object as string."""
+        return "({}, {}, {}/{} bytes, {}/{} files, {} failed, {:.2f}Mb/s, ETA: {})".format(
+            self.job_id, self.job_status, self.bytes_done, self.bytes_total or "?",
+            self.transfers_done, self.transfers_total, self.transfers_failed,
+            self.throughput_mbps, "n/a" if self.eta_seconds is None
+            else "{:.0f}s".format(self.eta_seconds))
+
+    def __repr__(self):
+        """Represent AzCopy Progress object."""
+        return self.__str__()
+
+
+class AzCopyOutputParser(object):
+    """
+    Parse the output of an azcopy job line by line, while the job runs.
+
+    Lines in the json output format are turned into progress events. Lines in the text format
+    are still understood, so that the summary is known whatever the format azcopy used. Only the
+    summary is kept, not the output itself.
+    """
+
+    def __init__(self):
+        """Initialize AzCopy Output Parser class."""
+        self.summary_dict = OrderedDict([("Elapsed Time (Minutes)", None),
+                                         ("Total Number Of Transfers", None),
+                                         ("Number of Transfers Completed", None),
+                                         ("Number of Transfers Failed", None),
+                                         ("Number of Transfers Skipped", None),
+                                         ("TotalBytesTransferred", None),
+                                         ("Final Job Status", None)])
+        self.error_msg = None
+        self.job_id = None
+        self.start_time = None
+
+    def parse_line(self, line, now=None):
+        """
+        Parse a line of the azcopy output.
+
+        :param line: line written by azcopy.
+        :param now: time the line was read, defaults to now.
+        :return: AzCopyProgress object if the line reports the progress of the job, else None.
+        """
+        if now is None:
+            now = time.time()
+
+        if self.start_time is None:
+            self.start_time = now
+
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = None
+
+        if not isinstance(message, dict) or "MessageType" not in message:
+            self.parse_text_line(line)
+            return None
+
+        message_type = message["MessageType"]
+        message_content = message.get("MessageContent", "")
+
+        if message_type == AZCOPY_ERROR_MESSAGE:
+            self.error_msg = message_content.strip()
+            return None
+
+        if message_type not in (AZCOPY_INIT_MESSAGE, AZCOPY_PROGRESS_MESSAGE,
+                                AZCOPY_END_OF_JOB_MESSAGE):
+            return None
+
+        try:
+            content_dict = json.loads(message_content)
+        except ValueError:
+            return None
+
+        self.job_id = content_dict.get("JobID", self.job_id)
+
+        if message_type == AZCOPY_INIT_MESSAGE:
+            return None
+
+        return self.parse_job_summary(content_dict, message_type == AZCOPY_END_OF_JOB_MESSAGE,
+                                      now - self.start_time)
+
+    def parse_job_summary(self, content_dict, is_end_of_job, elapsed_time):
+        """
+        Update the summary with the job summary of a progress message.
+
+        :param content_dict: job summary reported by azcopy.
+        :param is_end_of_job: whether this is the last message of the job.
+        :param elapsed_time: seconds since the job started.
+        :return: AzCopyProgress object.
+        """
+        for json_key, summary_key in AZCOPY_SUMMARY_KEYS.items():
+            if json_key in content_dict:
+                self.summary_dict[summary_key] = str(content_dict[json_key])
+
+        job_status = AZCOPY_IN_PROGRESS_STATUS
+        if is_end_of_job:
+            job_status = content_dict.get("JobStatus") or AZCOPY_IN_PROGRESS_STATUS
+            self.summary_dict["Final Job Status"] = job_status
+            self.summary_dict["Elapsed Time (Minutes)"] = "{:.4f}".format(elapsed_time / 60.0)
+
+        failed_path_list = [failed_transfer.get("Src") for failed_transfer
+                            in content_dict.get("FailedTransfers") or []]
+
+        return AzCopyProgress(self.job_id, job_status,
+                              int(content_dict.get("TotalBytesTransferred") or 0),
+                              int(content_dict.get("TotalBytesExpected") or
+                                  content_dict.get("TotalBytesEnumerated") or 0),
+                              int(content_dict.get("TransfersCompleted") or 0),
+                              int(content_dict.get("TransfersFailed") or 0),
+                              int(content_dict.get("TotalTransfers") or 0),
+                              elapsed_time, failed_path_list)
+
+    def parse_text_line(self, line):
+        """
+        Update the summary with a line of the text output.
+
+        Summary lines after the first error are ignored.
+
+        :param line: line written by azcopy.
+        """
+        job_match = AZCOPY_JOB_STARTED_PATTERN.search(line)
+        if job_match:
+            self.job_id = job_match.group('job_id')
+
+        if self.error_msg is not None:
+            return
+
+        if "failed to" in line:
+            self.error_msg = line.strip()
+            return
+
+        for item in self.summary_dict:
+            if item in line and ":" in line:
+                self.summary_dict[item] = line.split(":")[1].strip()
+
+    def get_output(self):
+        """
+        Get the output of the job parsed so far.
+
+        :return: AzCopyOutput object.
+        """
+        return AzCopyOutput(dict(self.summary_dict), self.error_msg)
+
+
 class AzCopyManager:
     """
     Class used to encapsulate AzCopy commands to transfer processed files over to Azure Storage
     """
-    def __init__(self, source_path, destination_path, retry=NUMBER_TRIES):
+    def __init__(self, source_path, destination_path, retry=NUMBER_TRIES, cap_mbps=None):
         """
         Initialize Rsync Manager class.
 
         :param source_path: path of the source file to be transferred.
         :param destination_path: destination location to send the file.
         :param retry: number of tries in case of failure.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
         """
         self.source_path = str(source_path)
         self.destination_path = str(destination_path)
         self.retry = retry
+        self.cap_mbps = cap_mbps
 
     @staticmethod
     def check_if_url(path):
@@ -68,44 +367,156 @@ class AzCopyManager:
             return False
 
     def parse_azcopy_output(self, output):
-        az_op_dict = {"Elapsed Time (Minutes)" : None,
-                      "Total Number Of Transfers" : None,
-                      "Number of Transfers Completed" : None,
-                      "Number of Transfers Failed" : None,
-                      "Number of Transfers Skipped" : None,
-                      "TotalBytesTransferred" : None,
-                      "Final Job Status" : None}
-        lines = str(output).split('\n')
-
-        for line in lines:
-            if "failed to" in line:
-                return AzCopyOutput(az_op_dict, error_msg=line.strip())
-            for item in az_op_dict:
-                if item in line and ":" in line:
-                    az_op_dict[item] = line.split(":")[1].strip()
-
-        return AzCopyOutput(az_op_dict)
-
-    def transfer(self):
+        """
+        Parse the whole output of an azcopy job.
+
+        :param output: output written by azcopy.
+        :return: AzCopyOutput object.
+        """
+        azcopy_output_parser = AzCopyOutputParser()
+
+        for line in str(output).split('\n'):
+            azcopy_output_parser.parse_line(line)
+
+        return azcopy_output_parser.get_output()
+
+    def get_cap_mbps_args(self):
+        """
+        Get the azcopy arguments to limit the rate of the transfer.
+
+        :return: list of arguments, empty if the rate is not limited.
+        """
+        if self.cap_mbps is None:
+            return []
+
+        return [azcopy_cap_mbps_args, str(self.cap_mbps)]
+
+    def get_copy_command(self):
+        """
+        Get the azcopy command to copy the source to the destination.
+
+        :return: command as a list of arguments.
+        """
+        return [AZCOPY_CMD, azcopy_func_args, self.source_path, self.destination_path,
+                azcopy_output_type_args, azcopy_output_type] + self.get_cap_mbps_args()
+
+    def get_resume_command(self, job_id):
+        """
+        Get the azcopy command to resume a job, which sends only the blocks not committed yet.
+
+        :param job_id: id of the azcopy job.
+        :return: command as a list of arguments.
+        """
+        sas_args = azcopy_destination_sas_args if self.destination_path.endswith(sastoken) \
+            else azcopy_source_sas_args
+
+        return [AZCOPY_CMD, azcopy_jobs_args, azcopy_resume_args, job_id, sas_args,
+                sastoken.lstrip('?'), azcopy_output_type_args,
+                azcopy_output_type] + self.get_cap_mbps_args()
+
+    def run_command(self, command, on_job_started=None, on_progress=None):
+        """
+        Run an azcopy command, parsing its output while it runs.
+
+        :param command: command as a list of arguments.
+        :param on_job_started: function called with the job id as soon as azcopy reports it.
+        :param on_progress: function called with an AzCopyProgress object for each progress
+        reported by azcopy.
+        :return: AzCopyOutput object.
+        :raise AzCopyException: if azcopy reported an error and the job did not complete.
+        """
         try:
-            command = [AZCOPY_CMD, azcopy_func_args, self.source_path, self.destination_path, azcopy_output_type_args,
-                       azcopy_output_type]
-            process = Popen(command, shell=False, stdout=PIPE, stderr=PIPE)
-            output, std_error = process.communicate()
-            azcopy_output = self.parse_azcopy_output(output)
+            process = Popen(command, shell=False, stdout=PIPE, stderr=STDOUT)
 
-            if azcopy_output.summary_dict["Final Job Status"] != "Completed":
+            azcopy_output_parser = AzCopyOutputParser()
+            for line in iter(process.stdout.readline, ''):
+                azcopy_progress = azcopy_output_parser.parse_line(line)
+
+                if azcopy_output_parser.job_id is not None and on_job_started is not None:
+                    on_job_started(azcopy_output_parser.job_id)
+                    on_job_started = None
+
+                if azcopy_progress is not None and on_progress is not None:
+                    on_progress(azcopy_progress)
+
+            process.wait()
+            azcopy_output = azcopy_output_parser.get_output()
+
+            if azcopy_output.summary_dict["Final Job Status"] != AZCOPY_COMPLETED_STATUS:
                 if azcopy_output.error_msg:
-                    raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, azcopy_output.error_msg)
+                    raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed,
+                                          azcopy_output.error_msg)
 
             return azcopy_output
-        except (TypeError, ValueError) as error:
+        except (OSError, TypeError, ValueError) as error:
             raise AzCopyException(parameters=error.__str__())
 
+    def transfer(self, journal_path=None, on_progress=None):
+        """
+        Run the transfer, resuming the job recorded in the journal, if any.
+
+        The id of a new job is recorded in the journal as soon as azcopy reports it, and the
+        journal is removed when the job completes. If the recorded job cannot be resumed, the
+        transfer starts from the beginning. If the job did not complete, the journal is kept for
+        the next try.
+
+        :param journal_path: path of the job journal, None if the transfer is not resumable.
+        :param on_progress: function called with each AzCopyProgress of the transfer.
+        :return: AzCopyOutput object.
+        :raise AzCopyException: if the transfer failed.
+        """
+        if journal_path is None:
+            return self.run_command(self.get_copy_command(), on_progress=on_progress)
+
+        job_id = read_job_journal(journal_path)
+        if job_id is not None:
+            try:
+                azcopy_output = self.run_command(self.get_resume_command(job_id),
+                                                 on_progress=on_progress)
+            except AzCopyException:
+                azcopy_output = None
+
+            final_job_status = azcopy_output.summary_dict["Final Job Status"] \
+                if azcopy_output is not None else None
+
+            if final_job_status == AZCOPY_COMPLETED_STATUS:
+                remove_job_journal(journal_path)
+                return azcopy_output
+
+            if final_job_status is not None:
+                raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed,
+                                      "Resumed job {} finished with status {}."
+                                      .format(job_id, final_job_status))
+
+        azcopy_output = self.run_command(self.get_copy_command(),
+                                         partial(write_job_journal, journal_path), on_progress)
+
+        final_job_status = azcopy_output.summary_dict["Final Job Status"]
+        if final_job_status != AZCOPY_COMPLETED_STATUS:
+            raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed,
+                                  "Job {} finished with status {}."
+                                  .format(read_job_journal(journal_path), final_job_status))
+
+        remove_job_journal(journal_path)
+
+        return azcopy_output
 
 
     @staticmethod
-    def transfer_file(source_path, destination_path):
+    def transfer_file(source_path, destination_path, cap_mbps=None, resumable=False,
+                      on_progress=None):
+        """
+        Transfer a file between the local file system and Azure storage.
+
+        :param source_path: path of the file to be transferred.
+        :param destination_path: folder to send the file to.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param resumable: whether an interrupted upload is resumed by the next transfer of the
+        same file, from a job journal kept next to it.
+        :param on_progress: function called with each AzCopyProgress of the transfer.
+        :return: AzCopyOutput object.
+        :raise AzCopyException: if the transfer failed.
+        """
         target_file_name = os.path.basename(source_path)
         destination_file_path = os.path.join(destination_path, target_file_name)
 
@@ -118,6 +529,309 @@ class AzCopyManager:
         else:
             raise AzCopyException(parameters="Source and destination path not Azure URL")
 
-        azcopy_output = AzCopyManager(target_source_path, target_destination_path, NUMBER_TRIES).transfer()
+        journal_path = None
+        if resumable and AzCopyManager.check_if_url(destination_path):
+            journal_path = source_path + JOB_JOURNAL_SUFFIX
+
+        azcopy_output = AzCopyManager(target_source_path, target_destination_path, NUMBER_TRIES,
+                                      cap_mbps).transfer(journal_path, on_progress)
+
+        return azcopy_output
+
+    @staticmethod
+    def get_download_stream(source_path, cap_mbps=None, on_progress=None):
+        """
+        Get a stream to read a blob in order, without writing it to the local file system.
+
+        :param source_path: blob url of the file to be read.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param on_progress: not used, azcopy does not report progress while piping.
+        :return: AzCopyStreamDownload object, to be started by its caller.
+        """
+        return AzCopyStreamDownload(source_path, cap_mbps)
+
+    @staticmethod
+    def transfer_file_list(transfer_pair_list, cap_mbps=None):
+        """
+        Transfer several files, running a single azcopy job for each source and destination folder.
+
+        :param transfer_pair_list: list of tuples (source file path, destination folder).
+        :param cap_mbps: maximum rate of the transfers in megabits per second, None if not limited.
+        :return: dictionary with the error message of each source file path, None if transferred.
+        """
+        group_dict = OrderedDict()
+        for source_path, destination_path in transfer_pair_list:
+            group_dict.setdefault((os.path.dirname(source_path), destination_path), []).append(
+                os.path.basename(source_path))
+
+        result_dict = {}
+        for (source_dir, destination_path), file_name_list in group_dict.items():
+            result_dict.update(AzCopyManager.transfer_file_group(source_dir, destination_path,
+                                                                 file_name_list, cap_mbps))
+
+        return result_dict
+
+    @staticmethod
+    def transfer_file_group(source_dir, destination_path, file_name_list, cap_mbps=None):
+        """
+        Transfer files of the same folder in a single azcopy job, filtered by their names.
+
+        If the job does not complete, each file is transferred again on its own, so that the
+        result of every file is known.
+
+        :param source_dir: folder of the files to be transferred.
+        :param destination_path: destination folder of the files.
+        :param file_name_list: names of the files to be transferred.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :return: dictionary with the error message of each source file path, None if transferred.
+        """
+        source_path_list = [os.path.join(source_dir, file_name) for file_name in file_name_list]
+        source_files_path = os.path.join(source_dir, azcopy_all_files)
+
+        if AzCopyManager.check_if_url(destination_path):
+            azcopy_manager = AzCopyManager(source_files_path, destination_path + sastoken,
+                                           NUMBER_TRIES, cap_mbps)
+        elif AzCopyManager.check_if_url(source_dir):
+            azcopy_manager = AzCopyManager(source_files_path + sastoken, destination_path,
+                                           NUMBER_TRIES, cap_mbps)
+        else:
+            error_message = "Source and destination path not Azure URL"
+            return {source_path: error_message for source_path in source_path_list}
+
+        if len(file_name_list) > 1:
+            command = azcopy_manager.get_copy_command() + [
+                azcopy_include_path_args, azcopy_include_path_separator.join(file_name_list)]
+
+            try:
+                azcopy_output = azcopy_manager.run_command(command)
+
+                if azcopy_output.summary_dict["Final Job Status"] == AZCOPY_COMPLETED_STATUS:
+                    return {source_path: None for source_path in source_path_list}
+            except AzCopyException:
+                pass
+
+        result_dict = {}
+        for source_path in source_path_list:
+            try:
+                azcopy_output = AzCopyManager.transfer_file(source_path, destination_path,
+                                                            cap_mbps)
+
+                final_job_status = azcopy_output.summary_dict["Final Job Status"]
+                result_dict[source_path] = None if final_job_status == AZCOPY_COMPLETED_STATUS \
+                    else "Final job status: {}.".format(final_job_status)
+            except AzCopyException as transfer_exp:
+                result_dict[source_path] = transfer_exp.__str__()
+
+        return result_dict
+
+    def get_remove_command(self, include_path_list=None):
+        """
+        Get the azcopy command to remove every blob under the source url.
+
+        :param include_path_list: folders of the source url to be removed, all if None.
+        :return: command as a list of arguments.
+        """
+        command = [AZCOPY_CMD, azcopy_remove_args, self.source_path, azcopy_recursive_args,
+                   azcopy_output_type_args, azcopy_output_type]
+
+        if include_path_list:
+            command += [azcopy_include_path_args,
+                        azcopy_include_path_separator.join(include_path_list)]
+
+        return command
+
+    @staticmethod
+    def remove_dir_list(container_url, dir_name_list):
+        """
+        Remove every blob under several folders of a container, in a single azcopy job.
+
+        If the job does not complete, each folder is removed again on its own, so that the result
+        of every folder is known.
+
+        :param container_url: container url.
+        :param dir_name_list: list of folder names in the container.
+        :return: dictionary with the error message of each folder name, None if removed.
+        """
+        if len(dir_name_list) > 1:
+            azcopy_manager = AzCopyManager(container_url + sastoken, "")
+            try:
+                azcopy_output = azcopy_manager.run_command(azcopy_manager.get_remove_command(
+                    [dir_name.strip('/') for dir_name in dir_name_list]))
+
+                if azcopy_output.summary_dict["Final Job Status"] == AZCOPY_COMPLETED_STATUS:
+                    return {dir_name: None for dir_name in dir_name_list}
+            except AzCopyException:
+                pass
+
+        result_dict = {}
+        for dir_name in dir_name_list:
+            azcopy_manager = AzCopyManager(os.path.join(container_url, dir_name.strip('/'))
+                                           + sastoken, "")
+            try:
+                azcopy_output = azcopy_manager.run_command(azcopy_manager.get_remove_command())
+
+                final_job_status = azcopy_output.summary_dict["Final Job Status"]
+                result_dict[dir_name] = None if final_job_status == AZCOPY_COMPLETED_STATUS \
+                    else "Final job status: {}.".format(final_job_status)
+            except AzCopyException as remove_exp:
+                result_dict[dir_name] = remove_exp.__str__()
+
+        return result_dict
+
+
+class AzCopyStreamTransfer(AzCopyManager):
+    """
+    Class used to upload a stream of data as a single blob, by writing it into azcopy stdin.
+
+    Usage: start() returns the writable pipe, finish() waits for the upload to complete and
+    abort() cancels it without committing the blob.
+    """
+    def __init__(self, file_name, destination_path):
+        """
+        Initialize AzCopy Stream Transfer class.
+
+        :param file_name: name of the blob to be created in the destination.
+        :param destination_path: Azure storage location to send the stream.
+        :raise AzCopyException: if the destination path is not an Azure URL.
+        """
+        if not AzCopyManager.check_if_url(destination_path):
+            raise AzCopyException(parameters="Destination path not Azure URL")
+
+        destination_file_path = os.path.join(destination_path, file_name) + sastoken
+
+        AzCopyManager.__init__(self, "", destination_file_path, 1)
+
+        self.process = None
+        self.output_file = None
+
+    def start(self):
+        """
+        Start the azcopy process in pipe mode.
+
+        Output is kept in a temporary file, so a chatty azcopy cannot block the writer.
+
+        :return: file object to write the data to be uploaded.
+        :raise AzCopyException: if the process cannot be started.
+        """
+        command = [AZCOPY_CMD, azcopy_func_args, self.destination_path, azcopy_from_to_args,
+                   azcopy_pipe_upload, azcopy_output_type_args, azcopy_output_type]
+        try:
+            self.output_file = tempfile.TemporaryFile()
+            self.process = Popen(command, shell=False, stdin=PIPE, stdout=self.output_file,
+                                 stderr=STDOUT)
+        except (OSError, TypeError, ValueError) as error:
+            raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, error.__str__())
+
+        return self.process.stdin
+
+    def finish(self):
+        """
+        Close the stream and wait for azcopy to commit the blob.
+
+        :return: AzCopyOutput object.
+        :raise AzCopyException: if azcopy failed to upload the stream.
+        """
+        try:
+            self.process.stdin.close()
+            ret_code = self.process.wait()
+
+            self.output_file.seek(0)
+            azcopy_output = self.parse_azcopy_output(self.output_file.read())
+        except (IOError, OSError, ValueError) as error:
+            raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, error.__str__())
+        finally:
+            self.output_file.close()
+
+        if ret_code != 0:
+            raise AzCopyException(ExceptionCodes.AzCopyCommandFailed,
+                                  azcopy_output.error_msg or ret_code)
 
         return azcopy_output
+
+    def abort(self):
+        """Kill the azcopy process before the end of the stream, so no blob is committed."""
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+        if self.output_file is not None:
+            self.output_file.close()
+
+
+class AzCopyStreamDownload(AzCopyManager):
+    """
+    Class used to read a blob as a stream of data, by reading it from azcopy stdout.
+
+    Usage: start() returns the readable pipe, finish() reads it to its end and waits for the
+    download to complete and abort() cancels it.
+    """
+    def __init__(self, source_path, cap_mbps=None):
+        """
+        Initialize AzCopy Stream Download class.
+
+        :param source_path: blob url of the file to be read.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :raise AzCopyException: if the source path is not an Azure URL.
+        """
+        if not AzCopyManager.check_if_url(source_path):
+            raise AzCopyException(parameters="Source path not Azure URL")
+
+        AzCopyManager.__init__(self, source_path + sastoken, "", 1, cap_mbps)
+
+        self.process = None
+        self.output_file = None
+
+    def start(self):
+        """
+        Start the azcopy process in pipe mode.
+
+        Messages are kept in a temporary file, so only the data of the blob is read from stdout.
+
+        :return: file object to read the data of the blob.
+        :raise AzCopyException: if the process cannot be started.
+        """
+        command = [AZCOPY_CMD, azcopy_func_args, self.source_path, azcopy_from_to_args,
+                   azcopy_pipe_download, azcopy_output_type_args,
+                   azcopy_output_type] + self.get_cap_mbps_args()
+        try:
+            self.output_file = tempfile.TemporaryFile()
+            self.process = Popen(command, shell=False, stdout=PIPE, stderr=self.output_file)
+        except (OSError, TypeError, ValueError) as error:
+            raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, error.__str__())
+
+        return self.process.stdout
+
+    def finish(self):
+        """
+        Read the stream to its end and wait for azcopy to complete the download.
+
+        :return: AzCopyOutput object.
+        :raise AzCopyException: if azcopy failed to download the blob.
+        """
+        try:
+            while self.process.stdout.read(io.DEFAULT_BUFFER_SIZE):
+                pass
+            self.process.stdout.close()
+            ret_code = self.process.wait()
+
+            self.output_file.seek(0)
+            azcopy_output = self.parse_azcopy_output(self.output_file.read())
+        except (IOError, OSError, ValueError) as error:
+            raise AzCopyException(ExceptionCodes.AzCopyExecutionFailed, error.__str__())
+        finally:
+            self.output_file.close()
+
+        if ret_code != 0:
+            raise AzCopyException(ExceptionCodes.AzCopyCommandFailed,
+                                  azcopy_output.error_msg or ret_code)
+
+        return azcopy_output
+
+    def abort(self):
+        """Kill the azcopy process before the end of the stream."""
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+        if self.output_file is not None:
+            self.output_file.close()
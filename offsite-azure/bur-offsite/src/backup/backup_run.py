@@ -0,0 +1,138 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=broad-except
+
+"""Module to track a backup whose volumes are uploaded by pools shared with other backups."""
+
+import threading
+import time
+
+from backup.volume_result import VolumeResult
+
+
+class BackupRun(object):
+    """
+    Track the volumes of a single backup while they are processed and transferred.
+
+    Volumes of several backups may be in the shared pools at the same time, so each backup keeps
+    its own results and knows when all its volumes are done.
+    """
+
+    def __init__(self, backup_folder_name, local_backup_path, temp_backup_path,
+                 remote_backup_path, remote_az_backup_path):
+        """
+        Initialize Backup Run object.
+
+        :param backup_folder_name: backup directory name.
+        :param local_backup_path: path of the backup in the system.
+        :param temp_backup_path: backup temporary directory path.
+        :param remote_backup_path: remote backup path.
+        :param remote_az_backup_path: remote azure storage location of the backup.
+        """
+        self.backup_folder_name = backup_folder_name
+        self.local_backup_path = local_backup_path
+        self.temp_backup_path = temp_backup_path
+        self.remote_backup_path = remote_backup_path
+        self.remote_az_backup_path = remote_az_backup_path
+
+        self.file_path_list = []
+        self.volume_path_list = []
+        self.backup_output_dict = {}
+        self.transfer_result_list = []
+        self.pending_volume_count = 0
+        self.all_volumes_submitted = False
+        self.start_time = time.time()
+        self.condition = threading.Condition()
+
+    def add_pending_volume(self):
+        """Register a volume handed to the file scheduler."""
+        with self.condition:
+            self.pending_volume_count += 1
+
+    def finish_pending_volume(self):
+        """Register that a volume left the file scheduler, waking up whoever waits for it."""
+        with self.condition:
+            self.pending_volume_count -= 1
+            self.condition.notify_all()
+
+    def set_all_volumes_submitted(self):
+        """Register that no other volume will be handed to the file scheduler."""
+        with self.condition:
+            self.all_volumes_submitted = True
+            self.condition.notify_all()
+
+    def add_transfer(self, volume_name, volume_output, async_result):
+        """
+        Keep the asynchronous result of a volume sent to the transfer pool.
+
+        :param volume_name: name of the volume.
+        :param volume_output: VolumeResult of the processed volume.
+        :param async_result: result returned by the transfer pool.
+        """
+        with self.condition:
+            self.transfer_result_list.append((volume_name, volume_output, async_result))
+
+    def set_volume_output(self, volume_name, volume_output):
+        """
+        Store the final VolumeResult of a volume.
+
+        :param volume_name: name of the volume.
+        :param volume_output: VolumeResult of the volume.
+        """
+        with self.condition:
+            self.backup_output_dict[volume_name] = volume_output
+
+    def wait_volumes(self):
+        """
+        Wait until every volume of the backup has its final result.
+
+        Volumes whose transfer job failed without calling back are reported with an error.
+
+        :return: dictionary with the VolumeResult of each volume.
+        """
+        with self.condition:
+            while not self.all_volumes_submitted or self.pending_volume_count > 0:
+                self.condition.wait()
+
+            transfer_result_list = list(self.transfer_result_list)
+
+        for volume_name, volume_output, async_result in transfer_result_list:
+            async_result.wait()
+
+            if volume_name in self.backup_output_dict:
+                continue
+
+            try:
+                _, volume_output = async_result.get()
+            except Exception as transfer_exp:
+                volume_output = VolumeResult(volume_output.volume_path).set_error(
+                    "Error while transferring volume. {}".format(transfer_exp.__str__()))
+
+            self.set_volume_output(volume_name, volume_output)
+
+        return self.backup_output_dict
+
+    def get_processing_time(self):
+        """
+        Get the time since the backup started to be processed.
+
+        :return: elapsed time in seconds.
+        """
+        return time.time() - self.start_time
+
+    def __str__(self):
+        """Represent Backup Run object as string."""
+        return "({}, {} pending volume(s), {} result(s))".format(
+            self.backup_folder_name, self.pending_volume_count, len(self.backup_output_dict))
+
+    def __repr__(self):
+        """Represent Backup Run object."""
+        return self.__str__()
@@ -22,7 +22,9 @@ from ConfigParser import ConfigParser, MissingSectionHeaderError, NoOptionError,
     ParsingError
 import os
 
-from backup.constants import DEFAULT_OFFSITE_NAME, DEFAULT_OFFSITE_RETENTION
+from backup.bandwidth import parse_bandwidth_profile
+from backup.constants import AZCOPY_TRANSFER_BACKEND, DEFAULT_CUSTOMER_WEIGHT, \
+    DEFAULT_OFFSITE_NAME, DEFAULT_OFFSITE_RETENTION, TRANSFER_BACKENDS
 from backup.exceptions import BackupSettingsException, ExceptionCodes
 from backup.gnupg_manager import GnupgManager
 from backup.logger import CustomLogger
@@ -61,7 +63,8 @@ class SupportInfo:
 class OffsiteConfig:
     """Class used to store sourced information about the off-site backup location."""
 
-    def __init__(self, ip, user, path, folder, retention, storage_account, container_name, name=DEFAULT_OFFSITE_NAME):
+    def __init__(self, ip, user, path, folder, retention, storage_account, container_name, name=DEFAULT_OFFSITE_NAME,
+                 bandwidth_profile=None, transfer_backend=AZCOPY_TRANSFER_BACKEND):
         """
         Initialize Offsite Config object.
 
@@ -70,6 +73,8 @@ class OffsiteConfig:
         :param path: path in which the backup folder will be placed.
         :param folder: backup folder's name.
         :param name: name of offsite location.
+        :param bandwidth_profile: BandwidthProfile limiting the transfers, None if not limited.
+        :param transfer_backend: backend used to transfer files to and from the storage.
         """
         self.name = name
         self.ip = ip
@@ -82,6 +87,8 @@ class OffsiteConfig:
         self.container_name = container_name
         self.full_container_path = os.path.join(storage_account, container_name)
         self.retention = retention
+        self.bandwidth_profile = bandwidth_profile
+        self.transfer_backend = transfer_backend
 
     def __str__(self):
         """Represent Offsite Config object as string."""
@@ -95,17 +102,20 @@ class OffsiteConfig:
 class OnsiteConfig:
     """Class used to store sourced information about the onsite backup location."""
 
-    def __init__(self, temp_path):
+    def __init__(self, temp_path, temp_budget_mb=None):
         """
         Initialize Onsite Config object.
 
         :param temp_path: temporary folder to store files during the backup process.
+        :param temp_budget_mb: maximum space in MB held in the temporary folder by volumes waiting
+        to be transferred, None if not limited.
         """
         self.temp_path = temp_path
+        self.temp_budget_mb = temp_budget_mb
 
     def __str__(self):
         """Represent Onsite Config object as string."""
-        return "({})".format(self.temp_path)
+        return "({}, {})".format(self.temp_path, self.temp_budget_mb)
 
     def __repr__(self):
         """Represent Onsite Config object."""
@@ -115,19 +125,22 @@ class OnsiteConfig:
 class EnmConfig:
     """Class used to store sourced information about the backup location of a customer."""
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, weight=DEFAULT_CUSTOMER_WEIGHT):
         """
         Initialize ENM Config object.
 
         :param name: deployment name from the configuration section.
         :param path: backup path.
+        :param weight: share of the upload resources given to the customer when uploaded along
+        with other customers.
         """
         self.name = name
         self.backup_path = path
+        self.weight = weight
 
     def __str__(self):
         """Represent EnmConfig object as string."""
-        return "({}, {})".format(self.name, self.backup_path)
+        return "({}, {}, {})".format(self.name, self.backup_path, self.weight)
 
     def __repr__(self):
         """Represent EnmConfig object."""
@@ -273,13 +286,27 @@ class ScriptSettings:
                                     .format(DEFAULT_OFFSITE_RETENTION))
                 retention = DEFAULT_OFFSITE_RETENTION
 
+            bandwidth_profile = None
+            if self.config.has_option('OFFSITE_CONN', 'BANDWIDTH_PROFILE'):
+                bandwidth_profile = parse_bandwidth_profile(
+                    self.config.get('OFFSITE_CONN', 'BANDWIDTH_PROFILE'))
+
+            transfer_backend = AZCOPY_TRANSFER_BACKEND
+            if self.config.has_option('OFFSITE_CONN', 'TRANSFER_BACKEND'):
+                transfer_backend = self.config.get('OFFSITE_CONN', 'TRANSFER_BACKEND').strip()
+                if transfer_backend not in TRANSFER_BACKENDS:
+                    raise ValueError("TRANSFER_BACKEND must be one of {}.".format(
+                        ", ".join(TRANSFER_BACKENDS)))
+
             offsite_config = OffsiteConfig(self.config.get('OFFSITE_CONN', 'IP'),
                                            self.config.get('OFFSITE_CONN', 'USER'),
                                            self.config.get('OFFSITE_CONN', 'BKP_PATH'),
                                            self.config.get('OFFSITE_CONN', 'BKP_DIR'),
                                            retention,
                                            self.config.get('OFFSITE_CONN', 'STORAGE_ACCOUNT'),
-                                           self.config.get('OFFSITE_CONN', 'CONTAINER_NAME'))
+                                           self.config.get('OFFSITE_CONN', 'CONTAINER_NAME'),
+                                           bandwidth_profile=bandwidth_profile,
+                                           transfer_backend=transfer_backend)
         except NoSectionError as error:
             raise BackupSettingsException(ExceptionCodes.MissingOffSiteSection, error)
 
@@ -298,7 +325,14 @@ class ScriptSettings:
         :raise BackupSettingsException: if the configuration file cannot be parsed.
         """
         try:
-            onsite_config = OnsiteConfig(self.config.get('ONSITE_PARAMS', 'BKP_TEMP_FOLDER'))
+            temp_budget_mb = None
+            if self.config.has_option('ONSITE_PARAMS', 'BKP_TEMP_BUDGET_MB'):
+                temp_budget_mb = int(self.config.get('ONSITE_PARAMS', 'BKP_TEMP_BUDGET_MB'))
+                if temp_budget_mb < 1:
+                    raise ValueError("BKP_TEMP_BUDGET_MB must be greater than 0.")
+
+            onsite_config = OnsiteConfig(self.config.get('ONSITE_PARAMS', 'BKP_TEMP_FOLDER'),
+                                         temp_budget_mb)
         except NoSectionError as error:
             raise BackupSettingsException(ExceptionCodes.MissingOnSiteSection, error)
 
@@ -333,12 +367,14 @@ class ScriptSettings:
                 self.logger.info("Configuration loaded only for: {}.".format(customer_name))
                 path = self.config.get(customer_name, "CUSTOMER_PATH")
 
-                return {customer_name: EnmConfig(customer_name, path)}
+                return {customer_name: EnmConfig(customer_name, path,
+                                                 self._get_customer_weight(customer_name))}
 
             for section in sections:
                 path = self.config.get(section, "CUSTOMER_PATH")
 
-                customer_config_dict[section] = EnmConfig(section, path)
+                customer_config_dict[section] = EnmConfig(section, path,
+                                                          self._get_customer_weight(section))
 
         except NoSectionError as error:
             raise BackupSettingsException(ExceptionCodes.MissingCustomerSection, error)
@@ -348,6 +384,29 @@ class ScriptSettings:
 
         return customer_config_dict
 
+    def _get_customer_weight(self, customer_name):
+        """
+        Read the optional weight of a customer section from the config file.
+
+        :param customer_name: customer section name.
+        :return: weight of the customer, DEFAULT_CUSTOMER_WEIGHT if not informed.
+        :raise BackupSettingsException: if the weight is not a positive integer.
+        """
+        if not self.config.has_option(customer_name, "WEIGHT"):
+            return DEFAULT_CUSTOMER_WEIGHT
+
+        weight = self.config.get(customer_name, "WEIGHT")
+
+        try:
+            if int(weight) >= 1:
+                return int(weight)
+        except ValueError:
+            pass
+
+        raise BackupSettingsException(ExceptionCodes.ConfigurationFileOptionError,
+                                      "Invalid WEIGHT '{}' for customer {}.".format(
+                                          weight, customer_name))
+
     def get_delay_config(self):
         """
         Read delay details from config file.
@@ -0,0 +1,198 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module to limit the bandwidth used by the off-site transfers according to the time of day."""
+
+import threading
+import time
+
+HOURS_PER_DAY = 24
+BYTES_PER_MEGABIT = 1000 * 1000 / 8
+BURST_SECONDS = 1.0
+
+
+def parse_bandwidth_profile(profile_string):
+    """
+    Parse a bandwidth profile in the format 'HH-HH:MBPS, HH:MBPS, ...'.
+
+    Each entry sets the rate in megabits per second for an inclusive range of hours, or for a
+    single hour. Hours not informed are not limited.
+
+    :param profile_string: profile as written in the configuration file.
+    :return: BandwidthProfile object.
+    :raise ValueError: if the profile cannot be parsed.
+    """
+    hourly_rate_list = [None] * HOURS_PER_DAY
+
+    for entry in [entry.strip() for entry in profile_string.split(',') if entry.strip()]:
+        hour_range, rate_mbps = entry.split(':')
+        hour_range = hour_range.split('-')
+
+        first_hour = int(hour_range[0])
+        last_hour = int(hour_range[-1])
+        rate_mbps = int(rate_mbps)
+
+        if len(hour_range) > 2 or not 0 <= first_hour <= last_hour < HOURS_PER_DAY:
+            raise ValueError("Invalid hour range '{}' in bandwidth profile.".format(entry))
+
+        if rate_mbps < 1:
+            raise ValueError("Invalid rate '{}' in bandwidth profile.".format(entry))
+
+        for hour in range(first_hour, last_hour + 1):
+            hourly_rate_list[hour] = rate_mbps
+
+    return BandwidthProfile(hourly_rate_list)
+
+
+class BandwidthProfile(object):
+    """Rate allowed for the off-site transfers in each hour of the day."""
+
+    def __init__(self, hourly_rate_list):
+        """
+        Initialize Bandwidth Profile object.
+
+        :param hourly_rate_list: list with the rate in megabits per second of each hour of the
+        day, None for hours without limit.
+        """
+        self.hourly_rate_list = hourly_rate_list
+
+    def get_rate_mbps(self, timestamp=None):
+        """
+        Get the rate allowed at the informed time.
+
+        :param timestamp: time to get the rate for, defaults to now.
+        :return: rate in megabits per second or None if not limited.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        return self.hourly_rate_list[time.localtime(timestamp).tm_hour]
+
+    def __str__(self):
+        """Represent Bandwidth Profile object as string."""
+        return "({})".format(", ".join("{:02d}:{}".format(hour, rate_mbps) for hour, rate_mbps
+                                       in enumerate(self.hourly_rate_list)
+                                       if rate_mbps is not None))
+
+    def __repr__(self):
+        """Represent Bandwidth Profile object."""
+        return self.__str__()
+
+
+class BandwidthLimiter(object):
+    """
+    Share the rate of a bandwidth profile between all transfers of a run.
+
+    Transfers done by external tools get an equal part of the current rate for each transfer
+    that may run at the same time. Data written by BUR itself, like streamed volumes, is
+    throttled by a token bucket refilled at the current rate.
+    """
+
+    def __init__(self, bandwidth_profile, number_transfers):
+        """
+        Initialize Bandwidth Limiter object.
+
+        :param bandwidth_profile: BandwidthProfile object.
+        :param number_transfers: number of transfers that may run at the same time.
+        """
+        self.bandwidth_profile = bandwidth_profile
+        self.number_transfers = max(1, int(number_transfers))
+        self.tokens = 0.0
+        self.last_refill_time = None
+        self.lock = threading.Lock()
+
+    def get_transfer_cap_mbps(self):
+        """
+        Get the rate a single transfer started now may use.
+
+        :return: rate in megabits per second or None if not limited.
+        """
+        rate_mbps = self.bandwidth_profile.get_rate_mbps()
+        if rate_mbps is None:
+            return None
+
+        return max(1, rate_mbps / self.number_transfers)
+
+    def consume(self, num_bytes):
+        """
+        Take tokens for the informed amount of data, sleeping until they are available.
+
+        The tokens are reserved while holding the lock, leaving the bucket in debt if they are
+        not available yet, and the wait happens after releasing it, so that other transfers are
+        not blocked while this one sleeps.
+
+        :param num_bytes: number of bytes about to be transferred.
+        :return: seconds slept.
+        """
+        slept_time = 0.0
+
+        with self.lock:
+            rate_mbps = self.bandwidth_profile.get_rate_mbps()
+            if rate_mbps is None:
+                self.last_refill_time = None
+                return slept_time
+
+            rate_bytes = float(rate_mbps * BYTES_PER_MEGABIT)
+            now = time.time()
+
+            if self.last_refill_time is None:
+                self.tokens = rate_bytes * BURST_SECONDS
+            else:
+                self.tokens = min(rate_bytes * BURST_SECONDS,
+                                  self.tokens + (now - self.last_refill_time) * rate_bytes)
+
+            self.tokens -= num_bytes
+            self.last_refill_time = now
+
+            if self.tokens < 0:
+                slept_time = -self.tokens / rate_bytes
+
+        if slept_time > 0:
+            time.sleep(slept_time)
+
+        return slept_time
+
+    def __getstate__(self):
+        """Get the state of the object to be serialized, without its lock."""
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore a serialized object, creating a new lock."""
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+class ThrottledWriter(object):
+    """File object wrapper which throttles the data written by a BandwidthLimiter."""
+
+    def __init__(self, file_object, bandwidth_limiter):
+        """
+        Initialize Throttled Writer object.
+
+        :param file_object: file object to write the data to.
+        :param bandwidth_limiter: BandwidthLimiter object.
+        """
+        self.file_object = file_object
+        self.bandwidth_limiter = bandwidth_limiter
+
+    def write(self, data):
+        """
+        Write data once the limiter allows it.
+
+        :param data: data to be written.
+        """
+        self.bandwidth_limiter.consume(len(data))
+        self.file_object.write(data)
+
+    def __getattr__(self, name):
+        """Delegate any other attribute to the wrapped file object."""
+        return getattr(self.file_object, name)
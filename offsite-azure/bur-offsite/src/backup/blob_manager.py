@@ -0,0 +1,886 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=too-many-arguments,too-many-instance-attributes
+
+"""Module to transfer files to and from Azure storage over HTTP, without the azcopy binary."""
+
+import base64
+from collections import deque
+import hashlib
+from multiprocessing.pool import ThreadPool
+import os
+import threading
+import time
+import urllib
+import xml.etree.ElementTree as ElementTree
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from backup.azcopy_manager import AZCOPY_COMPLETED_STATUS, AZCOPY_IN_PROGRESS_STATUS, \
+    AzCopyManager, AzCopyOutput, AzCopyProgress, remove_job_journal, sastoken
+from backup.bandwidth import BandwidthLimiter, BandwidthProfile, HOURS_PER_DAY
+from backup.constants import NATIVE_TRANSFER_BACKEND
+from backup.exceptions import BlobTransferException, ExceptionCodes
+
+BLOB_API_VERSION = "2019-02-02"
+BLOB_TYPE = "BlockBlob"
+
+MEGABYTE = 1024 * 1024
+BLOCK_SIZE = 8 * MEGABYTE
+# Azure returns the MD5 of a range only for ranges up to 4MB.
+RANGE_SIZE = 4 * MEGABYTE
+NUMBER_BLOCK_WORKERS = 4
+# Maximum number of blobs returned by a single list request.
+LIST_PAGE_SIZE = 5000
+
+NUMBER_TRIES = 3
+RETRY_WAIT_TIME = 2
+REQUEST_TIMEOUT = 120
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
+BLOCK_JOURNAL_SUFFIX = ".blocks"
+
+SESSION_CONTEXT = {}
+
+
+def get_blob_session(pool_size=NUMBER_BLOCK_WORKERS):
+    """
+    Get the HTTP session of this process, whose connections are reused by all transfers.
+
+    Pool workers are forked with the session of their parent, so each process creates its own.
+
+    :param pool_size: number of connections kept open to the same host.
+    :return: requests.Session object.
+    """
+    if SESSION_CONTEXT.get('pid') != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        SESSION_CONTEXT['pid'] = os.getpid()
+        SESSION_CONTEXT['session'] = session
+
+    return SESSION_CONTEXT['session']
+
+
+def get_content_md5(data):
+    """
+    Get the MD5 of some data in the format used by the Content-MD5 header.
+
+    :param data: bytes to be checked.
+    :return: base64 encoded MD5.
+    """
+    return base64.b64encode(hashlib.md5(data).digest())
+
+
+def get_block_id(block_index):
+    """
+    Get the id of a block, which is the same for the same block of every try of an upload.
+
+    :param block_index: position of the block in the file.
+    :return: base64 encoded block id.
+    """
+    return base64.b64encode("{:08d}".format(block_index))
+
+
+def get_block_list_xml(block_id_list):
+    """
+    Get the body of a put block list request, committing the informed blocks in order.
+
+    :param block_id_list: ids of the blocks of the blob.
+    :return: xml document.
+    """
+    return '<?xml version="1.0" encoding="utf-8"?><BlockList>{}</BlockList>'.format(
+        "".join("<Latest>{}</Latest>".format(block_id) for block_id in block_id_list))
+
+
+def parse_block_list_xml(block_list_xml):
+    """
+    Get the blocks uploaded but not committed yet from a get block list response.
+
+    :param block_list_xml: xml document returned by the storage.
+    :return: dictionary with the size of each block id.
+    """
+    block_size_dict = {}
+
+    for block in ElementTree.fromstring(block_list_xml).iter('Block'):
+        block_size_dict[block.findtext('Name')] = int(block.findtext('Size') or 0)
+
+    return block_size_dict
+
+
+def read_block_journal(journal_path):
+    """
+    Read the MD5 of the blocks sent by an interrupted upload, recorded one block per line.
+
+    :param journal_path: path of the journal file.
+    :return: dictionary with the MD5 of each block id, empty if there is no journal.
+    """
+    block_md5_dict = {}
+
+    try:
+        with open(journal_path) as journal_file:
+            for line in journal_file:
+                item_list = line.split()
+                if len(item_list) == 2:
+                    block_md5_dict[item_list[0]] = item_list[1]
+    except (IOError, OSError):
+        return {}
+
+    return block_md5_dict
+
+
+def parse_blob_list_xml(blob_list_xml):
+    """
+    Get the blob names and the marker of the next page from a list blobs response.
+
+    :param blob_list_xml: xml document returned by the storage.
+    :return: tuple (list of blob names, marker of the next page or None if it is the last one).
+    """
+    enumeration_results = ElementTree.fromstring(blob_list_xml)
+
+    blob_name_list = [blob.findtext('Name') for blob in enumeration_results.iter('Blob')]
+
+    return blob_name_list, enumeration_results.findtext('NextMarker') or None
+
+
+def get_blob_url(container_url, blob_name):
+    """
+    Get the url of a blob, keeping the sas token of the container url.
+
+    :param container_url: container url, with or without a sas token.
+    :param blob_name: name of the blob in the container.
+    :return: blob url.
+    """
+    base_url, separator, query = container_url.partition('?')
+
+    return "{}/{}{}{}".format(base_url.rstrip('/'), urllib.quote(blob_name), separator, query)
+
+
+class BlobManager(object):
+    """
+    Class used to transfer files to and from Azure storage through its HTTP interface.
+
+    It keeps the same transfer_file contract as AzCopyManager. Large files are uploaded as blocks
+    sent in parallel and committed by a block list, and downloaded by parallel ranged reads. Each
+    block and range is checked by its MD5 and retried on its own.
+    """
+
+    def __init__(self, source_path, destination_path, cap_mbps=None, block_size=None,
+                 range_size=None, number_workers=NUMBER_BLOCK_WORKERS, on_progress=None):
+        """
+        Initialize Blob Manager class.
+
+        :param source_path: path or blob url of the file to be transferred.
+        :param destination_path: path or blob url of the destination file.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param block_size: size of the blocks uploaded in parallel, defaults to BLOCK_SIZE.
+        :param range_size: size of the ranges downloaded in parallel, defaults to RANGE_SIZE.
+        :param number_workers: number of blocks or ranges transferred at the same time.
+        :param on_progress: function called with an AzCopyProgress object after each block.
+        """
+        self.source_path = source_path
+        self.destination_path = destination_path
+        self.block_size = block_size or BLOCK_SIZE
+        self.range_size = range_size or RANGE_SIZE
+        self.number_workers = max(1, int(number_workers))
+        self.on_progress = on_progress
+
+        self.bandwidth_limiter = None
+        if cap_mbps is not None:
+            self.bandwidth_limiter = BandwidthLimiter(
+                BandwidthProfile([cap_mbps] * HOURS_PER_DAY), 1)
+
+        self.session = get_blob_session(self.number_workers)
+        self.lock = threading.Lock()
+        self.journal_file = None
+        self.start_time = None
+        self.bytes_done = 0
+        self.bytes_total = 0
+
+    def send_request(self, method, url, params=None, headers=None, data=None, check_md5=False):
+        """
+        Send a request to the storage, trying again on connection errors and server errors.
+
+        When check_md5 is set, a response whose body does not match its Content-MD5 header is
+        also tried again.
+
+        :param method: HTTP method.
+        :param url: blob url with its sas token.
+        :param params: extra query parameters.
+        :param headers: extra headers.
+        :param data: body of the request.
+        :param check_md5: whether the body of the response is checked by its MD5.
+        :return: requests.Response object.
+        :raise BlobTransferException: if the request did not succeed after all tries.
+        """
+        request_headers = {'x-ms-version': BLOB_API_VERSION}
+        request_headers.update(headers or {})
+
+        error_code = error_message = None
+        for current_try in range(NUMBER_TRIES):
+            if current_try:
+                time.sleep(RETRY_WAIT_TIME * current_try)
+
+            try:
+                response = self.session.request(method, url, params=params,
+                                                headers=request_headers, data=data,
+                                                timeout=REQUEST_TIMEOUT)
+            except RequestException as request_exception:
+                error_code = ExceptionCodes.BlobTransferFailed
+                error_message = request_exception.__str__()
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES:
+                error_code = ExceptionCodes.BlobTransferFailed
+                error_message = "{} {} returned {}.".format(method, url.split('?')[0],
+                                                            response.status_code)
+                continue
+
+            if response.status_code >= 300:
+                raise BlobTransferException(ExceptionCodes.BlobTransferFailed,
+                                            "{} {} returned {}: {}".format(
+                                                method, url.split('?')[0],
+                                                response.status_code, response.text))
+
+            expected_md5 = response.headers.get('Content-MD5')
+            if check_md5 and expected_md5 is not None and \
+                    get_content_md5(response.content) != expected_md5:
+                error_code = ExceptionCodes.BlobChecksumMismatch
+                error_message = "{} {} {}".format(method, url.split('?')[0],
+                                                  request_headers.get('x-ms-range', ''))
+                continue
+
+            return response
+
+        raise BlobTransferException(error_code, error_message)
+
+    def report_progress(self, num_bytes, job_status=AZCOPY_IN_PROGRESS_STATUS):
+        """
+        Count the bytes transferred and send the progress to the callback, one call at a time.
+
+        :param num_bytes: number of bytes just transferred.
+        :param job_status: status of the transfer.
+        """
+        with self.lock:
+            self.bytes_done += num_bytes
+
+            if self.on_progress is not None:
+                is_completed = job_status == AZCOPY_COMPLETED_STATUS
+                self.on_progress(AzCopyProgress(None, job_status, self.bytes_done,
+                                                self.bytes_total, int(is_completed), 0, 1,
+                                                time.time() - self.start_time))
+
+    def throttle(self, num_bytes):
+        """
+        Wait until the rate limit allows the informed amount of data to be sent.
+
+        :param num_bytes: number of bytes about to be transferred.
+        """
+        if self.bandwidth_limiter is not None:
+            self.bandwidth_limiter.consume(num_bytes)
+
+    def read_block(self, offset):
+        """
+        Read a block of the source file.
+
+        :param offset: position of the block in the file.
+        :return: bytes of the block.
+        """
+        with open(self.source_path, 'rb') as source_file:
+            source_file.seek(offset)
+            return source_file.read(self.block_size)
+
+    def upload_block(self, block_tuple):
+        """
+        Upload a block of the source file, checked by its MD5.
+
+        :param block_tuple: tuple (block id, offset of the block in the file).
+        """
+        block_id, offset = block_tuple
+
+        data = self.read_block(offset)
+        self.throttle(len(data))
+
+        block_md5 = get_content_md5(data)
+
+        self.send_request('PUT', self.destination_path,
+                          params={'comp': 'block', 'blockid': block_id},
+                          headers={'Content-MD5': block_md5}, data=data)
+
+        self.record_block(block_id, block_md5)
+        self.report_progress(len(data))
+
+    def open_block_journal(self, journal_path):
+        """
+        Open the journal where the blocks are recorded as they are uploaded, to resume the upload.
+
+        A journal that cannot be opened only makes the upload not resumable.
+
+        :param journal_path: path of the journal file.
+        """
+        try:
+            self.journal_file = open(journal_path, 'a')
+        except (IOError, OSError):
+            self.journal_file = None
+
+    def record_block(self, block_id, block_md5):
+        """
+        Record an uploaded block in the journal, if any.
+
+        :param block_id: id of the block.
+        :param block_md5: base64 encoded MD5 of the data of the block.
+        """
+        with self.lock:
+            if self.journal_file is None:
+                return
+
+            try:
+                self.journal_file.write("{} {}\n".format(block_id, block_md5))
+                self.journal_file.flush()
+            except (IOError, OSError):
+                self.close_block_journal()
+
+    def close_block_journal(self):
+        """Close the journal of the uploaded blocks, if open."""
+        if self.journal_file is not None:
+            try:
+                self.journal_file.close()
+            except (IOError, OSError):
+                pass
+
+            self.journal_file = None
+
+    def get_uncommitted_blocks(self):
+        """
+        Get the blocks left by an interrupted upload of the destination blob.
+
+        :return: dictionary with the size of each block id, empty if there is none.
+        """
+        try:
+            response = self.send_request('GET', self.destination_path,
+                                         params={'comp': 'blocklist',
+                                                 'blocklisttype': 'uncommitted'})
+        except BlobTransferException:
+            return {}
+
+        return parse_block_list_xml(response.content)
+
+    def upload(self, resumable=False):
+        """
+        Upload the source file to the destination blob.
+
+        Files up to one block are sent by a single request. Bigger ones are sent in parallel
+        blocks and then committed. A resumable upload records the MD5 of each block sent in a
+        journal next to the file. It does not send again a block left by an interrupted upload
+        only when its size and its MD5 in the journal match the data now in the file, so blocks of
+        an older file of the same name are never committed.
+
+        :param resumable: whether blocks already uploaded are reused.
+        :return: number of bytes uploaded.
+        :raise BlobTransferException: if the upload failed.
+        """
+        self.bytes_total = os.path.getsize(self.source_path)
+
+        if self.bytes_total <= self.block_size:
+            data = self.read_block(0)
+            self.throttle(len(data))
+
+            self.send_request('PUT', self.destination_path,
+                              headers={'x-ms-blob-type': BLOB_TYPE,
+                                       'Content-MD5': get_content_md5(data)}, data=data)
+            self.report_progress(len(data))
+
+            return self.bytes_total
+
+        block_tuple_list = [(get_block_id(block_index), offset) for block_index, offset
+                            in enumerate(range(0, self.bytes_total, self.block_size))]
+
+        journal_path = self.source_path + BLOCK_JOURNAL_SUFFIX
+
+        block_md5_dict = {}
+        uploaded_block_dict = {}
+        if resumable:
+            block_md5_dict = read_block_journal(journal_path)
+            if block_md5_dict:
+                uploaded_block_dict = self.get_uncommitted_blocks()
+
+        pending_block_list = []
+        for block_id, offset in block_tuple_list:
+            block_size = min(self.block_size, self.bytes_total - offset)
+
+            if uploaded_block_dict.get(block_id) == block_size and block_id in block_md5_dict \
+                    and block_md5_dict[block_id] == get_content_md5(self.read_block(offset)):
+                self.report_progress(block_size)
+            else:
+                pending_block_list.append((block_id, offset))
+
+        if resumable:
+            self.open_block_journal(journal_path)
+
+        try:
+            self.run_parallel(self.upload_block, pending_block_list)
+        finally:
+            with self.lock:
+                self.close_block_journal()
+
+        self.send_request('PUT', self.destination_path, params={'comp': 'blocklist'},
+                          data=get_block_list_xml([block_id for block_id, _
+                                                   in block_tuple_list]))
+
+        if resumable:
+            remove_job_journal(journal_path)
+
+        return self.bytes_total
+
+    def list_blob_names(self, prefix):
+        """
+        Get the names of the blobs of the source container starting with a prefix.
+
+        :param prefix: prefix of the blob names.
+        :return: list of blob names.
+        :raise BlobTransferException: if the blobs cannot be listed.
+        """
+        blob_name_list = []
+        marker = None
+
+        while True:
+            params = {'restype': 'container', 'comp': 'list', 'prefix': prefix,
+                      'maxresults': LIST_PAGE_SIZE}
+            if marker is not None:
+                params['marker'] = marker
+
+            response = self.send_request('GET', self.source_path, params=params)
+
+            try:
+                page_name_list, marker = parse_blob_list_xml(response.content)
+            except ElementTree.ParseError as parse_error:
+                raise BlobTransferException(ExceptionCodes.BlobTransferFailed,
+                                            parse_error.__str__())
+
+            blob_name_list.extend(page_name_list)
+
+            if marker is None:
+                return blob_name_list
+
+    def delete_blob(self, blob_name):
+        """
+        Delete a blob of the source container.
+
+        :param blob_name: name of the blob.
+        :raise BlobTransferException: if the blob cannot be deleted.
+        """
+        self.send_request('DELETE', get_blob_url(self.source_path, blob_name))
+
+    def get_end_offset(self):
+        """
+        Get the offset in the source blob where the download ends.
+
+        :return: offset after the last byte to be downloaded.
+        """
+        return self.bytes_total
+
+    def read_range(self, offset):
+        """
+        Read a range of the source blob.
+
+        :param offset: offset of the range in the blob.
+        :return: data of the range.
+        :raise BlobTransferException: if the range cannot be read.
+        """
+        last_byte = min(offset + self.range_size, self.get_end_offset()) - 1
+
+        self.throttle(last_byte - offset + 1)
+
+        response = self.send_request('GET', self.source_path,
+                                     headers={'x-ms-range': "bytes={}-{}".format(offset,
+                                                                                 last_byte),
+                                              'x-ms-range-get-content-md5': 'true'},
+                                     check_md5=True)
+
+        self.report_progress(len(response.content))
+
+        return response.content
+
+    def download_range(self, range_tuple):
+        """
+        Download a range of the source blob into the partial destination file.
+
+        :param range_tuple: tuple (partial file path, offset of the range in the blob).
+        """
+        partial_file_path, offset = range_tuple
+        range_data = self.read_range(offset)
+
+        with open(partial_file_path, 'r+b') as partial_file:
+            partial_file.seek(offset)
+            partial_file.write(range_data)
+
+    def download(self):
+        """
+        Download the source blob to the destination file, by ranges read in parallel.
+
+        Data is written to a partial file renamed once every range is written, so an
+        interrupted download never leaves a file that looks complete.
+
+        :return: number of bytes downloaded.
+        :raise BlobTransferException: if the download failed.
+        """
+        response = self.send_request('HEAD', self.source_path)
+        self.bytes_total = int(response.headers.get('Content-Length', 0))
+
+        partial_file_path = self.destination_path + PARTIAL_DOWNLOAD_SUFFIX
+        with open(partial_file_path, 'wb') as partial_file:
+            partial_file.truncate(self.bytes_total)
+
+        try:
+            self.run_parallel(self.download_range, [(partial_file_path, offset) for offset
+                                                    in range(0, self.bytes_total,
+                                                             self.range_size)])
+            os.rename(partial_file_path, self.destination_path)
+        except (BlobTransferException, EnvironmentError):
+            if os.path.exists(partial_file_path):
+                os.remove(partial_file_path)
+            raise
+
+        return self.bytes_total
+
+    def run_parallel(self, function, argument_list):
+        """
+        Run a function for each argument in the worker threads, stopping at the first error.
+
+        :param function: function to be run.
+        :param argument_list: list of arguments, one for each call.
+        :raise BlobTransferException: if any call failed.
+        """
+        if not argument_list:
+            return
+
+        thread_pool = ThreadPool(min(self.number_workers, len(argument_list)))
+        try:
+            for _ in thread_pool.imap_unordered(function, argument_list):
+                pass
+        except EnvironmentError as io_error:
+            raise BlobTransferException(ExceptionCodes.BlobTransferFailed, io_error.__str__())
+        finally:
+            thread_pool.terminate()
+
+    def transfer(self, resumable=False):
+        """
+        Run the transfer in the direction given by which path is a blob url.
+
+        :param resumable: whether an interrupted upload reuses the blocks already uploaded.
+        :return: AzCopyOutput object, with the same summary reported by azcopy.
+        :raise BlobTransferException: if the transfer failed.
+        """
+        self.start_time = time.time()
+
+        try:
+            if AzCopyManager.check_if_url(self.destination_path):
+                transferred_bytes = self.upload(resumable)
+            else:
+                transferred_bytes = self.download()
+        except EnvironmentError as io_error:
+            raise BlobTransferException(ExceptionCodes.BlobTransferFailed, io_error.__str__())
+
+        return self.get_transfer_output(transferred_bytes)
+
+    def get_transfer_output(self, transferred_bytes):
+        """
+        Report the end of the transfer and summarize it.
+
+        :param transferred_bytes: number of bytes transferred.
+        :return: AzCopyOutput object, with the same summary reported by azcopy.
+        """
+        self.report_progress(0, AZCOPY_COMPLETED_STATUS)
+
+        elapsed_minutes = (time.time() - self.start_time) / 60.0
+
+        return AzCopyOutput({"Elapsed Time (Minutes)": "{:.4f}".format(elapsed_minutes),
+                             "Total Number Of Transfers": "1",
+                             "Number of Transfers Completed": "1",
+                             "Number of Transfers Failed": "0",
+                             "Number of Transfers Skipped": "0",
+                             "TotalBytesTransferred": str(transferred_bytes),
+                             "Final Job Status": AZCOPY_COMPLETED_STATUS})
+
+    @staticmethod
+    def transfer_file(source_path, destination_path, cap_mbps=None, resumable=False,
+                      on_progress=None):
+        """
+        Transfer a file between the local file system and Azure storage.
+
+        :param source_path: path of the file to be transferred.
+        :param destination_path: folder to send the file to.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param resumable: whether an interrupted upload reuses the blocks already uploaded by
+        the next transfer of the same file.
+        :param on_progress: function called with each AzCopyProgress of the transfer.
+        :return: AzCopyOutput object.
+        :raise BlobTransferException: if the transfer failed.
+        """
+        destination_file_path = os.path.join(destination_path, os.path.basename(source_path))
+
+        if AzCopyManager.check_if_url(destination_path):
+            destination_file_path += sastoken
+        elif AzCopyManager.check_if_url(source_path):
+            source_path += sastoken
+        else:
+            raise BlobTransferException(ExceptionCodes.BlobTransferFailed,
+                                        "Source and destination path not Azure URL")
+
+        return BlobManager(source_path, destination_file_path, cap_mbps,
+                           on_progress=on_progress).transfer(resumable)
+
+    @staticmethod
+    def get_download_stream(source_path, cap_mbps=None, on_progress=None, offset=0, size=None):
+        """
+        Get a stream to read a blob in order, without writing it to the local file system.
+
+        Only part of the blob is read when an offset or a size is informed, e.g. a single member
+        of a volume archive found in its table of contents.
+
+        :param source_path: blob url of the file to be read.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param on_progress: function called with each AzCopyProgress of the transfer.
+        :param offset: offset in the blob of the first byte to be read.
+        :param size: number of bytes to be read, up to the end of the blob if None.
+        :return: BlobStreamDownload object, to be started by its caller.
+        """
+        return BlobStreamDownload(source_path, cap_mbps, on_progress, offset, size)
+
+    @staticmethod
+    def transfer_file_list(transfer_pair_list, cap_mbps=None):
+        """
+        Transfer several files in parallel, over the connections of this process.
+
+        :param transfer_pair_list: list of tuples (source file path, destination folder).
+        :param cap_mbps: maximum rate of each transfer in megabits per second, None if not
+        limited.
+        :return: dictionary with the error message of each source file path, None if transferred.
+        """
+        def transfer_pair(transfer_pair_tuple):
+            """Transfer a single file, returning its error message, if any."""
+            source_path, destination_path = transfer_pair_tuple
+            try:
+                BlobManager.transfer_file(source_path, destination_path, cap_mbps)
+            except BlobTransferException as transfer_exception:
+                return source_path, transfer_exception.__str__()
+
+            return source_path, None
+
+        if not transfer_pair_list:
+            return {}
+
+        thread_pool = ThreadPool(min(NUMBER_BLOCK_WORKERS, len(transfer_pair_list)))
+        try:
+            return dict(thread_pool.map(transfer_pair, transfer_pair_list))
+        finally:
+            thread_pool.terminate()
+
+    @staticmethod
+    def remove_dir_list(container_url, dir_name_list):
+        """
+        Remove every blob under several folders of a container.
+
+        The blobs of all folders are listed first and then deleted in parallel, over the
+        connections of this process.
+
+        :param container_url: container url.
+        :param dir_name_list: list of folder names in the container.
+        :return: dictionary with the error message of each folder name, None if removed.
+        """
+        blob_manager = BlobManager(container_url + sastoken, None)
+
+        result_dict = {}
+        delete_tuple_list = []
+        for dir_name in dir_name_list:
+            result_dict[dir_name] = None
+            try:
+                delete_tuple_list.extend((dir_name, blob_name) for blob_name in
+                                         blob_manager.list_blob_names(dir_name.strip('/') + '/'))
+            except BlobTransferException as list_exception:
+                result_dict[dir_name] = list_exception.__str__()
+
+        def delete_blob(delete_tuple):
+            """Delete a single blob, returning its folder and error message, if any."""
+            dir_name, blob_name = delete_tuple
+            try:
+                blob_manager.delete_blob(blob_name)
+            except BlobTransferException as delete_exception:
+                return dir_name, delete_exception.__str__()
+
+            return dir_name, None
+
+        if not delete_tuple_list:
+            return result_dict
+
+        thread_pool = ThreadPool(min(NUMBER_BLOCK_WORKERS, len(delete_tuple_list)))
+        try:
+            for dir_name, error_message in thread_pool.imap_unordered(delete_blob,
+                                                                     delete_tuple_list):
+                if error_message is not None and result_dict[dir_name] is None:
+                    result_dict[dir_name] = error_message
+        finally:
+            thread_pool.terminate()
+
+        return result_dict
+
+
+class BlobStreamDownload(BlobManager):
+    """
+    Class used to read a blob in order, while the next ranges are downloaded in parallel.
+
+    Usage: start() returns the readable stream, finish() reads it to its end and summarizes the
+    transfer and abort() stops it. At most two ranges per worker are held in memory.
+    """
+
+    def __init__(self, source_path, cap_mbps=None, on_progress=None, offset=0, size=None):
+        """
+        Initialize Blob Stream Download class.
+
+        :param source_path: blob url of the file to be read.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param on_progress: function called with an AzCopyProgress object after each range.
+        :param offset: offset in the blob of the first byte to be read.
+        :param size: number of bytes to be read, up to the end of the blob if None.
+        :raise BlobTransferException: if the source path is not an Azure URL.
+        """
+        if not AzCopyManager.check_if_url(source_path):
+            raise BlobTransferException(ExceptionCodes.BlobTransferFailed,
+                                        "Source path not Azure URL")
+
+        BlobManager.__init__(self, source_path + sastoken, None, cap_mbps,
+                             on_progress=on_progress)
+
+        self.thread_pool = None
+        self.pending_range_list = deque()
+        self.start_offset = offset
+        self.read_size = size
+        self.end_offset = 0
+        self.next_offset = offset
+        self.range_data = b''
+        self.range_position = 0
+
+    def start(self):
+        """
+        Start reading the ranges of the blob.
+
+        :return: this object, which is read as a file.
+        :raise BlobTransferException: if the blob cannot be read.
+        """
+        self.start_time = time.time()
+
+        response = self.send_request('HEAD', self.source_path)
+        self.end_offset = int(response.headers.get('Content-Length', 0))
+
+        if self.read_size is not None:
+            self.end_offset = min(self.end_offset, self.start_offset + self.read_size)
+
+        self.bytes_total = max(0, self.end_offset - self.start_offset)
+
+        self.thread_pool = ThreadPool(self.number_workers)
+        for _ in range(self.number_workers * 2):
+            self.request_next_range()
+
+        return self
+
+    def get_end_offset(self):
+        """
+        Get the offset in the source blob where the stream ends.
+
+        :return: offset after the last byte to be read.
+        """
+        return self.end_offset
+
+    def request_next_range(self):
+        """Queue the download of the next range of the blob, if any is left."""
+        if self.next_offset < self.end_offset:
+            self.pending_range_list.append(self.thread_pool.apply_async(self.read_range,
+                                                                        (self.next_offset,)))
+            self.next_offset += self.range_size
+
+    def read(self, size=-1):
+        """
+        Read data from the blob, waiting for the ranges still being downloaded.
+
+        :param size: maximum number of bytes to be read, the whole blob if negative.
+        :return: data read, empty at the end of the blob.
+        :raise BlobTransferException: if a range cannot be read.
+        """
+        data_list = []
+        remaining_size = size
+
+        while remaining_size != 0:
+            if self.range_position >= len(self.range_data):
+                if not self.pending_range_list:
+                    break
+
+                pending_range = self.pending_range_list.popleft()
+                self.request_next_range()
+
+                try:
+                    self.range_data = pending_range.get()
+                except EnvironmentError as io_error:
+                    raise BlobTransferException(ExceptionCodes.BlobTransferFailed,
+                                                io_error.__str__())
+                self.range_position = 0
+
+            end_position = len(self.range_data)
+            if remaining_size > 0:
+                end_position = min(end_position, self.range_position + remaining_size)
+                remaining_size -= end_position - self.range_position
+
+            data_list.append(self.range_data[self.range_position:end_position])
+            self.range_position = end_position
+
+        return b''.join(data_list)
+
+    def finish(self):
+        """
+        Read the blob to its end, e.g. the padding after the end of a tar archive.
+
+        :return: AzCopyOutput object, with the same summary reported by azcopy.
+        :raise BlobTransferException: if a range cannot be read.
+        """
+        while self.read(self.range_size):
+            pass
+
+        self.abort()
+
+        return self.get_transfer_output(self.bytes_total)
+
+    def abort(self):
+        """Stop downloading the ranges of the blob."""
+        if self.thread_pool is not None:
+            self.thread_pool.terminate()
+            self.thread_pool = None
+
+        self.pending_range_list.clear()
+
+
+def get_transfer_manager(transfer_backend):
+    """
+    Get the class which transfers files to and from the off-site with the informed backend.
+
+    Both classes have the same transfer_file, transfer_file_list, get_download_stream and
+    remove_dir_list methods.
+
+    :param transfer_backend: name of the backend set in the configuration file.
+    :return: BlobManager for the native backend, AzCopyManager otherwise.
+    """
+    if transfer_backend == NATIVE_TRANSFER_BACKEND:
+        return BlobManager
+
+    return AzCopyManager
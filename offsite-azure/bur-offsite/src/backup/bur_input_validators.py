@@ -23,7 +23,8 @@ import multiprocessing
 import os
 
 from backup.backup_settings import ScriptSettings
-from backup.constants import DEFAULT_NUM_PROCESSORS, LOG_SUFFIX, DEFAULT_NUM_THREADS
+from backup.constants import DEFAULT_MIN_CONCURRENCY, DEFAULT_NUM_CUSTOMERS, \
+    DEFAULT_NUM_PROCESSORS, LOG_SUFFIX, DEFAULT_NUM_THREADS
 from backup.exceptions import BackupSettingsException, ExceptionCodes, InputValidatorsException
 from backup.logger import CustomLogger
 from backup.utils.fsys import create_path
@@ -250,6 +251,12 @@ def validate_input_arguments(console_input_args, bur_operations_enum, logger):
     console_input_args.number_transfer_processors = validate_number_of_processors(
         console_input_args.number_transfer_processors, logger)
 
+    console_input_args.number_customers = validate_number_of_customers(
+        console_input_args.number_customers, logger)
+
+    console_input_args.min_concurrency = validate_min_concurrency(
+        console_input_args.min_concurrency, logger)
+
 
 def validate_script_option_argument(str_script_option, script_option_enum_size):
     """
@@ -302,6 +309,10 @@ def validate_bur_operation_arguments(console_input_args, bur_operations_enum,
             if console_input_args.backup_destination is None:
                 console_input_args.backup_destination = ""
 
+            if getattr(console_input_args, 'file_name', None) and \
+                    not getattr(console_input_args, 'volume_name', None):
+                raise InputValidatorsException(ExceptionCodes.MissingVolumeForFileRestore)
+
         elif operation == int(bur_operations_enum.BKP_UPLOAD.value):
             if not is_backup_tag_empty and is_customer_name_empty:
                 raise InputValidatorsException(ExceptionCodes.MissingCustomerNameForUpload)
@@ -426,6 +437,58 @@ def validate_number_of_threads(num_threads_to_use, logger):
     return num_threads_to_use
 
 
+def validate_number_of_customers(num_customers, logger):
+    """
+    Check the provided number of customers to be uploaded at the same time if valid.
+
+    :param num_customers: the number of customers to be checked from the input.
+    :param logger: logger object.
+    :return: the correct number of customers to be uploaded at the same time.
+    """
+    try:
+        num_customers = int(num_customers)
+
+    except (ValueError, TypeError):
+        logger.warning("Invalid number of customers: {}. Changed to: {}."
+                       .format(num_customers, DEFAULT_NUM_CUSTOMERS))
+        return DEFAULT_NUM_CUSTOMERS
+
+    if num_customers < 1:
+        logger.warning("Invalid number of customers: {}. Changed to: {}."
+                       .format(num_customers, DEFAULT_NUM_CUSTOMERS))
+        return DEFAULT_NUM_CUSTOMERS
+
+    logger.info("Valid number of customers: {}.".format(num_customers))
+
+    return num_customers
+
+
+def validate_min_concurrency(min_concurrency, logger):
+    """
+    Check the provided lowest number of jobs per stage when the concurrency is adapted if valid.
+
+    :param min_concurrency: the lowest number of jobs to be checked from the input.
+    :param logger: logger object.
+    :return: the correct lowest number of jobs.
+    """
+    try:
+        min_concurrency = int(min_concurrency)
+
+    except (ValueError, TypeError):
+        logger.warning("Invalid minimum concurrency: {}. Changed to: {}."
+                       .format(min_concurrency, DEFAULT_MIN_CONCURRENCY))
+        return DEFAULT_MIN_CONCURRENCY
+
+    if min_concurrency < 1:
+        logger.warning("Invalid minimum concurrency: {}. Changed to: {}."
+                       .format(min_concurrency, DEFAULT_MIN_CONCURRENCY))
+        return DEFAULT_MIN_CONCURRENCY
+
+    logger.info("Valid minimum concurrency: {}.".format(min_concurrency))
+
+    return min_concurrency
+
+
 def validate_number_of_processors(num_processors_to_use, logger):
     """
     Check the provided number of processors to be used if valid.
@@ -509,5 +572,9 @@ def validate_argument_list(get_arg_parser, log_root_path, arg_list=None):
     args.offsite_retention = validate_offsite_retention_argument(args.offsite_retention)
     args.log_level = validate_log_level(args.log_level)
     args.rsync_ssh = validate_boolean_input(args.rsync_ssh)
+    args.stream_upload = validate_boolean_input(args.stream_upload)
+    args.seekable_archive = validate_boolean_input(args.seekable_archive)
+    args.stream_restore = validate_boolean_input(args.stream_restore)
+    args.adaptive_concurrency = validate_boolean_input(args.adaptive_concurrency)
 
     return args
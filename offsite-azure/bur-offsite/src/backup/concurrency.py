@@ -0,0 +1,416 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=too-many-arguments,too-many-instance-attributes
+
+"""Module to adapt the number of jobs running in each upload stage to the measured throughput."""
+
+import multiprocessing
+import os
+import threading
+import time
+
+ADJUST_INTERVAL = 30
+LIMIT_WAIT_TIME = 5
+
+DECREASE_FACTOR = 0.5
+THROUGHPUT_DROP_RATIO = 0.1
+# Weight of the last interval in the smoothed throughput, and intervals it must keep dropping for.
+THROUGHPUT_SMOOTHING = 0.5
+THROUGHPUT_DROP_SAMPLES = 2
+# A busy CPU is the goal of the processing stage, only runnable jobs well over the cores congest it.
+LOAD_HIGH_RATIO = 1.5
+TEMP_SPACE_HIGH_RATIO = 0.9
+
+BYTES_PER_MB = 1000 * 1000
+PROC_STAT_PATH = '/proc/stat'
+
+
+def read_cpu_times(proc_stat_path=PROC_STAT_PATH):
+    """
+    Read the accumulated idle and total CPU times of the system.
+
+    :param proc_stat_path: path of the kernel statistics file.
+    :return: tuple (idle time, total time) or None if the times are not available.
+    """
+    try:
+        with open(proc_stat_path) as proc_stat_file:
+            cpu_time_list = [int(cpu_time) for cpu_time in proc_stat_file.readline().split()[1:]]
+    except (EnvironmentError, ValueError):
+        return None
+
+    if len(cpu_time_list) < 4:
+        return None
+
+    # idle and iowait columns.
+    idle_time = sum(cpu_time_list[3:5])
+
+    return idle_time, sum(cpu_time_list)
+
+
+def read_load_ratio():
+    """
+    Read the number of runnable jobs of the system per CPU core.
+
+    :return: 1-minute load average divided by the number of cores or None if not available.
+    """
+    try:
+        return os.getloadavg()[0] / multiprocessing.cpu_count()
+    except (OSError, NotImplementedError):
+        return None
+
+
+def format_ratio(ratio):
+    """
+    Format a ratio as a percentage for the logs.
+
+    :param ratio: ratio between 0 and 1, or None.
+    :return: formatted percentage or 'n/a'.
+    """
+    return "n/a" if ratio is None else "{:.0%}".format(ratio)
+
+
+def format_throughput(throughput):
+    """
+    Format a throughput for the logs.
+
+    :param throughput: throughput in MB/s, or None.
+    :return: formatted throughput or 'n/a'.
+    """
+    return "n/a" if throughput is None else "{:.2f}MB/s".format(throughput)
+
+
+class AdaptiveLimit(object):
+    """
+    Limit of jobs running at the same time in an upload stage, which can be changed at any time.
+
+    Each job holds a slot from acquire to release and the size of the jobs released with success
+    is accumulated, so that the throughput of the stage can be sampled. As the size of a job is
+    only counted when it finishes, jobs spanning several intervals complete in bursts, so the
+    throughput is smoothed and only a sustained drop is taken as congestion.
+
+    If a job sent to a pool fails without calling back, its slot is reclaimed once the job is seen
+    as finished, which is checked every wait_time seconds while waiting.
+    """
+
+    def __init__(self, name, minimum, maximum, wait_time=LIMIT_WAIT_TIME):
+        """
+        Initialize Adaptive Limit object, starting halfway between its bounds.
+
+        :param name: name of the stage, used in the logs.
+        :param minimum: lowest number of jobs allowed at the same time.
+        :param maximum: highest number of jobs allowed at the same time.
+        :param wait_time: seconds between checks for finished jobs while waiting.
+        """
+        self.name = name
+        self.maximum = max(1, int(maximum))
+        self.minimum = max(1, min(int(minimum), self.maximum))
+        self.limit = max(self.minimum, self.maximum // 2)
+        self.wait_time = wait_time
+
+        self.job_dict = {}
+        self.completed_bytes = 0
+        self.is_saturated = False
+        self.sample_bytes = 0
+        self.sample_time = 0.0
+        self.throughput = None
+        self.previous_throughput = None
+        self.drop_count = 0
+        self.last_change = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, key, num_bytes=0):
+        """
+        Take a slot for a job, waiting while the limit is reached.
+
+        :param key: identification of the job.
+        :param num_bytes: size of the data handled by the job.
+        """
+        with self.condition:
+            while len(self.job_dict) >= self.limit:
+                self.is_saturated = True
+                self.condition.wait(self.wait_time)
+                self._release_failed_jobs()
+
+            self.job_dict[key] = [num_bytes, None]
+
+    def set_job(self, key, async_result):
+        """
+        Keep the asynchronous result of a job sent to a pool with its slot.
+
+        :param key: identification of the job.
+        :param async_result: result returned by the pool.
+        """
+        with self.condition:
+            if key in self.job_dict:
+                self.job_dict[key][1] = async_result
+
+    def release(self, key, is_success=True):
+        """
+        Give back the slot of a job, if any.
+
+        :param key: identification of the job.
+        :param is_success: whether the size of the job is counted as transferred data.
+        :return: size of the job released.
+        """
+        with self.condition:
+            num_bytes, _ = self.job_dict.pop(key, [0, None])
+            if is_success:
+                self.completed_bytes += num_bytes
+
+            self.condition.notify_all()
+
+            return num_bytes
+
+    def take_sample(self):
+        """
+        Get the data completed since the last sample and whether jobs had to wait for a slot.
+
+        :return: tuple (completed bytes, whether the stage was saturated).
+        """
+        with self.condition:
+            sample = self.completed_bytes, self.is_saturated or len(self.job_dict) >= self.limit
+            self.completed_bytes = 0
+            self.is_saturated = False
+
+            return sample
+
+    def update_throughput(self, completed_bytes, elapsed_time):
+        """
+        Smooth the throughput of the stage with the data completed in the last interval.
+
+        An interval in which no job finished while jobs were running tells nothing about the
+        throughput, so it is merged with the next ones until a job finishes.
+
+        :param completed_bytes: size of the jobs completed in the interval.
+        :param elapsed_time: duration of the interval in seconds.
+        :return: smoothed throughput in MB/s, None if the interval was merged with the next one.
+        """
+        self.sample_bytes += completed_bytes
+        self.sample_time += elapsed_time
+
+        with self.condition:
+            if not self.sample_bytes and self.job_dict:
+                return None
+
+        sample_throughput = self.sample_bytes / float(BYTES_PER_MB) / self.sample_time
+        self.sample_bytes = 0
+        self.sample_time = 0.0
+
+        if self.throughput is None:
+            self.throughput = sample_throughput
+        else:
+            self.throughput = THROUGHPUT_SMOOTHING * sample_throughput + \
+                (1 - THROUGHPUT_SMOOTHING) * self.throughput
+
+        return self.throughput
+
+    def adjust(self, throughput, is_saturated, congestion_reason=None):
+        """
+        Change the limit by additive increase and multiplicative decrease.
+
+        The limit is halved on congestion, or when the throughput kept dropping for
+        THROUGHPUT_DROP_SAMPLES samples up to an increase. Otherwise it grows by one while jobs
+        are waiting for a slot.
+
+        :param throughput: smoothed throughput of the stage in MB/s, None if it was not sampled
+        since the last adjustment.
+        :param is_saturated: whether jobs had to wait for a slot since the last adjustment.
+        :param congestion_reason: description of the congestion detected, None if there is none.
+        :return: tuple (previous limit, new limit, reason of the decision).
+        """
+        previous_limit = self.limit
+
+        if throughput is not None:
+            if self.previous_throughput is not None and \
+                    throughput < self.previous_throughput * (1 - THROUGHPUT_DROP_RATIO):
+                self.drop_count += 1
+            else:
+                self.drop_count = 0
+
+            self.previous_throughput = throughput
+
+        if congestion_reason is None and self.last_change > 0 and \
+                self.drop_count >= THROUGHPUT_DROP_SAMPLES:
+            congestion_reason = "throughput dropped for {} intervals to {}".format(
+                self.drop_count, format_throughput(throughput))
+
+        if congestion_reason is not None:
+            self.drop_count = 0
+            new_limit = int(previous_limit * DECREASE_FACTOR)
+            reason = congestion_reason
+        elif is_saturated:
+            new_limit = previous_limit + 1
+            reason = "jobs waiting for a slot"
+        else:
+            new_limit = previous_limit
+            reason = "jobs not waiting for a slot"
+
+        new_limit = self.set_limit(new_limit)
+
+        self.last_change = new_limit - previous_limit
+
+        return previous_limit, new_limit, reason
+
+    def set_limit(self, limit):
+        """
+        Change the number of jobs allowed at the same time, within the bounds.
+
+        :param limit: new number of jobs.
+        :return: limit applied.
+        """
+        with self.condition:
+            self.limit = max(self.minimum, min(self.maximum, int(limit)))
+            self.condition.notify_all()
+
+            return self.limit
+
+    def _release_failed_jobs(self):
+        """Give back the slots of jobs sent to a pool that finished without success."""
+        for key, (_, async_result) in self.job_dict.items():
+            if async_result is not None and async_result.ready() and \
+                    not async_result.successful():
+                self.release(key, False)
+
+    def __str__(self):
+        """Represent Adaptive Limit object as string."""
+        return "({}, limit: {}, bounds: {}-{})".format(self.name, self.limit, self.minimum,
+                                                      self.maximum)
+
+    def __repr__(self):
+        """Represent Adaptive Limit object."""
+        return self.__str__()
+
+
+class ConcurrencyController(object):
+    """
+    Adjust periodically the limits of the processing and transfer stages of an upload.
+
+    The processing stage is congested when the jobs waiting for a CPU core pile up or when the
+    volumes waiting to be transferred hold nearly all the temporary space budget. A fully used CPU
+    alone is not congestion, as compressing and encrypting are bound by it. Both stages are also
+    congested when their throughput drops after an increase.
+    """
+
+    def __init__(self, logger, process_limit, transfer_limit, temp_space_budget=None,
+                 interval=ADJUST_INTERVAL):
+        """
+        Initialize Concurrency Controller object.
+
+        :param logger: logger object.
+        :param process_limit: AdaptiveLimit of the files being processed.
+        :param transfer_limit: AdaptiveLimit of the volumes being transferred.
+        :param temp_space_budget: TempSpaceBudget of the volumes waiting to be transferred, None
+        if the temporary space is not limited.
+        :param interval: seconds between adjustments.
+        """
+        self.logger = logger
+        self.process_limit = process_limit
+        self.transfer_limit = transfer_limit
+        self.temp_space_budget = temp_space_budget
+        self.interval = interval
+
+        self.last_cpu_times = read_cpu_times()
+        self.last_adjust_time = time.time()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start adjusting the limits in a background thread."""
+        self.logger.info("Adapting the concurrency every {}s, starting with {} and {}."
+                         .format(self.interval, self.process_limit, self.transfer_limit))
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        """Adjust the limits every interval until stopped."""
+        while not self.stop_event.wait(self.interval):
+            self.adjust()
+
+    def stop(self):
+        """Stop adjusting the limits."""
+        self.stop_event.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def get_cpu_idle_ratio(self):
+        """
+        Get the ratio of idle CPU time since the last call.
+
+        :return: ratio between 0 and 1 or None if not available.
+        """
+        cpu_times = read_cpu_times()
+        last_cpu_times, self.last_cpu_times = self.last_cpu_times, cpu_times
+
+        if cpu_times is None or last_cpu_times is None or cpu_times[1] <= last_cpu_times[1]:
+            return None
+
+        return float(cpu_times[0] - last_cpu_times[0]) / (cpu_times[1] - last_cpu_times[1])
+
+    def get_temp_space_ratio(self):
+        """
+        Get the ratio of the temporary space budget held by volumes waiting to be transferred.
+
+        :return: ratio, or None if the temporary space is not limited.
+        """
+        if self.temp_space_budget is None:
+            return None
+
+        return float(self.temp_space_budget.used_mb) / self.temp_space_budget.budget_mb
+
+    def adjust(self):
+        """
+        Sample the stages and adjust their limits, logging every decision.
+
+        :return: list of tuples (stage name, previous limit, new limit, reason).
+        """
+        now = time.time()
+        elapsed_time = max(now - self.last_adjust_time, 1e-3)
+        self.last_adjust_time = now
+
+        cpu_idle_ratio = self.get_cpu_idle_ratio()
+        load_ratio = read_load_ratio()
+        temp_space_ratio = self.get_temp_space_ratio()
+
+        # The load average lags behind, so it is not taken again right after a decrease.
+        process_congestion = None
+        if load_ratio is not None and load_ratio > LOAD_HIGH_RATIO and \
+                self.process_limit.last_change >= 0:
+            process_congestion = "load at {:.0%} of the CPU cores".format(load_ratio)
+        elif temp_space_ratio is not None and temp_space_ratio >= TEMP_SPACE_HIGH_RATIO:
+            process_congestion = "temporary space budget at {:.0%}".format(temp_space_ratio)
+
+        decision_list = []
+        for adaptive_limit, congestion_reason in [(self.process_limit, process_congestion),
+                                                  (self.transfer_limit, None)]:
+            completed_bytes, is_saturated = adaptive_limit.take_sample()
+            throughput = adaptive_limit.update_throughput(completed_bytes, elapsed_time)
+
+            previous_limit, new_limit, reason = adaptive_limit.adjust(throughput, is_saturated,
+                                                                      congestion_reason)
+
+            self.logger.info("Concurrency of stage '{}' {} from {} to {}: {}. Throughput: "
+                             "{}, CPU idle: {}, load per core: {}, temporary space "
+                             "used: {}.".format(adaptive_limit.name,
+                                                "kept" if new_limit == previous_limit else
+                                                "changed", previous_limit, new_limit, reason,
+                                                format_throughput(throughput),
+                                                format_ratio(cpu_idle_ratio),
+                                                format_ratio(load_ratio),
+                                                format_ratio(temp_space_ratio)))
+
+            decision_list.append((adaptive_limit.name, previous_limit, new_limit, reason))
+
+        return decision_list
+
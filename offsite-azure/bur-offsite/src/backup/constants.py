@@ -18,6 +18,7 @@ TAR_SUFFIX = "tar"
 GZ_SUFFIX = "gz"
 GPG_SUFFIX = "gpg"
 DESCRIPTOR_SUFFIX = "dat"
+TOC_SUFFIX = "toc"
 METADATA_FILE_SUFFIX = "_metadata"
 PROCESSED_VOLUME_ENDS_WITH = '.' + TAR_SUFFIX
 DESCRIPTOR_ENDS_WITH = '.' + DESCRIPTOR_SUFFIX
@@ -33,6 +34,11 @@ LOG_ROOT_PATH_CLI = "--log_root_path"
 TIMEOUT = 120
 LOG_LEVEL = "LogLevel=ERROR"
 
+# Seconds an idle shared ssh connection is kept open, and seconds before trying again to open one
+# to a host that refused it.
+SSH_CONTROL_PERSIST = 300
+SSH_MASTER_RETRY_INTERVAL = 60
+
 BLOCK_SIZE_MB_STR = "MB"
 BLOCK_SIZE_GB_STR = "GB"
 
@@ -42,6 +48,9 @@ BLOCK_SIZE_GB = 1024
 DEFAULT_NUM_THREADS = 5
 DEFAULT_NUM_PROCESSORS = 5
 DEFAULT_NUM_TRANSFER_PROCS = 8
+DEFAULT_NUM_CUSTOMERS = 1
+DEFAULT_CUSTOMER_WEIGHT = 1
+DEFAULT_MIN_CONCURRENCY = 1
 
 PLATFORM_NAME = str(platform).lower()
 
@@ -53,12 +62,13 @@ TAR_CMD = "gtar" if 'sun' in PLATFORM_NAME else "tar"
 META_DATA_KEYS = Enum('META_DATA_KEYS', 'objects, md5')
 
 
-VOLUME_OUTPUT_KEYS = Enum('VOLUME_OUTPUT_KEYS', 'volume_path, processing_time, tar_time, output, '
-                                                'status, rsync_output, transfer_time')
-
 NOT_INFORMED_STR = "Not informed"
 
 GENIE_VOL_BKPS_DEPLOYMENT = "genie_vol_bkp"
 
 DEFAULT_OFFSITE_RETENTION = 4
 DEFAULT_OFFSITE_NAME = "AZURE"
+
+AZCOPY_TRANSFER_BACKEND = "azcopy"
+NATIVE_TRANSFER_BACKEND = "native"
+TRANSFER_BACKENDS = (AZCOPY_TRANSFER_BACKEND, NATIVE_TRANSFER_BACKEND)
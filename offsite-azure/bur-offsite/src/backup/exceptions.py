@@ -89,6 +89,12 @@ class ExceptionCodes(Enum):
     ErrorSortingOffsiteBackupList = 89
     AzCopyExecutionFailed = 90
     AzCopyCommandFailed = 91
+    BlobTransferFailed = 92
+    BlobChecksumMismatch = 93
+    NoSuchVolume = 94
+    NoSuchFile = 95
+    MissingVolumeForFileRestore = 96
+    InvalidArchiveToc = 97
 
 
 def get_exception_message(code=None):
@@ -176,6 +182,13 @@ def get_exception_message(code=None):
                                                          "backups from the offsite location."
     msgs[ExceptionCodes.AzCopyExecutionFailed] = "AzCopy execution failed"
     msgs[ExceptionCodes.AzCopyCommandFailed] = "AzCopy Command returned Non zero error code"
+    msgs[ExceptionCodes.BlobTransferFailed] = "Blob transfer failed."
+    msgs[ExceptionCodes.BlobChecksumMismatch] = "Downloaded blob data does not match its MD5."
+    msgs[ExceptionCodes.NoSuchVolume] = "Volume not found in the backup."
+    msgs[ExceptionCodes.NoSuchFile] = "File not found in the volume."
+    msgs[ExceptionCodes.MissingVolumeForFileRestore] = "Volume name needed to restore a single " \
+                                                       "file."
+    msgs[ExceptionCodes.InvalidArchiveToc] = "Archive table of contents is not valid."
 
     try:
         return msgs[code]
@@ -235,6 +248,27 @@ class AzCopyException(BurException):
             return self.__str__()
 
 
+class BlobTransferException(BurException):
+    """Exception class to refer error raised from blob_manager.py script."""
+
+    def __init__(self, code=None, parameters=None):
+        """
+        Initialize a BlobTransferException.
+
+        :param code: error code.
+        :param parameters: input variable that caused the error.
+        """
+        code = code if code else ExceptionCodes.DefaultExceptionCode
+        message = get_exception_message(code)
+        super(BlobTransferException, self).__init__(message, code)
+        self.code = code
+        self.parameters = parameters
+        if self.parameters:
+            self.message = "{} ({})".format(message, self.parameters)
+        else:
+            self.message = message
+
+
 class InputValidatorsException(BurException):
     """Exception class to refer error raised from bur_input_validators.py script."""
 
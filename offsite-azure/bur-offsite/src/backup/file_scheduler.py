@@ -0,0 +1,304 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=broad-except
+
+"""Module to schedule the files of all volumes of a backup under a single concurrency limit."""
+
+import os
+import threading
+import time
+
+from backup.exceptions import BurException
+from backup.logger import CustomLogger
+from backup.thread_pool import ThreadPoolExecutor
+
+SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
+
+DEFAULT_VOLUME_THREADS = 1
+
+
+class VolumeTask(object):
+    """Track the processing of the files of a single volume."""
+
+    def __init__(self, volume_name, volume_path, output_path, context=None):
+        """
+        Initialize Volume Task object.
+
+        :param volume_name: name of the volume.
+        :param volume_path: path of the volume whose files will be processed.
+        :param output_path: folder to store the processed files.
+        :param context: dictionary with data kept by the caller until the volume is finished.
+        """
+        self.volume_name = volume_name
+        self.volume_path = volume_path
+        self.output_path = output_path
+        self.context = context if context is not None else {}
+        self.pending_file_count = 0
+        self.processed_file_count = 0
+        self.all_files_submitted = False
+        self.is_dispatched = False
+        self.error_list = []
+        self.start_time = time.time()
+        self.processing_time = 0.0
+        # processed files waiting to be handed to on_file_ready, one at a time.
+        self.ready_file_list = []
+        self.is_handing_ready_files = False
+
+    def is_finished(self):
+        """
+        Check whether every file of the volume was submitted and processed.
+
+        :return: true, if the volume has no pending files; false otherwise.
+        """
+        return self.all_files_submitted and self.pending_file_count == 0
+
+    def __str__(self):
+        """Represent Volume Task object as string."""
+        return "({}, {} processed, {} pending, {} error(s))".format(
+            self.volume_name, self.processed_file_count, self.pending_file_count,
+            len(self.error_list))
+
+    def __repr__(self):
+        """Represent Volume Task object."""
+        return self.__str__()
+
+
+class FileScheduler(object):
+    """
+    Process the files of every volume of a backup in a single pool of workers.
+
+    Files from all volumes share the same concurrency limit, so workers are kept busy until the
+    last file of the backup, instead of being bound to the volume they started with.
+
+    When the last file of a volume is processed, the volume is handed to on_volume_processed in a
+    separate pool, so that archiving or transferring it does not hold a file worker.
+
+    Processed files are handed to on_file_ready by the file workers, outside the lock of the
+    executor. While a worker hands the files of a volume, the files of that volume processed by
+    other workers are queued for it, so a volume slow to take its files, e.g. a throttled stream,
+    holds a single worker and never the other volumes.
+    """
+
+    def __init__(self, logger, process_file_function, max_jobs, on_volume_processed,
+                 on_file_ready=None, volume_threads=DEFAULT_VOLUME_THREADS, file_limit=None):
+        """
+        Initialize File Scheduler and start its workers.
+
+        :param logger: logger object.
+        :param process_file_function: function called with (file path, output path) for each
+        file, returning the path of the processed file.
+        :param max_jobs: maximum number of files processed at the same time for the whole backup.
+        :param on_volume_processed: function called with the VolumeTask once all its files are
+        processed.
+        :param on_file_ready: function called with (VolumeTask, processed file path) as soon as
+        each file is ready, one file at a time.
+        :param volume_threads: maximum number of volumes being finished at the same time.
+        :param file_limit: AdaptiveLimit of the files processed at the same time, below max_jobs,
+        None to use all workers.
+        """
+        self.logger = CustomLogger(SCRIPT_FILE, logger.log_root_path, logger.log_file_name,
+                                   logger.log_level)
+
+        self.process_file_function = process_file_function
+        self.on_volume_processed = on_volume_processed
+        self.on_file_ready = on_file_ready
+        self.file_limit = file_limit
+        self.lock = threading.Lock()
+
+        self.file_executor = ThreadPoolExecutor(logger, max_jobs)
+        self.volume_executor = ThreadPoolExecutor(logger, volume_threads)
+
+    def add_volume(self, volume_task, file_path_list):
+        """
+        Submit every file of a volume to the shared file workers.
+
+        Blocks while the queue of the workers is full, so files are listed lazily. A volume that
+        already failed is dispatched without processing its files.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param file_path_list: iterable with the paths of the files of the volume.
+        :return: VolumeTask object.
+        """
+        self.logger.info("Scheduling files of volume '{}'.".format(volume_task.volume_path))
+
+        if volume_task.error_list:
+            file_path_list = []
+
+        try:
+            for file_path in file_path_list:
+                with self.lock:
+                    volume_task.pending_file_count += 1
+
+                self.file_executor.submit(os.path.basename(file_path), self.process_file,
+                                          volume_task, file_path)
+        except (BurException, EnvironmentError) as listing_exp:
+            with self.lock:
+                volume_task.error_list.append("Could not list files of volume '{}': {}"
+                                              .format(volume_task.volume_path, listing_exp))
+
+        with self.lock:
+            volume_task.all_files_submitted = True
+
+        self.dispatch_if_finished(volume_task)
+
+        return volume_task
+
+    def process_file(self, volume_task, file_path):
+        """
+        Process a single file of a volume and update the volume with its result.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param file_path: path of the file.
+        :return: tuple (processed file path or None, error message or None).
+        """
+        processed_file_path, error_message = self.run_process_file_function(volume_task,
+                                                                            file_path)
+
+        self.on_file_processed(volume_task, processed_file_path, error_message)
+
+        return processed_file_path, error_message
+
+    def run_process_file_function(self, volume_task, file_path):
+        """
+        Run the processing of a single file of a volume.
+
+        Files of a volume that already failed are skipped.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param file_path: path of the file.
+        :return: tuple (processed file path or None, error message or None).
+        """
+        if volume_task.error_list:
+            return None, None
+
+        is_success = False
+        self.acquire_file_slot(file_path)
+
+        try:
+            processed_file_path = self.process_file_function(file_path, volume_task.output_path)
+            is_success = True
+
+            return processed_file_path, None
+        except Exception as process_exp:
+            return None, "Error while processing file '{}'. {}".format(file_path,
+                                                                      process_exp.__str__())
+        finally:
+            if self.file_limit is not None:
+                self.file_limit.release(file_path, is_success)
+
+    def acquire_file_slot(self, file_path):
+        """
+        Wait for a slot of the file limit, if any, accounting the size of the file.
+
+        :param file_path: path of the file about to be processed.
+        """
+        if self.file_limit is None:
+            return
+
+        try:
+            file_size = os.path.getsize(file_path)
+        except EnvironmentError:
+            file_size = 0
+
+        self.file_limit.acquire(file_path, file_size)
+
+    def on_file_processed(self, volume_task, processed_file_path, error_message):
+        """
+        Hand a processed file to on_file_ready, if any, and update its volume.
+
+        Called by the file worker of the file, outside the lock of the executor. If another worker
+        is handing the files of the same volume, the file is queued for it instead.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param processed_file_path: path of the processed file, None if not processed.
+        :param error_message: error message of the processing, None if there is none.
+        """
+        if processed_file_path is None or self.on_file_ready is None:
+            self.update_volume(volume_task, processed_file_path, error_message)
+            return
+
+        with self.lock:
+            volume_task.ready_file_list.append(processed_file_path)
+            if volume_task.is_handing_ready_files:
+                return
+
+            volume_task.is_handing_ready_files = True
+
+        self.hand_ready_files(volume_task)
+
+    def hand_ready_files(self, volume_task):
+        """
+        Hand the queued files of a volume to on_file_ready until there is none left.
+
+        :param volume_task: VolumeTask object of the volume.
+        """
+        while True:
+            with self.lock:
+                if not volume_task.ready_file_list:
+                    volume_task.is_handing_ready_files = False
+                    return
+
+                processed_file_path = volume_task.ready_file_list.pop(0)
+
+            error_message = None
+            try:
+                self.on_file_ready(volume_task, processed_file_path)
+            except Exception as ready_exp:
+                error_message = ready_exp.__str__()
+
+            self.update_volume(volume_task, processed_file_path, error_message)
+
+    def update_volume(self, volume_task, processed_file_path, error_message):
+        """
+        Count a file as done in its volume, dispatching the volume when all its files are done.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param processed_file_path: path of the processed file, None if not processed.
+        :param error_message: error message of the file, None if there is none.
+        """
+        with self.lock:
+            volume_task.pending_file_count -= 1
+            if processed_file_path is not None and error_message is None:
+                volume_task.processed_file_count += 1
+            if error_message is not None:
+                volume_task.error_list.append(error_message)
+
+        if error_message is not None:
+            self.logger.error(error_message)
+
+        self.dispatch_if_finished(volume_task)
+
+    def dispatch_if_finished(self, volume_task):
+        """
+        Hand the volume to on_volume_processed once, when all its files are processed.
+
+        :param volume_task: VolumeTask object of the volume.
+        :return: true, if the volume was dispatched now; false otherwise.
+        """
+        with self.lock:
+            if volume_task.is_dispatched or not volume_task.is_finished():
+                return False
+
+            volume_task.is_dispatched = True
+            volume_task.processing_time = time.time() - volume_task.start_time
+
+        self.logger.log_time("Elapsed time to process the files of volume '{}'"
+                             .format(volume_task.volume_path), volume_task.processing_time)
+
+        self.volume_executor.submit(volume_task.volume_name, self.on_volume_processed,
+                                    volume_task)
+
+        return True
+
+    def shutdown(self):
+        """Wait for all submitted files and volumes to be finished."""
+        self.file_executor.shutdown()
+        self.volume_executor.shutdown()
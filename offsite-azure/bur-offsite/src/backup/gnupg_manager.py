@@ -12,18 +12,22 @@
 
 """Module to handle gnupg functions."""
 
+import hashlib
 import os
+from Queue import Queue
 from subprocess import PIPE, Popen
 
 from gnupg import GPG
 
-from backup.constants import GPG_SUFFIX, PLATFORM_NAME
-from backup.exceptions import ExceptionCodes, GnupgException
+from backup.constants import GPG_SUFFIX, GZ_SUFFIX, PLATFORM_NAME
+from backup.exceptions import BurException, ExceptionCodes, GnupgException
 from backup.logger import CustomLogger
-from backup.thread_pool import THREAD_OUTPUT_INDEX, ThreadPool
-from backup.utils.compress import compress_file, decompress_file
+from backup.thread_pool import THREAD_OUTPUT_INDEX, ThreadPoolExecutor
+from backup.utils.compress import compress_file, decompress_file, iter_tar_stream, \
+    TAR_STREAM_CHUNK_SIZE
 from backup.utils.decorator import timeit
-from backup.utils.fsys import get_current_user, get_home_dir, is_dir, is_valid_path, remove_path
+from backup.utils.fsys import create_path, get_current_user, get_home_dir, is_dir, is_valid_path, \
+    remove_path
 from backup.utils.validator import check_not_empty
 
 GPG_KEY_PATH = os.path.join(get_home_dir(), ".gnupg")
@@ -37,6 +41,13 @@ GPG_CIPHER_ALG = 'AES256'
 GPG_COMPRESS_ALG = 'none'
 GPG_PERMISSION_DENIED = "permission denied"
 GPG_ENCRYPTED_FILE_ENDS_WITH = ".{}".format(GPG_SUFFIX)
+GZ_ENCRYPTED_FILE_ENDS_WITH = ".{}{}".format(GZ_SUFFIX, GPG_ENCRYPTED_FILE_ENDS_WITH)
+
+GZIP_CMD = "gzip"
+
+# Data of a tar member is handed to its decryption job in chunks. Each job buffers at most
+# STREAM_QUEUE_CHUNKS of them, so the stream is only read ahead of a busy job up to this limit.
+STREAM_QUEUE_CHUNKS = 16
 
 SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
 
@@ -145,9 +156,7 @@ class GnupgManager:
                                    GPG_ENCRYPTED_FILE_ENDS_WITH)
 
             try:
-                ret_code = Popen([self.gpg_cmd, "--output", output, "-r", self.gpg_user_email,
-                                  "--cipher-algo", GPG_CIPHER_ALG, "--compress-algo",
-                                  GPG_COMPRESS_ALG, "--encrypt", file_path], stdout=devnull,
+                ret_code = Popen(self.get_encrypt_command(output, file_path), stdout=devnull,
                                  stderr=devnull).wait()
                 if ret_code != 0:
                     raise GnupgException(ExceptionCodes.EncryptError, file_path)
@@ -156,6 +165,78 @@ class GnupgManager:
 
         return output
 
+    def get_encrypt_command(self, output, file_path=None):
+        """
+        Build the gpg command line used to encrypt a file.
+
+        :param output: path of the encrypted file to be written.
+        :param file_path: file to be encrypted. If not informed, gpg reads from its stdin.
+        :return: command list to be used with Popen.
+        """
+        command = [self.gpg_cmd, "--output", output, "-r", self.gpg_user_email, "--cipher-algo",
+                   GPG_CIPHER_ALG, "--compress-algo", GPG_COMPRESS_ALG, "--encrypt"]
+
+        if file_path is not None:
+            command.append(file_path)
+
+        return command
+
+    @timeit
+    def stream_compress_encrypt_file(self, file_path, output_path, **kwargs):
+        """
+        Compress and encrypt a file in a single pass, piping gzip output straight into gpg.
+
+        The source file is read only once and no intermediate .gz file is written to disk.
+        The result is the same <file_name>.gz.gpg file produced by compress_encrypt_file.
+
+        :param file_path: file path to be compressed and encrypted.
+        :param output_path: path where the encrypted and compressed file will be stored.
+        :return: path of the processed file.
+        :raise GnupgException: if an error happened during the process.
+        """
+        check_not_empty(output_path)
+        is_valid_path(file_path)
+        is_valid_path(output_path)
+
+        self.logger.info("Compressing and encrypting file '{}'.".format(file_path))
+
+        output = "{}{}".format(os.path.join(output_path, os.path.basename(file_path)),
+                               GZ_ENCRYPTED_FILE_ENDS_WITH)
+
+        gzip_process = None
+        gpg_process = None
+
+        with open(os.devnull, "w") as devnull, open(file_path, "rb") as source_file:
+            try:
+                gzip_process = Popen([GZIP_CMD, "-c"], stdin=source_file, stdout=PIPE,
+                                     stderr=devnull)
+                gpg_process = Popen(self.get_encrypt_command(output), stdin=gzip_process.stdout,
+                                    stdout=devnull, stderr=devnull)
+
+                # Allow gzip to receive a SIGPIPE if gpg exits before reading the whole stream.
+                gzip_process.stdout.close()
+
+                gpg_ret_code = gpg_process.wait()
+                gzip_ret_code = gzip_process.wait()
+            except (OSError, TypeError, ValueError) as error:
+                for process in [gzip_process, gpg_process]:
+                    if process is not None and process.poll() is None:
+                        process.kill()
+                        process.wait()
+
+                remove_path(output)
+                raise GnupgException(ExceptionCodes.EncryptError, error)
+
+        if gzip_ret_code != 0:
+            remove_path(output)
+            raise GnupgException(ExceptionCodes.GzipCommandError, [file_path, gzip_ret_code])
+
+        if gpg_ret_code != 0:
+            remove_path(output)
+            raise GnupgException(ExceptionCodes.EncryptError, file_path)
+
+        return output
+
     def compress_encrypt_file(self, file_path, output_path):
         """
         Compress and encrypt a file using gpg and gz strategies.
@@ -189,13 +270,17 @@ class GnupgManager:
         return encrypted_file_path
 
     @timeit
-    def compress_encrypt_file_list(self, source_dir, output_path, number_threads, **kwargs):
+    def compress_encrypt_file_list(self, source_dir, output_path, number_threads, stream=True,
+                                   on_file_ready=None, **kwargs):
         """
         Compress and encrypt a list of files in parallel using a thread pool.
 
         :param source_dir: folder where the files to be encrypted are located.
         :param output_path: folder to store encrypted files.
         :param number_threads: number of threads to process the source dir.
+        :param stream: whether to pipe gzip into gpg without writing an intermediate file.
+        :param on_file_ready: function called with the path of each processed file, one file at a
+        time, as soon as it is ready.
         :return: true if success.
         :raise GnupgException: if an error happened during the process.
         """
@@ -205,15 +290,21 @@ class GnupgManager:
         is_valid_path(output_path)
 
         job_error_list = []
-        job_thread_pool = ThreadPool(self.logger, number_threads, GnupgManager.on_file_processed,
-                                     job_error_list)
+        job_executor = ThreadPoolExecutor(self.logger, number_threads,
+                                          GnupgManager.on_file_processed, job_error_list,
+                                          on_file_ready)
 
-        for file_name in os.listdir(source_dir):
-            source_file_path = os.path.join(source_dir, file_name)
+        if stream:
+            process_file_function = self.stream_compress_encrypt_file
+        else:
+            process_file_function = self.compress_encrypt_file
 
-            job_thread_pool.create_thread("{}-Thread".format(file_name), self.compress_encrypt_file,
-                                          source_file_path, output_path)
-        job_thread_pool.start_pool()
+        try:
+            for file_name, source_file_path in GnupgManager.get_source_file_list(source_dir):
+                job_executor.submit("{}-Thread".format(file_name), process_file_function,
+                                    source_file_path, output_path)
+        finally:
+            job_executor.shutdown()
 
         if job_error_list:
             raise GnupgException(parameters=job_error_list)
@@ -297,15 +388,197 @@ class GnupgManager:
             raise GnupgException(ExceptionCodes.InvalidFolder, source_dir)
 
         job_error_list = []
-        decryption_thread_pool = ThreadPool(self.logger, number_threads,
-                                            GnupgManager.on_file_processed, job_error_list)
+        decryption_executor = ThreadPoolExecutor(self.logger, number_threads,
+                                                 GnupgManager.on_file_processed, job_error_list)
 
-        for file_name in os.listdir(source_dir):
-            source_file_path = os.path.join(source_dir, file_name)
+        try:
+            for file_name, source_file_path in GnupgManager.get_source_file_list(source_dir):
+                decryption_executor.submit("{}-Thread".format(file_name),
+                                           self.decrypt_decompress_file, source_file_path)
+        finally:
+            decryption_executor.shutdown()
+
+        if job_error_list:
+            raise GnupgException(parameters=job_error_list)
+
+        return True
 
-            decryption_thread_pool.create_thread("{}-Thread".format(file_name),
-                                                 self.decrypt_decompress_file, source_file_path)
-        decryption_thread_pool.start_pool()
+    @timeit
+    def stream_decrypt_decompress_file(self, chunk_iterator, output_file_path, **kwargs):
+        """
+        Decrypt and decompress a stream of data in a single pass, piping gpg output into gzip.
+
+        Only the final decompressed file is written to disk. The stream is read to its end
+        whatever fails, even the output file not being opened, so whoever writes to it is never
+        left blocked.
+
+        :param chunk_iterator: iterable with the encrypted data, usually a <file_name>.gz.gpg.
+        :param output_file_path: path of the decompressed file to be written.
+        :return: path of the processed file.
+        :raise GnupgException: if an error happened during the process.
+        """
+        gpg_process = None
+        gzip_process = None
+        output_file = None
+
+        try:
+            check_not_empty(output_file_path)
+
+            self.logger.info("Decrypting and decompressing stream to file '{}'.".format(
+                output_file_path))
+
+            with open(os.devnull, "w") as devnull, open(output_file_path, "wb") as output_file:
+                gpg_process = Popen([self.gpg_cmd, "--decrypt"], stdin=PIPE, stdout=PIPE,
+                                    stderr=devnull, close_fds=True)
+                gzip_process = Popen([GZIP_CMD, "-dc"], stdin=gpg_process.stdout,
+                                     stdout=output_file, stderr=devnull, close_fds=True)
+
+                # Allow gpg to receive a SIGPIPE if gzip exits before reading the whole stream.
+                gpg_process.stdout.close()
+
+                for chunk in chunk_iterator:
+                    gpg_process.stdin.write(chunk)
+                gpg_process.stdin.close()
+
+                gpg_ret_code = gpg_process.wait()
+                gzip_ret_code = gzip_process.wait()
+        except (IOError, OSError, TypeError, ValueError) as error:
+            for process in [gpg_process, gzip_process]:
+                if process is not None and process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+            if output_file is not None:
+                remove_path(output_file_path)
+
+            raise GnupgException(ExceptionCodes.DecryptError, [output_file_path, error])
+        finally:
+            for _ in chunk_iterator:
+                pass
+
+        if gpg_ret_code != 0:
+            remove_path(output_file_path)
+            raise GnupgException(ExceptionCodes.DecryptError, output_file_path)
+
+        if gzip_ret_code != 0:
+            remove_path(output_file_path)
+            raise GnupgException(ExceptionCodes.GunzipCommandError, [output_file_path,
+                                                                     gzip_ret_code])
+
+        return output_file_path
+
+    @timeit
+    def decrypt_decompress_file_object(self, file_object, output_file_path, expected_md5=None,
+                                       **kwargs):
+        """
+        Decrypt and decompress a single encrypted file read from a file object.
+
+        Used to restore one member of a volume archive fetched by a ranged read, which is checked
+        against the md5 recorded in the table of contents of the archive.
+
+        :param file_object: readable file object with the encrypted data.
+        :param output_file_path: path of the decompressed file to be written.
+        :param expected_md5: md5 of the encrypted data, not checked if None.
+        :return: path of the processed file.
+        :raise BurException: if the data cannot be read, does not match its md5 or cannot be
+        decrypted.
+        """
+        md5_hash = hashlib.md5()
+        read_error_list = []
+
+        def iter_file_chunks():
+            """
+            Read the file object in chunks, keeping the md5 and stopping at the first error.
+
+            :return: generator of the chunks of data.
+            """
+            try:
+                for chunk in iter(lambda: file_object.read(TAR_STREAM_CHUNK_SIZE), b''):
+                    md5_hash.update(chunk)
+                    yield chunk
+            except BurException as read_exp:
+                read_error_list.append(read_exp)
+
+        try:
+            self.stream_decrypt_decompress_file(iter_file_chunks(), output_file_path)
+        except GnupgException:
+            if not read_error_list:
+                raise
+
+        if read_error_list:
+            remove_path(output_file_path)
+            raise read_error_list[0]
+
+        if expected_md5 is not None and md5_hash.hexdigest() != expected_md5:
+            remove_path(output_file_path)
+            raise GnupgException(ExceptionCodes.BlobChecksumMismatch, output_file_path)
+
+        return output_file_path
+
+    @timeit
+    def decrypt_decompress_tar_stream(self, file_object, output_path, number_threads,
+                                      member_filter=None, **kwargs):
+        """
+        Restore the files of a volume archive while it is read, e.g. from a download stream.
+
+        The archive is read only once. Each <file_name>.gz.gpg member is handed to a thread of the
+        pool as it arrives, to be decrypted and decompressed straight into its final file, so
+        neither the archive nor the encrypted files are written to disk.
+
+        :param file_object: readable file object with the tar archive of the volume.
+        :param output_path: folder where the volume is restored.
+        :param number_threads: number of files decrypted and decompressed at the same time.
+        :param member_filter: function called with the name of each member, which is restored
+        only if it returns true. Every member is restored if None.
+        :return: true if success.
+        :raise GnupgException: if an error happened during the process.
+        """
+        if not is_dir(output_path):
+            raise GnupgException(ExceptionCodes.InvalidFolder, output_path)
+
+        job_error_list = []
+        decryption_executor = ThreadPoolExecutor(self.logger, number_threads,
+                                                 GnupgManager.on_file_processed, job_error_list)
+
+        try:
+            for tar_member, member_chunks in iter_tar_stream(file_object):
+                if member_filter is not None and not member_filter(tar_member.name):
+                    continue
+
+                member_path = os.path.normpath(os.path.join(output_path, tar_member.name))
+
+                if os.path.isabs(tar_member.name) or not member_path.startswith(
+                        os.path.join(os.path.normpath(output_path), '')):
+                    job_error_list.append(GnupgException(ExceptionCodes.InvalidPath,
+                                                         tar_member.name).__str__())
+                    continue
+
+                if tar_member.isdir():
+                    create_path(member_path)
+                    continue
+
+                if member_chunks is None or not member_path.endswith(GZ_ENCRYPTED_FILE_ENDS_WITH):
+                    job_error_list.append(GnupgException(ExceptionCodes.InvalidGPGFile,
+                                                         tar_member.name).__str__())
+                    continue
+
+                create_path(os.path.dirname(member_path))
+
+                chunk_queue = Queue(STREAM_QUEUE_CHUNKS)
+                decryption_executor.submit("{}-Thread".format(os.path.basename(member_path)),
+                                           self.stream_decrypt_decompress_file,
+                                           iter(chunk_queue.get, None),
+                                           member_path[0:len(member_path) - len(
+                                               GZ_ENCRYPTED_FILE_ENDS_WITH)])
+                try:
+                    for chunk in member_chunks:
+                        chunk_queue.put(chunk)
+                finally:
+                    chunk_queue.put(None)
+        except BurException as stream_exp:
+            job_error_list.append(stream_exp.__str__())
+        finally:
+            decryption_executor.shutdown()
 
         if job_error_list:
             raise GnupgException(parameters=job_error_list)
@@ -313,12 +586,24 @@ class GnupgManager:
         return True
 
     @staticmethod
-    def on_file_processed(thread_output, job_error_list):
+    def get_source_file_list(source_dir):
+        """
+        Yield the files of a folder one at a time, so jobs are created only when submitted.
+
+        :param source_dir: folder to be listed.
+        :return: generator of tuples (file name, file path).
+        """
+        for file_name in os.listdir(source_dir):
+            yield file_name, os.path.join(source_dir, file_name)
+
+    @staticmethod
+    def on_file_processed(thread_output, job_error_list, on_file_ready=None):
         """
         Execute Callback function after a successful file encryption/decryption.
 
         :param thread_output: thread output after processing the file [thread name, elapsed time].
         :param job_error_list: list to keep track of each thread error.
+        :param on_file_ready: function to be called with the processed file path, if informed.
         :return: false, if an error was found; true otherwise.
         """
         error_message = thread_output[THREAD_OUTPUT_INDEX.TH_ERROR.value - 1]
@@ -327,6 +612,14 @@ class GnupgManager:
 
             return False
 
+        if on_file_ready is not None:
+            try:
+                on_file_ready(thread_output[THREAD_OUTPUT_INDEX.TH_RESULT.value - 1])
+            except BurException as ready_exception:
+                job_error_list.append(ready_exception.__str__())
+
+                return False
+
         return True
 
     def __str__(self):
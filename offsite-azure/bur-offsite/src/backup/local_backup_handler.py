@@ -12,7 +12,9 @@
 
 """Module to manage upload related functions of customer's backups."""
 
+from collections import namedtuple
 from enum import Enum
+from functools import partial
 import multiprocessing as mp
 import os
 import time
@@ -20,88 +22,138 @@ import time
 import dill
 
 from backup.constants import BACKUP_META_FILE, BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, \
-    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, PROCESSED_VOLUME_ENDS_WITH, SUCCESS_FLAG_FILE, \
-    VOLUME_OUTPUT_KEYS
-from backup.exceptions import BurException, ExceptionCodes, UploadBackupException, UtilsException, AzCopyException
+    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, DEFAULT_MIN_CONCURRENCY, PROCESSED_VOLUME_ENDS_WITH, \
+    SUCCESS_FLAG_FILE
+from backup.exceptions import AzCopyException, BurException, ExceptionCodes, \
+    UploadBackupException, UtilsException
+from backup.file_scheduler import FileScheduler, VolumeTask
+from backup.gnupg_manager import GnupgManager, GZ_ENCRYPTED_FILE_ENDS_WITH
 from backup.logger import CustomLogger
+from backup.resource_budget import TempSpaceBudget
 from backup.rsync_manager import RsyncManager
-from backup.azcopy_manager import AzCopyManager
-from backup.utils.backup_handler import check_local_disk_space_for_upload, \
+from backup.azcopy_manager import AzCopyManager, AzCopyStreamTransfer, \
+    check_transfer_result_dict, JOB_JOURNAL_SUFFIX, remove_job_journal
+from backup.backup_run import BackupRun
+from backup.bandwidth import ThrottledWriter
+from backup.blob_manager import BLOCK_JOURNAL_SUFFIX, get_transfer_manager
+from backup.concurrency import AdaptiveLimit, ConcurrencyController
+from backup.transfer_progress import TransferProgressMonitor
+from backup.utils.backup_handler import add_checksum_output, check_local_disk_space_for_upload, \
     validate_backup_per_volume
-from backup.utils.compress import compress_file
+from backup.utils.compress import add_file_to_tar_stream, close_tar_stream, compress_file, \
+    get_tar_toc_path, open_tar_stream, tar_file_with_toc
 from backup.utils.decorator import collect_performance_data, timeit, timer_delay
 from backup.utils.fsys import create_path, create_pickle_file, get_folder_file_lists_from_dir, \
-    get_formatted_size_on_disk, remove_path
-from backup.utils.remote import check_remote_path_exists, create_remote_dir, \
-    get_remote_folder_content
+    get_formatted_size_on_disk, get_size_on_disk, remove_path
+from backup.utils.hash_cache import evict_hash_cache_path
+from backup.utils.offsite_catalog import BACKUP_STATUS_UPLOADED, OffsiteBackupEntry, \
+    record_offsite_backup
+from backup.utils.remote import create_remote_dir_list, get_remote_folder_content, \
+    get_remote_path_stats
+from backup.volume_result import VolumeResult
 
 MIN_BKP_LOCAL = 1
 
+DEFAULT_BACKUP_PIPELINE_DEPTH = 2
+
+# processed files and the volume archive are in the temporary folder at the same time.
+TEMP_SPACE_ARCHIVE_FACTOR = 2
+
 SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
 
 VOLUME_CALLBACK_OUTPUT_INDEX = Enum('VOLUME_CALLBACK_OUTPUT_INDEX', 'VOLUME_NAME, VOLUME_OUTPUT, '
-                                                                    'REMOTE_BACKUP_PATH, REMOTE_AZ_BACKUP_PATH')
+                                                                    'BACKUP_RUN')
+
 
+VolumeTransferTask = namedtuple('VolumeTransferTask', 'volume_name, volume_output, volume_path, '
+                                                       'remote_backup_path, remote_az_backup_path')
 
-def unwrapper_local_backup_handler_function(backup_handler_obj, function_name, *args):
+WORKER_CONTEXT = {}
+
+
+def init_local_backup_handler_worker(serialized_backup_handler):
     """
-    Reload a LocalBackupHandler object to use Multiprocessing map function.
+    Load the LocalBackupHandler object once for each worker process of a pool.
 
-    Supported functions: process_volume, transfer_backup_volume_to_offsite.
+    Used as the pool initializer, so that tasks carry only their own arguments.
 
-    :param backup_handler_obj: LocalBackupHandler object.
-    :param function_name: name of the function from LocalBackupHandler class to be executed.
-    :param args: arguments of the unwrapped function.
-    :return: volume_name, volume_output and remote_backup_path; or output of the original function.
-    :raise UploadBackupException: if the arguments are not as expected.
+    :param serialized_backup_handler: LocalBackupHandler object serialized by dill.
     """
-    loaded_backup_handler_object = dill.loads(backup_handler_obj)
-    if not isinstance(loaded_backup_handler_object, LocalBackupHandler):
-        raise UploadBackupException(ExceptionCodes.CannotUnwrapperObject,
-                                    loaded_backup_handler_object)
+    WORKER_CONTEXT['backup_handler'] = dill.loads(serialized_backup_handler)
 
-    if function_name not in (LocalBackupHandler.process_volume.__name__,
-                             LocalBackupHandler.transfer_backup_volume_to_offsite.__name__):
-        raise UploadBackupException(ExceptionCodes.OperationNotSupported, function_name)
 
-    if function_name == LocalBackupHandler.process_volume.__name__:
-        volume_path = args[0]
-        volume_name = args[1]
-        temp_volume_folder_path = args[2]
-        remote_backup_path = args[3]
-        remote_az_backup_path = args[4]
+def get_worker_backup_handler():
+    """
+    Get the LocalBackupHandler object loaded by the worker process.
 
-        volume_output = loaded_backup_handler_object.process_volume(volume_path,
-                                                                    temp_volume_folder_path)
-        return volume_name, volume_output, remote_backup_path, remote_az_backup_path
+    :return: LocalBackupHandler object.
+    :raise UploadBackupException: if the worker was not initialized with a valid object.
+    """
+    backup_handler = WORKER_CONTEXT.get('backup_handler')
+    if not isinstance(backup_handler, LocalBackupHandler):
+        raise UploadBackupException(ExceptionCodes.CannotUnwrapperObject, backup_handler)
+
+    return backup_handler
+
+
+def run_volume_transfer_task(transfer_task):
+    """
+    Transfer a processed volume to off-site from a worker process of the transfer pool.
 
-    return loaded_backup_handler_object.transfer_backup_volume_to_offsite(*args)
+    :param transfer_task: VolumeTransferTask with the arguments of the transfer.
+    :return: same output as LocalBackupHandler.transfer_backup_volume_to_offsite method.
+    :raise UploadBackupException: if the worker was not initialized with a valid object.
+    """
+    return get_worker_backup_handler().transfer_backup_volume_to_offsite(*transfer_task)
 
 
 class LocalBackupHandler:
     """
     Class responsible for executing the backup upload feature for a customer.
 
-    It uses multi-processing to handle the volumes in parallel for each backup.
+    Files of all volumes are processed by a single file scheduler, and each processed volume is
+    transferred in parallel by a pool of processes. Both are shared by the backups of the customer,
+    so the volumes of a backup start being processed while the last volumes of the previous one
+    are still transferred. Backups are still finished one at a time, in order.
     """
 
     def __init__(self, offsite_config, onsite_config, customer_conf, gpg_manager, process_pool_size,
-                 thread_pool_size, transfer_pool_size, logger, rsync_ssh=True):
+                 thread_pool_size, transfer_pool_size, logger, rsync_ssh=True,
+                 stream_upload=False, backup_pipeline_depth=DEFAULT_BACKUP_PIPELINE_DEPTH,
+                 temp_space_mb=None, bandwidth_limiter=None, adaptive_concurrency=False,
+                 min_concurrency=DEFAULT_MIN_CONCURRENCY, seekable_archive=False):
         """
         Initialize Local Backup Handler object.
 
         :param offsite_config: details of the off-site server.
         :param customer_conf: details of the local customer server.
         :param gpg_manager: gpg manager object to handle encryption and decryption.
-        :param process_pool_size: maximum number of running process at a time.
-        :param thread_pool_size: maximum number of running threads at a time.
+        :param process_pool_size: maximum number of volumes being archived at a time.
+        :param thread_pool_size: number of files processed at a time per volume being archived,
+        so that up to process_pool_size * thread_pool_size files are processed at a time.
         :param transfer_pool_size: number of running rsync processes.
         :param logger: logger object.
         :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon.
+        :param stream_upload: whether to stream processed volumes straight to off-site as a tar
+        archive, instead of archiving them in the temporary folder before the transfer.
+        :param backup_pipeline_depth: maximum number of backups being processed at a time.
+        :param temp_space_mb: temporary disk space in MB the customer may use, when it is shared
+        with other customers uploaded at the same time. None to use all free space. It also
+        bounds the space held by volumes waiting to be transferred, like the temporary space
+        budget of the onsite configuration.
+        :param bandwidth_limiter: BandwidthLimiter shared by all transfers of the run, None if
+        transfers are not limited.
+        :param adaptive_concurrency: whether the number of files processed and volumes transferred
+        at a time is adapted to the measured throughput, up to the pool sizes.
+        :param min_concurrency: lowest number of files processed and of volumes transferred at a
+        time when the concurrency is adapted.
+        :param seekable_archive: whether each archived volume is uploaded with a table of contents
+        of its members, so that a single member can be read back by a ranged read.
         """
         self.customer_conf = customer_conf
         self.offsite_config = offsite_config
         self.onsite_config = onsite_config
+        self.transfer_manager = get_transfer_manager(offsite_config.transfer_backend)
 
         self.remote_root_path = os.path.join(self.offsite_config.full_path, self.customer_conf.name)
         self.remote_root_container_path = os.path.join(self.offsite_config.full_container_path, self.customer_conf.name)
@@ -117,8 +169,19 @@ class LocalBackupHandler:
         self.thread_pool_size = thread_pool_size
         self.transfer_pool_size = transfer_pool_size
         self.rsync_ssh = rsync_ssh
-        self.backup_output_dict = None
+        self.stream_upload = stream_upload
+        self.backup_pipeline_depth = max(1, backup_pipeline_depth)
+        self.temp_space_mb = temp_space_mb
+        self.bandwidth_limiter = bandwidth_limiter
+        self.adaptive_concurrency = adaptive_concurrency
+        self.min_concurrency = min_concurrency
+        self.seekable_archive = seekable_archive
         self.transfer_pool = None
+        self.file_scheduler = None
+        self.temp_space_budget = None
+        self.transfer_limit = None
+        self.concurrency_controller = None
+        self.checksum_report_dict = {}
         self.serialized_object = dill.dumps(self)
 
     @timer_delay
@@ -136,39 +199,29 @@ class LocalBackupHandler:
         """
         local_backup_list = self.get_and_validate_onsite_backups_list(backup_tag)
 
-        self.validate_create_offsite_onsite_base_paths()
+        self.validate_create_offsite_onsite_base_paths(local_backup_list)
 
         self.logger.log_info("Doing backup of: {}, directories: {}"
                              .format(self.customer_conf.name, local_backup_list))
 
         backup_error_list = []
-        for current_backup_folder_name in local_backup_list:
-            remote_current_backup_path = os.path.join(self.remote_root_path,
-                                                      current_backup_folder_name)
-            remote_current_backup_az_path = os.path.join(self.remote_root_container_path,
-                                                         current_backup_folder_name)
-
-            temp_current_backup_path = os.path.join(self.temp_customer_root_path,
-                                                    current_backup_folder_name)
-
-            try:
-                if not create_path(temp_current_backup_path):
-                    raise UploadBackupException(ExceptionCodes.CannotCreatePath,
-                                                temp_current_backup_path)
+        backup_run_list = []
 
-                if not create_remote_dir(self.offsite_config.host, remote_current_backup_path):
-                    raise UploadBackupException(ExceptionCodes.CannotCreatePath,
-                                                remote_current_backup_path)
-
-                self.process_backup(current_backup_folder_name, temp_current_backup_path,
-                                    remote_current_backup_path, remote_current_backup_az_path)
+        self.start_pools()
+        try:
+            for current_backup_folder_name in local_backup_list:
+                try:
+                    backup_run_list.append(self.start_backup(current_backup_folder_name))
+                except BurException as backup_exception:
+                    backup_error_list.append(backup_exception.__str__())
 
-                if not remove_path(temp_current_backup_path):
-                    self.logger.error("Error while removing temporary backup folder '{}'."
-                                      .format(temp_current_backup_path))
+                while len(backup_run_list) >= self.backup_pipeline_depth:
+                    self.complete_backup(backup_run_list.pop(0), backup_error_list)
 
-            except UploadBackupException as backup_exception:
-                backup_error_list.append(backup_exception.__str__())
+            while backup_run_list:
+                self.complete_backup(backup_run_list.pop(0), backup_error_list)
+        finally:
+            self.stop_pools()
 
         if backup_error_list:
             raise UploadBackupException(ExceptionCodes.ProcessBackupListErrors,
@@ -177,6 +230,142 @@ class LocalBackupHandler:
 
         return local_backup_list
 
+    def start_pools(self):
+        """Start the file scheduler and the transfer pool shared by the backups of the customer."""
+        self.transfer_pool = mp.Pool(self.transfer_pool_size, init_local_backup_handler_worker,
+                                     (self.serialized_object,))
+
+        process_limit = None
+        if self.adaptive_concurrency:
+            process_limit = AdaptiveLimit('process', self.min_concurrency,
+                                          self.process_pool_size * self.thread_pool_size)
+            self.transfer_limit = AdaptiveLimit('transfer', self.min_concurrency,
+                                                self.transfer_pool_size)
+
+        self.file_scheduler = FileScheduler(self.logger,
+                                            self.gpg_manager.stream_compress_encrypt_file,
+                                            self.process_pool_size * self.thread_pool_size,
+                                            self.finish_volume,
+                                            self.on_volume_file_ready if self.stream_upload
+                                            else None,
+                                            self.process_pool_size,
+                                            process_limit)
+
+        temp_budget_mb = self.get_temp_budget_mb()
+        if temp_budget_mb is not None:
+            self.logger.info("Volumes waiting to be transferred may hold up to {}MB of temporary "
+                             "space.".format(temp_budget_mb))
+            self.temp_space_budget = TempSpaceBudget(temp_budget_mb)
+
+        if self.adaptive_concurrency:
+            self.concurrency_controller = ConcurrencyController(
+                self.logger, process_limit, self.transfer_limit, self.temp_space_budget)
+            self.concurrency_controller.start()
+
+    def stop_pools(self):
+        """Wait for the volumes still in the file scheduler and the transfer pool to finish."""
+        if self.file_scheduler is not None:
+            self.file_scheduler.shutdown()
+            self.file_scheduler = None
+
+        if self.transfer_pool is not None:
+            self.transfer_pool.close()
+            self.transfer_pool.join()
+            self.transfer_pool = None
+
+        if self.concurrency_controller is not None:
+            self.concurrency_controller.stop()
+            self.concurrency_controller = None
+
+        self.temp_space_budget = None
+        self.transfer_limit = None
+
+    def get_temp_budget_mb(self):
+        """
+        Get the temporary space the volumes waiting to be transferred may hold at a time.
+
+        :return: space in MB, or None if not limited.
+        """
+        temp_budget_mb_list = [temp_budget_mb for temp_budget_mb in
+                               [self.onsite_config.temp_budget_mb, self.temp_space_mb]
+                               if temp_budget_mb is not None]
+
+        return min(temp_budget_mb_list) if temp_budget_mb_list else None
+
+    def get_transfer_cap_mbps(self):
+        """
+        Get the rate a transfer started now may use.
+
+        :return: rate in megabits per second or None if not limited.
+        """
+        if self.bandwidth_limiter is None:
+            return None
+
+        return self.bandwidth_limiter.get_transfer_cap_mbps()
+
+    def reserve_temp_space(self, backup_run, volume_name, content_path, size_factor=1):
+        """
+        Reserve the temporary space of a volume, waiting while the transfers are behind.
+
+        :param backup_run: BackupRun object of the backup the volume belongs to.
+        :param volume_name: name of the volume.
+        :param content_path: path whose size is the estimated space of the volume.
+        :param size_factor: times the size of content_path is held in the temporary folder.
+        :raise UtilsException: if the size of content_path cannot be read.
+        """
+        if self.temp_space_budget is None:
+            return
+
+        self.temp_space_budget.reserve((backup_run.backup_folder_name, volume_name),
+                                       get_size_on_disk(content_path) * size_factor)
+
+    def release_temp_space(self, backup_run, volume_name):
+        """
+        Give back the temporary space of a volume that left the temporary folder.
+
+        :param backup_run: BackupRun object of the backup the volume belongs to.
+        :param volume_name: name of the volume.
+        """
+        if self.temp_space_budget is not None:
+            self.temp_space_budget.release((backup_run.backup_folder_name, volume_name))
+
+    def acquire_transfer_slot(self, transfer_key, processed_volume_path):
+        """
+        Wait for a slot of the transfer limit, if the concurrency is adapted.
+
+        :param transfer_key: identification of the volume transfer.
+        :param processed_volume_path: path of the archive to be transferred.
+        """
+        if self.transfer_limit is None:
+            return
+
+        try:
+            volume_size = os.path.getsize(processed_volume_path)
+        except EnvironmentError:
+            volume_size = 0
+
+        self.transfer_limit.acquire(transfer_key, volume_size)
+
+    def complete_backup(self, backup_run, backup_error_list):
+        """
+        Finish a backup, removing its temporary folder if it succeeds.
+
+        :param backup_run: BackupRun object of the backup.
+        :param backup_error_list: list to add the error message to, if the backup fails.
+        :return: true, if the backup was finished successfully; false otherwise.
+        """
+        try:
+            self.finish_backup(backup_run)
+        except BurException as backup_exception:
+            backup_error_list.append(backup_exception.__str__())
+            return False
+
+        if not remove_path(backup_run.temp_backup_path):
+            self.logger.error("Error while removing temporary backup folder '{}'."
+                              .format(backup_run.temp_backup_path))
+
+        return True
+
     def get_and_validate_onsite_backups_list(self, backup_tag=None):
         """
         Prepare the list of valid onsite backups to be processed and uploaded to off-site.
@@ -201,16 +390,25 @@ class LocalBackupHandler:
 
         return valid_onsite_backups_list
 
-    def validate_create_offsite_onsite_base_paths(self):
+    def validate_create_offsite_onsite_base_paths(self, backup_folder_list=None):
         """
         Validate if the customer paths exist on off-site and create temporary paths onsite.
 
+        The off-site folders of the customer and of its backups are created by a single remote
+        command.
+
+        :param backup_folder_list: names of the backups to be uploaded.
         :return: true, if success.
         :raise UploadBackupException: if any path cannot be validated.
         """
-        if not create_remote_dir(self.offsite_config.host, self.remote_root_path):
+        remote_dir_list = [self.remote_root_path] + [
+            os.path.join(self.remote_root_path, backup_folder_name) for backup_folder_name
+            in backup_folder_list or []]
+
+        not_created_dir_list = create_remote_dir_list(self.offsite_config.host, remote_dir_list)
+        if not_created_dir_list:
             raise UploadBackupException(ExceptionCodes.CannotCreatePath,
-                                        [self.remote_root_path, self.customer_conf.name])
+                                        [not_created_dir_list, self.customer_conf.name])
 
         if not create_path(self.onsite_config.temp_path):
             raise UploadBackupException(ExceptionCodes.CannotCreatePath,
@@ -249,89 +447,128 @@ class LocalBackupHandler:
 
         return []
 
-    @collect_performance_data
-    def process_backup(self, backup_folder_name, temp_backup_path, remote_backup_path, remote_az_backup_path):
+    def start_backup(self, backup_folder_name):
         """
-        Compress, encrypt and transfer volumes of the current backup to the off-site server.
+        Start the upload of a backup, handing its volumes to the shared pools.
+
+        Returns once every volume was submitted, which may happen while volumes of previous
+        backups are still being processed or transferred.
 
         :param backup_folder_name: backup directory name.
-        :param temp_backup_path: backup temporary directory path.
-        :param remote_backup_path: remote backup path.
-        :param remote_az_backup_path: Remote Azure storage path for backup.
-        :return: tuple with backup id, backup output dictionary and total processing time.
+        :return: BackupRun object of the backup.
+        :raise UploadBackupException: if the backup cannot be started.
+        :raise UtilsException: if there is not enough disk space to process the backup.
         """
-        time_start = time.time()
-
         local_backup_path = os.path.join(self.customer_conf.backup_path, backup_folder_name)
+        remote_backup_path = os.path.join(self.remote_root_path, backup_folder_name)
+        remote_az_backup_path = os.path.join(self.remote_root_container_path, backup_folder_name)
+        temp_backup_path = os.path.join(self.temp_customer_root_path, backup_folder_name)
 
-        check_local_disk_space_for_upload(local_backup_path, temp_backup_path, self.logger)
+        if not create_path(temp_backup_path):
+            raise UploadBackupException(ExceptionCodes.CannotCreatePath, temp_backup_path)
 
-        self.backup_output_dict = mp.Manager().dict()
+        check_local_disk_space_for_upload(local_backup_path, temp_backup_path, self.logger,
+                                          self.temp_space_mb, self.get_temp_budget_mb())
 
-        self.transfer_pool = mp.Pool(self.transfer_pool_size)
+        backup_run = BackupRun(backup_folder_name, local_backup_path, temp_backup_path,
+                               remote_backup_path, remote_az_backup_path)
 
-        file_path_list, volume_path_list, volume_path_to_process_list = \
-            self.validate_already_processed_volumes(local_backup_path, temp_backup_path,
-                                                    remote_backup_path, remote_az_backup_path)
+        try:
+            volume_path_to_process_list = self.validate_already_processed_volumes(backup_run)
 
-        if volume_path_to_process_list:
-            self.logger.info("Processing list of volumes: {}.".format(volume_path_to_process_list))
+            if volume_path_to_process_list:
+                self.logger.info("Processing list of volumes: {}.".format(
+                    volume_path_to_process_list))
 
-        process_pool = mp.Pool(self.process_pool_size)
+            size_factor = 1 if self.stream_upload else TEMP_SPACE_ARCHIVE_FACTOR
 
-        for volume_path in volume_path_to_process_list:
-            volume_name = os.path.basename(volume_path)
+            for volume_path in volume_path_to_process_list:
+                self.reserve_temp_space(backup_run, os.path.basename(volume_path), volume_path,
+                                        size_factor)
 
-            temp_volume_folder_path = os.path.join(temp_backup_path, volume_name)
+                volume_task = self.start_volume(volume_path, backup_run)
 
-            process_pool.apply_async(unwrapper_local_backup_handler_function,
-                                     (self.serialized_object,
-                                      LocalBackupHandler.process_volume.__name__, volume_path,
-                                      volume_name, temp_volume_folder_path, remote_backup_path, remote_az_backup_path),
-                                     callback=self.on_volume_ready)
-        process_pool.close()
-        process_pool.join()
+                backup_run.add_pending_volume()
 
-        self.transfer_pool.close()
-        self.transfer_pool.join()
+                self.file_scheduler.add_volume(volume_task, (
+                    file_path for _, file_path in GnupgManager.get_source_file_list(volume_path)))
+        finally:
+            backup_run.set_all_volumes_submitted()
 
-        self.check_backup_output_errors()
+        return backup_run
 
-        file_name_list = self.process_backup_metadata_files(file_path_list, temp_backup_path,
-                                                            remote_backup_path, remote_az_backup_path)
+    @collect_performance_data
+    def finish_backup(self, backup_run):
+        """
+        Wait for the volumes of a backup and transfer its metadata and descriptors to off-site.
 
-        self.process_bur_descriptors(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, file_name_list,
-                                     temp_backup_path, remote_backup_path, remote_az_backup_path)
+        :param backup_run: BackupRun object of the backup.
+        :return: tuple with backup id, dictionary with the VolumeResult of each volume and total
+        processing time.
+        :raise UploadBackupException: if any volume or metadata file failed.
+        """
+        backup_output_dict = backup_run.wait_volumes()
 
-        volume_name_list = [os.path.basename(file_path) for file_path in volume_path_list]
+        add_checksum_output(backup_output_dict, backup_run.local_backup_path,
+                            self.checksum_report_dict)
 
-        self.process_bur_descriptors(BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, volume_name_list,
-                                     temp_backup_path, remote_backup_path, remote_az_backup_path)
+        self.check_backup_output_errors(backup_output_dict)
 
-        time_end = time.time()
+        file_name_list = self.process_backup_metadata_files(
+            backup_run.file_path_list, backup_run.temp_backup_path, backup_run.remote_backup_path,
+            backup_run.remote_az_backup_path)
+
+        volume_name_list = [os.path.basename(file_path)
+                            for file_path in backup_run.volume_path_list]
+
+        self.process_bur_descriptors([(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, file_name_list),
+                                      (BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, volume_name_list)],
+                                     backup_run.temp_backup_path, backup_run.remote_backup_path,
+                                     backup_run.remote_az_backup_path)
+
+        self.record_uploaded_backup(backup_run, volume_name_list)
 
         # it is not possible collect the performance data with timeit in this case.
-        total_backup_processing_time = time_end - time_start
+        total_backup_processing_time = backup_run.get_processing_time()
+
+        bur_id = "{}_{}".format(self.customer_conf.name, backup_run.backup_folder_name)
+
+        return bur_id, backup_output_dict, total_backup_processing_time
 
-        bur_id = "{}_{}".format(self.customer_conf.name, backup_folder_name)
+    def record_uploaded_backup(self, backup_run, volume_name_list):
+        """
+        Record a backup uploaded to off-site in the off-site catalog.
+
+        :param backup_run: BackupRun object of the backup.
+        :param volume_name_list: list of volume names of the backup.
+        :return: true, if the backup was recorded.
+        """
+        try:
+            backup_size_mb = get_size_on_disk(backup_run.local_backup_path)
+        except UtilsException:
+            backup_size_mb = None
 
-        return bur_id, self.backup_output_dict, total_backup_processing_time
+        return record_offsite_backup(OffsiteBackupEntry(
+            backup_run.backup_folder_name, self.customer_conf.name,
+            backup_run.remote_backup_path.rstrip('/'), backup_run.remote_az_backup_path,
+            backup_size_mb, volume_name_list, time.time(), BACKUP_STATUS_UPLOADED), self.logger)
 
-    def validate_already_processed_volumes(self, local_backup_path, temp_backup_path,
-                                           remote_backup_path, remote_az_backup_path=None):
+    def validate_already_processed_volumes(self, backup_run):
         """
-        Retrieve the list of files and volumes to be processed still.
+        Retrieve the list of volumes to be processed still.
 
         Check the system for already processed volumes for this backup and send them to off-site
         using the transfer pool.
 
-        :param local_backup_path: path of the backup in the system.
-        :param temp_backup_path: path of the temporary location of volumes before transferring.
-        :param remote_backup_path: backup location on off-site.
-        :param remote_az_backup_path: backup folder location in Azure storage
-        :return: tuple with list of files, list of all volumes and list of volumes to be processed.
+        The lists of files and volumes of the backup are stored in the backup run.
+
+        :param backup_run: BackupRun object of the backup.
+        :return: list of volumes to be processed.
         :raise UploadBackupException: if cannot get volume list or metadata information.
         """
+        local_backup_path = backup_run.local_backup_path
+        temp_backup_path = backup_run.temp_backup_path
+
         volume_path_list, file_path_list = get_folder_file_lists_from_dir(local_backup_path)
 
         if not volume_path_list:
@@ -340,7 +577,11 @@ class LocalBackupHandler:
         if not file_path_list:
             raise UploadBackupException(ExceptionCodes.NoMetadataForBackup, local_backup_path)
 
-        uploaded_volume_name_list = self.get_list_processed_vols_names_offsite(remote_backup_path)
+        backup_run.file_path_list = file_path_list
+        backup_run.volume_path_list = volume_path_list
+
+        uploaded_volume_name_list = self.get_list_processed_vols_names_offsite(
+            backup_run.remote_backup_path)
 
         volume_path_list_to_process = []
         for volume_path in volume_path_list:
@@ -358,10 +599,11 @@ class LocalBackupHandler:
                 self.logger.info("Found already processed volume in the system '{}'. "
                                  "Sending it to off-site.".format(proc_tar_volume_path))
 
-                volume_output = LocalBackupHandler.get_empty_volume_output(proc_tar_volume_path,
-                                                                           True)
+                volume_output = VolumeResult(proc_tar_volume_path, True)
+
+                self.reserve_temp_space(backup_run, volume_name, proc_tar_volume_path)
 
-                self.on_volume_ready((volume_name, volume_output, remote_backup_path, remote_az_backup_path))
+                self.on_volume_ready((volume_name, volume_output, backup_run))
 
                 continue
 
@@ -375,34 +617,61 @@ class LocalBackupHandler:
 
             volume_path_list_to_process.append(volume_path)
 
-        return file_path_list, volume_path_list, volume_path_list_to_process
+        return volume_path_list_to_process
+
+    def get_offsite_path_stats(self, path_list):
+        """
+        Get which off-site paths exist, with a single remote command.
+
+        :param path_list: list of off-site paths.
+        :return: dictionary with the RemotePathStat of each path, None if it does not exist. Empty
+        if the paths cannot be checked, so that they are all sent again.
+        """
+        try:
+            return get_remote_path_stats(self.offsite_config.host, path_list)
+        except UtilsException as exception:
+            self.logger.warning("Could not check off-site paths {}: {}".format(path_list,
+                                                                              exception))
 
-    def process_bur_descriptors(self, descriptor_name, content_list, temp_backup_path,
-                                remote_backup_path, remote_az_backup_path):
+        return {}
+
+    def process_bur_descriptors(self, descriptor_list, temp_backup_path, remote_backup_path,
+                                remote_az_backup_path):
         """
         Create and transfer BUR descriptor files with the list of file and volume names to off-site.
 
-        :param descriptor_name: name of the descriptor to be processed.
-        :param content_list: content of the descriptor in list format.
+        Descriptors not on off-site yet are transferred together.
+
+        :param descriptor_list: list of tuples (descriptor name, content in list format).
         :param temp_backup_path: temporary backup processing directory.
         :param remote_backup_path: remote backup location.
         :param remote_az_backup_path: remote azure storage location
         :return: true, if success.
         """
-        descriptor_path_offsite = os.path.join(remote_backup_path, descriptor_name)
+        pickle_file_list = []
+
+        offsite_path_stat_dict = self.get_offsite_path_stats(
+            [os.path.join(remote_backup_path, descriptor_name) for descriptor_name, _
+             in descriptor_list])
+
+        for descriptor_name, content_list in descriptor_list:
+            descriptor_path_offsite = os.path.join(remote_backup_path, descriptor_name)
+
+            if offsite_path_stat_dict.get(descriptor_path_offsite) is not None:
+                self.logger.warning("Backup descriptor {} was already uploaded to off-site."
+                                    .format(descriptor_name))
+                continue
 
-        if not check_remote_path_exists(self.offsite_config.host, descriptor_path_offsite):
             self.logger.info("Creating and sending BUR file descriptor file '{}' to off-site."
                              .format(descriptor_name))
 
-            target_dir = "{}:{}".format(self.offsite_config.host, remote_backup_path)
+            pickle_file_list.append((os.path.join(temp_backup_path, descriptor_name),
+                                     content_list))
 
-            LocalBackupHandler.create_transfer_pickle_file(
-                os.path.join(temp_backup_path, descriptor_name), content_list, target_dir, remote_az_backup_path,
-                self.rsync_ssh)
-
-        self.logger.warning("Backup descriptor {} was already uploaded to off-site.".format(
-            descriptor_name))
+        if pickle_file_list:
+            LocalBackupHandler.create_transfer_pickle_files(pickle_file_list, remote_az_backup_path,
+                                                            self.get_transfer_cap_mbps(),
+                                                            self.transfer_manager)
 
         return True
 
@@ -423,15 +692,17 @@ class LocalBackupHandler:
         """
         self.logger.info("Processing backup standalone files after volumes.")
 
-        target_dir = "{}:{}".format(self.offsite_config.host, remote_backup_path)
+        file_to_transfer_list = []
 
-        processed_file_name_list = []
+        offsite_path_stat_dict = self.get_offsite_path_stats(
+            [os.path.join(remote_backup_path, os.path.basename(file_path))
+             for file_path in file_list])
 
         for file_path in file_list:
             file_name = os.path.basename(file_path)
 
             file_path_offsite = os.path.join(remote_backup_path, file_name)
-            if check_remote_path_exists(self.offsite_config.host, file_path_offsite):
+            if offsite_path_stat_dict.get(file_path_offsite) is not None:
                 self.logger.warning("Backup metadata {} was already uploaded to "
                                     "off-site.".format(file_name))
                 continue
@@ -439,8 +710,8 @@ class LocalBackupHandler:
             if SUCCESS_FLAG_FILE == file_name:
                 file_to_transfer = file_path
             elif BACKUP_META_FILE == file_name:
-                processed_file_path = self.gpg_manager.compress_encrypt_file(file_path,
-                                                                             temp_backup_path)
+                processed_file_path = self.gpg_manager.stream_compress_encrypt_file(
+                    file_path, temp_backup_path)
 
                 self.logger.info("Archiving backup metadata file '{}'.".format(processed_file_path))
 
@@ -458,12 +729,14 @@ class LocalBackupHandler:
             self.logger.info("Transferring backup metadata file '{}' to '{}'."
                              .format(file_to_transfer, remote_az_backup_path))
 
-            #RsyncManager.transfer_file(file_to_transfer, target_dir, self.rsync_ssh)
-            AzCopyManager.transfer_file(file_to_transfer, remote_az_backup_path)
+            file_to_transfer_list.append(file_to_transfer)
 
-            processed_file_name_list.append(os.path.basename(file_to_transfer))
+        if file_to_transfer_list:
+            check_transfer_result_dict(self.transfer_manager.transfer_file_list(
+                [(file_to_transfer, remote_az_backup_path)
+                 for file_to_transfer in file_to_transfer_list], self.get_transfer_cap_mbps()))
 
-        return processed_file_name_list
+        return [os.path.basename(file_to_transfer) for file_to_transfer in file_to_transfer_list]
 
     def on_volume_ready(self, on_volume_ready_tuple):
         """
@@ -472,48 +745,64 @@ class LocalBackupHandler:
         If the volume is ready, add a new job to the transfer pool, so that it starts uploading
         the volume to off-site.
 
-        Populate the backup dictionary with details of the volume's processing.
+        Populate the backup run with the VolumeResult of the volume.
+
+        When the volume was already streamed to off-site while being processed, its output is just
+        stored as a transferred volume.
 
-        :param on_volume_ready_tuple: volume_name, volume_output_dictionary, remote_backup_path.
+        :param on_volume_ready_tuple: volume_name, VolumeResult, BackupRun object.
         :return: true, if volume was processed and sent to the transfer pool; false, otherwise.
         """
         volume_name = on_volume_ready_tuple[
             VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_NAME.value - 1]
         volume_output = on_volume_ready_tuple[
             VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_OUTPUT.value - 1]
-        remote_backup_path = on_volume_ready_tuple[
-            VOLUME_CALLBACK_OUTPUT_INDEX.REMOTE_BACKUP_PATH.value - 1]
-        remote_az_backup_path = on_volume_ready_tuple[
-            VOLUME_CALLBACK_OUTPUT_INDEX.REMOTE_AZ_BACKUP_PATH.value -1]
+        backup_run = on_volume_ready_tuple[
+            VOLUME_CALLBACK_OUTPUT_INDEX.BACKUP_RUN.value - 1]
 
-        if volume_output[VOLUME_OUTPUT_KEYS.status.name]:
-            processed_volume_path = volume_output[VOLUME_OUTPUT_KEYS.volume_path.name]
+        if volume_output.status and volume_output.rsync_output is not None:
+            return self.on_volume_transferred(backup_run, (volume_name, volume_output))
+
+        if volume_output.status:
+            processed_volume_path = volume_output.volume_path
 
             volume_size_string = get_formatted_size_on_disk(processed_volume_path)
 
             self.logger.info("Volume '{}' processed successfully. Size: {}. Starting to send it."
                              .format(processed_volume_path, volume_size_string))
 
-            transfer_func_name = LocalBackupHandler.transfer_backup_volume_to_offsite.__name__
+            transfer_key = (backup_run.backup_folder_name, volume_name)
+            self.acquire_transfer_slot(transfer_key, processed_volume_path)
+
+            async_result = self.transfer_pool.apply_async(
+                run_volume_transfer_task, (VolumeTransferTask(
+                    volume_name, volume_output, processed_volume_path,
+                    backup_run.remote_backup_path, backup_run.remote_az_backup_path),),
+                callback=partial(self.on_volume_transferred, backup_run))
+
+            backup_run.add_transfer(volume_name, volume_output, async_result)
+
+            if self.temp_space_budget is not None:
+                self.temp_space_budget.set_transfer(transfer_key, async_result)
+
+            if self.transfer_limit is not None:
+                self.transfer_limit.set_job(transfer_key, async_result)
 
-            self.transfer_pool.apply_async(unwrapper_local_backup_handler_function,
-                                           (self.serialized_object, transfer_func_name,
-                                            volume_name, volume_output, processed_volume_path,
-                                            remote_backup_path, remote_az_backup_path),
-                                           callback=self.on_volume_transferred)
             return True
 
         self.logger.error("An error happened while processing volume '{}'.".format(volume_name))
 
-        self.backup_output_dict[volume_name] = volume_output
+        backup_run.set_volume_output(volume_name, volume_output)
+        self.release_temp_space(backup_run, volume_name)
 
         return False
 
-    def on_volume_transferred(self, on_volume_transferred_tuple):
+    def on_volume_transferred(self, backup_run, on_volume_transferred_tuple):
         """
         Return a callback after a volume is transferred.
 
-        :param on_volume_transferred_tuple: tuple with volume_name and volume_output_dictionary.
+        :param backup_run: BackupRun object of the backup the volume belongs to.
+        :param on_volume_transferred_tuple: tuple with volume_name and VolumeResult.
         :return: volume output status.
         """
         volume_name = on_volume_transferred_tuple[
@@ -521,123 +810,303 @@ class LocalBackupHandler:
         volume_output = on_volume_transferred_tuple[
             VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_OUTPUT.value - 1]
 
-        self.backup_output_dict[volume_name] = volume_output
+        backup_run.set_volume_output(volume_name, volume_output)
+        self.release_temp_space(backup_run, volume_name)
+
+        if self.transfer_limit is not None:
+            self.transfer_limit.release((backup_run.backup_folder_name, volume_name),
+                                        volume_output.status)
 
-        return volume_output[VOLUME_OUTPUT_KEYS.status.name]
+        return volume_output.status
 
-    def check_backup_output_errors(self):
+    def check_backup_output_errors(self, backup_output_dict):
         """
-        Check the output dictionary of a backup download for errors.
+        Check the output dictionary of a backup upload for errors.
 
+        :param backup_output_dict: dictionary with the VolumeResult of each volume of the backup.
         :return: true, if no error was found.
         :raise UploadBackupException: if errors during the process were detected.
         """
         failed_volume_error_message_list = []
 
-        for key, _ in self.backup_output_dict.items():
-            if not self.backup_output_dict[key][VOLUME_OUTPUT_KEYS.status.name]:
-                error_message = self.backup_output_dict[key][
-                    VOLUME_OUTPUT_KEYS.output.name]
-                failed_volume_error_message_list.append(error_message)
-                self.logger.error(error_message)
+        for volume_result in backup_output_dict.values():
+            if not volume_result.status:
+                failed_volume_error_message_list.append(volume_result.output)
+                self.logger.error(volume_result.output)
 
         if failed_volume_error_message_list:
             raise UploadBackupException(parameters=failed_volume_error_message_list)
 
         return True
 
-    def process_volume(self, volume_path, tmp_volume_path):
+    def start_volume(self, volume_path, backup_run):
         """
-        Process a single volume folder by encrypting the files and compressing the folder.
+        Prepare a volume to have its files processed by the file scheduler.
+
+        If stream upload is enabled, the transfer of the volume archive is started, so that each
+        file is sent to off-site as soon as it is processed.
+
+        Errors are kept in the returned task, so the volume is reported when it is finished.
 
         :param volume_path: path of the volume.
-        :param tmp_volume_path: local temporary path to store auxiliary files.
-        :return: dictionary with the output of the processed volume.
-        :raise UploadBackupException: if an error happens during the process.
+        :param backup_run: BackupRun object of the backup the volume belongs to.
+        :return: VolumeTask object of the volume.
         """
-        self.logger.log_info("Process_id: {}, processing volume: {}, for: {}"
-                             .format(os.getpid(), volume_path, self.customer_conf.name))
+        volume_name = os.path.basename(volume_path)
+        tmp_volume_path = os.path.join(backup_run.temp_backup_path, volume_name)
+        remote_az_backup_path = backup_run.remote_az_backup_path
+
+        self.logger.log_info("Processing volume: {}, for: {}"
+                             .format(volume_path, self.customer_conf.name))
 
-        volume_output_dict = LocalBackupHandler.get_empty_volume_output()
+        volume_task = VolumeTask(volume_name, volume_path, tmp_volume_path,
+                                 {'backup_run': backup_run})
 
         try:
             if not create_path(tmp_volume_path):
                 raise UploadBackupException(ExceptionCodes.CannotCreatePath, tmp_volume_path)
 
-            self.logger.info("Compressing and encrypting files from volume '{}'."
-                             .format(volume_path))
+            if self.stream_upload:
+                tar_volume_name = "{}{}".format(volume_name, PROCESSED_VOLUME_ENDS_WITH)
+
+                self.logger.info("Streaming volume '{}' to '{}'.".format(tar_volume_name,
+                                                                          remote_az_backup_path))
+
+                stream_transfer = AzCopyStreamTransfer(tar_volume_name, remote_az_backup_path)
+                volume_task.context['stream_transfer'] = stream_transfer
+
+                stream_pipe = stream_transfer.start()
+                if self.bandwidth_limiter is not None:
+                    stream_pipe = ThrottledWriter(stream_pipe, self.bandwidth_limiter)
+
+                tar_stream = open_tar_stream(stream_pipe)
+                volume_task.context['tar_stream'] = tar_stream
+
+                add_file_to_tar_stream(tar_stream, tmp_volume_path, volume_name)
+
+        except BurException as processing_exception:
+            volume_task.error_list.append(processing_exception.__str__())
+
+        return volume_task
+
+    def on_volume_file_ready(self, volume_task, processed_file_path):
+        """
+        Append a processed file to the tar stream of its volume, removing it from disk.
+
+        :param volume_task: VolumeTask object of the volume.
+        :param processed_file_path: path of the compressed and encrypted file.
+        :return: true, if success.
+        """
+        return add_file_to_tar_stream(volume_task.context['tar_stream'], processed_file_path,
+                                      arc_dir=volume_task.volume_name, remove_added=True)
+
+    def finish_volume(self, volume_task):
+        """
+        Finish a volume after all its files were processed and send it to the transfer stage.
+
+        :param volume_task: VolumeTask object of the volume.
+        :return: true, if volume was processed and sent to the transfer pool; false, otherwise.
+        """
+        backup_run = volume_task.context['backup_run']
+
+        try:
+            self.logger.log_time("Elapsed time to process the volume '{}'"
+                                 .format(volume_task.volume_path), volume_task.processing_time)
+
+            if self.stream_upload:
+                volume_output = self.finish_stream_volume(volume_task)
+            else:
+                volume_output = self.archive_volume(volume_task)
+
+            return self.on_volume_ready((volume_task.volume_name, volume_output, backup_run))
+        finally:
+            backup_run.finish_pending_volume()
+
+    def archive_volume(self, volume_task):
+        """
+        Archive the folder with the processed files of a volume.
+
+        :param volume_task: VolumeTask object of the volume.
+        :return: VolumeResult of the processed volume.
+        """
+        volume_result = VolumeResult()
+        volume_result.processing_time = volume_task.processing_time
 
-            total_volume_process_time = []
-            self.gpg_manager.compress_encrypt_file_list(volume_path, tmp_volume_path,
-                                                        self.thread_pool_size,
-                                                        get_elapsed_time=total_volume_process_time)
+        tmp_volume_path = volume_task.output_path
 
-            if total_volume_process_time:
-                self.logger.log_time("Elapsed time to process the volume '{}'"
-                                     .format(volume_path), total_volume_process_time[0])
-                volume_output_dict[VOLUME_OUTPUT_KEYS.processing_time.name] = \
-                    total_volume_process_time[0]
+        try:
+            if volume_task.error_list:
+                raise UploadBackupException(parameters=volume_task.error_list)
 
             self.logger.info("Archiving volume directory '{}' for customer {}."
                              .format(tmp_volume_path, self.customer_conf.name))
 
             volume_tar_time = []
-            compressed_volume_path = compress_file(tmp_volume_path, None, "w",
-                                                   get_elapsed_time=volume_tar_time)
+            if self.seekable_archive:
+                compressed_volume_path, _ = tar_file_with_toc(
+                    tmp_volume_path, os.path.dirname(tmp_volume_path),
+                    self.get_volume_original_size_dict(volume_task),
+                    get_elapsed_time=volume_tar_time)
+            else:
+                compressed_volume_path = compress_file(tmp_volume_path, None, "w",
+                                                       get_elapsed_time=volume_tar_time)
+
+            # an upload recorded for a previous archive cannot be resumed with the new one.
+            for journal_suffix in [JOB_JOURNAL_SUFFIX, BLOCK_JOURNAL_SUFFIX]:
+                remove_job_journal(compressed_volume_path + journal_suffix)
 
             if volume_tar_time:
                 self.logger.log_time("Elapsed time to archive the volume '{}'"
                                      .format(tmp_volume_path), volume_tar_time[0])
-                volume_output_dict[VOLUME_OUTPUT_KEYS.tar_time.name] = volume_tar_time[0]
+                volume_result.tar_time = volume_tar_time[0]
 
             if not remove_path(tmp_volume_path):
                 raise UploadBackupException(ExceptionCodes.CannotRemovePath, tmp_volume_path)
 
-            volume_output_dict[VOLUME_OUTPUT_KEYS.volume_path.name] = \
-                compressed_volume_path
-            volume_output_dict[VOLUME_OUTPUT_KEYS.status.name] = True
+            volume_result.volume_path = compressed_volume_path
+            volume_result.status = True
 
         except BurException as processing_exception:
-            volume_output_dict[VOLUME_OUTPUT_KEYS.output.name] = \
-                "Error while processing volume. {}".format(processing_exception.__str__())
+            volume_result.set_error("Error while processing volume. {}".format(
+                processing_exception.__str__()))
 
-        return volume_output_dict
+        return volume_result
+
+    @staticmethod
+    def get_volume_original_size_dict(volume_task):
+        """
+        Get the size of the files of a volume on-site, by their name in the volume archive.
+
+        :param volume_task: VolumeTask object of the volume.
+        :return: dictionary with the original size of each member of the volume archive.
+        """
+        original_size_dict = {}
+        for file_name, file_path in GnupgManager.get_source_file_list(volume_task.volume_path):
+            if os.path.isfile(file_path):
+                original_size_dict[os.path.join(volume_task.volume_name, file_name +
+                                                GZ_ENCRYPTED_FILE_ENDS_WITH)] = \
+                    os.path.getsize(file_path)
+
+        return original_size_dict
+
+    def transfer_volume_toc(self, volume_archive_path, remote_az_dir, cap_mbps=None):
+        """
+        Transfer the table of contents of a volume archive, once the archive is on off-site.
+
+        Volumes archived without a table of contents are skipped.
+
+        :param volume_archive_path: path of the volume archive.
+        :param remote_az_dir: remote azure storage location where the archive was sent.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :return: true, if a table of contents was transferred.
+        :raise UploadBackupException: if the table of contents cannot be removed after the
+        transfer.
+        """
+        toc_path = get_tar_toc_path(volume_archive_path)
+        if not os.path.exists(toc_path):
+            return False
+
+        self.transfer_manager.transfer_file(toc_path, remote_az_dir, cap_mbps)
+
+        if not remove_path(toc_path):
+            raise UploadBackupException(ExceptionCodes.CannotRemovePath, toc_path)
+
+        return True
+
+    def finish_stream_volume(self, volume_task):
+        """
+        Close the tar stream of a volume and wait for its transfer to off-site.
+
+        If any file of the volume failed, the transfer is aborted instead.
+
+        :param volume_task: VolumeTask object of the volume.
+        :return: VolumeResult of the processed and transferred volume.
+        """
+        volume_result = VolumeResult()
+        volume_result.processing_time = volume_task.processing_time
+
+        tmp_volume_path = volume_task.output_path
+        stream_transfer = volume_task.context.get('stream_transfer')
+
+        try:
+            if volume_task.error_list:
+                raise UploadBackupException(parameters=volume_task.error_list)
+
+            close_tar_stream(volume_task.context['tar_stream'])
+
+            volume_result.rsync_output = stream_transfer.finish()
+            stream_transfer = None
+
+            transfer_time = time.time() - volume_task.start_time
+            self.logger.log_time("Elapsed time to stream volume '{}'"
+                                 .format(volume_task.volume_path), transfer_time)
+            volume_result.transfer_time = transfer_time
+
+            self.logger.info("Volume '{}' was successfully streamed to off-site for customer {}."
+                             .format(volume_task.volume_path, self.customer_conf.name))
+
+            if not remove_path(tmp_volume_path):
+                raise UploadBackupException(ExceptionCodes.CannotRemovePath, tmp_volume_path)
+
+            volume_result.volume_path = "{}{}".format(
+                volume_task.volume_name, PROCESSED_VOLUME_ENDS_WITH)
+            volume_result.status = True
+
+        except BurException as processing_exception:
+            if stream_transfer is not None:
+                stream_transfer.abort()
+
+            remove_path(tmp_volume_path)
+
+            volume_result.set_error("Error while streaming volume. {}".format(
+                processing_exception.__str__()))
+
+        return volume_result
 
     def transfer_backup_volume_to_offsite(self, volume_name, volume_output,
                                           tmp_customer_volume_path, remote_dir, remote_az_dir):
         """
         Transfer a backup already compressed and encrypted to the off-site.
 
-        Results from the processing are stored in the output dictionary.
+        Results from the transfer are stored in the VolumeResult of the volume. The rate of the
+        transfer is capped by the bandwidth profile of the hour the transfer starts, not the hour
+        the volume was queued.
 
         :param volume_name: name of the volume to be transferred.
-        :param volume_output: output dictionary with results after processing the volume.
+        :param volume_output: VolumeResult with results after processing the volume.
         :param tmp_customer_volume_path: temporary folder where the backup volumes are stored.
         :param remote_dir: remote location to send the backup.
+        :param remote_az_dir: remote azure storage location to send the backup.
         :return: volume name and volume_output with updated data about the transferring process.
         """
-        volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name] = None
-        volume_output[VOLUME_OUTPUT_KEYS.transfer_time.name] = 0.0
+        volume_output.rsync_output = None
+        volume_output.transfer_time = 0.0
 
         try:
-            target_dir = "{}:{}".format(self.offsite_config.host, remote_dir)
-
             self.logger.log_info("Process_id: {}, transferring volume '{}' to '{}'".format(
                 os.getpid(), tmp_customer_volume_path, remote_az_dir))
 
             transfer_time = []
-            # rsync_output = RsyncManager.transfer_file(tmp_customer_volume_path, target_dir,
-            #                                           self.rsync_ssh,
-            #                                           get_elapsed_time=transfer_time)
 
-            azcopy_output = AzCopyManager.transfer_file(tmp_customer_volume_path, remote_az_dir)
+            progress_monitor = TransferProgressMonitor(self.logger, tmp_customer_volume_path)
+            cap_mbps = self.get_transfer_cap_mbps()
+            azcopy_output = self.transfer_manager.transfer_file(tmp_customer_volume_path,
+                                                                remote_az_dir, cap_mbps,
+                                                                resumable=True,
+                                                                on_progress=progress_monitor)
+
+            if progress_monitor.get_elapsed_time() is not None:
+                transfer_time.append(progress_monitor.get_elapsed_time())
 
             if transfer_time:
                 self.logger.log_time("Elapsed time to transfer volume '{}'"
                                      .format(tmp_customer_volume_path), transfer_time[0])
-                volume_output[VOLUME_OUTPUT_KEYS.transfer_time.name] = transfer_time[0]
+                volume_output.transfer_time = transfer_time[0]
 
-            volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name] = azcopy_output
+            volume_output.rsync_output = azcopy_output
+
+            if self.seekable_archive:
+                self.transfer_volume_toc(tmp_customer_volume_path, remote_az_dir, cap_mbps)
 
             self.logger.info("Volume '{}' was successfully transferred to off-site for customer {}."
                              .format(tmp_customer_volume_path, self.customer_conf.name))
@@ -648,22 +1117,20 @@ class LocalBackupHandler:
                 raise UploadBackupException(ExceptionCodes.CannotRemovePath,
                                             tmp_customer_volume_path)
 
-            volume_output[VOLUME_OUTPUT_KEYS.status.name] = True
-            volume_output[VOLUME_OUTPUT_KEYS.output.name] = ""
+            volume_output.status = True
+            volume_output.output = ""
 
         except BurException as transfer_exception:
             error_message = "Error while transferring volume. {}" \
                 .format(transfer_exception.__str__())
 
-            volume_output[VOLUME_OUTPUT_KEYS.status.name] = False
-            volume_output[VOLUME_OUTPUT_KEYS.output.name] = error_message
+            volume_output.set_error(error_message)
 
         except AzCopyException as transfer_exception:
             error_message = "Error while transferring volume. {}" \
                 .format(transfer_exception.__str__())
 
-            volume_output[VOLUME_OUTPUT_KEYS.status.name] = False
-            volume_output[VOLUME_OUTPUT_KEYS.output.name] = error_message
+            volume_output.set_error(error_message)
 
         return volume_name, volume_output
 
@@ -693,6 +1160,8 @@ class LocalBackupHandler:
             if not remove_path(customer_backup_path):
                 return False, "Error while deleting folder '{}' from NFS server." \
                     .format(customer_backup_path)
+
+            evict_hash_cache_path(customer_backup_path, self.logger)
         else:
             return False, "Backup '{}' NOT removed. Just {} backup found." \
                 .format(customer_backup_path, MIN_BKP_LOCAL)
@@ -726,7 +1195,8 @@ class LocalBackupHandler:
                 self.logger.warning("Found a file '{}' inside backup folder.".format(backup_path))
                 continue
 
-            if not validate_backup_per_volume(self.customer_conf.name, backup_path, self.logger):
+            if not validate_backup_per_volume(self.customer_conf.name, backup_path, self.logger,
+                                              self.checksum_report_dict):
                 self.logger.warning("Backup '{}' is not valid.".format(backup_path))
                 continue
 
@@ -739,45 +1209,29 @@ class LocalBackupHandler:
         return valid_dir_list
 
     @staticmethod
-    def create_transfer_pickle_file(file_path, pickle_content, target_dir, remote_az_backup_path, rsync_ssh=True):
+    def create_transfer_pickle_files(pickle_file_list, remote_az_backup_path, cap_mbps=None,
+                                     transfer_manager=AzCopyManager):
         """
-        Create and transfer a pickle file to the informed target.
+        Create pickle files and transfer them to the informed target in a single job.
 
         If an error occurs, an Exception is raised with the details of the problem.
 
-        :param file_path: pickle file path to be created.
-        :param pickle_content: content to be stored in the pickle file.
-        :param target_dir: remote location to send the pickle file.
+        :param pickle_file_list: list of tuples (pickle file path, content to be stored in it).
         :param remote_az_backup_path: remote az storage location
-        :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
+        :param transfer_manager: class used to transfer the files.
         :return: true if success.
-        :raise UploadBackupException: if an error happened to remove the pickle file.
+        :raise AzCopyException: if any pickle file could not be transferred.
+        :raise UploadBackupException: if an error happened to remove a pickle file.
         """
-        create_pickle_file(pickle_content, file_path)
+        for file_path, pickle_content in pickle_file_list:
+            create_pickle_file(pickle_content, file_path)
 
-        #RsyncManager.transfer_file(file_path, target_dir, rsync_ssh)
-        AzCopyManager.transfer_file(file_path, remote_az_backup_path)
+        check_transfer_result_dict(transfer_manager.transfer_file_list(
+            [(file_path, remote_az_backup_path) for file_path, _ in pickle_file_list], cap_mbps))
 
-        if not remove_path(file_path):
-            raise UploadBackupException(ExceptionCodes.CannotRemoveFile, file_path)
+        for file_path, _ in pickle_file_list:
+            if not remove_path(file_path):
+                raise UploadBackupException(ExceptionCodes.CannotRemoveFile, file_path)
 
         return True
-
-    @staticmethod
-    def get_empty_volume_output(volume_path="", status=False):
-        """
-        Get a volume output dictionary with initialized data.
-
-        :param volume_path: volume path if it already exists.
-        :param status: processing status.
-        :return: volume output dictionary with the informed settings.
-        """
-        volume_output_dict = dict()
-
-        volume_output_dict[VOLUME_OUTPUT_KEYS.volume_path.name] = volume_path
-        volume_output_dict[VOLUME_OUTPUT_KEYS.processing_time.name] = 0.0
-        volume_output_dict[VOLUME_OUTPUT_KEYS.tar_time.name] = 0.0
-        volume_output_dict[VOLUME_OUTPUT_KEYS.output.name] = ""
-        volume_output_dict[VOLUME_OUTPUT_KEYS.status.name] = status
-
-        return volume_output_dict
@@ -16,24 +16,29 @@
 
 import argparse
 from enum import Enum
+import multiprocessing as mp
 import os
 import sys
+import time
 
 from logger import logging
 
 from backup import __version__
+from backup.bandwidth import BandwidthLimiter
 from backup.bur_input_validators import SCRIPT_OBJECTS, validate_argument_list, \
     validate_get_main_logger, validate_input_arguments, validate_onsite_offsite_locations, \
     validate_script_settings
-from backup.constants import DEFAULT_NUM_PROCESSORS, DEFAULT_NUM_THREADS, \
-    DEFAULT_NUM_TRANSFER_PROCS, LOG_ROOT_PATH_CLI, LOG_SUFFIX
+from backup.constants import DEFAULT_MIN_CONCURRENCY, DEFAULT_NUM_CUSTOMERS, \
+    DEFAULT_NUM_PROCESSORS, DEFAULT_NUM_THREADS, DEFAULT_NUM_TRANSFER_PROCS, LOG_ROOT_PATH_CLI, \
+    LOG_SUFFIX
 from backup.exceptions import BurException, NotificationHandlerException
 from backup.local_backup_handler import LocalBackupHandler
 from backup.offsite_backup_handler import OffsiteBackupHandler
+from backup.resource_budget import ResourceBudget
 from backup.utils.datatypes import get_values_from_dict
 from backup.utils.datetime import format_time, get_formatted_timestamp
 from backup.utils.decorator import timeit
-from backup.utils.fsys import get_home_dir
+from backup.utils.fsys import get_free_disk_space, get_home_dir
 from backup.utils.script_cli import get_cli_arguments
 
 SCRIPT_OPTION_HELP = "Select the function to be executed.\n" \
@@ -43,13 +48,31 @@ SCRIPT_OPTION_HELP = "Select the function to be executed.\n" \
 NUMBER_THREADS_HELP = "Select the number of threads allowed. Defaults to 5."
 NUMBER_PROCESSORS_HELP = "Select the number of processors. Defaults to 5."
 NUMBER_RSYNC_INSTANCES_HELP = "Select the number of working rsync instances. Defaults to 8."
+NUMBER_CUSTOMERS_HELP = "Select the number of customers uploaded at the same time, sharing the " \
+                        "processors, rsync instances and temporary disk space. Defaults to 1."
 LOG_ROOT_PATH_HELP = "Provide a path to store the logs."
 LOG_LEVEL_HELP = "Provide the log level. Options: [CRITICAL, ERROR, WARNING, INFO, DEBUG]."
 BACKUP_TAG_HELP = "Provide the backup tag to be downloaded."
 CUSTOMER_NAME_HELP = "Provide the customer name to process upload or download."
 BACKUP_DESTINATION_HELP = "Provide the destination of the downloaded backup."
+VOLUME_NAME_HELP = "Provide the name of a single volume to be restored from the backup."
+FILE_NAME_HELP = "Provide the name of a single file to be restored from the informed volume."
 RSYNC_SSH_HELP = "Whether to use rsync over ssh. Defaults to False, which means it will use " \
                  "rsync daemon."
+STREAM_UPLOAD_HELP = "Whether to stream processed volumes straight to off-site, without " \
+                     "archiving them in the temporary folder first. Defaults to False."
+SEEKABLE_ARCHIVE_HELP = "Whether to upload each archived volume with a table of contents of its " \
+                        "files, so that a single file can be restored by a ranged read of the " \
+                        "archive. Not applied to volumes streamed to off-site. Defaults to False."
+STREAM_RESTORE_HELP = "Whether to restore each volume while it is downloaded, without writing " \
+                      "its archive and encrypted files to the destination first. Defaults to " \
+                      "False."
+ADAPTIVE_CONCURRENCY_HELP = "Whether to adapt the number of files processed and volumes " \
+                            "transferred at a time to the measured throughput, up to the " \
+                            "informed numbers of threads, processors and rsync instances. " \
+                            "Defaults to False."
+MIN_CONCURRENCY_HELP = "Select the lowest number of files processed and of volumes transferred " \
+                       "at a time when the concurrency is adapted. Defaults to 1."
 USAGE_HELP = "Display detailed help."
 OFFSITE_RETENTION_HELP = "Number of how many backups will be retained."
 BUR_VERSION_HELP = "Show currently installed bur version."
@@ -64,6 +87,8 @@ DEFAULT_LOG_ROOT_PATH = os.path.join(get_home_dir(), "backup")
 
 SUCCESS_EXIT_CODE = 0
 
+CUSTOMER_POLL_INTERVAL = 1
+
 EXIT_CODES = Enum('EXIT_CODES', 'INVALID_INPUT, FAILED_UPLOAD, FAILED_DOWNLOAD, FAILED_QUERY, '
                                 'FAILED_OFFSITE_CLEANUP, FAILED_VALIDATION')
 
@@ -191,6 +216,9 @@ def execute_backup_upload(customer_config_dict, offsite_config, onsite_config, g
 
     If customer name is provided, it will perform the backup of this single enmaas deployment.
 
+    When more than one customer can be uploaded at a time, the processes and the temporary disk
+    space are shared between the customers running together, according to their weights.
+
     :param customer_config_dict: dictionary with the enmaas configuration per customer.
     :param offsite_config: offsite object.
     :param onsite_config: onsite object.
@@ -201,69 +229,252 @@ def execute_backup_upload(customer_config_dict, offsite_config, onsite_config, g
     :param delay_config: configuration about timeout for backup uploads.
     :return: True if success.
     """
-    operation = SCRIPT_OPERATIONS.BKP_UPLOAD
-    success_message_list = []
+    customer_config_list = []
+    for customer_config in customer_config_dict.values():
+        if not os.path.exists(customer_config.backup_path):
+            logger.error("Backup path '{}' does not exist for customer {}"
+                         .format(customer_config.backup_path, customer_config.name))
+            continue
+
+        customer_config_list.append(customer_config)
+
+    upload_args = (offsite_config, onsite_config, gpg_manager, notification_handler, logger,
+                   bur_args, delay_config)
+
+    bandwidth_limiter = get_bandwidth_limiter(offsite_config, bur_args, logger)
+
+    number_customers = min(bur_args.number_customers, len(customer_config_list))
+
+    if number_customers <= 1:
+        is_success = True
+        for customer_config in customer_config_list:
+            is_success = upload_customer_backups(
+                customer_config, *upload_args, bandwidth_limiter=bandwidth_limiter) and is_success
+
+    else:
+        is_success = execute_concurrent_backup_upload(customer_config_list, number_customers,
+                                                      *upload_args,
+                                                      bandwidth_limiter=bandwidth_limiter)
+
+    if not is_success:
+        logger.log_error_exit("BUR Operation finished.", EXIT_CODES.FAILED_UPLOAD.value)
+
+    return True
+
+
+def execute_concurrent_backup_upload(customer_config_list, number_customers, offsite_config,
+                                     onsite_config, gpg_manager, notification_handler, logger,
+                                     bur_args, delay_config, bandwidth_limiter=None):
+    """
+    Upload the backups of several customers at a time, sharing a global budget of resources.
+
+    Each customer is uploaded by a process of its own, started from this thread once its share of
+    the resources is reserved. This thread only starts and waits for those processes, so the
+    process pools of a customer are forked from a process without other threads running.
+
+    :param customer_config_list: list of customers to be uploaded.
+    :param number_customers: number of customers uploaded at a time.
+    :param offsite_config: offsite object.
+    :param onsite_config: onsite object.
+    :param gpg_manager: gpg manager object.
+    :param notification_handler: object to send e-mail in case of error.
+    :param logger: logger object.
+    :param bur_args: the CLI arguments.
+    :param delay_config: configuration about timeout for backup uploads.
+    :param bandwidth_limiter: limiter shared by the transfers of all customers, None if not
+    limited.
+    :return: true, if the backups of all customers were uploaded; false otherwise.
+    """
+    try:
+        temp_space_mb = get_free_disk_space(onsite_config.temp_path)
+    except BurException as disk_space_exp:
+        logger.warning("Temporary disk space will not be shared between customers: {}"
+                       .format(disk_space_exp))
+        temp_space_mb = None
+
+    resource_budget = ResourceBudget(number_customers, bur_args.number_processors,
+                                     bur_args.number_transfer_processors, temp_space_mb)
+
+    for customer_config in customer_config_list:
+        resource_budget.add_customer(customer_config.name, customer_config.weight)
+
+    logger.info("Uploading up to {} customers at a time.".format(number_customers))
+
+    waiting_customer_list = list(customer_config_list)
+    running_customer_list = []
     is_success = True
 
-    for customer_config in customer_config_dict.values():
-        try:
-            if not os.path.exists(customer_config.backup_path):
-                logger.error("Backup path '{}' does not exist for customer {}"
-                             .format(customer_config.backup_path, customer_config.name))
+    while waiting_customer_list or running_customer_list:
+        while waiting_customer_list and len(running_customer_list) < number_customers:
+            customer_share = resource_budget.acquire(waiting_customer_list[0].name,
+                                                     blocking=False)
+            if customer_share is None:
+                break
+
+            customer_config = waiting_customer_list.pop(0)
+            logger.info("Resources given to customer {}: {}.".format(customer_config.name,
+                                                                    customer_share))
+
+            customer_process = mp.Process(target=run_customer_upload, args=(
+                customer_config, offsite_config, onsite_config, gpg_manager,
+                notification_handler, logger, bur_args, delay_config, customer_share,
+                bandwidth_limiter))
+            customer_process.start()
+
+            running_customer_list.append((customer_config, customer_share, customer_process))
+
+        time.sleep(CUSTOMER_POLL_INTERVAL)
+
+        for customer_config, customer_share, customer_process in list(running_customer_list):
+            if customer_process.is_alive():
                 continue
 
-            local_backup_handler = LocalBackupHandler(offsite_config,
-                                                      onsite_config,
-                                                      customer_config,
-                                                      gpg_manager,
-                                                      bur_args.number_processors,
-                                                      bur_args.number_threads,
-                                                      bur_args.number_transfer_processors,
-                                                      logger,
-                                                      bur_args.rsync_ssh)
+            customer_process.join()
+            resource_budget.release(customer_share)
+            running_customer_list.remove((customer_config, customer_share, customer_process))
+
+            if customer_process.exitcode != SUCCESS_EXIT_CODE:
+                logger.error("Upload of customer {} failed with exit code {}."
+                             .format(customer_config.name, customer_process.exitcode))
+                is_success = False
+
+    return is_success
 
-            upload_time = []
-            report_delay_args = [customer_config.name, operation, delay_config.max_delay,
-                                 get_formatted_timestamp(), notification_handler, logger]
 
-            processed_backup_tag = local_backup_handler.process_backup_list(
-                bur_args.backup_tag, get_elapsed_time=upload_time, max_delay=delay_config.max_delay,
-                on_timeout=report_delay, on_timeout_args=report_delay_args)
+def run_customer_upload(customer_config, offsite_config, onsite_config, gpg_manager,
+                        notification_handler, logger, bur_args, delay_config, customer_share,
+                        bandwidth_limiter=None):
+    """
+    Upload the backups of a customer from its own process, exiting with the result.
 
-            success_message = "Upload successfully finished for customer {}.".format(
-                customer_config.name)
-            logger.info(success_message)
-            success_message_list.append(success_message)
+    :param customer_config: customer configuration object.
+    :param offsite_config: offsite object.
+    :param onsite_config: onsite object.
+    :param gpg_manager: gpg manager object.
+    :param notification_handler: object to send e-mail in case of error.
+    :param logger: logger object.
+    :param bur_args: the CLI arguments.
+    :param delay_config: configuration about timeout for backup uploads.
+    :param customer_share: CustomerShare object with the resources reserved for the customer.
+    :param bandwidth_limiter: limiter shared by the transfers of all customers, None if not
+    limited.
+    """
+    if upload_customer_backups(customer_config, offsite_config, onsite_config, gpg_manager,
+                               notification_handler, logger, bur_args, delay_config,
+                               customer_share, bandwidth_limiter):
+        sys.exit(SUCCESS_EXIT_CODE)
 
-            backup_tag_message = "Backup tag(s): {}.".format(processed_backup_tag)
-            success_message_list.append(backup_tag_message)
+    sys.exit(EXIT_CODES.FAILED_UPLOAD.value)
 
-            if upload_time:
-                elapsed_msg = "Elapsed time to finish upload"
-                success_message_list.append("{}: {}.".format(elapsed_msg,
-                                                             format_time(upload_time[0])))
-                logger.log_time(elapsed_msg, upload_time[0])
 
-            customer_dict = {customer_config.name: customer_config}
-            # cleanup_success_list = execute_offsite_backup_cleanup(
-            #     customer_dict, offsite_config, gpg_manager, notification_handler, logger, bur_args)
+def upload_customer_backups(customer_config, offsite_config, onsite_config, gpg_manager,
+                            notification_handler, logger, bur_args, delay_config,
+                            customer_share=None, bandwidth_limiter=None):
+    """
+    Upload the backups of a customer and notify the result.
 
-            # success_message_list.append(cleanup_success_list)
+    :param customer_config: customer configuration object.
+    :param offsite_config: offsite object.
+    :param onsite_config: onsite object.
+    :param gpg_manager: gpg manager object.
+    :param notification_handler: object to send e-mail in case of error.
+    :param logger: logger object.
+    :param bur_args: the CLI arguments.
+    :param delay_config: configuration about timeout for backup uploads.
+    :param customer_share: CustomerShare object with the resources reserved for the customer
+    among the customers uploaded at the same time, or None to use all resources informed by CLI.
+    :param bandwidth_limiter: limiter shared by the transfers of all customers, None if not
+    limited.
+    :return: true, if success; false otherwise.
+    """
+    operation = SCRIPT_OPERATIONS.BKP_UPLOAD
+    success_message_list = []
 
-            report_success(notification_handler, logger, operation, success_message_list,
-                           customer_config.name)
+    number_processors = bur_args.number_processors
+    number_transfer_processors = bur_args.number_transfer_processors
+    temp_space_mb = None
 
-        except BurException as upload_exception:
-            is_success = False
-            report_error(notification_handler, logger, operation, upload_exception.__str__(),
-                         EXIT_CODES.FAILED_UPLOAD.value)
+    if customer_share is not None:
+        number_processors = customer_share.number_processors
+        number_transfer_processors = customer_share.number_transfer_processors
+        temp_space_mb = customer_share.temp_space_mb
 
-    if not is_success:
-        logger.log_error_exit("BUR Operation finished.", EXIT_CODES.FAILED_UPLOAD.value)
+    try:
+        local_backup_handler = LocalBackupHandler(offsite_config,
+                                                  onsite_config,
+                                                  customer_config,
+                                                  gpg_manager,
+                                                  number_processors,
+                                                  bur_args.number_threads,
+                                                  number_transfer_processors,
+                                                  logger,
+                                                  bur_args.rsync_ssh,
+                                                  bur_args.stream_upload,
+                                                  temp_space_mb=temp_space_mb,
+                                                  bandwidth_limiter=bandwidth_limiter,
+                                                  adaptive_concurrency=bur_args
+                                                  .adaptive_concurrency,
+                                                  min_concurrency=bur_args.min_concurrency,
+                                                  seekable_archive=bur_args.seekable_archive)
+
+        upload_time = []
+        report_delay_args = [customer_config.name, operation, delay_config.max_delay,
+                             get_formatted_timestamp(), notification_handler, logger]
+
+        processed_backup_tag = local_backup_handler.process_backup_list(
+            bur_args.backup_tag, get_elapsed_time=upload_time, max_delay=delay_config.max_delay,
+            on_timeout=report_delay, on_timeout_args=report_delay_args)
+
+        success_message = "Upload successfully finished for customer {}.".format(
+            customer_config.name)
+        logger.info(success_message)
+        success_message_list.append(success_message)
+
+        backup_tag_message = "Backup tag(s): {}.".format(processed_backup_tag)
+        success_message_list.append(backup_tag_message)
+
+        if upload_time:
+            elapsed_msg = "Elapsed time to finish upload"
+            success_message_list.append("{}: {}.".format(elapsed_msg,
+                                                         format_time(upload_time[0])))
+            logger.log_time(elapsed_msg, upload_time[0])
+
+        customer_dict = {customer_config.name: customer_config}
+        # cleanup_success_list = execute_offsite_backup_cleanup(
+        #     customer_dict, offsite_config, gpg_manager, notification_handler, logger, bur_args)
+
+        # success_message_list.append(cleanup_success_list)
+
+        report_success(notification_handler, logger, operation, success_message_list,
+                       customer_config.name)
+
+    except BurException as upload_exception:
+        report_error(notification_handler, logger, operation, upload_exception.__str__(),
+                     EXIT_CODES.FAILED_UPLOAD.value)
+        return False
 
     return True
 
 
+def get_bandwidth_limiter(offsite_config, bur_args, logger):
+    """
+    Create the bandwidth limiter shared by the off-site transfers, if a profile is configured.
+
+    :param offsite_config: offsite object.
+    :param bur_args: the CLI arguments.
+    :param logger: logger object.
+    :return: BandwidthLimiter object or None if the transfers are not limited.
+    """
+    if offsite_config.bandwidth_profile is None:
+        return None
+
+    logger.info("Off-site transfers limited by the bandwidth profile {}."
+                .format(offsite_config.bandwidth_profile))
+
+    return BandwidthLimiter(offsite_config.bandwidth_profile,
+                            bur_args.number_transfer_processors)
+
+
 @timeit
 def execute_backup_query(customer_config_dict, offsite_config, gpg_manager, notification_handler,
                          logger, bur_args, **kwargs):
@@ -329,14 +540,17 @@ def execute_backup_download(customer_config_dict, offsite_config, gpg_manager,
                                                   bur_args.number_processors,
                                                   bur_args.number_transfer_processors,
                                                   logger,
-                                                  bur_args.rsync_ssh)
+                                                  bur_args.rsync_ssh,
+                                                  get_bandwidth_limiter(offsite_config, bur_args,
+                                                                        logger),
+                                                  stream_restore=bur_args.stream_restore)
 
     operation = SCRIPT_OPERATIONS.BKP_DOWNLOAD
 
     try:
-        offsite_backup_handler.execute_download_backup_from_offsite(bur_args.customer_name,
-                                                                    bur_args.backup_tag,
-                                                                    bur_args.backup_destination)
+        offsite_backup_handler.execute_download_backup_from_offsite(
+            bur_args.customer_name, bur_args.backup_tag, bur_args.backup_destination,
+            volume_name=bur_args.volume_name, file_name=bur_args.file_name)
 
         success_message = "Backup '{}' downloaded successfully to destination '{}'.".format(
             bur_args.backup_tag, bur_args.backup_destination)
@@ -523,13 +737,23 @@ def get_arg_parser():
     parser.add_argument("--number_transfer_processors",
                         default=DEFAULT_NUM_TRANSFER_PROCS,
                         help=NUMBER_RSYNC_INSTANCES_HELP)
+    parser.add_argument("--number_customers", default=DEFAULT_NUM_CUSTOMERS,
+                        help=NUMBER_CUSTOMERS_HELP)
     parser.add_argument(LOG_ROOT_PATH_CLI, nargs='?', default=DEFAULT_LOG_ROOT_PATH,
                         help=LOG_ROOT_PATH_HELP)
     parser.add_argument("--log_level", nargs='?', default=logging.INFO, help=LOG_LEVEL_HELP)
     parser.add_argument("--backup_tag", help=BACKUP_TAG_HELP)
     parser.add_argument("--customer_name", default="", help=CUSTOMER_NAME_HELP)
     parser.add_argument("--backup_destination", nargs='?', help=BACKUP_DESTINATION_HELP)
+    parser.add_argument("--volume", dest="volume_name", help=VOLUME_NAME_HELP)
+    parser.add_argument("--file", dest="file_name", help=FILE_NAME_HELP)
     parser.add_argument("--rsync_ssh", default=False, help=RSYNC_SSH_HELP)
+    parser.add_argument("--stream_upload", default=False, help=STREAM_UPLOAD_HELP)
+    parser.add_argument("--seekable_archive", default=False, help=SEEKABLE_ARCHIVE_HELP)
+    parser.add_argument("--stream_restore", default=False, help=STREAM_RESTORE_HELP)
+    parser.add_argument("--adaptive_concurrency", default=False, help=ADAPTIVE_CONCURRENCY_HELP)
+    parser.add_argument("--min_concurrency", default=DEFAULT_MIN_CONCURRENCY,
+                        help=MIN_CONCURRENCY_HELP)
     parser.add_argument("--usage", action="store_true", help=USAGE_HELP)
     parser.add_argument("--offsite_retention", help=OFFSITE_RETENTION_HELP)
     parser.add_argument("--version", action="store_true", help=BUR_VERSION_HELP)
@@ -589,6 +813,9 @@ def show_bur_usage():
             3.1 If no customer is specified, the script will process all customers from the
             configuration file sequentially, otherwise just the informed customer will be affected.
             If a customer and a backup tag is informed, just that backup will be processed.
+            With '--number_customers', several customers are uploaded at the same time. The
+            processors, rsync instances and temporary disk space informed are then shared between
+            the customers running together, proportionally to the WEIGHT of each customer.
 
             3.2 The backup task is done in parallel, so that the volumes are processed and
             transferred to offsite independently. The number of process and threads used can be
@@ -599,6 +826,14 @@ def show_bur_usage():
                 volume.
                 - Archive the volume using tar.
             3.4 The already processed volumes without errors are uploaded to the offsite (rsync).
+            When '--stream_upload' is informed, the archive is not created in the temporary
+            folder: each encrypted file is appended to a tar stream sent straight to the offsite.
+            When '--seekable_archive' is informed, a table of contents with the offset, sizes and
+            md5 of each file of the archive is sent next to each archived volume.
+            When '--adaptive_concurrency' is informed, the number of files processed and volumes
+            transferred at a time starts halfway and is raised while jobs are waiting, or halved
+            when the load exceeds the CPU cores, the temporary space budget is nearly full or the
+            throughput drops, between '--min_concurrency' and the numbers informed by CLI.
 
             3.5 Remove the older backups from each customer directory, according to the off-site
             retention value.
@@ -612,6 +847,14 @@ def show_bur_usage():
                 actual backup folder from the off-site.
             4.4 After a successful download, the system decompress and decrypts the volumes in
                 parallel.
+                When '--stream_restore' is informed, each volume is restored while it is
+                downloaded: the files of the archive are decrypted and decompressed in parallel as
+                they arrive, and only the restored files are written to the destination.
+                When '--volume' is informed, only that volume is downloaded and validated against
+                its metadata. When '--file' is also informed, only that file and the metadata of
+                the volume are restored from the volume archive. If the volume was uploaded with a
+                table of contents and the native transfer backend is used, only those files are
+                read from the archive.
             4.5 The downloaded backup is stored in the destination location passed by CLI.
 
         Regarding the upload feature, if at any point a problem happens, the process of the
@@ -664,9 +907,19 @@ def show_bur_usage():
         BKP_DIR         remote folder name where the backups will be stored. This folder will be
                         created in the BKP_PATH if it does not exist.
         RETENTION       max value for retention of backups.
+        BANDWIDTH_PROFILE optional maximum rate in megabits per second of the off-site transfers
+                        by hour of the day, as 'HH-HH:MBPS, HH:MBPS'. The rate is shared by the
+                        transfers running at the same time. Hours not informed are not limited.
+        TRANSFER_BACKEND optional backend of the transfers to and from the storage: 'azcopy'
+                        (default) runs the azcopy binary for each transfer, 'native' sends them
+                        over HTTP from BUR itself, in parallel blocks checked by MD5. Streamed
+                        uploads always use azcopy.
 
         [ONSITE_PARAMS]
         BKP_TEMP_FOLDER local temporary folder to store files during the upload process.
+        BKP_TEMP_BUDGET_MB optional maximum space in MB held in the temporary folder by volumes
+                        waiting to be transferred. Volumes wait for space before being processed,
+                        so backups bigger than the temporary folder can be uploaded.
 
         [DELAY]
         BKP_MAX_DELAY maximum amount of time to wait until the support is notified.
@@ -687,9 +940,12 @@ def show_bur_usage():
         BKP_PATH=/root/path/to/backup/dir
         BKP_DIR=backup_dir_name
         RETENTION=3
+        BANDWIDTH_PROFILE=08-18:200, 19-23:800
+        TRANSFER_BACKEND=native
 
         [ONSITE_PARAMS]
         BKP_TEMP_FOLDER=/path/to/local/temp/folder
+        BKP_TEMP_BUDGET_MB=500000
 
         [DELAY]
         BKP_MAX_DELAY=10s
@@ -702,10 +958,13 @@ def show_bur_usage():
 
         [CUSTOMER_NAME]
         CUSTOMER_PATH   path to the customer's volumes.
+        WEIGHT          optional share of the resources when uploaded along with other
+                        customers. Defaults to 1.
 
         For example:
         [CUSTOMER_0]
         CUSTOMER_PATH=/path/to/customer/backup/folder
+        WEIGHT=2
         --------------------------------------------------------------------------------------------
         """.format(SCRIPT_FILE, CONF_FILE_NAME))
 
@@ -12,34 +12,44 @@
 
 """Module to manage download related functions of customer's backups."""
 
+from collections import namedtuple
 import multiprocessing as mp
 import os
+import sqlite3
 import time
 
 import dill
 
-from backup.constants import BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, \
-    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, SUCCESS_FLAG_FILE, TAR_SUFFIX, TIMEOUT, VOLUME_OUTPUT_KEYS
+from backup.constants import AZCOPY_TRANSFER_BACKEND, BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, \
+    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, METADATA_FILE_SUFFIX, NATIVE_TRANSFER_BACKEND, \
+    SUCCESS_FLAG_FILE, TAR_SUFFIX, TIMEOUT
 from backup.exceptions import BurException, DownloadBackupException, ExceptionCodes, AzCopyException
 from backup.logger import CustomLogger
 from backup.rsync_manager import RsyncManager
-from backup.azcopy_manager import AzCopyManager
-from backup.utils.backup_handler import check_is_processed_volume, \
-    check_local_disk_space_for_download, validate_backup_per_volume
-from backup.utils.compress import decompress_file, is_tar_file
+from backup.azcopy_manager import AzCopyManager, check_transfer_result_dict
+from backup.blob_manager import BlobManager, get_transfer_manager
+from backup.gnupg_manager import GZ_ENCRYPTED_FILE_ENDS_WITH
+from backup.transfer_progress import TransferProgressMonitor
+from backup.utils.backup_handler import add_checksum_output, check_is_processed_volume, \
+    check_local_disk_space_for_download, validate_backup_per_volume, \
+    validate_volume_file_metadata, validate_volume_metadata
+from backup.utils.compress import decompress_file, get_tar_toc_path, is_tar_file, parse_tar_toc
 from backup.utils.datatypes import find_elem_dict, get_values_from_dict
 from backup.utils.decorator import collect_performance_data, timeit
-from backup.utils.fsys import create_path, is_valid_path, load_pickle_file, remove_path, \
-    split_folder_list
-from backup.utils.remote import check_remote_path_exists, is_remote_folder_empty, \
-    remove_remote_dir, run_ssh_command, sort_remote_folders_by_content
+from backup.utils.fsys import create_path, is_valid_path, load_pickle_file, remove_path
+from backup.utils.offsite_catalog import DEFAULT_OFFSITE_CATALOG_PATH, open_offsite_catalog
+from backup.utils.remote import check_remote_path_exists, get_remote_backup_ages, \
+    get_remote_sub_dir_dict, remove_remote_dir
 from backup.utils.validator import check_not_empty
+from backup.volume_result import VolumeResult
 
 SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
 
 
 def download_volume_from_offsite(volume_name, archived_volume_name, remote_volume_path,
-                                 backup_destination_path, remote_az_volume_path, rsync_ssh=True):
+                                 backup_destination_path, remote_az_volume_path, rsync_ssh=True,
+                                 bandwidth_limiter=None,
+                                 transfer_backend=AZCOPY_TRANSFER_BACKEND):
     """
     Call the transfer function to download volumes from the off-site.
 
@@ -52,50 +62,131 @@ def download_volume_from_offsite(volume_name, archived_volume_name, remote_volum
     :param backup_destination_path: local destination to store the volume data.
     :param rsync_ssh: rsync mode used (true for ssh/false for daemon).
     :param remote_az_volume_path
-    :return: tuple (volume name, archived volume name, output dictionary, destination path).
+    :param bandwidth_limiter: BandwidthLimiter giving the rate of the download when it starts,
+    None if not limited.
+    :param transfer_backend: name of the backend used to download the volume.
+    :return: tuple (volume name, archived volume name, VolumeResult, destination path).
     """
-    volume_output = dict()
-    volume_output[VOLUME_OUTPUT_KEYS.status.name] = False
-    volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name] = None
-    volume_output[VOLUME_OUTPUT_KEYS.transfer_time.name] = 0.0
+    volume_output = VolumeResult()
 
     try:
         transfer_time = []
         #rsync_output = RsyncManager.transfer_file(remote_volume_path, backup_destination_path,
         #                                          rsync_ssh, get_elapsed_time=transfer_time)
 
-        azcopy_output = AzCopyManager.transfer_file(remote_az_volume_path, backup_destination_path)
+        cap_mbps = None
+        if bandwidth_limiter is not None:
+            cap_mbps = bandwidth_limiter.get_transfer_cap_mbps()
 
-        volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name] = azcopy_output
+        progress_monitor = TransferProgressMonitor(CustomLogger(SCRIPT_FILE, ""),
+                                                   remote_az_volume_path)
+        azcopy_output = get_transfer_manager(transfer_backend).transfer_file(
+            remote_az_volume_path, backup_destination_path, cap_mbps,
+            on_progress=progress_monitor)
+
+        if progress_monitor.get_elapsed_time() is not None:
+            transfer_time.append(progress_monitor.get_elapsed_time())
+
+        volume_output.rsync_output = azcopy_output
 
         if transfer_time:
-            volume_output[VOLUME_OUTPUT_KEYS.transfer_time.name] = transfer_time[0]
+            volume_output.transfer_time = transfer_time[0]
 
-        volume_output[VOLUME_OUTPUT_KEYS.status.name] = True
+        volume_output.status = True
 
     except BurException as transfer_exp:
-        error_message = "Error while downloading volume. {}".format(transfer_exp.__str__())
-        volume_output[VOLUME_OUTPUT_KEYS.output.name] = error_message
+        volume_output.set_error("Error while downloading volume. {}".format(
+            transfer_exp.__str__()))
 
     return volume_name, archived_volume_name, volume_output, backup_destination_path
 
 
-def unwrapper_process_volume_function(backup_handler_obj, *args):
+def get_file_member_filter(volume_name, file_name):
+    """
+    Get the filter of the archive members needed to restore a single file of a volume.
+
+    Besides the file itself, the metadata file of the volume is restored to validate it.
+
+    :param volume_name: volume name.
+    :param file_name: name of the file inside the volume.
+    :return: function telling whether an archive member, given by its name, is restored.
+    """
+    file_member_name = os.path.join(volume_name, file_name + GZ_ENCRYPTED_FILE_ENDS_WITH)
+    metadata_member_suffix = METADATA_FILE_SUFFIX + GZ_ENCRYPTED_FILE_ENDS_WITH
+
+    def is_member_restored(member_name):
+        """
+        Check whether an archive member is needed to restore the file.
+
+        :param member_name: name of the member in the archive.
+        :return: true, if the member is the file or the metadata file of the volume.
+        """
+        member_name = os.path.normpath(member_name)
+
+        return member_name == file_member_name or (
+            os.path.dirname(member_name) == volume_name and
+            member_name.endswith(metadata_member_suffix))
+
+    return is_member_restored
+
+
+VolumeProcessTask = namedtuple('VolumeProcessTask', 'archived_volume_name, volume_root_path, '
+                                                     'volume_output, file_name')
+VolumeProcessTask.__new__.__defaults__ = (None,)
+
+WORKER_CONTEXT = {}
+
+
+def init_offsite_backup_handler_worker(serialized_backup_handler):
+    """
+    Load the OffsiteBackupHandler object once for each worker process of a pool.
+
+    Used as the pool initializer, so that tasks carry only their own arguments.
+
+    :param serialized_backup_handler: OffsiteBackupHandler object serialized by dill.
     """
-    Process_volume method to use Multiprocessing map to run class methods in a different process.
+    WORKER_CONTEXT['backup_handler'] = dill.loads(serialized_backup_handler)
+
+
+def get_worker_backup_handler():
+    """
+    Get the OffsiteBackupHandler object loaded by the initializer of the worker process.
+
+    :return: OffsiteBackupHandler object.
+    :raise DownloadBackupException: if the worker was not initialized with a valid object.
+    """
+    backup_handler = WORKER_CONTEXT.get('backup_handler')
+    if not isinstance(backup_handler, OffsiteBackupHandler):
+        raise DownloadBackupException(ExceptionCodes.CannotUnwrapperObject, backup_handler)
+
+    return backup_handler
 
-    Un-wrapper function for OffsiteBackupHandler.
 
-    :param backup_handler_obj: OffsiteBackupHandler object.
-    :param args: arguments of the unwrapped function.
+def run_volume_process_task(process_task):
+    """
+    Process a downloaded volume from a worker process of the process pool.
+
+    :param process_task: VolumeProcessTask with the arguments of the processing.
     :return: same output as OffsiteBackupHandler.process_volume method.
-    :raise DownloadBackupException: if the arguments are not as expected.
+    :raise DownloadBackupException: if the worker was not initialized with a valid object.
     """
-    loaded_backup_handler_object = dill.loads(backup_handler_obj)
-    if not isinstance(loaded_backup_handler_object, OffsiteBackupHandler):
-        raise DownloadBackupException(ExceptionCodes.CannotUnwrapperObject, backup_handler_obj)
+    return get_worker_backup_handler().process_volume(*process_task)
+
+
+VolumeStreamTask = namedtuple('VolumeStreamTask', 'archived_volume_name, remote_az_volume_path, '
+                                                   'volume_root_path, file_name')
+VolumeStreamTask.__new__.__defaults__ = (None,)
 
-    return loaded_backup_handler_object.process_volume(*args)
+
+def run_volume_stream_task(stream_task):
+    """
+    Download and restore a volume in a single pass from a worker process of the stream pool.
+
+    :param stream_task: VolumeStreamTask with the arguments of the restore.
+    :return: same output as OffsiteBackupHandler.process_volume_stream method.
+    :raise DownloadBackupException: if the worker was not initialized with a valid object.
+    """
+    return get_worker_backup_handler().process_volume_stream(*stream_task)
 
 
 class OffsiteBackupHandler:
@@ -106,7 +197,9 @@ class OffsiteBackupHandler:
     """
 
     def __init__(self, gpg_manager, offsite_config, customer_config_dict, thread_pool_size,
-                 process_pool_size, transfer_pool_size, logger, rsync_ssh=True):
+                 process_pool_size, transfer_pool_size, logger, rsync_ssh=True,
+                 bandwidth_limiter=None, offsite_catalog_path=DEFAULT_OFFSITE_CATALOG_PATH,
+                 stream_restore=False):
         """
         Initialize Offsite Backup Handler object.
 
@@ -118,9 +211,15 @@ class OffsiteBackupHandler:
         :param transfer_pool_size: number of allowed running rsync processes at a time.
         :param logger: logger object.
         :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon.
+        :param bandwidth_limiter: BandwidthLimiter shared by the downloads, None if downloads are
+        not limited.
+        :param offsite_catalog_path: path of the off-site catalog, None to always query off-site.
+        :param stream_restore: whether to restore each volume while it is downloaded, without
+        writing its archive and encrypted files to disk.
         """
         self.gpg_manager = gpg_manager
         self.offsite_config = offsite_config
+        self.transfer_manager = get_transfer_manager(offsite_config.transfer_backend)
         self.customer_config_dict = customer_config_dict
 
         self.thread_pool_size = thread_pool_size
@@ -128,6 +227,9 @@ class OffsiteBackupHandler:
         self.transfer_pool_size = transfer_pool_size
 
         self.rsync_ssh = rsync_ssh
+        self.bandwidth_limiter = bandwidth_limiter
+        self.offsite_catalog_path = offsite_catalog_path
+        self.stream_restore = stream_restore
         self.logger = CustomLogger(SCRIPT_FILE, logger.log_root_path, logger.log_file_name,
                                    logger.log_level)
 
@@ -138,11 +240,14 @@ class OffsiteBackupHandler:
 
         self.process_pool = None
 
+        self.restore_volume_name = None
+        self.restore_file_name = None
+
         self.serialized_object = dill.dumps(self)
 
     @timeit
     def execute_download_backup_from_offsite(self, customer_name, backup_tag, backup_destination,
-                                             **kwargs):
+                                             volume_name=None, file_name=None, **kwargs):
         """
         Execute the download of the backup based on the input parameters.
 
@@ -151,6 +256,9 @@ class OffsiteBackupHandler:
         :param customer_name: customer name to retrieve the backup.
         :param backup_tag: backup tag to be retrieved from the off-site location.
         :param backup_destination: path where the backup will be downloaded.
+        :param volume_name: name of the only volume to be restored, None to restore all volumes.
+        :param file_name: name of the only file to be restored from the volume, None to restore
+        the whole volume.
         :return: true if success.
         :raise DownloadBackupException: if backup tag cannot be found.
         """
@@ -158,21 +266,19 @@ class OffsiteBackupHandler:
 
         customer_config = get_values_from_dict(self.customer_config_dict, customer_name)
 
-        customer_backup_dict = self.get_offsite_backup_dict(customer_config)
-
-        customer_name, backup_path_to_be_retrieved = find_elem_dict(customer_backup_dict,
-                                                                    backup_tag)
+        customer_name, backup_path_to_be_retrieved, az_backup_path_to_be_retrieved = \
+            self.find_offsite_backup(customer_config, backup_tag)
 
         if not backup_path_to_be_retrieved.strip():
             raise DownloadBackupException(ExceptionCodes.NoSuchBackupTag, backup_tag)
 
-        az_backup_path_to_be_retrieved = os.path.join(self.remote_container_path, customer_name, os.path.basename(backup_path_to_be_retrieved))
         self.logger.info("Azure storage backup path to retrieve backup : {}".format(az_backup_path_to_be_retrieved))
 
         backup_destination = self.validate_backup_destination(customer_name, backup_destination)
 
         self.download_process_backup(customer_name, backup_tag, backup_path_to_be_retrieved,
-                                     backup_destination, az_backup_path_to_be_retrieved)
+                                     backup_destination, az_backup_path_to_be_retrieved,
+                                     volume_name=volume_name, file_name=file_name)
 
         return True
 
@@ -197,16 +303,61 @@ class OffsiteBackupHandler:
 
         return backup_destination
 
-    def get_offsite_backup_dict(self, customer_query=None, timeout=TIMEOUT):
+    def find_offsite_backup(self, customer_config, backup_tag):
+        """
+        Find the customer and the off-site paths of a backup tag.
+
+        The tag is looked up in the off-site catalog, which is refreshed once from off-site when
+        the tag is not there. Without a catalog, the first backup path containing the tag is used.
+
+        :param customer_config: customer object to look in or list of customer objects.
+        :param backup_tag: backup tag to be found.
+        :return: tuple (customer name, backup path, container path) or tuple of empty strings.
         """
-        Query the off-site server looking for the list of available backups.
+        for refresh in [False, True]:
+            customer_backup_dict = self.get_offsite_backup_dict(customer_config, refresh=refresh)
+
+            offsite_catalog = open_offsite_catalog(self.logger, self.offsite_catalog_path)
+            if offsite_catalog is None:
+                break
+
+            with offsite_catalog:
+                try:
+                    backup_entry = offsite_catalog.find_backup(backup_tag,
+                                                               customer_backup_dict.keys())
+                except sqlite3.Error as catalog_exp:
+                    self.logger.warning("Could not read off-site catalog. Cause: {}."
+                                        .format(catalog_exp))
+                    break
+
+            if backup_entry is not None:
+                return backup_entry.customer_name, backup_entry.offsite_path, \
+                    backup_entry.container_path
+
+        customer_name, backup_path = find_elem_dict(customer_backup_dict, backup_tag)
+
+        if not backup_path.strip():
+            return "", "", ""
+
+        return customer_name, backup_path, os.path.join(self.remote_container_path,
+                                                        customer_name,
+                                                        os.path.basename(backup_path))
+
+    def get_offsite_backup_dict(self, customer_query=None, timeout=TIMEOUT, refresh=False):
+        """
+        Get the list of available backups on off-site for each customer.
 
         If the customer_name is empty, retrieves the available backup from all customers, otherwise
         it gets just the ones from a particular customer.
 
+        The backups are read from the off-site catalog. Only the customers not refreshed recently
+        are queried on the off-site server, all in a single command.
+
         :param customer_query: specific customer object to process or None.
         :param timeout: time to wait for the process to finish.
-        :return: map containing the list of available backups in the off-site by customer name.
+        :param refresh: whether to query the off-site server for every customer.
+        :return: map containing the list of available backups in the off-site by customer name,
+        from the newest to the oldest.
         """
         if customer_query is None:
             customer_config_list = self.customer_config_dict.values()
@@ -221,31 +372,83 @@ class OffsiteBackupHandler:
         self.logger.info("Looking for available backups for customers: {}."
                          .format(customer_config_list))
 
-        backup_list_by_customer_dict = dict()
+        offsite_catalog = open_offsite_catalog(self.logger, self.offsite_catalog_path)
+
+        if offsite_catalog is not None:
+            with offsite_catalog:
+                try:
+                    return self.get_catalog_backup_dict(offsite_catalog, customer_config_list,
+                                                        timeout, refresh)
+                except sqlite3.Error as catalog_exp:
+                    self.logger.warning("Could not read off-site catalog. Cause: {}."
+                                        .format(catalog_exp))
+
+        return {customer_name: [backup_path for backup_path, _, _ in listed_backup_list]
+                for customer_name, listed_backup_list in self.list_offsite_backups(
+                    customer_config_list, timeout).items()}
 
-        ssh_get_sorted_dir_list = ""
+    def get_catalog_backup_dict(self, offsite_catalog, customer_config_list, timeout=TIMEOUT,
+                                refresh=False):
+        """
+        Get the list of backups for each customer from the off-site catalog.
+
+        The customers whose backups are stale in the catalog are refreshed from off-site first.
+
+        :param offsite_catalog: OffsiteCatalog object.
+        :param customer_config_list: list of customer objects.
+        :param timeout: time to wait for the off-site query to finish.
+        :param refresh: whether to refresh every customer.
+        :return: map containing the list of backup paths by customer name.
+        :raise sqlite3.Error: if the catalog cannot be read or updated.
+        """
+        stale_customer_config_list = [customer_config for customer_config in customer_config_list
+                                      if refresh or offsite_catalog.is_stale(customer_config.name)]
+
+        if stale_customer_config_list:
+            self.logger.info("Refreshing off-site catalog for customers: {}."
+                             .format(stale_customer_config_list))
+
+            for customer_name, listed_backup_list in self.list_offsite_backups(
+                    stale_customer_config_list, timeout).items():
+                offsite_catalog.refresh_customer(customer_name, listed_backup_list)
+
+        backup_list_by_customer_dict = dict()
         for customer_config in customer_config_list:
-            ssh_get_sorted_dir_list += "ls -dt {}/*/\necho END-OF-COMMAND\n" \
-                .format(os.path.join(self.remote_root_backup_path, customer_config.name))
-            backup_list_by_customer_dict[customer_config.name] = []
+            backup_list_by_customer_dict[customer_config.name] = [
+                backup_entry.offsite_path for backup_entry
+                in offsite_catalog.get_customer_backup_list(customer_config.name)]
 
-        stdout, _ = run_ssh_command(self.offsite_config.host, ssh_get_sorted_dir_list, timeout)
+        return backup_list_by_customer_dict
 
-        folder_by_customer = stdout.split('END-OF-COMMAND')
+    def list_offsite_backups(self, customer_config_list, timeout=TIMEOUT):
+        """
+        Query the off-site server looking for the backups of a list of customers.
 
-        customer_idx = 0
-        for key, _ in sorted(backup_list_by_customer_dict.items()):
-            if customer_idx > len(folder_by_customer):
-                break
+        :param customer_config_list: list of customer objects.
+        :param timeout: time to wait for the process to finish.
+        :return: map with the list of tuples (backup path, container path, modification time) by
+        customer name, from the newest to the oldest backup.
+        """
+        customer_root_path_dict = {
+            os.path.join(self.remote_root_backup_path, customer_config.name): customer_config.name
+            for customer_config in customer_config_list}
 
-            backup_list_by_customer_dict[key] = split_folder_list(folder_by_customer[customer_idx])
-            customer_idx += 1
+        sub_dir_dict = get_remote_sub_dir_dict(self.offsite_config.host,
+                                               sorted(customer_root_path_dict.keys()), timeout)
+
+        backup_list_by_customer_dict = dict()
+        for customer_root_path, customer_name in customer_root_path_dict.items():
+            backup_list_by_customer_dict[customer_name] = [
+                (backup_path, os.path.join(self.remote_container_path, customer_name,
+                                           os.path.basename(backup_path)), mtime)
+                for backup_path, mtime in sub_dir_dict[customer_root_path]]
 
         return backup_list_by_customer_dict
 
     @collect_performance_data
     def download_process_backup(self, customer_name, backup_tag, backup_path_to_retrieve,
-                                backup_destination_path, backup_az_path_to_retrieve):
+                                backup_destination_path, backup_az_path_to_retrieve,
+                                volume_name=None, file_name=None):
         """
         Download and process the backup to the destination directory.
 
@@ -255,17 +458,35 @@ class OffsiteBackupHandler:
 
         Decrypt all files inside the volumes and delete the decrypted files.
 
+        When a volume is informed, only its archive is downloaded and validated. When a file is
+        also informed, only that file and the volume metadata are restored from the archive.
+
         :param customer_name: name or deployment label.
         :param backup_tag: backup tag to be retrieved.
         :param backup_path_to_retrieve: backup path on remote location to be downloaded.
         :param backup_destination_path: folder to store the downloaded backup.
         :param backup_az_path_to_retrieve
+        :param volume_name: name of the only volume to be restored, None to restore all volumes.
+        :param file_name: name of the only file to be restored from the volume, None to restore
+        the whole volume.
         :return: tuple with backup tag, backup output and total time.
         :raise Exception: if backup path cannot be created.
         """
         time_start = time.time()
 
-        check_local_disk_space_for_download(backup_path_to_retrieve, self.offsite_config.host,
+        if file_name and not volume_name:
+            raise DownloadBackupException(ExceptionCodes.MissingVolumeForFileRestore, file_name)
+
+        # pool callbacks run in this process, so the filters are read only by this process.
+        self.restore_volume_name = volume_name
+        self.restore_file_name = file_name
+
+        required_space_path = backup_path_to_retrieve
+        if volume_name:
+            required_space_path = os.path.join(backup_path_to_retrieve,
+                                               "{}.{}".format(volume_name, TAR_SUFFIX))
+
+        check_local_disk_space_for_download(required_space_path, self.offsite_config.host,
                                             backup_destination_path, self.logger)
 
         download_backup_path = os.path.join(backup_destination_path, backup_tag)
@@ -279,9 +500,11 @@ class OffsiteBackupHandler:
 
         source_remote_dir = "{}:{}".format(self.offsite_config.host, backup_path_to_retrieve)
 
-        self.backup_output_dict = mp.Manager().dict()
+        # pool callbacks run in this process, so a plain dict is enough.
+        self.backup_output_dict = {}
 
-        self.process_pool = mp.Pool(self.process_pool_size)
+        self.process_pool = mp.Pool(self.process_pool_size, init_offsite_backup_handler_worker,
+                                    (self.serialized_object,))
 
         volume_name_list, volume_name_to_download_list = \
             self.check_volumes_for_download(source_remote_dir, backup_az_path_to_retrieve, download_backup_path)
@@ -290,23 +513,13 @@ class OffsiteBackupHandler:
             self.logger.info("Downloading list of volumes: {}."
                              .format(volume_name_to_download_list))
 
-            transfer_pool = mp.Pool(self.transfer_pool_size)
-
-            for archived_volume_name in volume_name_to_download_list:
-                remote_volume_path = os.path.join(source_remote_dir, archived_volume_name)
-                remote_az_volume_path = os.path.join(backup_az_path_to_retrieve, archived_volume_name)
-
-                self.logger.info("Downloading volume '{}' to '{}'.".format(remote_az_volume_path,
-                                                                           download_backup_path))
-
-                volume_name = archived_volume_name.split('.')[0]
-
-                transfer_pool.apply_async(download_volume_from_offsite,
-                                          (volume_name, archived_volume_name, remote_volume_path,
-                                           download_backup_path, remote_az_volume_path, self.rsync_ssh),
-                                          callback=self.on_volume_downloaded)
-            transfer_pool.close()
-            transfer_pool.join()
+            # a single file is read from the archive without writing the archive to disk.
+            if self.stream_restore or file_name:
+                self.stream_volume_list(volume_name_to_download_list, backup_az_path_to_retrieve,
+                                        download_backup_path)
+            else:
+                self.download_volume_list(volume_name_to_download_list, source_remote_dir,
+                                          backup_az_path_to_retrieve, download_backup_path)
 
         self.process_pool.close()
         self.process_pool.join()
@@ -324,6 +537,72 @@ class OffsiteBackupHandler:
 
         return bur_id, self.backup_output_dict, total_backup_download_time
 
+    def download_volume_list(self, archived_volume_name_list, source_remote_dir,
+                             backup_az_path_to_retrieve, download_backup_path):
+        """
+        Download the volume archives, sending each one to the process pool once downloaded.
+
+        :param archived_volume_name_list: names of the archived volumes to be downloaded.
+        :param source_remote_dir: remote directory where the backup is stored.
+        :param backup_az_path_to_retrieve: container path where the backup is stored.
+        :param download_backup_path: local directory where the recovered backup is stored.
+        """
+        transfer_pool = mp.Pool(self.transfer_pool_size)
+
+        for archived_volume_name in archived_volume_name_list:
+            remote_volume_path = os.path.join(source_remote_dir, archived_volume_name)
+            remote_az_volume_path = os.path.join(backup_az_path_to_retrieve, archived_volume_name)
+
+            self.logger.info("Downloading volume '{}' to '{}'.".format(remote_az_volume_path,
+                                                                       download_backup_path))
+
+            volume_name = archived_volume_name.split('.')[0]
+
+            transfer_pool.apply_async(download_volume_from_offsite,
+                                      (volume_name, archived_volume_name, remote_volume_path,
+                                       download_backup_path, remote_az_volume_path,
+                                       self.rsync_ssh, self.bandwidth_limiter,
+                                       self.offsite_config.transfer_backend),
+                                      callback=self.on_volume_downloaded)
+        transfer_pool.close()
+        transfer_pool.join()
+
+    def stream_volume_list(self, archived_volume_name_list, backup_az_path_to_retrieve,
+                           download_backup_path):
+        """
+        Restore the volumes while they are downloaded, one volume per process of the pool.
+
+        :param archived_volume_name_list: names of the archived volumes to be restored.
+        :param backup_az_path_to_retrieve: container path where the backup is stored.
+        :param download_backup_path: local directory where the recovered backup is stored.
+        """
+        stream_pool = mp.Pool(self.transfer_pool_size, init_offsite_backup_handler_worker,
+                              (self.serialized_object,))
+
+        for archived_volume_name in archived_volume_name_list:
+            remote_az_volume_path = os.path.join(backup_az_path_to_retrieve, archived_volume_name)
+
+            self.logger.info("Streaming volume '{}' to '{}'.".format(remote_az_volume_path,
+                                                                     download_backup_path))
+
+            stream_pool.apply_async(run_volume_stream_task, (VolumeStreamTask(
+                archived_volume_name, remote_az_volume_path, download_backup_path,
+                self.restore_file_name),),
+                                    callback=self.on_volume_processed)
+        stream_pool.close()
+        stream_pool.join()
+
+    def get_transfer_cap_mbps(self):
+        """
+        Get the rate a download started now may use.
+
+        :return: rate in megabits per second or None if not limited.
+        """
+        if self.bandwidth_limiter is None:
+            return None
+
+        return self.bandwidth_limiter.get_transfer_cap_mbps()
+
     def check_offsite_backup_success_flag(self, offsite_backup_path):
         """
         Check the off-site for the backup success flag.
@@ -345,17 +624,21 @@ class OffsiteBackupHandler:
         Get the list of volumes from descriptor file and verify if each volume is downloaded and
         processed, downloaded but pending processing or needs to be downloaded.
 
+        Only the volume to be restored is checked, if one was informed.
+
         :param source_remote_dir: remote directory where the backup is stored.
         :param download_backup_path: local directory where the recovered backup is stored.
         :return: tuple (list of all volumes, list of still missing volumes).
-        :raise DownloadBackupException: if an empty volume list is detected in the descriptor file.
+        :raise DownloadBackupException: if an empty volume list is detected in the descriptor file
+        or the volume to be restored is not in the backup.
         """
         bur_volume_list_desc_file_path = os.path.join(source_remote_dir,
                                                       BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME)
         bur_volume_list_az_file_path = os.path.join(az_remote_dir, BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME)
 
         volume_name_list = OffsiteBackupHandler.retrieve_remote_pickle_file_content(
-            bur_volume_list_desc_file_path, download_backup_path, self.rsync_ssh, bur_volume_list_az_file_path)
+            bur_volume_list_desc_file_path, download_backup_path, self.rsync_ssh, bur_volume_list_az_file_path,
+            self.transfer_manager)
 
         if not volume_name_list:
             raise DownloadBackupException(ExceptionCodes.NoVolumeListForBackup,
@@ -363,11 +646,18 @@ class OffsiteBackupHandler:
 
         self.logger.info('Volumes found on offsite : {}'.format(volume_name_list))
 
+        if self.restore_volume_name:
+            if self.restore_volume_name not in volume_name_list:
+                raise DownloadBackupException(ExceptionCodes.NoSuchVolume,
+                                              [self.restore_volume_name, source_remote_dir])
+
+            volume_name_list = [self.restore_volume_name]
+
         missing_volume_list = []
 
         for volume_name in volume_name_list:
             volume_path = os.path.join(download_backup_path, volume_name)
-            if check_is_processed_volume(volume_path, self.logger):
+            if self.is_restored_volume(volume_path):
                 continue
 
             archived_volume_name = "{}.{}".format(volume_name, TAR_SUFFIX)
@@ -377,10 +667,7 @@ class OffsiteBackupHandler:
                 self.logger.info("'{}' already downloaded in the system. "
                                  "Starting to process it.".format(full_archived_volume_path))
 
-                volume_output = dict()
-                volume_output[VOLUME_OUTPUT_KEYS.status.name] = True
-                volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name] = None
-                volume_output[VOLUME_OUTPUT_KEYS.transfer_time.name] = 0.0
+                volume_output = VolumeResult(status=True)
 
                 self.on_volume_downloaded((volume_name, archived_volume_name, volume_output,
                                            download_backup_path))
@@ -389,6 +676,21 @@ class OffsiteBackupHandler:
 
         return volume_name_list, missing_volume_list
 
+    def is_restored_volume(self, volume_path):
+        """
+        Check if a volume, or only the file to be restored from it, was already restored.
+
+        :param volume_path: local path of the volume.
+        :return: true, if already restored and validated against the volume metadata.
+        """
+        if not self.restore_file_name:
+            return check_is_processed_volume(volume_path, self.logger)
+
+        if not os.path.exists(os.path.join(volume_path, self.restore_file_name)):
+            return False
+
+        return validate_volume_file_metadata(volume_path, self.restore_file_name, self.logger)
+
     def on_volume_downloaded(self, callback_tuple):
         """
         Start the processing of the downloaded volume if no error happened.
@@ -401,19 +703,19 @@ class OffsiteBackupHandler:
         volume_output = callback_tuple[2]
         backup_destination_path = callback_tuple[3]
 
-        if volume_output[VOLUME_OUTPUT_KEYS.status.name]:
+        if volume_output.status:
             self.logger.info("Starting to recover volume {}.".format(volume_name))
 
-            self.process_pool.apply_async(unwrapper_process_volume_function,
-                                          (self.serialized_object, archived_volume_name,
-                                           backup_destination_path, volume_output),
+            self.process_pool.apply_async(run_volume_process_task, (VolumeProcessTask(
+                archived_volume_name, backup_destination_path, volume_output,
+                self.restore_file_name),),
                                           callback=self.on_volume_processed)
             return True
 
         self.logger.error("An error happened while downloading volume '{}'.".format(volume_name))
 
-        if volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name]:
-            self.logger.error(volume_output[VOLUME_OUTPUT_KEYS.rsync_output.name])
+        if volume_output.rsync_output:
+            self.logger.error(volume_output.rsync_output)
 
         self.backup_output_dict[volume_name] = volume_output
 
@@ -423,7 +725,7 @@ class OffsiteBackupHandler:
         """
         Return callback after a volume is downloaded from off-site.
 
-        :param callback_tuple: expected tuple (volume_name, volume_output_dictionary).
+        :param callback_tuple: expected tuple (volume_name, VolumeResult).
         :return: volume output status.
         """
         volume_name = callback_tuple[0]
@@ -431,7 +733,7 @@ class OffsiteBackupHandler:
 
         self.backup_output_dict[volume_name] = volume_output
 
-        return volume_output[VOLUME_OUTPUT_KEYS.status.name]
+        return volume_output.status
 
     def process_backup_metadata_files(self, source_remote_dir, az_remote_dir, backup_destination_path):
         """
@@ -449,10 +751,12 @@ class OffsiteBackupHandler:
         file_list_metadata_az_path = os.path.join(az_remote_dir, BUR_FILE_LIST_DESCRIPTOR_FILE_NAME)
 
         file_name_list = OffsiteBackupHandler.retrieve_remote_pickle_file_content(
-            file_list_metadata_path, backup_destination_path, self.rsync_ssh, file_list_metadata_az_path)
+            file_list_metadata_path, backup_destination_path, self.rsync_ssh, file_list_metadata_az_path,
+            self.transfer_manager)
 
         self.logger.info('Available metadata files: {}'.format(file_name_list))
 
+        download_name_list = []
         for file_name in file_name_list:
             file_path = os.path.join(backup_destination_path, file_name)
 
@@ -460,11 +764,17 @@ class OffsiteBackupHandler:
                 self.logger.info("Backup metadata file {} already downloaded.".format(file_name))
                 continue
 
-            remote_file_path = os.path.join(source_remote_dir, file_name)
-            az_remote_file_path = os.path.join(az_remote_dir, file_name)
+            #RsyncManager.transfer_file(os.path.join(source_remote_dir, file_name),
+            #                           backup_destination_path, self.rsync_ssh)
+            download_name_list.append(file_name)
+
+        if download_name_list:
+            check_transfer_result_dict(self.transfer_manager.transfer_file_list(
+                [(os.path.join(az_remote_dir, file_name), backup_destination_path)
+                 for file_name in download_name_list], self.get_transfer_cap_mbps()))
 
-            #RsyncManager.transfer_file(remote_file_path, backup_destination_path, self.rsync_ssh)
-            AzCopyManager.transfer_file(az_remote_file_path, backup_destination_path)
+        for file_name in download_name_list:
+            file_path = os.path.join(backup_destination_path, file_name)
 
             if is_tar_file(file_path):
                 self.logger.info("Extracting backup metadata file '{}'.".format(file_path))
@@ -508,12 +818,10 @@ class OffsiteBackupHandler:
 
         # Check for errors during the process
         failed_volume_error_message_list = []
-        for key, _ in self.backup_output_dict.items():
-            if not self.backup_output_dict[key][VOLUME_OUTPUT_KEYS.status.name]:
-                error_message = \
-                    self.backup_output_dict[key][VOLUME_OUTPUT_KEYS.output.name]
-                failed_volume_error_message_list.append(error_message)
-                self.logger.error(error_message)
+        for volume_result in self.backup_output_dict.values():
+            if not volume_result.status:
+                failed_volume_error_message_list.append(volume_result.output)
+                self.logger.error(volume_result.output)
 
         if failed_volume_error_message_list:
             raise DownloadBackupException(ExceptionCodes.DownloadProcessFailed,
@@ -528,30 +836,68 @@ class OffsiteBackupHandler:
                                               [volume_name, full_local_volume_path])
 
         # Check against metadata
-        if not validate_backup_per_volume(customer_name, backup_download_destination_path,
-                                          self.logger):
+        checksum_report_dict = {}
+        if not self.validate_restored_volumes(customer_name, backup_download_destination_path,
+                                              volume_name_list, checksum_report_dict):
             raise DownloadBackupException(ExceptionCodes.MetadataValidationFailed,
                                           backup_download_destination_path)
+
+        add_checksum_output(self.backup_output_dict, backup_download_destination_path,
+                            checksum_report_dict)
         self.logger.info("Backup '{}' successfully validated."
                          .format(backup_download_destination_path))
 
         return True
 
-    def process_volume(self, volume_name, volume_root_path, volume_output):
+    def validate_restored_volumes(self, customer_name, backup_download_destination_path,
+                                  volume_name_list, checksum_report_dict=None):
+        """
+        Validate the restored volumes against their metadata.
+
+        The whole backup is validated, unless a single volume or file was restored.
+
+        :param customer_name: customer name or deployment label.
+        :param backup_download_destination_path: path where the backup was downloaded.
+        :param volume_name_list: list of the restored volumes.
+        :param checksum_report_dict: dictionary to store the checksum report by volume path.
+        :return: true, if the restored data is valid; false, otherwise.
+        """
+        if not self.restore_volume_name:
+            return validate_backup_per_volume(customer_name, backup_download_destination_path,
+                                              self.logger, checksum_report_dict)
+
+        for volume_name in volume_name_list:
+            volume_path = os.path.join(backup_download_destination_path, volume_name)
+
+            if self.restore_file_name:
+                is_valid = validate_volume_file_metadata(volume_path, self.restore_file_name,
+                                                         self.logger, checksum_report_dict)
+            else:
+                is_valid = validate_volume_metadata(volume_path, self.logger,
+                                                    checksum_report_dict)
+
+            if not is_valid:
+                return False
+
+        return True
+
+    def process_volume(self, volume_name, volume_root_path, volume_output, file_name=None):
         """
         Process a volume downloaded from off-site to its original state.
 
-        The results are stored in an output dictionary.
+        The results are stored in the VolumeResult of the volume.
 
         :param volume_name: volume name.
         :param volume_root_path: volume root path.
-        :param volume_output: output dictionary with results after processing the volume.
-        :return: tuple with volume name and volume output dictionary.
+        :param volume_output: VolumeResult with results after downloading the volume.
+        :param file_name: name of the only file to be restored from the volume, None to restore
+        the whole volume.
+        :return: tuple with volume name and VolumeResult.
         """
-        volume_output[VOLUME_OUTPUT_KEYS.processing_time.name] = 0.0
-        volume_output[VOLUME_OUTPUT_KEYS.tar_time.name] = 0.0
-        volume_output[VOLUME_OUTPUT_KEYS.output.name] = ""
-        volume_output[VOLUME_OUTPUT_KEYS.status.name] = False
+        volume_output.processing_time = 0.0
+        volume_output.tar_time = 0.0
+        volume_output.output = ""
+        volume_output.status = False
 
         volume_full_path = os.path.join(volume_root_path, volume_name)
 
@@ -561,6 +907,11 @@ class OffsiteBackupHandler:
 
             is_valid_path(volume_full_path)
 
+            if file_name:
+                self.restore_volume_file(volume_full_path, volume_root_path, file_name,
+                                         volume_output)
+                return volume_name, volume_output
+
             self.logger.info("Extracting volume {}.".format(volume_full_path))
 
             volume_extraction_time = []
@@ -570,7 +921,7 @@ class OffsiteBackupHandler:
             if volume_extraction_time:
                 self.logger.log_time("Elapsed time to extract volume '{}'".format(volume_full_path),
                                      volume_extraction_time[0])
-                volume_output[VOLUME_OUTPUT_KEYS.tar_time.name] = volume_extraction_time[0]
+                volume_output.tar_time = volume_extraction_time[0]
 
             decompressed_volume_dir = os.path.join(volume_root_path, volume_name.split('.')[0])
 
@@ -585,22 +936,223 @@ class OffsiteBackupHandler:
             if tot_volume_process_time:
                 self.logger.log_time("Elapsed time to process the volume '{}'".format(
                     decompressed_volume_dir), tot_volume_process_time[0])
-                volume_output[VOLUME_OUTPUT_KEYS.processing_time.name] = \
-                    tot_volume_process_time[0]
+                volume_output.processing_time = tot_volume_process_time[0]
+
+            volume_output.status = True
+
+        except BurException as exception:
+            volume_output.set_error("Error while processing volume. {}.".format(
+                exception.__str__()))
+        return volume_name, volume_output
+
+    def restore_volume_file(self, volume_full_path, volume_root_path, file_name, volume_output):
+        """
+        Restore a single file, and the volume metadata, from a downloaded volume archive.
+
+        The archive is removed once the file is restored.
+
+        :param volume_full_path: path of the downloaded volume archive.
+        :param volume_root_path: volume root path.
+        :param file_name: name of the file to be restored from the volume.
+        :param volume_output: VolumeResult of the volume, updated with the processing time.
+        :return: true if success.
+        :raise BurException: if the file cannot be restored.
+        """
+        volume_name = os.path.basename(volume_full_path).split('.')[0]
+
+        self.logger.info("Restoring file '{}' from volume '{}'.".format(file_name,
+                                                                        volume_full_path))
+
+        tot_volume_process_time = []
+        with open(volume_full_path, 'rb') as volume_file:
+            self.gpg_manager.decrypt_decompress_tar_stream(
+                volume_file, volume_root_path, self.thread_pool_size,
+                member_filter=get_file_member_filter(volume_name, file_name),
+                get_elapsed_time=tot_volume_process_time)
+
+        remove_path(volume_full_path)
+
+        restored_file_path = os.path.join(volume_root_path, volume_name, file_name)
+        if not os.path.exists(restored_file_path):
+            raise DownloadBackupException(ExceptionCodes.NoSuchFile, [file_name, volume_name])
+
+        if tot_volume_process_time:
+            self.logger.log_time("Elapsed time to restore the file '{}'".format(
+                restored_file_path), tot_volume_process_time[0])
+            volume_output.processing_time = tot_volume_process_time[0]
+
+        volume_output.status = True
+
+        return True
+
+    def process_volume_stream(self, archived_volume_name, remote_az_volume_path, volume_root_path,
+                              file_name=None):
+        """
+        Restore a volume while it is downloaded from off-site, reading its archive only once.
+
+        Only the decrypted and decompressed files are written. The results are stored in the
+        VolumeResult of the volume.
+
+        :param archived_volume_name: name of the archived volume file on off-site.
+        :param remote_az_volume_path: container path of the archived volume.
+        :param volume_root_path: volume root path.
+        :param file_name: name of the only file to be restored from the volume, None to restore
+        the whole volume.
+        :return: tuple with volume name and VolumeResult.
+        """
+        volume_name = archived_volume_name.split('.')[0]
+        cap_mbps = self.get_transfer_cap_mbps()
+
+        member_filter = None
+        if file_name:
+            member_filter = get_file_member_filter(volume_name, file_name)
+
+        volume_output = VolumeResult()
+        volume_output.processing_time = 0.0
+        volume_output.tar_time = 0.0
+        volume_output.output = ""
+
+        download_stream = None
+
+        try:
+            self.logger.log_info("Process_id: {}, streaming volume {}.".format(os.getpid(),
+                                                                               volume_name))
+
+            time_start = time.time()
+            if file_name and self.restore_file_from_toc(remote_az_volume_path, volume_root_path,
+                                                        file_name, cap_mbps):
+                volume_output.transfer_time = time.time() - time_start
+                volume_output.processing_time = volume_output.transfer_time
+                volume_output.status = True
+
+                return volume_name, volume_output
+
+            download_stream = self.transfer_manager.get_download_stream(
+                remote_az_volume_path, cap_mbps,
+                on_progress=TransferProgressMonitor(self.logger, remote_az_volume_path))
+
+            tot_volume_process_time = []
+            self.gpg_manager.decrypt_decompress_tar_stream(download_stream.start(),
+                                                           volume_root_path,
+                                                           self.thread_pool_size,
+                                                           member_filter=member_filter,
+                                                           get_elapsed_time=tot_volume_process_time)
+
+            if file_name and not os.path.exists(os.path.join(volume_root_path, volume_name,
+                                                             file_name)):
+                raise DownloadBackupException(ExceptionCodes.NoSuchFile, [file_name, volume_name])
 
-            volume_output[VOLUME_OUTPUT_KEYS.status.name] = True
+            volume_output.rsync_output = download_stream.finish()
+
+            if tot_volume_process_time:
+                self.logger.log_time("Elapsed time to stream the volume '{}'".format(
+                    remote_az_volume_path), tot_volume_process_time[0])
+                volume_output.transfer_time = tot_volume_process_time[0]
+                volume_output.processing_time = tot_volume_process_time[0]
+
+            volume_output.status = True
 
         except BurException as exception:
-            volume_output[VOLUME_OUTPUT_KEYS.output.name] = \
-                "Error while processing volume. {}.".format(exception.__str__())
+            if download_stream is not None:
+                download_stream.abort()
+
+            volume_output.set_error("Error while streaming volume. {}.".format(
+                exception.__str__()))
+
         return volume_name, volume_output
 
+    def read_volume_toc(self, remote_az_volume_path):
+        """
+        Read the table of contents uploaded next to a volume archive.
+
+        :param remote_az_volume_path: container path of the archived volume.
+        :return: dictionary with the TarTocEntry of each member, or None if the volume has no
+        readable table of contents, e.g. it was uploaded without one.
+        """
+        toc_path = get_tar_toc_path(remote_az_volume_path)
+
+        try:
+            download_stream = BlobManager.get_download_stream(toc_path)
+            try:
+                toc_content = download_stream.start().read()
+            finally:
+                download_stream.abort()
+
+            return parse_tar_toc(toc_content)
+        except BurException as toc_exp:
+            self.logger.warning("Could not read table of contents '{}', the whole archive will be "
+                                "read. Cause: {}".format(toc_path, toc_exp))
+
+        return None
+
+    def restore_file_from_toc(self, remote_az_volume_path, volume_root_path, file_name,
+                              cap_mbps=None):
+        """
+        Restore a single file of a volume by ranged reads of the volume archive.
+
+        Only the file and the metadata file of the volume are read from off-site, at the offsets
+        listed in the table of contents of the archive, and each one is checked by its md5.
+
+        :param remote_az_volume_path: container path of the archived volume.
+        :param volume_root_path: volume root path.
+        :param file_name: name of the file to be restored from the volume.
+        :param cap_mbps: maximum rate of the download in megabits per second, None if not limited.
+        :return: true, if the file was restored; false, if ranged reads are not supported by the
+        transfer backend or the volume has no table of contents.
+        :raise BurException: if the file is not in the volume or cannot be restored.
+        """
+        if self.offsite_config.transfer_backend != NATIVE_TRANSFER_BACKEND:
+            return False
+
+        toc_entry_dict = self.read_volume_toc(remote_az_volume_path)
+        if toc_entry_dict is None:
+            return False
+
+        volume_name = os.path.basename(remote_az_volume_path).split('.')[0]
+        member_filter = get_file_member_filter(volume_name, file_name)
+
+        toc_entry_list = [toc_entry for member_name, toc_entry in sorted(toc_entry_dict.items())
+                          if member_filter(member_name)]
+
+        file_member_name = os.path.join(volume_name, file_name + GZ_ENCRYPTED_FILE_ENDS_WITH)
+        if file_member_name not in [os.path.normpath(toc_entry.name)
+                                    for toc_entry in toc_entry_list]:
+            raise DownloadBackupException(ExceptionCodes.NoSuchFile, [file_name, volume_name])
+
+        for toc_entry in toc_entry_list:
+            member_path = os.path.normpath(toc_entry.name)
+            output_file_path = os.path.join(volume_root_path, member_path[0:len(member_path) - len(
+                GZ_ENCRYPTED_FILE_ENDS_WITH)])
+
+            self.logger.info("Restoring '{}' from bytes {} to {} of '{}'.".format(
+                output_file_path, toc_entry.offset, toc_entry.offset + toc_entry.size,
+                remote_az_volume_path))
+
+            if not create_path(os.path.dirname(output_file_path)):
+                raise DownloadBackupException(ExceptionCodes.CannotCreatePath,
+                                              os.path.dirname(output_file_path))
+
+            download_stream = BlobManager.get_download_stream(
+                remote_az_volume_path, cap_mbps,
+                on_progress=TransferProgressMonitor(self.logger, remote_az_volume_path),
+                offset=toc_entry.offset, size=toc_entry.size)
+            try:
+                self.gpg_manager.decrypt_decompress_file_object(download_stream.start(),
+                                                                output_file_path, toc_entry.md5)
+                download_stream.finish()
+            finally:
+                download_stream.abort()
+
+        return True
+
     def get_backup_dir_list_to_cleanup(self, offsite_retention):
         """
         Get the list of the oldest directories to be removed for each customer from the off-site.
 
         Note that empty backups are not considered in the process.
 
+        The age of the backups of all customers is read by a single scan of the off-site.
+
         :param offsite_retention: how many backups should be kept on offside.
         :return: list with the directories to be removed or empty.
         """
@@ -608,13 +1160,17 @@ class OffsiteBackupHandler:
 
         dir_list_by_customer_dict = self.get_offsite_backup_dict(customer_config_list)
 
+        backup_age_dict = get_remote_backup_ages(
+            self.offsite_config.host, [os.path.join(self.remote_root_backup_path, customer_name)
+                                       for customer_name in sorted(dir_list_by_customer_dict)])
+
         dir_to_be_removed_list = []
 
         for customer_key, _ in dir_list_by_customer_dict.items():
 
-            not_empty_bkp_path_list = filter(lambda offsite_bkp_path: not is_remote_folder_empty(
-                self.offsite_config.host, offsite_bkp_path), dir_list_by_customer_dict[
-                    customer_key])
+            not_empty_bkp_path_list = [
+                offsite_bkp_path for offsite_bkp_path in dir_list_by_customer_dict[customer_key]
+                if offsite_bkp_path in backup_age_dict]
 
             offsite_backup_list_size = len(not_empty_bkp_path_list)
 
@@ -622,8 +1178,9 @@ class OffsiteBackupHandler:
                 .format(customer_key, offsite_backup_list_size, offsite_retention)
 
             if offsite_backup_list_size > offsite_retention:
-                sorted_backup_list = sort_remote_folders_by_content(self.offsite_config.host,
-                                                                    not_empty_bkp_path_list)
+                sorted_backup_list = sorted(not_empty_bkp_path_list,
+                                            key=lambda bkp_path: backup_age_dict[bkp_path],
+                                            reverse=True)
 
                 dir_to_be_removed_list.extend(sorted_backup_list[offsite_retention:])
 
@@ -641,6 +1198,10 @@ class OffsiteBackupHandler:
 
         Keep the MAX_BKP_OFFSITE most recent backups.
 
+        The blobs of the backups are removed first. Only the backups whose blobs were removed have
+        their folder removed from the off-site server, so that the others are found again by the
+        next clean up.
+
         :return tuple with true, success message and list of removed directories, if no problem
         happened or tuple with false, error message, list of removed directories, otherwise.
         """
@@ -651,21 +1212,82 @@ class OffsiteBackupHandler:
         if not remove_dir_list:
             return True, "Off-site clean up finished successfully with no backup removed.", []
 
-        try:
-            not_removed_list, validated_removed_list = remove_remote_dir(self.offsite_config.host,
-                                                                         remove_dir_list)
-        except BurException as cleanup_exp:
-            return False, cleanup_exp.__str__(), []
+        blob_not_removed_list = self.remove_backup_blobs(remove_dir_list)
+
+        remove_dir_list = [remove_dir for remove_dir in remove_dir_list
+                           if remove_dir not in blob_not_removed_list]
+
+        not_removed_list, validated_removed_list = [], []
+        if remove_dir_list:
+            try:
+                not_removed_list, validated_removed_list = remove_remote_dir(
+                    self.offsite_config.host, remove_dir_list)
+            except BurException as cleanup_exp:
+                return False, cleanup_exp.__str__(), []
+
+        self.remove_offsite_catalog_backups(validated_removed_list)
+
+        not_removed_list = blob_not_removed_list + not_removed_list
 
         if not_removed_list:
-            log_message = "Following backups were not removed: {}".format(not_removed_list)
+            log_message = "Following backups were not removed: {}".format(", ".join(
+                not_removed_list))
             return False, log_message, validated_removed_list
 
         return True, "Off-site clean up finished successfully.", validated_removed_list
 
+    def remove_backup_blobs(self, backup_path_list):
+        """
+        Remove the blobs of a list of backups from the off-site container.
+
+        :param backup_path_list: list of backup paths on the off-site server.
+        :return: list of backup paths whose blobs could not be removed.
+        """
+        container_dir_dict = {os.path.join(os.path.basename(os.path.dirname(backup_path)),
+                                           os.path.basename(backup_path)): backup_path
+                              for backup_path in backup_path_list}
+
+        result_dict = self.transfer_manager.remove_dir_list(self.remote_container_path,
+                                                            sorted(container_dir_dict))
+
+        not_removed_list = []
+        for container_dir, error_message in sorted(result_dict.items()):
+            if error_message is None:
+                continue
+
+            self.logger.error("Error while removing blobs of backup '{}'. {}"
+                              .format(container_dir, error_message))
+            not_removed_list.append(container_dir_dict[container_dir])
+
+        return not_removed_list
+
+    def remove_offsite_catalog_backups(self, removed_dir_list):
+        """
+        Remove the backups deleted from off-site from the off-site catalog.
+
+        :param removed_dir_list: list of removed backup paths.
+        :return: number of backups removed from the catalog.
+        """
+        if not removed_dir_list:
+            return 0
+
+        offsite_catalog = open_offsite_catalog(self.logger, self.offsite_catalog_path)
+        if offsite_catalog is None:
+            return 0
+
+        with offsite_catalog:
+            try:
+                return offsite_catalog.remove_path_list(removed_dir_list)
+            except sqlite3.Error as catalog_exp:
+                self.logger.warning("Could not remove backups {} from off-site catalog. Cause: {}."
+                                    .format(removed_dir_list, catalog_exp))
+
+        return 0
+
     @staticmethod
     def retrieve_remote_pickle_file_content(remote_file_path, local_destination_path,
-                                            rsync_ssh=True, remote_az_file_path=None):
+                                            rsync_ssh=True, remote_az_file_path=None,
+                                            transfer_manager=AzCopyManager):
         """
         Retrieve and load the content of a pickle file stored remotely.
 
@@ -675,12 +1297,13 @@ class OffsiteBackupHandler:
         :param local_destination_path: local destination path to download the file.
         :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon.
         :param remote_az_file_path
+        :param transfer_manager: class used to download the file.
         :return: true if success.
         :raise DownloadBackupException: if cannot read pickle file content or remove it after
         reading.
         """
         #RsyncManager.transfer_file(remote_file_path, local_destination_path, rsync_ssh)
-        AzCopyManager.transfer_file(remote_az_file_path, local_destination_path)
+        transfer_manager.transfer_file(remote_az_file_path, local_destination_path)
 
         local_file_path = os.path.join(local_destination_path, os.path.basename(remote_file_path))
 
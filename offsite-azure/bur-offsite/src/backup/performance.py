@@ -116,18 +116,15 @@ class BURPerformance:
             report_file.close()
 
         for volume_name in self.backup_output_dict.keys():
-            proc_time = self.backup_output_dict[volume_name][
-                constants.VOLUME_OUTPUT_KEYS.processing_time.name]
-            tar_time = self.backup_output_dict[volume_name][
-                constants.VOLUME_OUTPUT_KEYS.tar_time.name]
-            transfer_time = self.backup_output_dict[volume_name][
-                constants.VOLUME_OUTPUT_KEYS.transfer_time.name]
+            proc_time = self.backup_output_dict[volume_name].processing_time
+            tar_time = self.backup_output_dict[volume_name].tar_time
+            transfer_time = self.backup_output_dict[volume_name].transfer_time
 
             total_proc_time = float(proc_time) + float(tar_time)
             total_time = total_proc_time + float(transfer_time)
 
             # rsync_output = \
-            #     self.backup_output_dict[volume_name][constants.VOLUME_OUTPUT_KEYS.rsync_output.name]
+            #     self.backup_output_dict[volume_name].rsync_output
 
             # rsync_speedup = rsync_rate = constants.NOT_INFORMED_STR
             # if rsync_output is not None:
@@ -137,15 +134,17 @@ class BURPerformance:
             rsync_speedup = "0.0"
             rsync_rate = "0.0"
 
-            azcopy_output = self.backup_output_dict[volume_name][constants.VOLUME_OUTPUT_KEYS.rsync_output.name]
+            azcopy_output = self.backup_output_dict[volume_name].rsync_output
 
             az_copy_transfer_time = constants.NOT_INFORMED_STR
             if azcopy_output is not None:
                 az_copy_transfer_time = azcopy_output.summary_dict.get("Elapsed Time (Minutes)")
 
+            checksum_time = self.backup_output_dict[volume_name].checksum_time
+            checksum_rate = self.backup_output_dict[volume_name].checksum_rate
 
             with open(report_file_path, 'a') as report_file:
-                report_file.write("{}, {}, {}, {}, {}, {}, {}, {}, {}\n".format(volume_name,
+                report_file.write("{}, {}, {}, {}, {}, {}, {}, {}, {}, {}, {:.2f}\n".format(volume_name,
                                                                             format_time(proc_time),
                                                                             format_time(tar_time),
                                                                             format_time(
@@ -154,7 +153,9 @@ class BURPerformance:
                                                                                 transfer_time),
                                                                             format_time(total_time),
                                                                             rsync_speedup,
-                                                                            rsync_rate, az_copy_transfer_time))
+                                                                            rsync_rate, az_copy_transfer_time,
+                                                                            format_time(checksum_time),
+                                                                            float(checksum_rate)))
 
     @staticmethod
     def get_log_root_path_value(passed_args):
@@ -192,4 +193,5 @@ class BURPerformance:
         :return: header.
         """
         return "VOLUME_NAME, COMPRESSION_ENCRYPTION_TIME, TAR_TIME, TOTAL_PROCESSING_TIME, " \
-               "TRANSFER_TIME, TOTAL_TIME, SPEEDUP, RATE, AZCOPY_TRANSFER_TIME\n"
+               "TRANSFER_TIME, TOTAL_TIME, SPEEDUP, RATE, AZCOPY_TRANSFER_TIME, CHECKSUM_TIME, " \
+               "CHECKSUM_RATE_MBPS\n"
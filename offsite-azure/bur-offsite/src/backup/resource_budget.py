@@ -0,0 +1,262 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=too-many-arguments,too-few-public-methods
+
+"""Module to share the upload resources between customers and between the stages of an upload."""
+
+from collections import OrderedDict
+import threading
+
+RESOURCE_NAMES = ('number_processors', 'number_transfer_processors', 'temp_space_mb')
+
+TEMP_SPACE_WAIT_TIME = 5
+
+
+def split_by_weight(total, weight_list):
+    """
+    Split an amount of units proportionally to a list of weights.
+
+    Each part gets the integer part of its quota, and the units left are given one by one to the
+    parts with the largest remainders, the first ones winning ties. Every part gets at least one
+    unit.
+
+    :param total: amount of units to be split.
+    :param weight_list: weight of each part.
+    :return: list with the units of each part, in the order of the weights.
+    """
+    total_weight = sum(weight_list)
+    share_list = [int(total * weight // total_weight) for weight in weight_list]
+
+    remainder_order = sorted(range(len(weight_list)),
+                             key=lambda index: -(total * weight_list[index] % total_weight))
+    for index in remainder_order[:int(total) - sum(share_list)]:
+        share_list[index] += 1
+
+    return [max(1, share) for share in share_list]
+
+
+class CustomerShare(object):
+    """Resources granted to a customer while its backups are uploaded."""
+
+    def __init__(self, customer_name, number_processors, number_transfer_processors,
+                 temp_space_mb=None):
+        """
+        Initialize Customer Share object.
+
+        :param customer_name: name of the customer.
+        :param number_processors: number of processes to process volumes.
+        :param number_transfer_processors: number of processes to transfer volumes.
+        :param temp_space_mb: temporary disk space in MB, None if not limited.
+        """
+        self.customer_name = customer_name
+        self.number_processors = number_processors
+        self.number_transfer_processors = number_transfer_processors
+        self.temp_space_mb = temp_space_mb
+
+    def __str__(self):
+        """Represent Customer Share object as string."""
+        return "({}, processors: {}, transfer processors: {}, temp space: {}MB)".format(
+            self.customer_name, self.number_processors, self.number_transfer_processors,
+            self.temp_space_mb)
+
+    def __repr__(self):
+        """Represent Customer Share object."""
+        return self.__str__()
+
+
+class ResourceBudget(object):
+    """
+    Split a global budget of processes and temporary disk space between customers.
+
+    Customers are registered in the order they will be uploaded. When a customer starts, it gets a
+    share of each resource proportional to its weight among the customers expected to run at the
+    same time: the ones already running plus the next registered ones, up to the number of
+    concurrent customers. Units that do not split evenly go to the largest remainders, the
+    customers that started first winning ties. The share is given back when the customer
+    finishes.
+    """
+
+    def __init__(self, number_customers, number_processors, number_transfer_processors,
+                 temp_space_mb=None):
+        """
+        Initialize Resource Budget object.
+
+        :param number_customers: number of customers uploaded at the same time.
+        :param number_processors: total number of processes to process volumes.
+        :param number_transfer_processors: total number of processes to transfer volumes.
+        :param temp_space_mb: total temporary disk space in MB, None if not limited.
+        """
+        self.number_customers = max(1, int(number_customers))
+        self.total_dict = {'number_processors': number_processors,
+                           'number_transfer_processors': number_transfer_processors,
+                           'temp_space_mb': temp_space_mb}
+        self.free_dict = dict(self.total_dict)
+        self.waiting_customer_list = []
+        self.running_customer_dict = OrderedDict()
+        self.condition = threading.Condition()
+
+    def add_customer(self, customer_name, weight=1):
+        """
+        Register a customer waiting to be uploaded.
+
+        :param customer_name: name of the customer.
+        :param weight: relative weight of the customer when sharing the resources.
+        """
+        with self.condition:
+            self.waiting_customer_list.append((customer_name, max(1, int(weight))))
+
+    def get_share_weight_list(self, customer_name):
+        """
+        Get the weights the resources are split by when the customer starts.
+
+        :param customer_name: name of the customer about to start.
+        :return: tuple (weights of the running customers, the customer and the next waiting ones,
+        index of the customer in that list).
+        """
+        waiting_weight_list = [weight for name, weight in self.waiting_customer_list
+                               if name != customer_name]
+        customer_weight = dict(self.waiting_customer_list).get(customer_name, 1)
+
+        number_waiting = max(0, self.number_customers - len(self.running_customer_dict) - 1)
+        weight_list = list(self.running_customer_dict.values()) + [customer_weight] + \
+            waiting_weight_list[:number_waiting]
+
+        return weight_list, len(self.running_customer_dict)
+
+    def acquire(self, customer_name, blocking=True):
+        """
+        Reserve the share of resources of a customer, waiting until every resource is available.
+
+        :param customer_name: name of the customer.
+        :param blocking: whether to wait for the resources, instead of returning None when they
+        are not available.
+        :return: CustomerShare object with the reserved resources, or None if not blocking and the
+        resources are not available.
+        """
+        with self.condition:
+            while not self._is_available():
+                if not blocking:
+                    return None
+                self.condition.wait()
+
+            weight_list, customer_index = self.get_share_weight_list(customer_name)
+
+            share_dict = {}
+            for resource_name in RESOURCE_NAMES:
+                total = self.total_dict[resource_name]
+                if total is None:
+                    share_dict[resource_name] = None
+                    continue
+
+                fair_share = split_by_weight(total, weight_list)[customer_index]
+                share_dict[resource_name] = min(fair_share, self.free_dict[resource_name])
+                self.free_dict[resource_name] -= share_dict[resource_name]
+
+            self.waiting_customer_list = [(name, weight) for name, weight
+                                          in self.waiting_customer_list if name != customer_name]
+            self.running_customer_dict[customer_name] = weight_list[customer_index]
+
+            return CustomerShare(customer_name, **share_dict)
+
+    def release(self, customer_share):
+        """
+        Give back the share of resources of a customer.
+
+        :param customer_share: CustomerShare object returned by acquire.
+        """
+        with self.condition:
+            for resource_name in RESOURCE_NAMES:
+                if self.free_dict[resource_name] is not None:
+                    self.free_dict[resource_name] += getattr(customer_share, resource_name)
+
+            self.running_customer_dict.pop(customer_share.customer_name, None)
+            self.condition.notify_all()
+
+    def _is_available(self):
+        """
+        Check whether there is at least one unit of each limited resource free.
+
+        :return: true, if a customer can start; false otherwise.
+        """
+        return all(free is None or free >= 1 for free in self.free_dict.values())
+
+
+class TempSpaceBudget(object):
+    """
+    Bound the temporary disk space held by volumes that are processed but not transferred yet.
+
+    Each volume reserves its estimated size before being processed and gives it back once it is
+    transferred or fails, so volume processing waits while the transfers are behind. A volume
+    bigger than the budget is still admitted when no other volume holds space.
+
+    If a transfer job fails without calling back, its reservation is reclaimed once the job is
+    seen as finished, which is checked every wait_time seconds while waiting.
+    """
+
+    def __init__(self, budget_mb, wait_time=TEMP_SPACE_WAIT_TIME):
+        """
+        Initialize Temp Space Budget object.
+
+        :param budget_mb: maximum temporary disk space in MB held at a time.
+        :param wait_time: seconds between checks for finished transfer jobs while waiting.
+        """
+        self.budget_mb = budget_mb
+        self.wait_time = wait_time
+        self.used_mb = 0
+        self.reservation_dict = {}
+        self.condition = threading.Condition()
+
+    def reserve(self, key, size_mb):
+        """
+        Reserve temporary disk space for a volume, waiting while the budget is exhausted.
+
+        :param key: identification of the volume.
+        :param size_mb: estimated space in MB the volume needs.
+        """
+        with self.condition:
+            while self.used_mb > 0 and self.used_mb + size_mb > self.budget_mb:
+                self.condition.wait(self.wait_time)
+                self._release_failed_transfers()
+
+            self.reservation_dict[key] = [size_mb, None]
+            self.used_mb += size_mb
+
+    def set_transfer(self, key, async_result):
+        """
+        Keep the asynchronous result of the transfer job of a volume with its reservation.
+
+        :param key: identification of the volume.
+        :param async_result: result returned by the transfer pool.
+        """
+        with self.condition:
+            if key in self.reservation_dict:
+                self.reservation_dict[key][1] = async_result
+
+    def release(self, key):
+        """
+        Give back the space reserved for a volume, if any.
+
+        :param key: identification of the volume.
+        :return: space in MB given back.
+        """
+        with self.condition:
+            size_mb, _ = self.reservation_dict.pop(key, [0, None])
+            self.used_mb -= size_mb
+            self.condition.notify_all()
+
+            return size_mb
+
+    def _release_failed_transfers(self):
+        """Give back the space of volumes whose transfer job finished without success."""
+        for key, (_, async_result) in self.reservation_dict.items():
+            if async_result is not None and async_result.ready() and \
+                    not async_result.successful():
+                self.release(key)
@@ -28,6 +28,8 @@ RSYNC_CMD = "rsync"
 RSYNC_DAEMON_DESTINATION = "/rsyncd"
 RSYNC_SSH_ARGS = "-ahce ssh"
 RSYNC_DAEMON_ARGS = "-ahc"
+RSYNC_BWLIMIT_ARG = "--bwlimit={}"
+KIBIBYTES_PER_MEGABIT = 1000 * 1000 / 8 / 1024.0
 
 RSYNC_OUTPUT_SUMMARY_ITEM = Enum('RSYNC_OUTPUT_SUMMARY_ITEM',
                                  'total_files, created, deleted, transferred, rate, speedup')
@@ -65,7 +67,8 @@ class RsyncOutput:
 class RsyncManager:
     """Class used to encapsulate rsync commands to transfer files over the network."""
 
-    def __init__(self, source_path, destination_path, retry=NUMBER_TRIES, rsync_ssh=True):
+    def __init__(self, source_path, destination_path, retry=NUMBER_TRIES, rsync_ssh=True,
+                 cap_mbps=None):
         """
         Initialize Rsync Manager class.
 
@@ -73,11 +76,24 @@ class RsyncManager:
         :param destination_path: destination location to send the file.
         :param retry: number of tries in case of failure.
         :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
         """
         self.source_path = source_path
         self.destination_path = destination_path
         self.retry = retry
         self.rsync_ssh = rsync_ssh
+        self.cap_mbps = cap_mbps
+
+    def get_bwlimit_args(self):
+        """
+        Get the rsync arguments to limit the rate of the transfer.
+
+        :return: list of arguments, empty if the rate is not limited.
+        """
+        if self.cap_mbps is None:
+            return []
+
+        return [RSYNC_BWLIMIT_ARG.format(max(1, int(self.cap_mbps * KIBIBYTES_PER_MEGABIT)))]
 
     @staticmethod
     def parse_number_of_file_key_value(rsync_output_line):
@@ -189,8 +205,10 @@ class RsyncManager:
             if not check_remote_path_exists(host, remote_path):
                 raise RsyncException(ExceptionCodes.InvalidPath, source_path)
 
-            output = subprocess.check_output([RSYNC_CMD, rsync_args, '--stats', source_path,
-                                              self.destination_path], stderr=subprocess.PIPE)
+            output = subprocess.check_output([RSYNC_CMD, rsync_args, '--stats'] +
+                                             self.get_bwlimit_args() +
+                                             [source_path, self.destination_path],
+                                             stderr=subprocess.PIPE)
 
             rsync_output = self.parse_output(output)
 
@@ -238,7 +256,8 @@ class RsyncManager:
                 destination_path = "{}{}".format(RSYNC_MODULE, destination_path)
 
             for current_try in range(1, self.retry + 1):
-                process = [RSYNC_CMD, rsync_args, '--stats', self.source_path, destination_path]
+                process = [RSYNC_CMD, rsync_args, '--stats'] + self.get_bwlimit_args() + \
+                    [self.source_path, destination_path]
                 output = subprocess.check_output(process, stderr=subprocess.PIPE)
 
                 rsync_output = self.parse_output(output)
@@ -259,7 +278,7 @@ class RsyncManager:
 
     @staticmethod
     @timeit
-    def transfer_file(source_path, target_path, rsync_ssh=True, **kwargs):
+    def transfer_file(source_path, target_path, rsync_ssh=True, cap_mbps=None, **kwargs):
         """
         Transfer a file from the source to a target location by using RsyncManager.
 
@@ -273,6 +292,7 @@ class RsyncManager:
         :param target_path: remote location.
         :param rsync_ssh: boolean to determine whether to use rsync over ssh or rsync daemon,
         default value is true, which means use rsync ssh by default.
+        :param cap_mbps: maximum rate of the transfer in megabits per second, None if not limited.
         :return: RsyncOutput object with details of the transfer process.
         :raise Exception: if an error happens during the transferring.
         """
@@ -280,8 +300,10 @@ class RsyncManager:
         check_not_empty(target_path)
 
         if '@' in source_path:
-            rsync_output = RsyncManager(source_path, target_path, NUMBER_TRIES, rsync_ssh).receive()
+            rsync_output = RsyncManager(source_path, target_path, NUMBER_TRIES, rsync_ssh,
+                                        cap_mbps).receive()
         else:
-            rsync_output = RsyncManager(source_path, target_path, NUMBER_TRIES, rsync_ssh).send()
+            rsync_output = RsyncManager(source_path, target_path, NUMBER_TRIES, rsync_ssh,
+                                        cap_mbps).send()
 
         return rsync_output
@@ -10,159 +10,224 @@
 
 # pylint: disable=keyword-arg-before-vararg,broad-except
 
-"""Module to manage multiple threads in a pool."""
+"""Module to run jobs in a bounded pool of worker threads."""
 
 from enum import Enum
 import os
 from Queue import Queue
 import threading
-from threading import Lock
 import time
 
 from backup.logger import CustomLogger
 
 MAX_THREAD = 5
+QUEUE_SIZE_PER_THREAD = 2
 SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
 
 THREAD_OUTPUT_INDEX = Enum('THREAD_OUTPUT_INDEX', 'TH_NAME, TH_ELAPSED_TIME, TH_RESULT, TH_ERROR')
 
 
-class SingleThread(threading.Thread):
-    """
-    Subclasses the default thread behaviour.
+class Future(object):
+    """Holds the result of a job submitted to the ThreadPoolExecutor."""
 
-    Callback should return a tuple with thread name, elapsed time, job output and exception message.
-    """
+    def __init__(self, task_name):
+        """
+        Initialize Future object.
 
-    def __init__(self, thread_name, callback, function_name, *func_args):
+        :param task_name: identification of the job.
         """
-        Initialize custom Single Thread.
+        self.task_name = task_name
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._error_message = None
 
-        :param thread_name: identification of the thread.
-        :param callback: callback function to be called at the end of the thread.
-        :param function_name: function to be executed by this thread.
-        :param func_args: list of arguments to be passed to the previous informed function.
+    def set_result(self, result=None, error_message=None):
         """
-        threading.Thread.__init__(self)
+        Store the output of the job and wake up any thread waiting for it.
 
-        self.thread_name = thread_name
-        self.function = function_name
-        self.args = func_args
-        self.callback = callback
+        :param result: output of the job.
+        :param error_message: error message caused by an exception from the job.
+        """
+        with self._condition:
+            self._result = result
+            self._error_message = error_message
+            self._done = True
+            self._condition.notify_all()
 
-    def run(self):
-        """Execute this thread."""
-        start_time = time.time()
+    def done(self):
+        """
+        Check whether the job is finished.
 
-        result = None
-        error_message = None
+        :return: true, if the job is finished; false otherwise.
+        """
+        with self._condition:
+            return self._done
 
-        try:
-            result = self.function(*self.args)
-        except Exception as exception:
-            error_message = exception.__str__()
+    def wait(self, timeout=None):
+        """
+        Block until the job is finished or the timeout expires.
+
+        :param timeout: maximum time in seconds to wait. Waits forever if None.
+        :return: true, if the job is finished; false otherwise.
+        """
+        with self._condition:
+            if not self._done:
+                self._condition.wait(timeout)
+            return self._done
 
-        end_time = time.time()
+    def result(self, timeout=None):
+        """
+        Get the output of the job, waiting for it to finish.
 
-        if self.callback is not None:
-            self.callback(self.thread_name, end_time - start_time, result, error_message)
+        :param timeout: maximum time in seconds to wait. Waits forever if None.
+        :return: output of the job or None if it is not finished yet.
+        """
+        self.wait(timeout)
+        return self._result
+
+    def error_message(self, timeout=None):
+        """
+        Get the error message of the job, waiting for it to finish.
+
+        :param timeout: maximum time in seconds to wait. Waits forever if None.
+        :return: error message or None if the job succeeded or is not finished yet.
+        """
+        self.wait(timeout)
+        return self._error_message
 
 
-class ThreadPool:
+class ThreadPoolExecutor(object):
     """
-    Creates and control the throughput of threads.
+    Run jobs with a fixed number of worker threads pulling from a bounded queue.
+
+    Workers sleep on the queue until a job arrives, and submit blocks while the queue is full, so
+    jobs can be submitted lazily from a generator without creating all of them up front.
 
-    Callback should return a tuple with ([thread name, elapsed time, job output, error_message],
-    variables defined while creating the thread pool).
+    Callback receives ([job name, elapsed time, job output, error_message], variables defined
+    while creating the executor) and is called with a lock held, one job at a time.
     """
 
     def __init__(self, logger, max_threads=MAX_THREAD, callback=None, *callback_args):
         """
-        Initialize custom Thread Pool.
+        Initialize Thread Pool Executor and start its workers.
 
         :param logger: log object.
-        :param max_threads: maximum number of threads to be running at the moment.
+        :param max_threads: number of worker threads.
+        :param callback: function to be called at the end of each job.
+        :param callback_args: extra arguments to be passed to the callback.
         """
-        self.threads_queue = Queue()
-        self.max_threads = max_threads
-        self.running_threads = []
+        self.max_threads = max(1, int(max_threads))
+        self.jobs_queue = Queue(self.max_threads * QUEUE_SIZE_PER_THREAD)
         self.callback = callback
         self.callback_args = callback_args
-        self.mutex = Lock()
+        self.mutex = threading.Lock()
+        self.is_shutdown = False
         self.logger = CustomLogger(SCRIPT_FILE, logger.log_root_path, logger.log_file_name,
                                    logger.log_level)
 
-    def on_finished(self, thread_name, elapsed_time=0.0, result=None, error_message=None):
+        self.workers = []
+        for index in range(self.max_threads):
+            worker = threading.Thread(target=self.run_worker,
+                                      name="{}-Worker-{}".format(SCRIPT_FILE, index))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, task_name, function, *func_args):
         """
-        Call this callback at the end of the thread to print information.
+        Add a new job to the queue, blocking while the queue is full.
 
-        :param thread_name:  name of the thread.
-        :param elapsed_time: elapsed time after the thread completion.
-        :param result: output of the thread.
-        :param error_message: error message caused by an exception from the job.
+        :param task_name: name of the job.
+        :param function: function to be executed by the job.
+        :param func_args: arguments of the function.
+        :return: Future object of the job.
+        :raise RuntimeError: if the executor was already shut down.
         """
-        self.logger.log_time("Finishing thread {} with elapsed time"
-                             .format(thread_name), elapsed_time)
+        if self.is_shutdown:
+            raise RuntimeError("Cannot submit job {} after shutdown.".format(task_name))
 
-        if self.callback is not None:
-            self.mutex.acquire()
-            self.callback([thread_name, elapsed_time, result, error_message], *self.callback_args)
-            self.mutex.release()
+        self.logger.info("Submitting job {}.".format(task_name))
+
+        future = Future(task_name)
+        self.jobs_queue.put((future, function, func_args))
+
+        return future
+
+    def run_worker(self):
+        """Execute queued jobs until the shutdown marker is received."""
+        while True:
+            job = self.jobs_queue.get()
+            try:
+                if job is None:
+                    return
 
-    def create_thread(self, thread_name, function_name, *func_args):
+                self.run_job(*job)
+            finally:
+                self.jobs_queue.task_done()
+
+    def run_job(self, future, function, func_args):
         """
-        Create a new thread with the specified arguments.
+        Execute a single job and report its output.
 
-        :param thread_name:   name of the thread.
-        :param function_name: function to be executed by the thread.
-        :param func_args:     arguments of the function
+        :param future: Future object of the job.
+        :param function: function to be executed.
+        :param func_args: arguments of the function.
         """
-        self.logger.info("Creating thread {}.".format(thread_name))
+        start_time = time.time()
+
+        result = None
+        error_message = None
+
+        try:
+            result = function(*func_args)
+        except Exception as exception:
+            error_message = exception.__str__()
 
-        self.threads_queue.put(SingleThread(thread_name, self.on_finished,
-                                            function_name, *func_args))
+        callback_error = self.on_finished(future.task_name, time.time() - start_time, result,
+                                          error_message)
 
-    def get_pool_size(self):
+        future.set_result(result, error_message or callback_error)
+
+    def on_finished(self, task_name, elapsed_time=0.0, result=None, error_message=None):
         """
-        Get number of created threads in this pool.
+        Call this callback at the end of the job to print information.
 
-        :return: number of threads.
+        :param task_name: name of the job.
+        :param elapsed_time: elapsed time after the job completion.
+        :param result: output of the job.
+        :param error_message: error message caused by an exception from the job.
+        :return: error message of the callback, if it failed; None otherwise.
         """
-        return self.threads_queue.qsize()
+        self.logger.log_time("Finishing job {} with elapsed time".format(task_name),
+                             elapsed_time)
+
+        if self.callback is not None:
+            with self.mutex:
+                try:
+                    self.callback([task_name, elapsed_time, result, error_message],
+                                  *self.callback_args)
+                except Exception as exception:
+                    callback_error = "Callback of job {} failed: {}".format(task_name, exception)
+                    self.logger.error(callback_error)
+                    return callback_error
+
+        return None
 
-    def pop_start_thread(self):
+    def shutdown(self, wait=True):
         """
-        Pops the thread from the queue and starts it.
+        Stop accepting jobs and let the workers finish the queued ones.
 
-        :return: new running thread reference.
+        :param wait: whether to block until all workers are finished.
         """
-        if not self.threads_queue.empty():
-            thread = self.threads_queue.get()
-            thread.start()
-            return thread
-        return None
+        if self.is_shutdown:
+            return
+
+        self.is_shutdown = True
+
+        for _ in self.workers:
+            self.jobs_queue.put(None)
 
-    def clean_running_thread_list(self):
-        """Clean list in the running threads to allow others to start."""
-        currently_running = []
-        for running_th in self.running_threads:
-            if running_th.isAlive():
-                currently_running.append(running_th)
-            else:
-                del running_th
-
-        del self.running_threads[:]
-        self.running_threads = currently_running
-
-    def start_pool(self):
-        """Start the pool of created threads."""
-        while not self.threads_queue.empty():
-            if len(self.running_threads) < self.max_threads:
-                self.running_threads.append(self.pop_start_thread())
-
-            self.clean_running_thread_list()
-
-        for running_th in self.running_threads:
-            if running_th.isAlive():
-                running_th.join()
-        del self.running_threads[:]
+        if wait:
+            for worker in self.workers:
+                worker.join()
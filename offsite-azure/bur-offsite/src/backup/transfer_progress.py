@@ -0,0 +1,91 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module to follow the progress of off-site transfers while they run."""
+
+import time
+
+PROGRESS_LOG_INTERVAL = 60
+STALL_TIMEOUT = 300
+
+
+class TransferProgressMonitor(object):
+    """
+    Log the progress events of a transfer and detect when it stalls.
+
+    Progress is logged at most once every log_interval seconds, besides the last event of the
+    transfer. A transfer is stalled when no byte was transferred for stall_timeout seconds, which
+    is logged once as a warning, so that a hung transfer is noticed long before it ends.
+    """
+
+    def __init__(self, logger, transfer_name, log_interval=PROGRESS_LOG_INTERVAL,
+                 stall_timeout=STALL_TIMEOUT):
+        """
+        Initialize Transfer Progress Monitor object.
+
+        :param logger: logger object.
+        :param transfer_name: name of the transferred file, used in the logs.
+        :param log_interval: minimum seconds between two progress logs.
+        :param stall_timeout: seconds without transferred bytes to consider the transfer stalled.
+        """
+        self.logger = logger
+        self.transfer_name = transfer_name
+        self.log_interval = log_interval
+        self.stall_timeout = stall_timeout
+
+        self.last_progress = None
+        self.last_log_time = None
+        self.last_advance_time = time.time()
+        self.is_stalled = False
+
+    def __call__(self, azcopy_progress, now=None):
+        """
+        Handle a progress event of the transfer.
+
+        :param azcopy_progress: AzCopyProgress object.
+        :param now: time the event was received, defaults to now.
+        """
+        if now is None:
+            now = time.time()
+
+        last_bytes_done = self.last_progress.bytes_done if self.last_progress else 0
+        self.last_progress = azcopy_progress
+
+        if azcopy_progress.bytes_done > last_bytes_done:
+            self.last_advance_time = now
+
+            if self.is_stalled:
+                self.is_stalled = False
+                self.logger.info("Transfer of '{}' is progressing again.".format(
+                    self.transfer_name))
+
+        elif not self.is_stalled and not azcopy_progress.is_finished and \
+                now - self.last_advance_time >= self.stall_timeout:
+            self.is_stalled = True
+            self.logger.warning("Transfer of '{}' made no progress in the last {:.0f}s: {}."
+                                .format(self.transfer_name, now - self.last_advance_time,
+                                        azcopy_progress))
+
+        if azcopy_progress.is_finished or self.last_log_time is None or \
+                now - self.last_log_time >= self.log_interval:
+            self.last_log_time = now
+            self.logger.info("Progress of transfer '{}': {}.".format(self.transfer_name,
+                                                                     azcopy_progress))
+
+    def get_elapsed_time(self):
+        """
+        Get the duration of the transfer reported by azcopy.
+
+        :return: elapsed seconds, or None if no progress was reported.
+        """
+        if self.last_progress is None:
+            return None
+
+        return self.last_progress.elapsed_time
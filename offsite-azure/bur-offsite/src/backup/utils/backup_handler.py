@@ -12,6 +12,7 @@
 
 """Module is for backup handling utility functions."""
 
+from functools import partial
 import glob
 import json
 import os
@@ -19,25 +20,37 @@ import os
 from backup.constants import BACKUP_META_FILE, BLOCK_SIZE_MB_STR, GENIE_VOL_BKPS_DEPLOYMENT, \
     META_DATA_KEYS, METADATA_FILE_SUFFIX, SUCCESS_FLAG_FILE
 from backup.exceptions import ExceptionCodes, UtilsException
+from backup.utils.checksum import verify_checksum_list
 from backup.utils.fsys import get_free_disk_space, get_size_on_disk, is_dir, remove_path
+from backup.utils.hash_cache import open_hash_cache
 from backup.utils.remote import get_remote_folder_size
 
 
-def check_local_disk_space_for_upload(local_backup_path, temp_backup_path, logger):
+def check_local_disk_space_for_upload(local_backup_path, temp_backup_path, logger,
+                                      max_space_mb=None, temp_budget_mb=None):
     """
     Check whether the disk onsite has enough free space to process backup upload.
 
     :param local_backup_path: backup path to be processed.
     :param temp_backup_path: temporary backup directory.
     :param logger: logger object.
+    :param max_space_mb: maximum space in MB the upload may use, even if more is free.
+    :param temp_budget_mb: maximum space in MB the upload holds at a time, when volumes wait
+    for free space before being processed. The backup may then be bigger than the free space.
     :return: true if success.
     :raise UtilsException: if there is no free space enough available.
     """
     free_disk_space_onsite_mb = get_free_disk_space(temp_backup_path)
 
+    if max_space_mb is not None:
+        free_disk_space_onsite_mb = min(free_disk_space_onsite_mb, max_space_mb)
+
     bkp_size_mb = get_size_on_disk(local_backup_path)
 
-    if free_disk_space_onsite_mb <= bkp_size_mb:
+    if temp_budget_mb is not None:
+        bkp_size_mb = min(bkp_size_mb, temp_budget_mb)
+
+    if free_disk_space_onsite_mb < bkp_size_mb:
         error_params = ["Path: {}.".format(temp_backup_path),
                         "Required: {}{}.".format(bkp_size_mb, BLOCK_SIZE_MB_STR),
                         "Available: {}{}.".format(free_disk_space_onsite_mb, BLOCK_SIZE_MB_STR)]
@@ -99,13 +112,14 @@ def check_is_processed_volume(volume_path, logger):
     return True
 
 
-def validate_backup_per_volume(deployment_label, backup_path, logger):
+def validate_backup_per_volume(deployment_label, backup_path, logger, checksum_report_dict=None):
     """
     Validate the volumes and metadata file inside the backup_path folder.
 
     :param deployment_label: deployment label or customer name.
     :param backup_path: backup path.
     :param logger: logger object.
+    :param checksum_report_dict: dictionary to store the checksum report of each volume path.
     :return: true, if the backup was correctly validated, false, otherwise.
     """
     logger.info("Validating backup '{}'.".format(backup_path))
@@ -124,7 +138,8 @@ def validate_backup_per_volume(deployment_label, backup_path, logger):
         validate_dispatcher = [is_backup_ok_valid]
     else:
         validate_dispatcher = [is_backup_ok_valid,
-                               is_backup_volume_valid]
+                               partial(is_backup_volume_valid,
+                                       checksum_report_dict=checksum_report_dict)]
 
     for validation_function in validate_dispatcher:
         if not validation_function(backup_path, backup_structure, logger):
@@ -134,13 +149,15 @@ def validate_backup_per_volume(deployment_label, backup_path, logger):
     return True
 
 
-def is_backup_volume_valid(customer_backup_path, backup_structure, logger):
+def is_backup_volume_valid(customer_backup_path, backup_structure, logger,
+                           checksum_report_dict=None):
     """
     Validate volumes inside a customer tag folder.
 
     :param customer_backup_path: Path to a customer tag.
     :param backup_structure: A dict contains files and folders list.
     :param logger: Logger instance to use for logging.
+    :param checksum_report_dict: dictionary to store the checksum report by volume path.
     :return: True if success; False otherwise.
     """
     if not is_customer_backup_path_exist(customer_backup_path, logger):
@@ -155,7 +172,7 @@ def is_backup_volume_valid(customer_backup_path, backup_structure, logger):
     for volume_folder in backup_structure['folders']:
         volume_path = os.path.join(customer_backup_path, volume_folder)
 
-        if not validate_volume_metadata(volume_path, logger):
+        if not validate_volume_metadata(volume_path, logger, checksum_report_dict):
             logger.error("Backup '{}' could not be validated.".format(customer_backup_path))
             return False
     return True
@@ -277,12 +294,106 @@ def validate_metadata_content(volume_path, metadata_json, logger):
     return True
 
 
-def validate_volume_metadata(volume_path, logger):
+def validate_metadata_checksums(volume_path, metadata_json, logger, checksum_report_dict=None):
+    """
+    Verify the md5 of each file listed in the metadata against the physical volume.
+
+    Files not changed since their last verification are checked against the hash cache instead
+    of being read again.
+
+    :param volume_path: Volume path of a backup folder.
+    :param metadata_json: Metadata file content in json, already validated by
+    validate_metadata_content.
+    :param logger: Logger instance to use for logging.
+    :param checksum_report_dict: dictionary to store the checksum report by volume path.
+    :return: True if all files match their md5; False otherwise.
+    """
+    file_checksum_list = []
+    for item in metadata_json[META_DATA_KEYS.objects.name]:
+        vol_file = ''.join(item.keys())
+        file_checksum_list.append((os.path.join(volume_path, vol_file),
+                                   item[vol_file][META_DATA_KEYS.md5.name]))
+
+    hash_cache = open_hash_cache(logger)
+    try:
+        checksum_report = verify_checksum_list(file_checksum_list, logger, hash_cache=hash_cache)
+    finally:
+        if hash_cache is not None:
+            hash_cache.close()
+
+    if checksum_report_dict is not None:
+        checksum_report_dict[volume_path] = checksum_report
+
+    logger.info("Checksum verification of volume '{}': {}".format(volume_path, checksum_report))
+
+    return checksum_report.is_valid()
+
+
+def add_checksum_output(backup_output_dict, backup_path, checksum_report_dict):
+    """
+    Add the checksum verification time and rate of each volume to its VolumeResult.
+
+    :param backup_output_dict: dictionary with the VolumeResult of each volume of the backup.
+    :param backup_path: local path of the backup.
+    :param checksum_report_dict: dictionary with the checksum report by volume path.
+    :return: number of volume outputs updated.
+    """
+    updated_volumes = 0
+
+    for volume_name in backup_output_dict.keys():
+        checksum_report = checksum_report_dict.get(os.path.join(backup_path, volume_name))
+        if checksum_report is None:
+            continue
+
+        volume_output = backup_output_dict[volume_name]
+        volume_output.checksum_time = checksum_report.elapsed_time
+        volume_output.checksum_rate = checksum_report.get_throughput()
+
+        updated_volumes += 1
+
+    return updated_volumes
+
+
+def validate_volume_file_metadata(volume_path, file_name, logger, checksum_report_dict=None):
+    """
+    Validate a single file restored from a volume against the metadata file of the volume.
+
+    :param volume_path: Volume path of a backup folder.
+    :param file_name: name of the restored file inside the volume.
+    :param logger: Logger object.
+    :param checksum_report_dict: dictionary to store the checksum report by volume path.
+    :return: True, if the file is listed in the metadata with the same md5 code; False otherwise.
+    """
+    logger.info("Validating file '{}' against metadata from volume '{}'.".format(file_name,
+                                                                               volume_path))
+
+    metadata_json = get_metadata_file_json(volume_path, logger)
+
+    if not metadata_json:
+        return False
+
+    file_metadata_json = {META_DATA_KEYS.objects.name: [
+        item for item in metadata_json[META_DATA_KEYS.objects.name] if file_name in item]}
+
+    if not file_metadata_json[META_DATA_KEYS.objects.name]:
+        logger.error("Metadata error: File {} not listed in volume {}.".format(file_name,
+                                                                             volume_path))
+        return False
+
+    if not validate_metadata_content(volume_path, file_metadata_json, logger):
+        return False
+
+    return validate_metadata_checksums(volume_path, file_metadata_json, logger,
+                                       checksum_report_dict)
+
+
+def validate_volume_metadata(volume_path, logger, checksum_report_dict=None):
     """
     Validate the metadata file from a specific volume against the system.
 
     :param volume_path: Volume path of a backup folder.
     :param logger: Logger object.
+    :param checksum_report_dict: dictionary to store the checksum report by volume path.
     :return: True, if all files in the metadata have the same md5 code; False otherwise.
     """
     logger.info("Validating metadata from volume '{}'.".format(volume_path))
@@ -303,5 +414,8 @@ def validate_volume_metadata(volume_path, logger):
     if not validate_metadata_content(volume_path, metadata_json, logger):
         return False
 
+    if not validate_metadata_checksums(volume_path, metadata_json, logger, checksum_report_dict):
+        return False
+
     logger.info("Successful metadata validation for volume: '{}'.".format(volume_path))
     return True
@@ -0,0 +1,238 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module is for calculating and verifying file checksums."""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+from backup.exceptions import ExceptionCodes, UtilsException
+from backup.thread_pool import THREAD_OUTPUT_INDEX, ThreadPoolExecutor
+from backup.utils.hash_cache import get_file_key
+
+CHECKSUM_BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_CHECKSUM_THREADS = 4
+BYTES_PER_MB = 1024 * 1024
+
+
+class ChecksumReport(object):
+    """Store the results of a checksum verification over a list of files."""
+
+    def __init__(self):
+        """Initialize Checksum Report class."""
+        self.checked_file_count = 0
+        self.cached_file_count = 0
+        self.total_bytes = 0
+        self.elapsed_time = 0.0
+        self.mismatch_list = []
+        self.error_list = []
+        self.calculated_hash_list = []
+
+    def is_valid(self):
+        """
+        Check whether all files were read and matched their expected checksum.
+
+        :return: true, if no mismatch or error was found; false otherwise.
+        """
+        return not self.mismatch_list and not self.error_list
+
+    def get_throughput(self):
+        """
+        Get the reading rate of the verification.
+
+        :return: throughput in MB/s.
+        """
+        if self.elapsed_time <= 0:
+            return 0.0
+
+        return float(self.total_bytes) / BYTES_PER_MB / self.elapsed_time
+
+    def __str__(self):
+        """Represent Checksum Report object as string."""
+        return "Checked {} file(s), {} from hash cache, {} bytes read in {:.2f}s ({:.2f} MB/s). " \
+               "Mismatches: {}. Errors: {}.".format(self.checked_file_count,
+                                                    self.cached_file_count, self.total_bytes,
+                                                    self.elapsed_time, self.get_throughput(),
+                                                    self.mismatch_list, self.error_list)
+
+
+def get_file_md5(file_path, buffer_size=CHECKSUM_BUFFER_SIZE):
+    """
+    Calculate the md5 of a file reading it in large blocks.
+
+    hashlib releases the GIL while hashing each block, so several files can be hashed in parallel
+    by threads.
+
+    :param file_path: file to be hashed.
+    :param buffer_size: size in bytes of each read.
+    :return: tuple (md5 hex digest, number of bytes read).
+    :raise UtilsException: if the file cannot be read.
+    """
+    md5_hash = hashlib.md5()
+    total_bytes = 0
+
+    try:
+        with open(file_path, 'rb', 0) as source_file:
+            while True:
+                block = source_file.read(buffer_size)
+                if not block:
+                    break
+
+                md5_hash.update(block)
+                total_bytes += len(block)
+    except (IOError, OSError) as read_exp:
+        raise UtilsException(ExceptionCodes.InvalidFile, [file_path, read_exp])
+
+    return md5_hash.hexdigest(), total_bytes
+
+
+def verify_checksum_list(file_checksum_list, logger, number_threads=DEFAULT_CHECKSUM_THREADS,
+                         hash_cache=None):
+    """
+    Verify the md5 of a list of files in parallel, with at most number_threads files being read.
+
+    When a hash cache is informed, files whose device, inode, size and modification time are
+    cached are compared against the cached md5 without being read, and the md5 of the files read
+    is stored in the cache at the end. The cache is only accessed by the calling thread.
+
+    Each mismatch or unreadable file is logged and reported individually.
+
+    :param file_checksum_list: iterable of tuples (file path, expected md5).
+    :param logger: logger object.
+    :param number_threads: maximum number of files hashed at the same time.
+    :param hash_cache: HashCache object or None to read all files.
+    :return: ChecksumReport object with the results.
+    """
+    checksum_report = ChecksumReport()
+
+    time_start = time.time()
+
+    executor = ThreadPoolExecutor(logger, number_threads, on_file_checked, checksum_report,
+                                  logger)
+    try:
+        for file_path, expected_md5 in file_checksum_list:
+            file_key = None
+            if hash_cache is not None:
+                file_key, cached_md5 = lookup_cached_md5(hash_cache, file_path, logger)
+                if cached_md5 is not None:
+                    check_cached_md5(checksum_report, file_path, expected_md5, cached_md5,
+                                     logger)
+                    continue
+
+            executor.submit(os.path.basename(file_path), check_file_md5, file_path,
+                            expected_md5, file_key)
+    finally:
+        executor.shutdown()
+
+    checksum_report.elapsed_time = time.time() - time_start
+
+    if hash_cache is not None and checksum_report.calculated_hash_list:
+        try:
+            hash_cache.store_list(checksum_report.calculated_hash_list)
+        except sqlite3.Error as cache_exp:
+            logger.warning("Could not store calculated hashes in the cache. Cause: {}."
+                           .format(cache_exp))
+
+    return checksum_report
+
+
+def lookup_cached_md5(hash_cache, file_path, logger):
+    """
+    Get the key of a file and its cached md5, if any.
+
+    :param hash_cache: HashCache object.
+    :param file_path: file path.
+    :param logger: logger object.
+    :return: tuple (file key or None if the file cannot be accessed, cached md5 or None).
+    """
+    try:
+        file_key = get_file_key(file_path)
+    except OSError:
+        return None, None
+
+    try:
+        return file_key, hash_cache.lookup(file_key)
+    except sqlite3.Error as cache_exp:
+        logger.warning("Could not read hash cache for file '{}'. Cause: {}."
+                       .format(file_path, cache_exp))
+
+    return file_key, None
+
+
+def check_cached_md5(checksum_report, file_path, expected_md5, cached_md5, logger):
+    """
+    Compare the cached md5 of a file with the expected one and add the result to the report.
+
+    :param checksum_report: ChecksumReport object to be updated.
+    :param file_path: file path.
+    :param expected_md5: expected md5 hex digest.
+    :param cached_md5: cached md5 hex digest.
+    :param logger: logger object.
+    :return: true, if the file matched its expected checksum; false otherwise.
+    """
+    checksum_report.checked_file_count += 1
+    checksum_report.cached_file_count += 1
+
+    if str(expected_md5).strip().lower() != cached_md5:
+        logger.error("Checksum mismatch for file '{}': expected {}, found {} in hash cache."
+                     .format(file_path, expected_md5, cached_md5))
+        checksum_report.mismatch_list.append(file_path)
+        return False
+
+    return True
+
+
+def check_file_md5(file_path, expected_md5, file_key=None):
+    """
+    Calculate the md5 of a file and compare it with the expected one.
+
+    :param file_path: file to be hashed.
+    :param expected_md5: expected md5 hex digest.
+    :param file_key: key of the file taken before reading it, to store the md5 in the cache.
+    :return: tuple (file path, expected md5, calculated md5, number of bytes read, file key).
+    """
+    calculated_md5, total_bytes = get_file_md5(file_path)
+
+    return file_path, expected_md5, calculated_md5, total_bytes, file_key
+
+
+def on_file_checked(thread_output, checksum_report, logger):
+    """
+    Add the result of a single file verification to the report.
+
+    :param thread_output: output of the job [name, elapsed time, result, error message].
+    :param checksum_report: ChecksumReport object to be updated.
+    :param logger: logger object.
+    :return: true, if the file matched its expected checksum; false otherwise.
+    """
+    error_message = thread_output[THREAD_OUTPUT_INDEX.TH_ERROR.value - 1]
+    if error_message is not None:
+        logger.error("Checksum error: {}".format(error_message))
+        checksum_report.error_list.append(error_message)
+        return False
+
+    file_path, expected_md5, calculated_md5, total_bytes, file_key = \
+        thread_output[THREAD_OUTPUT_INDEX.TH_RESULT.value - 1]
+
+    checksum_report.checked_file_count += 1
+    checksum_report.total_bytes += total_bytes
+
+    if file_key is not None:
+        checksum_report.calculated_hash_list.append((file_path, file_key, calculated_md5))
+
+    if str(expected_md5).strip().lower() != calculated_md5:
+        logger.error("Checksum mismatch for file '{}': expected {}, found {}."
+                     .format(file_path, expected_md5, calculated_md5))
+        checksum_report.mismatch_list.append(file_path)
+        return False
+
+    return True
@@ -13,17 +13,27 @@
 
 """Module is for compressing and decompressing purposes."""
 
+from collections import namedtuple
 import gzip
+import hashlib
+import json
 import os
 from subprocess import Popen
+import tarfile
 from tarfile import TarError, TarFile
 
-from backup.constants import GZ_SUFFIX, TAR_CMD, TAR_SUFFIX
+from backup.constants import GZ_SUFFIX, TAR_CMD, TAR_SUFFIX, TOC_SUFFIX
 from backup.exceptions import ExceptionCodes, UtilsException
 from backup.utils.decorator import timeit
 from backup.utils.fsys import is_valid_path, remove_path
 from backup.utils.validator import check_not_empty
 
+TAR_STREAM_CHUNK_SIZE = 1024 * 1024
+
+TAR_TOC_VERSION = 1
+
+TarTocEntry = namedtuple('TarTocEntry', 'name, offset, size, original_size, md5')
+
 
 @timeit
 def compress_file(source_path, output_path=None, mode="w:gz", **kwargs):
@@ -143,6 +153,111 @@ def tar_file(file_path, file_destination):
     return tar_file_path
 
 
+def open_tar_stream(file_object):
+    """
+    Open a tar archive which is written sequentially into an already opened file object.
+
+    The file object can be a pipe (e.g. stdin of a transfer process), as no seek is done while
+    writing the archive. The file object is not closed when the archive is closed.
+
+    :param file_object: writable file object to receive the archive.
+    :return: tar stream object.
+    :raise UtilsException: if the tar stream cannot be opened.
+    """
+    try:
+        return tarfile.open(fileobj=file_object, mode="w|")
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, tar_exp)
+
+
+def add_file_to_tar_stream(tar_stream, file_path, arc_dir, remove_added=False):
+    """
+    Append a file to a tar stream under the informed archive directory.
+
+    When the path is a folder just its entry is added, not its content.
+
+    :param tar_stream: tar stream object opened by open_tar_stream.
+    :param file_path: path of the file to be added.
+    :param arc_dir: directory name of the file inside the archive.
+    :param remove_added: whether the file should be deleted after being added to the stream.
+    :return: name of the file inside the archive.
+    :raise UtilsException: if the file cannot be written to the stream or removed.
+    """
+    is_valid_path(file_path)
+
+    arc_name = arc_dir
+    if not os.path.isdir(file_path):
+        arc_name = os.path.join(arc_dir, os.path.basename(file_path))
+
+    try:
+        tar_stream.add(file_path, arcname=arc_name, recursive=False)
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, [file_path, tar_exp])
+
+    if remove_added and not remove_path(file_path):
+        raise UtilsException(ExceptionCodes.CannotRemoveFile, file_path)
+
+    return arc_name
+
+
+def close_tar_stream(tar_stream):
+    """
+    Write the end of archive blocks to the tar stream.
+
+    :param tar_stream: tar stream object opened by open_tar_stream.
+    :return: true if success.
+    :raise UtilsException: if the stream cannot be finished.
+    """
+    try:
+        tar_stream.close()
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, tar_exp)
+
+    return True
+
+
+def iter_tar_stream(file_object, chunk_size=TAR_STREAM_CHUNK_SIZE):
+    """
+    Read a tar archive sequentially from an already opened file object, one member at a time.
+
+    The file object can be a pipe (e.g. stdout of a transfer process), as no seek is done while
+    reading the archive. The data of a member can only be read before the next one is yielded.
+
+    :param file_object: readable file object with the archive.
+    :param chunk_size: maximum size of the chunks of data read from a member.
+    :return: generator of tuples (TarInfo of the member, generator of the chunks of its data or
+    None if the member is not a regular file).
+    :raise UtilsException: if the archive cannot be read.
+    """
+    try:
+        tar_stream = tarfile.open(fileobj=file_object, mode="r|")
+
+        for tar_member in tar_stream:
+            member_chunks = None
+            if tar_member.isfile():
+                member_chunks = iter_tar_member(tar_stream.extractfile(tar_member), chunk_size)
+
+            yield tar_member, member_chunks
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, tar_exp)
+
+
+def iter_tar_member(member_file, chunk_size=TAR_STREAM_CHUNK_SIZE):
+    """
+    Read the data of a tar member in chunks.
+
+    :param member_file: file object of the member, given by the tar stream.
+    :param chunk_size: maximum size of each chunk.
+    :return: generator of the chunks of data.
+    :raise UtilsException: if the data cannot be read, e.g. the archive ended too soon.
+    """
+    try:
+        for chunk in iter(lambda: member_file.read(chunk_size), b''):
+            yield chunk
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, tar_exp)
+
+
 def gunzip_file(file_path, file_destination):
     """
     Decompress file using gzip strategy.
@@ -228,3 +343,153 @@ def is_tar_file(file_path):
             return False
 
     return True
+
+
+def get_tar_toc_path(archive_path):
+    """
+    Get the path of the table of contents of a tar archive.
+
+    :param archive_path: path of the archive.
+    :return: path of the table of contents, next to the archive.
+    """
+    return "{}.{}".format(archive_path, TOC_SUFFIX)
+
+
+class Md5Reader(object):
+    """File object wrapper which computes the md5 of the data read through it."""
+
+    def __init__(self, file_object):
+        """
+        Initialize Md5 Reader object.
+
+        :param file_object: readable file object.
+        """
+        self.file_object = file_object
+        self.md5_hash = hashlib.md5()
+
+    def read(self, size=-1):
+        """
+        Read data from the wrapped file object, adding it to the md5.
+
+        :param size: maximum number of bytes to read, all if negative.
+        :return: data read.
+        """
+        data = self.file_object.read(size)
+        self.md5_hash.update(data)
+
+        return data
+
+    def hexdigest(self):
+        """
+        Get the md5 of the data read so far.
+
+        :return: md5 as a hexadecimal string.
+        """
+        return self.md5_hash.hexdigest()
+
+
+def add_file_with_toc_entry(archive, file_path, arc_name, original_size=None):
+    """
+    Append a file to a tar archive, getting its entry of the table of contents as it is written.
+
+    :param archive: tar archive opened for writing.
+    :param file_path: path of the file to be added.
+    :param arc_name: name of the file inside the archive.
+    :param original_size: size of the file before it was processed, if known.
+    :return: TarTocEntry of the file, or None if the path is not a regular file.
+    :raise TarError, IOError, OSError: if the file cannot be added.
+    """
+    tar_member = archive.gettarinfo(file_path, arc_name)
+
+    if not tar_member.isfile():
+        archive.addfile(tar_member)
+        return None
+
+    with open(file_path, "rb") as source_file:
+        md5_reader = Md5Reader(source_file)
+        archive.addfile(tar_member, md5_reader)
+
+    # the data is padded to whole blocks right before the current end of the archive.
+    data_blocks = (tar_member.size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+    offset_data = archive.offset - data_blocks * tarfile.BLOCKSIZE
+
+    return TarTocEntry(tar_member.name, offset_data, tar_member.size, original_size,
+                       md5_reader.hexdigest())
+
+
+@timeit
+def tar_file_with_toc(file_path, file_destination, original_size_dict=None, **kwargs):
+    """
+    Archive a folder using tarfile module, writing the table of contents of the archive next to it.
+
+    Each regular member is listed with the offset and size of its data in the archive, so that a
+    single member can be fetched by a ranged read and checked by its md5. They are recorded while
+    the members are written, so the archive is not read again. The archive is a plain tar, still
+    extracted by untar_file.
+
+    :param file_path: folder to be archived.
+    :param file_destination: destination folder.
+    :param original_size_dict: size of each member before it was processed, by member name.
+    :return: tuple (full archived file path, table of contents path).
+    :raise UtilsException: if the archive or the table of contents cannot be written.
+    """
+    is_valid_path(file_path)
+
+    if original_size_dict is None:
+        original_size_dict = {}
+
+    archived_file_name = "{}.{}".format(os.path.basename(file_path), TAR_SUFFIX)
+    tar_file_path = os.path.join(file_destination, archived_file_name)
+    toc_entry_list = []
+
+    try:
+        with tarfile.open(tar_file_path, mode="w") as archive:
+            for dir_path, dir_name_list, file_name_list in os.walk(file_path):
+                dir_name_list.sort()
+
+                arc_dir = os.path.join(os.path.basename(file_path),
+                                       os.path.relpath(dir_path, file_path))
+                archive.add(dir_path, arcname=os.path.normpath(arc_dir), recursive=False)
+
+                for file_name in sorted(file_name_list):
+                    arc_name = os.path.normpath(os.path.join(arc_dir, file_name))
+
+                    toc_entry = add_file_with_toc_entry(archive,
+                                                        os.path.join(dir_path, file_name),
+                                                        arc_name, original_size_dict.get(arc_name))
+                    if toc_entry is not None:
+                        toc_entry_list.append(toc_entry._asdict())
+    except (TarError, IOError, OSError) as tar_exp:
+        raise UtilsException(ExceptionCodes.TarZipCommandError, [tar_file_path, tar_exp])
+
+    toc_path = get_tar_toc_path(tar_file_path)
+
+    try:
+        with open(toc_path, "w") as toc_file:
+            json.dump({'version': TAR_TOC_VERSION, 'members': toc_entry_list}, toc_file)
+    except (IOError, OSError) as toc_exp:
+        raise UtilsException(ExceptionCodes.InvalidArchiveToc, [toc_path, toc_exp])
+
+    return tar_file_path, toc_path
+
+
+def parse_tar_toc(toc_content):
+    """
+    Read the table of contents written by tar_file_with_toc.
+
+    :param toc_content: content of the table of contents.
+    :return: dictionary with the TarTocEntry of each member, by member name.
+    :raise UtilsException: if the content is not a valid table of contents.
+    """
+    try:
+        toc_dict = json.loads(toc_content)
+
+        if toc_dict['version'] != TAR_TOC_VERSION:
+            raise UtilsException(ExceptionCodes.InvalidArchiveToc,
+                                 "Unknown version {}".format(toc_dict['version']))
+
+        toc_entry_list = [TarTocEntry(**member_dict) for member_dict in toc_dict['members']]
+    except (ValueError, TypeError, KeyError) as toc_exp:
+        raise UtilsException(ExceptionCodes.InvalidArchiveToc, toc_exp)
+
+    return {str(toc_entry.name): toc_entry for toc_entry in toc_entry_list}
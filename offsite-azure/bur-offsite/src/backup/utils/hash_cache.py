@@ -0,0 +1,183 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module is for keeping a persistent cache of file hashes between BUR executions."""
+
+import os
+import sqlite3
+
+from backup.utils.fsys import create_path, get_home_dir
+
+HASH_CACHE_FILE_NAME = "bur_hash_cache.db"
+DEFAULT_HASH_CACHE_PATH = os.path.join(get_home_dir(), "backup", HASH_CACHE_FILE_NAME)
+HASH_CACHE_TIMEOUT = 30
+
+NANOSECONDS = 1000000000
+
+CREATE_TABLE_SQL = "CREATE TABLE IF NOT EXISTS file_hash (device INTEGER NOT NULL, " \
+                   "inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, " \
+                   "path TEXT NOT NULL, md5 TEXT NOT NULL, PRIMARY KEY (device, inode))"
+CREATE_PATH_INDEX_SQL = "CREATE INDEX IF NOT EXISTS file_hash_path ON file_hash (path)"
+SELECT_HASH_SQL = "SELECT md5 FROM file_hash WHERE device = ? AND inode = ? AND size = ? AND " \
+                  "mtime_ns = ?"
+INSERT_HASH_SQL = "INSERT OR REPLACE INTO file_hash (device, inode, size, mtime_ns, path, md5) " \
+                  "VALUES (?, ?, ?, ?, ?, ?)"
+DELETE_PATH_SQL = "DELETE FROM file_hash WHERE path = ? OR substr(path, 1, ?) = ?"
+
+
+def get_file_key(file_path):
+    """
+    Get the identity of a file content as seen by the file system.
+
+    :param file_path: file path.
+    :return: tuple (device, inode, size, mtime in nanoseconds).
+    :raise OSError: if the file cannot be accessed.
+    """
+    file_stat = os.stat(file_path)
+
+    return (file_stat.st_dev, file_stat.st_ino, file_stat.st_size,
+            int(round(file_stat.st_mtime * NANOSECONDS)))
+
+
+def to_text(path):
+    """
+    Convert a path to unicode to be stored in the cache.
+
+    :param path: path as str or unicode.
+    :return: unicode path.
+    """
+    if isinstance(path, unicode):
+        return path
+
+    return path.decode('utf-8', 'replace')
+
+
+class HashCache(object):
+    """
+    Store the md5 of files keyed by device, inode, size and modification time.
+
+    A cached hash is only returned while the file keeps the same size and modification time, so
+    any change on the file makes it to be read again.
+    """
+
+    def __init__(self, cache_path=DEFAULT_HASH_CACHE_PATH):
+        """
+        Initialize Hash Cache class, creating the cache file if needed.
+
+        :param cache_path: path of the cache database file.
+        :raise sqlite3.Error: if the cache cannot be opened.
+        """
+        self.cache_path = cache_path
+
+        create_path(os.path.dirname(cache_path))
+
+        self.connection = sqlite3.connect(cache_path, timeout=HASH_CACHE_TIMEOUT)
+        with self.connection:
+            self.connection.execute(CREATE_TABLE_SQL)
+            self.connection.execute(CREATE_PATH_INDEX_SQL)
+
+    def __enter__(self):
+        """Return the cache to be used in a with statement."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the cache at the end of a with statement."""
+        self.close()
+
+    def lookup(self, file_key):
+        """
+        Get the cached md5 of a file.
+
+        :param file_key: file key returned by get_file_key.
+        :return: md5 hex digest, if cached; None otherwise.
+        """
+        row = self.connection.execute(SELECT_HASH_SQL, file_key).fetchone()
+
+        if row is None:
+            return None
+
+        return str(row[0])
+
+    def store_list(self, file_hash_list):
+        """
+        Store a list of calculated hashes in a single transaction.
+
+        :param file_hash_list: list of tuples (file path, file key, md5 hex digest).
+        :return: number of stored hashes.
+        """
+        with self.connection:
+            self.connection.executemany(INSERT_HASH_SQL, [
+                tuple(file_key) + (to_text(file_path), md5)
+                for file_path, file_key, md5 in file_hash_list])
+
+        return len(file_hash_list)
+
+    def evict_path(self, path):
+        """
+        Remove the cached hashes of a file or of every file under a folder.
+
+        :param path: file or folder path.
+        :return: number of removed hashes.
+        """
+        path = to_text(os.path.normpath(path))
+        folder_prefix = path.rstrip(os.sep) + os.sep
+
+        with self.connection:
+            cursor = self.connection.execute(DELETE_PATH_SQL, (path, len(folder_prefix),
+                                                               folder_prefix))
+
+        return cursor.rowcount
+
+    def close(self):
+        """Close the cache file."""
+        self.connection.close()
+
+
+def open_hash_cache(logger, cache_path=DEFAULT_HASH_CACHE_PATH):
+    """
+    Open the hash cache, so that an unusable cache does not stop the validation.
+
+    :param logger: logger object.
+    :param cache_path: path of the cache database file.
+    :return: HashCache object or None, if the cache could not be opened.
+    """
+    try:
+        return HashCache(cache_path)
+    except (sqlite3.Error, OSError) as cache_exp:
+        logger.warning("Hash cache '{}' is not available, files will be read. Cause: {}."
+                       .format(cache_path, cache_exp))
+
+    return None
+
+
+def evict_hash_cache_path(path, logger, cache_path=DEFAULT_HASH_CACHE_PATH):
+    """
+    Remove the cached hashes of a path that was deleted from the system.
+
+    :param path: removed file or folder path.
+    :param logger: logger object.
+    :param cache_path: path of the cache database file.
+    :return: number of removed hashes.
+    """
+    hash_cache = open_hash_cache(logger, cache_path)
+    if hash_cache is None:
+        return 0
+
+    with hash_cache:
+        try:
+            evicted_count = hash_cache.evict_path(path)
+        except sqlite3.Error as cache_exp:
+            logger.warning("Could not evict '{}' from hash cache. Cause: {}."
+                           .format(path, cache_exp))
+            return 0
+
+    logger.info("Removed {} cached hash(es) of path '{}'.".format(evicted_count, path))
+
+    return evicted_count
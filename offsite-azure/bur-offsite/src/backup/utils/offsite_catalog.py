@@ -0,0 +1,270 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module is for keeping a local catalog of the backups stored on off-site."""
+
+from collections import namedtuple
+import json
+import os
+import sqlite3
+import time
+
+from backup.utils.fsys import create_path, get_home_dir
+from backup.utils.hash_cache import to_text
+
+OFFSITE_CATALOG_FILE_NAME = "bur_offsite_catalog.db"
+DEFAULT_OFFSITE_CATALOG_PATH = os.path.join(get_home_dir(), "backup", OFFSITE_CATALOG_FILE_NAME)
+OFFSITE_CATALOG_TIMEOUT = 30
+
+# Backups uploaded or removed by other servers are only seen after a refresh from off-site.
+OFFSITE_CATALOG_MAX_AGE = 900
+
+BACKUP_STATUS_UPLOADED = "uploaded"
+BACKUP_STATUS_LISTED = "listed"
+
+CREATE_BACKUP_TABLE_SQL = "CREATE TABLE IF NOT EXISTS offsite_backup (customer TEXT NOT NULL, " \
+                          "backup_tag TEXT NOT NULL, offsite_path TEXT NOT NULL, " \
+                          "container_path TEXT NOT NULL, size_mb INTEGER, volume_list TEXT, " \
+                          "upload_time REAL NOT NULL, status TEXT NOT NULL, " \
+                          "PRIMARY KEY (customer, backup_tag))"
+CREATE_TAG_INDEX_SQL = "CREATE INDEX IF NOT EXISTS offsite_backup_tag ON offsite_backup " \
+                       "(backup_tag)"
+CREATE_REFRESH_TABLE_SQL = "CREATE TABLE IF NOT EXISTS customer_refresh (customer TEXT NOT NULL " \
+                           "PRIMARY KEY, refresh_time REAL NOT NULL)"
+BACKUP_COLUMNS = "backup_tag, customer, offsite_path, container_path, size_mb, volume_list, " \
+                 "upload_time, status"
+SELECT_TAG_SQL = "SELECT {} FROM offsite_backup WHERE backup_tag = ?".format(BACKUP_COLUMNS)
+SELECT_CUSTOMER_SQL = "SELECT {} FROM offsite_backup WHERE customer = ? ORDER BY upload_time " \
+                      "DESC, backup_tag DESC".format(BACKUP_COLUMNS)
+INSERT_BACKUP_SQL = "INSERT OR REPLACE INTO offsite_backup ({}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)" \
+    .format(BACKUP_COLUMNS)
+INSERT_LISTED_BACKUP_SQL = "INSERT OR IGNORE INTO offsite_backup ({}) VALUES " \
+                           "(?, ?, ?, ?, NULL, NULL, ?, '{}')".format(BACKUP_COLUMNS,
+                                                                    BACKUP_STATUS_LISTED)
+DELETE_BACKUP_SQL = "DELETE FROM offsite_backup WHERE customer = ? AND backup_tag = ?"
+DELETE_PATH_SQL = "DELETE FROM offsite_backup WHERE offsite_path = ?"
+SELECT_REFRESH_SQL = "SELECT refresh_time FROM customer_refresh WHERE customer = ?"
+INSERT_REFRESH_SQL = "INSERT OR REPLACE INTO customer_refresh (customer, refresh_time) " \
+                     "VALUES (?, ?)"
+
+OffsiteBackupEntry = namedtuple('OffsiteBackupEntry', 'backup_tag, customer_name, offsite_path, '
+                                                      'container_path, size_mb, volume_list, '
+                                                      'upload_time, status')
+
+
+def get_backup_entry(row):
+    """
+    Convert a row of the catalog into an OffsiteBackupEntry.
+
+    :param row: tuple with the columns in BACKUP_COLUMNS order.
+    :return: OffsiteBackupEntry object.
+    """
+    backup_tag, customer_name, offsite_path, container_path, size_mb, volume_list, upload_time, \
+        status = row
+
+    if volume_list is not None:
+        volume_list = [str(volume_name) for volume_name in json.loads(volume_list)]
+
+    return OffsiteBackupEntry(str(backup_tag), str(customer_name), str(offsite_path),
+                              str(container_path), size_mb, volume_list, upload_time, str(status))
+
+
+class OffsiteCatalog(object):
+    """
+    Store the backups available on off-site by customer and backup tag.
+
+    Backups are recorded as their upload finishes. The backups of a customer are read again from
+    off-site only when they were not refreshed for max_age seconds.
+    """
+
+    def __init__(self, catalog_path=DEFAULT_OFFSITE_CATALOG_PATH,
+                 max_age=OFFSITE_CATALOG_MAX_AGE):
+        """
+        Initialize Offsite Catalog class, creating the catalog file if needed.
+
+        :param catalog_path: path of the catalog database file.
+        :param max_age: seconds after which the backups of a customer must be refreshed.
+        :raise sqlite3.Error: if the catalog cannot be opened.
+        """
+        self.catalog_path = catalog_path
+        self.max_age = max_age
+
+        create_path(os.path.dirname(catalog_path))
+
+        self.connection = sqlite3.connect(catalog_path, timeout=OFFSITE_CATALOG_TIMEOUT)
+        with self.connection:
+            self.connection.execute(CREATE_BACKUP_TABLE_SQL)
+            self.connection.execute(CREATE_TAG_INDEX_SQL)
+            self.connection.execute(CREATE_REFRESH_TABLE_SQL)
+
+    def __enter__(self):
+        """Return the catalog to be used in a with statement."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the catalog at the end of a with statement."""
+        self.close()
+
+    def is_stale(self, customer_name, current_time=None):
+        """
+        Check whether the backups of a customer must be refreshed from off-site.
+
+        :param customer_name: customer name.
+        :param current_time: time of the check, now if None.
+        :return: true, if the customer was never refreshed or the refresh is too old.
+        """
+        row = self.connection.execute(SELECT_REFRESH_SQL, (to_text(customer_name),)).fetchone()
+
+        if row is None:
+            return True
+
+        if current_time is None:
+            current_time = time.time()
+
+        return not 0 <= current_time - row[0] < self.max_age
+
+    def refresh_customer(self, customer_name, listed_backup_list, refresh_time=None):
+        """
+        Update the backups of a customer with the ones found on off-site.
+
+        Backups already in the catalog keep their details, new ones are added as listed and the
+        ones no longer found are removed.
+
+        :param customer_name: customer name.
+        :param listed_backup_list: list of tuples (backup path, container path, modification time).
+        :param refresh_time: time of the refresh, now if None.
+        :return: number of backups of the customer.
+        """
+        if refresh_time is None:
+            refresh_time = time.time()
+
+        customer_name = to_text(customer_name)
+        listed_tag_set = set()
+
+        with self.connection:
+            for offsite_path, container_path, upload_time in listed_backup_list:
+                backup_tag = to_text(os.path.basename(offsite_path.rstrip('/')))
+                listed_tag_set.add(backup_tag)
+
+                self.connection.execute(INSERT_LISTED_BACKUP_SQL, (
+                    backup_tag, customer_name, to_text(offsite_path), to_text(container_path),
+                    upload_time))
+
+            removed_tag_list = [(customer_name, row[0]) for row in self.connection.execute(
+                SELECT_CUSTOMER_SQL, (customer_name,)) if row[0] not in listed_tag_set]
+
+            self.connection.executemany(DELETE_BACKUP_SQL, removed_tag_list)
+            self.connection.execute(INSERT_REFRESH_SQL, (customer_name, refresh_time))
+
+        return len(listed_tag_set)
+
+    def store_backup(self, backup_entry):
+        """
+        Record a backup, replacing the previous record of the same tag for the customer.
+
+        :param backup_entry: OffsiteBackupEntry object.
+        """
+        volume_list = backup_entry.volume_list
+        if volume_list is not None:
+            volume_list = json.dumps(volume_list)
+
+        with self.connection:
+            self.connection.execute(INSERT_BACKUP_SQL, (
+                to_text(backup_entry.backup_tag), to_text(backup_entry.customer_name),
+                to_text(backup_entry.offsite_path), to_text(backup_entry.container_path),
+                backup_entry.size_mb, volume_list, backup_entry.upload_time,
+                backup_entry.status))
+
+    def get_customer_backup_list(self, customer_name):
+        """
+        Get the backups of a customer, from the newest to the oldest.
+
+        :param customer_name: customer name.
+        :return: list of OffsiteBackupEntry objects.
+        """
+        return [get_backup_entry(row) for row in self.connection.execute(
+            SELECT_CUSTOMER_SQL, (to_text(customer_name),))]
+
+    def find_backup(self, backup_tag, customer_name_list=None):
+        """
+        Find a backup by its tag.
+
+        :param backup_tag: backup tag.
+        :param customer_name_list: customers to look in, all customers if None.
+        :return: OffsiteBackupEntry object, if found; None otherwise.
+        """
+        for row in self.connection.execute(SELECT_TAG_SQL, (to_text(backup_tag),)):
+            backup_entry = get_backup_entry(row)
+
+            if customer_name_list is None or backup_entry.customer_name in customer_name_list:
+                return backup_entry
+
+        return None
+
+    def remove_path_list(self, offsite_path_list):
+        """
+        Remove the backups stored in the informed off-site paths.
+
+        :param offsite_path_list: list of off-site backup paths.
+        :return: number of removed backups.
+        """
+        with self.connection:
+            cursor = self.connection.executemany(DELETE_PATH_SQL, [
+                (to_text(offsite_path.rstrip('/')),) for offsite_path in offsite_path_list])
+
+        return cursor.rowcount
+
+    def close(self):
+        """Close the catalog file."""
+        self.connection.close()
+
+
+def open_offsite_catalog(logger, catalog_path=DEFAULT_OFFSITE_CATALOG_PATH):
+    """
+    Open the off-site catalog, so that an unusable catalog does not stop the operation.
+
+    :param logger: logger object.
+    :param catalog_path: path of the catalog database file, None to not use a catalog.
+    :return: OffsiteCatalog object or None, if the catalog could not be opened.
+    """
+    if catalog_path is None:
+        return None
+
+    try:
+        return OffsiteCatalog(catalog_path)
+    except (sqlite3.Error, OSError) as catalog_exp:
+        logger.warning("Off-site catalog '{}' is not available, off-site will be queried. "
+                       "Cause: {}.".format(catalog_path, catalog_exp))
+
+    return None
+
+
+def record_offsite_backup(backup_entry, logger, catalog_path=DEFAULT_OFFSITE_CATALOG_PATH):
+    """
+    Record a backup whose upload to off-site has just finished.
+
+    :param backup_entry: OffsiteBackupEntry object.
+    :param logger: logger object.
+    :param catalog_path: path of the catalog database file.
+    :return: true, if the backup was recorded.
+    """
+    offsite_catalog = open_offsite_catalog(logger, catalog_path)
+    if offsite_catalog is None:
+        return False
+
+    with offsite_catalog:
+        try:
+            offsite_catalog.store_backup(backup_entry)
+        except sqlite3.Error as catalog_exp:
+            logger.warning("Could not record backup '{}' in off-site catalog. Cause: {}."
+                           .format(backup_entry.backup_tag, catalog_exp))
+            return False
+
+    return True
@@ -10,19 +10,147 @@
 
 """Module is for adding any utilities related to the remote connections."""
 
+from collections import namedtuple
+import fcntl
+import hashlib
 import os
+from pipes import quote
+import stat
 from subprocess import PIPE, Popen
 from threading import Timer
+import time
 
-from backup.constants import LOG_LEVEL, TIMEOUT
+from backup.constants import LOG_LEVEL, SSH_CONTROL_PERSIST, SSH_MASTER_RETRY_INTERVAL, TIMEOUT
 from backup.exceptions import ExceptionCodes, UtilsException
 from backup.utils.validator import check_not_empty
 
+SSH_CONTROL_DIR = os.path.join(os.path.expanduser("~"), ".ssh", "bur_control")
+
+SSH_MASTER_FAILURE_DICT = {}
+
+STALE_CONTROL_SOCKET_ERROR = "Control socket connect("
+
+REMOTE_PATH_MISSING = "PATH_IS_MISSING"
+
+# Directories are removed by batches of paths, running some batches at the same time.
+REMOVE_BATCH_SIZE = 20
+REMOVE_PARALLEL_BATCHES = 4
+
+RemotePathStat = namedtuple('RemotePathStat', 'is_dir, size, mtime')
+
+
+def get_ssh_control_path(host):
+    """
+    Get the path of the socket of the connection shared by all ssh commands sent to a host.
+
+    The path is the same for every process, so that pool workers use the connection opened by
+    any of them. It is kept short, as unix sockets paths are limited to around 100 characters.
+
+    :param host: address to connect in user@ip format.
+    :return: socket path.
+    """
+    return os.path.join(SSH_CONTROL_DIR, "{}.sock".format(hashlib.md5(host).hexdigest()[:16]))
+
+
+def is_private_dir(path):
+    """
+    Check if a path is a directory owned by the current user and closed to any other user.
+
+    Symbolic links are not followed, so a link to a directory is not accepted.
+
+    :param path: path to be checked.
+    :return: true if the path is a private directory, false otherwise.
+    """
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return False
+
+    return stat.S_ISDIR(path_stat.st_mode) and path_stat.st_uid == os.getuid() and \
+        not path_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+
+def open_ssh_master(host, timeout=TIMEOUT):
+    """
+    Open the connection to a host shared by the ssh commands, if it is not open yet.
+
+    The master connection runs in background and closes itself after SSH_CONTROL_PERSIST idle
+    seconds. Processes opening it at the same time are serialized by a lock file, so that a
+    single master is started. When it cannot be opened, no other try is made for
+    SSH_MASTER_RETRY_INTERVAL seconds. The connection is not shared if the folder of the sockets
+    is not a private directory of the current user.
+
+    :param host: address to connect in user@ip format.
+    :param timeout: timeout to wait for the connection to be opened.
+    :return: socket path of the connection, or None if it is not available.
+    """
+    failure_time = SSH_MASTER_FAILURE_DICT.get(host)
+    if failure_time is not None and time.time() - failure_time < SSH_MASTER_RETRY_INTERVAL:
+        return None
+
+    try:
+        if not os.path.lexists(SSH_CONTROL_DIR):
+            os.makedirs(SSH_CONTROL_DIR, 0o700)
+    except EnvironmentError:
+        pass
+
+    if not is_private_dir(SSH_CONTROL_DIR):
+        return None
+
+    control_path = get_ssh_control_path(host)
+    if os.path.exists(control_path):
+        return control_path
+
+    try:
+        with open(control_path + ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            if not os.path.exists(control_path):
+                with open(os.devnull, 'r+') as dev_null:
+                    ssh_master = Popen(['ssh', '-o', LOG_LEVEL, '-o', 'ControlMaster=yes',
+                                        '-o', 'ControlPath={}'.format(control_path),
+                                        '-o', 'ControlPersist={}'.format(SSH_CONTROL_PERSIST),
+                                        '-N', '-f', host],
+                                       stdin=dev_null, stdout=dev_null, stderr=dev_null)
+
+                    timer = Timer(timeout, lambda process: process.kill(), [ssh_master])
+                    try:
+                        timer.start()
+                        ssh_master.wait()
+                    finally:
+                        timer.cancel()
+    except (EnvironmentError, ValueError):
+        pass
+
+    if not os.path.exists(control_path):
+        SSH_MASTER_FAILURE_DICT[host] = time.time()
+        return None
+
+    SSH_MASTER_FAILURE_DICT.pop(host, None)
+
+    return control_path
+
+
+def remove_stale_control_path(control_path):
+    """
+    Remove the socket of a shared connection which is no longer open.
+
+    :param control_path: socket path.
+    """
+    try:
+        os.remove(control_path)
+    except OSError:
+        pass
+
 
 def run_ssh_command(host, command, timeout=TIMEOUT):
     """
     Use Popen library to issue commands to the informed host by using ssh protocol.
 
+    The command is sent over the connection shared with the other commands sent to the host, so
+    that only the first one pays for the ssh handshake. It falls back to a connection of its own
+    if the shared one cannot be opened.
+
     :param host: address to connect in user@ip format.
     :param command: command to be executed.
     :param timeout: timeout to wait for the process to finish.
@@ -31,8 +159,13 @@ def run_ssh_command(host, command, timeout=TIMEOUT):
     if not host.strip() or not command.strip():
         return "", ""
 
-    ssh = Popen(['ssh', '-o', LOG_LEVEL, host, 'bash'],
-                stdin=PIPE, stdout=PIPE, stderr=PIPE)
+    ssh_command = ['ssh', '-o', LOG_LEVEL]
+
+    control_path = open_ssh_master(host, timeout)
+    if control_path is not None:
+        ssh_command += ['-o', 'ControlMaster=no', '-o', 'ControlPath={}'.format(control_path)]
+
+    ssh = Popen(ssh_command + [host, 'bash'], stdin=PIPE, stdout=PIPE, stderr=PIPE)
 
     timer = Timer(timeout, lambda process: process.kill(), [ssh])
 
@@ -44,6 +177,13 @@ def run_ssh_command(host, command, timeout=TIMEOUT):
             stderr = "Command '{}' timeout.".format(command)
         timer.cancel()
 
+    if control_path is not None and STALE_CONTROL_SOCKET_ERROR in stderr:
+        # The shared connection was closed without removing its socket. The command ran on a
+        # connection of its own, and the next one opens a new shared connection.
+        remove_stale_control_path(control_path)
+        stderr = "".join(line for line in stderr.splitlines(True)
+                         if STALE_CONTROL_SOCKET_ERROR not in line)
+
     return stdout, stderr
 
 
@@ -105,10 +245,142 @@ def create_remote_dir(host, full_path, timeout=TIMEOUT):
     return True
 
 
+def create_remote_dir_list(host, dir_list, timeout=TIMEOUT):
+    """
+    Create many remote directories with a single ssh command.
+
+    Directories are created in order, so a parent can be informed before its children. As with
+    create_remote_dir, the parent of each directory must exist.
+
+    :param host: remote host address, e.g. user@host_ip
+    :param dir_list: list of full paths to be created.
+    :param timeout: timeout to wait for the process to finish.
+    :return: list of directories which are not available, empty if all of them are.
+    """
+    if not dir_list:
+        return []
+
+    create_dir_command = ""
+    for index, dir_path in enumerate(dir_list):
+        create_dir_command += "[ -d {0} ] || mkdir {0}\n[ -d {0} ] && echo {1}\n".format(
+            quote(dir_path), index)
+
+    stdout, _ = run_ssh_command(host, create_dir_command, timeout)
+
+    available_index_set = set(stdout.split())
+
+    return [dir_path for index, dir_path in enumerate(dir_list)
+            if str(index) not in available_index_set]
+
+
+def get_remote_path_stats(host, path_list, timeout=TIMEOUT):
+    """
+    Get whether many remote paths exist, with their size and modification time, at once.
+
+    A single ssh command is sent for all paths. The size of a directory is the size of its entry,
+    not of its content.
+
+    :param host: remote host address, e.g. user@host_ip
+    :param path_list: list of remote paths to be checked.
+    :param timeout: timeout to wait for the process to finish.
+    :return: dictionary with the RemotePathStat of each path, None if the path does not exist.
+    :raise UtilsException: if the command returned an error or its result cannot be parsed.
+    """
+    check_not_empty(host)
+
+    if not path_list:
+        return {}
+
+    # The output is one line for each path in the format: index size mtime file_type
+    stat_command = ""
+    for index, path in enumerate(path_list):
+        stat_command += "echo \"{} $(stat -c '%s %Y %F' -- {} 2>/dev/null || echo {})\"\n" \
+            .format(index, quote(path), REMOTE_PATH_MISSING)
+
+    stdout, stderr = run_ssh_command(host, stat_command, timeout)
+
+    if stderr:
+        raise UtilsException(ExceptionCodes.CannotAccessHost, [host, path_list, stderr])
+
+    path_stat_dict = {}
+    try:
+        for line in stdout.splitlines():
+            if not line.strip():
+                continue
+
+            index, path_stat = line.split(' ', 1)
+            path = path_list[int(index)]
+
+            if path_stat.strip() == REMOTE_PATH_MISSING:
+                path_stat_dict[path] = None
+                continue
+
+            size, mtime, file_type = path_stat.split(' ', 2)
+            path_stat_dict[path] = RemotePathStat(file_type.strip() == 'directory', int(size),
+                                                  int(mtime))
+    except (IndexError, ValueError) as error:
+        raise UtilsException(ExceptionCodes.CannotParseValue, [error, stdout])
+
+    if len(path_stat_dict) != len(set(path_list)):
+        raise UtilsException(ExceptionCodes.CannotParseValue, [path_list, stdout])
+
+    return path_stat_dict
+
+
+def get_remote_sub_dir_dict(host, dir_list, timeout=TIMEOUT):
+    """
+    Get the sub-directories of many remote directories, with their modification time, at once.
+
+    A single ssh command is sent for all directories. A missing directory has no sub-directories.
+
+    :param host: remote host address, e.g. user@host_ip
+    :param dir_list: list of remote directories.
+    :param timeout: timeout to wait for the process to finish.
+    :return: dictionary with the list of tuples (sub-directory path, modification time) of each
+    directory, from the newest to the oldest.
+    :raise UtilsException: if the command returned an error or its result cannot be parsed.
+    """
+    check_not_empty(host)
+
+    sub_dir_dict = {remote_dir: [] for remote_dir in dir_list}
+
+    if not dir_list:
+        return sub_dir_dict
+
+    # The output is one line for each sub-directory in the format: index mtime path
+    find_command = ""
+    for index, remote_dir in enumerate(dir_list):
+        find_command += "find {} -mindepth 1 -maxdepth 1 -type d -printf '{} %T@ %p\\n' " \
+                        "2>/dev/null\n".format(quote(remote_dir), index)
+
+    stdout, stderr = run_ssh_command(host, find_command, timeout)
+
+    if stderr:
+        raise UtilsException(ExceptionCodes.CannotAccessHost, [host, dir_list, stderr])
+
+    try:
+        for line in stdout.splitlines():
+            if not line.strip():
+                continue
+
+            index, mtime, sub_dir_path = line.split(' ', 2)
+            sub_dir_dict[dir_list[int(index)]].append((sub_dir_path, float(mtime)))
+    except (IndexError, ValueError) as error:
+        raise UtilsException(ExceptionCodes.CannotParseValue, [error, stdout])
+
+    for sub_dir_list in sub_dir_dict.values():
+        sub_dir_list.sort(key=lambda sub_dir: sub_dir[1], reverse=True)
+
+    return sub_dir_dict
+
+
 def remove_remote_dir(host, dir_list=None, timeout=TIMEOUT):
     """
     Remove the informed directory list from the remote server.
 
+    A single ssh command is sent for all directories. They are removed by batches of
+    REMOVE_BATCH_SIZE paths, with REMOVE_PARALLEL_BATCHES batches running at the same time.
+
     :param host: remote host address, e.g. user@host_ip
     :param dir_list: directory list.
     :param timeout: timeout to wait for the process to finish.
@@ -121,11 +393,21 @@ def remove_remote_dir(host, dir_list=None, timeout=TIMEOUT):
     if isinstance(dir_list, str):
         dir_list = [dir_list]
 
+    dir_list = [folder_path.strip() for folder_path in dir_list]
+
     remove_dir_cmd = ""
 
-    for folder_path in dir_list:
-        folder_path = folder_path.strip()
-        remove_dir_cmd += "rm -rf {}\n".format(folder_path)
+    batch_start_list = range(0, len(dir_list), REMOVE_BATCH_SIZE)
+    for batch_index, batch_start in enumerate(batch_start_list):
+        if batch_index and not batch_index % REMOVE_PARALLEL_BATCHES:
+            remove_dir_cmd += "wait\n"
+
+        # errors of rm are not reported, the paths left are found by the validation.
+        remove_dir_cmd += "rm -rf -- {} 2>/dev/null &\n".format(" ".join(
+            quote(folder_path) for folder_path in dir_list[batch_start:batch_start
+                                                           + REMOVE_BATCH_SIZE]))
+
+    remove_dir_cmd += "wait\n"
 
     _, stderr = run_ssh_command(host, remove_dir_cmd, timeout)
 
@@ -139,17 +421,22 @@ def validate_removed_dir_list(host, remove_dir_list=None):
     """
     Check the list of removed dirs, to validate if they were successfully deleted from off-site.
 
+    All directories are checked by a single ssh command.
+
     :param host: remote host to do the validation.
     :param remove_dir_list: list of directories supposed to be removed.
     :return: list of not removed directories, list of validated removed directories.
+    :raise UtilsException: if the directories cannot be checked.
     """
-    if remove_dir_list is None:
-        remove_dir_list = []
+    if not remove_dir_list:
+        return [], []
+
+    path_stat_dict = get_remote_path_stats(host, remove_dir_list)
 
     not_removed_list = []
     validated_removed_list = []
     for removed_path in remove_dir_list:
-        if not check_remote_path_exists(host, removed_path):
+        if path_stat_dict[removed_path] is None:
             validated_removed_list.append(removed_path)
         else:
             not_removed_list.append(removed_path)
@@ -157,6 +444,52 @@ def validate_removed_dir_list(host, remove_dir_list=None):
     return not_removed_list, validated_removed_list
 
 
+def get_remote_backup_ages(host, root_dir_list, timeout=TIMEOUT):
+    """
+    Get the age of every backup folder under many remote directories, scanning them at once.
+
+    A single ssh command scans all directories. The age of a backup folder is the modification
+    time of the oldest file or folder inside it. Empty backup folders are not returned.
+
+    :param host: remote host address, e.g. user@host_ip
+    :param root_dir_list: list of remote directories holding backup folders.
+    :param timeout: timeout to wait for the process to finish.
+    :return: dictionary with the age of each backup folder path, in seconds since the epoch.
+    :raise UtilsException: if the command returned an error or its result cannot be parsed.
+    """
+    check_not_empty(host)
+
+    if not root_dir_list:
+        return {}
+
+    # The output is one line for each backup folder in the format: index oldest_mtime folder_name
+    scan_command = ""
+    for index, root_dir in enumerate(root_dir_list):
+        scan_command += "find {} -mindepth 2 -printf '%T@ %P\\n' 2>/dev/null | awk -v idx={} " \
+                        "'{{name = substr($0, length($1) + 2); sub(\"/.*\", \"\", name); " \
+                        "if (!(name in age) || $1 + 0 < age[name]) age[name] = $1 + 0}} " \
+                        "END {{for (name in age) printf \"%s %.6f %s\\n\", idx, age[name], " \
+                        "name}}'\n".format(quote(root_dir), index)
+
+    stdout, stderr = run_ssh_command(host, scan_command, timeout)
+
+    if stderr:
+        raise UtilsException(ExceptionCodes.CannotAccessHost, [host, root_dir_list, stderr])
+
+    backup_age_dict = {}
+    try:
+        for line in stdout.splitlines():
+            if not line.strip():
+                continue
+
+            index, age, folder_name = line.split(' ', 2)
+            backup_age_dict[os.path.join(root_dir_list[int(index)], folder_name)] = float(age)
+    except (IndexError, ValueError) as error:
+        raise UtilsException(ExceptionCodes.CannotParseValue, [error, stdout])
+
+    return backup_age_dict
+
+
 def get_remote_folder_content(host, remote_path, filtering_criteria='*'):
     r"""
     Get a list of relative paths of files from the informed remote directory.
@@ -0,0 +1,85 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module to hold the result of processing and transferring a single volume."""
+
+
+class VolumeResult(object):
+    """
+    Store the output of the processing and transfer of a volume.
+
+    Instances are sent between the pool workers and the parent process through the pool
+    callbacks, so the class keeps a fixed set of attributes.
+    """
+
+    __slots__ = ('volume_path', 'status', 'output', 'processing_time', 'tar_time',
+                 'transfer_time', 'rsync_output', 'checksum_time', 'checksum_rate')
+
+    def __init__(self, volume_path="", status=False):
+        """
+        Initialize Volume Result object.
+
+        :param volume_path: path of the processed volume.
+        :param status: whether the volume was successfully handled.
+        """
+        self.volume_path = volume_path
+        self.status = status
+        self.output = ""
+        self.processing_time = 0.0
+        self.tar_time = 0.0
+        self.transfer_time = 0.0
+        self.rsync_output = None
+        self.checksum_time = 0.0
+        self.checksum_rate = 0.0
+
+    def set_error(self, error_message):
+        """
+        Mark the volume as failed.
+
+        :param error_message: description of the error.
+        :return: VolumeResult object.
+        """
+        self.status = False
+        self.output = error_message
+
+        return self
+
+    def __getstate__(self):
+        """
+        Get the state to be pickled, as classes with __slots__ have no __dict__.
+
+        :return: tuple with the value of each attribute.
+        """
+        return tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    def __setstate__(self, state):
+        """
+        Restore the state of an unpickled object.
+
+        :param state: tuple with the value of each attribute.
+        """
+        for attribute, value in zip(self.__slots__, state):
+            setattr(self, attribute, value)
+
+    def __eq__(self, other):
+        """Compare two Volume Result objects by their attributes."""
+        return isinstance(other, VolumeResult) and self.__getstate__() == other.__getstate__()
+
+    def __ne__(self, other):
+        """Compare two Volume Result objects by their attributes."""
+        return not self.__eq__(other)
+
+    def __str__(self):
+        """Represent Volume Result object as string."""
+        return "({}, {}, {})".format(self.volume_path, self.status, self.output)
+
+    def __repr__(self):
+        """Represent Volume Result object."""
+        return self.__str__()
@@ -0,0 +1,227 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Off-site transfers run against the local blob stand-in server."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+import requests
+from tests.system import transfer_benchmark
+from tests.system.utils.blob_stand_in import BlobStandInServer
+
+from backup.blob_manager import BLOCK_JOURNAL_SUFFIX, BlobManager, get_block_id, \
+    get_content_md5, sastoken
+
+MOCK_BLOB_PACKAGE = 'backup.blob_manager.'
+
+CONTAINER_NAME = 'container'
+BLOCK_SIZE = 64
+
+
+class TestBlobStandInServer(unittest.TestCase):
+    """Transfers of the native backend through the stand-in server."""
+
+    def setUp(self):
+        """Start the stand-in server with a container."""
+        self.temp_dir = tempfile.mkdtemp()
+
+        self.stand_in_server = BlobStandInServer()
+        self.stand_in_server.storage.create_container(CONTAINER_NAME)
+        self.stand_in_server.start()
+        self.container_url = self.stand_in_server.get_container_url(CONTAINER_NAME)
+
+        for name, value in [('BLOCK_SIZE', BLOCK_SIZE), ('RANGE_SIZE', BLOCK_SIZE)]:
+            constant_patcher = mock.patch(MOCK_BLOB_PACKAGE + name, value)
+            constant_patcher.start()
+            self.addCleanup(constant_patcher.stop)
+
+    def tearDown(self):
+        """Stop the stand-in server and remove the temporary folder."""
+        self.stand_in_server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def create_file(self, file_name, content):
+        """
+        Create a file to be uploaded.
+
+        :param file_name: name of the file.
+        :param content: content of the file.
+        :return: path of the file.
+        """
+        file_path = os.path.join(self.temp_dir, file_name)
+        with open(file_path, 'wb') as source_file:
+            source_file.write(content)
+
+        return file_path
+
+    def test_block_upload_and_ranged_download(self):
+        """A file bigger than a block should be committed and downloaded unchanged."""
+        content = os.urandom(BLOCK_SIZE * 3 + 5)
+        BlobManager.transfer_file(self.create_file('volume.tar', content), self.container_url)
+
+        request_count_dict, _, _ = self.stand_in_server.reset_stats()
+        self.assertEqual(4, request_count_dict['PUT block'])
+        self.assertEqual(1, request_count_dict['PUT blocklist'])
+
+        blob = self.stand_in_server.storage.get_blob(CONTAINER_NAME, 'volume.tar')
+        self.assertEqual(content, blob.data)
+        self.assertEqual(4, len(blob.committed_block_list))
+
+        download_dir = os.path.join(self.temp_dir, 'download')
+        os.mkdir(download_dir)
+        BlobManager.transfer_file(self.container_url + '/volume.tar', download_dir)
+
+        with open(os.path.join(download_dir, 'volume.tar'), 'rb') as downloaded_file:
+            self.assertEqual(content, downloaded_file.read())
+        self.assertEqual(4, self.stand_in_server.reset_stats()[0]['GET blob'])
+
+    def test_resume_upload_of_rearchived_file(self):
+        """Blocks left by an interrupted upload of an older file should not be committed."""
+        source_path = self.create_file('volume.tar', 'A' * BLOCK_SIZE * 3)
+
+        interrupted_upload = BlobManager(source_path, self.container_url + '/volume.tar' +
+                                         sastoken)
+        interrupted_upload.open_block_journal(source_path + BLOCK_JOURNAL_SUFFIX)
+        interrupted_upload.upload_block((get_block_id(0), 0))
+        interrupted_upload.close_block_journal()
+
+        content = os.urandom(BLOCK_SIZE * 3)
+        self.create_file('volume.tar', content)
+        self.stand_in_server.reset_stats()
+
+        BlobManager.transfer_file(source_path, self.container_url, resumable=True)
+
+        self.assertEqual(content, self.stand_in_server.storage.get_blob(CONTAINER_NAME,
+                                                                        'volume.tar').data)
+        self.assertEqual(3, self.stand_in_server.reset_stats()[0]['PUT block'])
+
+        self.create_file('volume.tar', 'A' * BLOCK_SIZE * 3)
+        interrupted_upload.open_block_journal(source_path + BLOCK_JOURNAL_SUFFIX)
+        interrupted_upload.upload_block((get_block_id(0), 0))
+        interrupted_upload.close_block_journal()
+        self.stand_in_server.reset_stats()
+
+        BlobManager.transfer_file(source_path, self.container_url, resumable=True)
+
+        self.assertEqual('A' * BLOCK_SIZE * 3, self.stand_in_server.storage.get_blob(
+            CONTAINER_NAME, 'volume.tar').data)
+        self.assertEqual(2, self.stand_in_server.reset_stats()[0]['PUT block'])
+
+    def test_download_stream(self):
+        """A blob read as a stream should come in order, one request per range."""
+        content = os.urandom(BLOCK_SIZE * 5 + 3)
+        BlobManager.transfer_file(self.create_file('volume.tar', content), self.container_url)
+        self.stand_in_server.reset_stats()
+
+        download_stream = BlobManager.get_download_stream(self.container_url + '/volume.tar')
+        stream = download_stream.start()
+
+        data_list = []
+        for data in iter(lambda: stream.read(BLOCK_SIZE / 3), ''):
+            data_list.append(data)
+        download_stream.finish()
+
+        self.assertEqual(content, ''.join(data_list))
+        self.assertEqual(6, self.stand_in_server.reset_stats()[0]['GET blob'])
+
+    def test_list_and_delete_blobs(self):
+        """Blobs should be listed by prefix and deleted one at a time."""
+        for file_name in ['backup_1', 'backup_2', 'other']:
+            BlobManager.transfer_file(self.create_file(file_name, file_name), self.container_url)
+
+        response = requests.get(self.container_url, params={'restype': 'container',
+                                                            'comp': 'list', 'prefix': 'backup'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.text.count('<Name>'))
+        self.assertIn('<Content-Length>8</Content-Length>', response.text)
+
+        self.assertEqual(202, requests.delete(self.container_url + '/backup_1').status_code)
+        self.assertEqual(404, requests.delete(self.container_url + '/backup_1').status_code)
+        self.assertEqual(['backup_2', 'other'], sorted(
+            self.stand_in_server.storage.container_dict[CONTAINER_NAME]))
+
+    def test_remove_dir_list(self):
+        """Only the blobs under the removed folders should be deleted."""
+        for file_name in ['volume_0', 'volume_1']:
+            BlobManager.transfer_file(self.create_file(file_name, file_name),
+                                      self.container_url + '/customer/bkp1')
+        BlobManager.transfer_file(self.create_file('volume_2', 'volume_2'),
+                                  self.container_url + '/customer/bkp10')
+
+        result_dict = BlobManager.remove_dir_list(self.container_url, ['customer/bkp1'])
+
+        self.assertEqual({'customer/bkp1': None}, result_dict)
+        self.assertEqual(['customer/bkp10/volume_2'], sorted(
+            self.stand_in_server.storage.container_dict[CONTAINER_NAME]))
+        self.assertEqual(2, self.stand_in_server.reset_stats()[0]['DELETE blob'])
+
+    def test_range_and_md5_errors(self):
+        """Ranges out of the blob and bodies not matching their MD5 should be refused."""
+        response = requests.put(self.container_url + '/blob', data='data',
+                                headers={'x-ms-blob-type': 'BlockBlob',
+                                         'Content-MD5': get_content_md5('other')})
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('Md5Mismatch', response.headers['x-ms-error-code'])
+
+        requests.put(self.container_url + '/blob', data='data',
+                     headers={'x-ms-blob-type': 'BlockBlob'})
+        response = requests.get(self.container_url + '/blob', headers={'x-ms-range': 'bytes=2-'})
+        self.assertEqual(206, response.status_code)
+        self.assertEqual('ta', response.content)
+        self.assertEqual(416, requests.get(self.container_url + '/blob',
+                                           headers={'Range': 'bytes=10-20'}).status_code)
+
+    def test_latency_added_to_requests(self):
+        """Every request should be delayed by the latency of the server."""
+        self.stand_in_server.latency = 0.2
+
+        start_time = time.time()
+        requests.head(self.container_url + '/missing')
+
+        self.assertGreaterEqual(time.time() - start_time, 0.2)
+
+
+class TestTransferBenchmark(unittest.TestCase):
+    """Benchmark runs of the off-site transfers."""
+
+    def setUp(self):
+        """Create a temporary folder."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_native_backend_benchmark(self):
+        """Every stage should succeed and be recorded in the output file."""
+        output_file_path = os.path.join(self.temp_dir, 'benchmark.json')
+
+        exit_code = transfer_benchmark.main(['--number_volumes', '2', '--volume_size_mb', '0.5',
+                                             '--number_metadata_files', '3', '--work_path',
+                                             os.path.join(self.temp_dir, 'work'),
+                                             '--output_file', output_file_path])
+
+        self.assertEqual(0, exit_code)
+
+        with open(output_file_path) as output_file:
+            stage_list = json.load(output_file)['stages']
+
+        self.assertEqual([transfer_benchmark.UPLOAD_STAGE, transfer_benchmark.DOWNLOAD_STAGE,
+                          transfer_benchmark.METADATA_STAGE],
+                         [stage['stage'] for stage in stage_list])
+        self.assertEqual(1000000, stage_list[1]['bytes'])
+        self.assertEqual(2, stage_list[1]['requests']['HEAD blob'])
+        self.assertEqual(3, stage_list[2]['number_files'])
@@ -0,0 +1,433 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=too-many-arguments,too-many-instance-attributes
+
+"""
+Benchmark of the off-site transfers, run against the local blob stand-in server.
+
+Volumes are uploaded by LocalBackupHandler.transfer_backup_volume_to_offsite, downloaded by
+download_volume_from_offsite and a list of small metadata files is sent by transfer_file_list,
+so each stage goes through the same code used by the upload and download operations. The
+throughput of each stage is reported in MB/s, to be compared between runs.
+
+Run from the project root, e.g.:
+
+    PYTHONPATH=src python -m tests.system.transfer_benchmark --transfer_backend native \
+        --latency_ms 20 --bandwidth_mbps 400 --output_file benchmark.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from tests.system.utils.blob_stand_in import BlobStandInServer
+
+from backup.backup_settings import EnmConfig, OffsiteConfig, OnsiteConfig
+from backup.blob_manager import get_transfer_manager
+from backup.concurrency import BYTES_PER_MB
+from backup.constants import NATIVE_TRANSFER_BACKEND, TRANSFER_BACKENDS
+from backup.local_backup_handler import LocalBackupHandler
+from backup.logger import CustomLogger
+from backup.offsite_backup_handler import download_volume_from_offsite
+from backup.volume_result import VolumeResult
+
+SCRIPT_FILE = os.path.basename(__file__).split('.')[0]
+
+BENCHMARK_CONTAINER = 'benchmark'
+BENCHMARK_CUSTOMER = 'CUSTOMER_BENCHMARK'
+BENCHMARK_BACKUP_TAG = 'benchmark_backup'
+
+DEFAULT_NUMBER_VOLUMES = 4
+DEFAULT_VOLUME_SIZE_MB = 64
+DEFAULT_NUMBER_METADATA_FILES = 20
+DEFAULT_NUMBER_TRANSFERS = 2
+
+METADATA_FILE_SIZE = 4 * 1024
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_STAGE = 'volume_upload'
+DOWNLOAD_STAGE = 'volume_download'
+METADATA_STAGE = 'metadata_upload'
+
+
+def create_random_file(file_path, num_bytes):
+    """
+    Create a file of random data, which does not compress, like an encrypted volume.
+
+    :param file_path: path of the file.
+    :param num_bytes: size of the file.
+    :return: md5 hex digest of the content.
+    """
+    md5 = hashlib.md5()
+
+    with open(file_path, 'wb') as random_file:
+        for offset in range(0, num_bytes, WRITE_CHUNK_SIZE):
+            chunk = os.urandom(min(WRITE_CHUNK_SIZE, num_bytes - offset))
+            md5.update(chunk)
+            random_file.write(chunk)
+
+    return md5.hexdigest()
+
+
+def get_file_md5(file_path):
+    """
+    Get the md5 of the content of a file.
+
+    :param file_path: path of the file.
+    :return: md5 hex digest of the content.
+    """
+    md5 = hashlib.md5()
+
+    with open(file_path, 'rb') as read_file:
+        for chunk in iter(lambda: read_file.read(WRITE_CHUNK_SIZE), b''):
+            md5.update(chunk)
+
+    return md5.hexdigest()
+
+
+class StageResult(object):
+    """Measures of a benchmark stage."""
+
+    def __init__(self, name, transfer_backend, number_files, num_bytes, elapsed_time,
+                 request_count_dict=None, error_list=None):
+        """
+        Initialize Stage Result object.
+
+        :param name: name of the stage.
+        :param transfer_backend: backend used by the transfers.
+        :param number_files: number of files transferred.
+        :param num_bytes: number of bytes transferred.
+        :param elapsed_time: seconds taken by the stage.
+        :param request_count_dict: number of requests answered by the stand-in, by operation.
+        :param error_list: errors of the transfers which failed.
+        """
+        self.name = name
+        self.transfer_backend = transfer_backend
+        self.number_files = number_files
+        self.num_bytes = num_bytes
+        self.elapsed_time = elapsed_time
+        self.request_count_dict = request_count_dict or {}
+        self.error_list = error_list or []
+
+    @property
+    def throughput(self):
+        """Get the throughput of the stage in MB/s."""
+        return self.num_bytes / float(BYTES_PER_MB) / max(self.elapsed_time, 1e-6)
+
+    @property
+    def is_success(self):
+        """Check whether all transfers of the stage succeeded."""
+        return not self.error_list
+
+    def to_dict(self):
+        """
+        Get the measures of the stage to be stored as json.
+
+        :return: dictionary of measures.
+        """
+        return {'stage': self.name,
+                'transfer_backend': self.transfer_backend,
+                'number_files': self.number_files,
+                'bytes': self.num_bytes,
+                'elapsed_time': round(self.elapsed_time, 3),
+                'throughput_mbs': round(self.throughput, 2),
+                'requests': self.request_count_dict,
+                'errors': self.error_list}
+
+    def __str__(self):
+        """Represent Stage Result object as string."""
+        return "{:<16} {:<8} {:>6} files {:>10.1f}MB {:>8.2f}s {:>8.2f}MB/s {}".format(
+            self.name, self.transfer_backend, self.number_files,
+            self.num_bytes / float(BYTES_PER_MB), self.elapsed_time, self.throughput,
+            "OK" if self.is_success else "{} errors".format(len(self.error_list)))
+
+    def __repr__(self):
+        """Represent Stage Result object."""
+        return self.__str__()
+
+
+class TransferBenchmark(object):
+    """Run the upload and download stages of a backup against a blob stand-in server."""
+
+    def __init__(self, stand_in_server, work_path, logger,
+                 transfer_backend=NATIVE_TRANSFER_BACKEND, number_volumes=DEFAULT_NUMBER_VOLUMES,
+                 volume_size_mb=DEFAULT_VOLUME_SIZE_MB,
+                 number_metadata_files=DEFAULT_NUMBER_METADATA_FILES,
+                 number_transfers=DEFAULT_NUMBER_TRANSFERS):
+        """
+        Initialize Transfer Benchmark object.
+
+        :param stand_in_server: BlobStandInServer object, already started.
+        :param work_path: folder holding the files created by the benchmark.
+        :param logger: logger object.
+        :param transfer_backend: backend used by the transfers.
+        :param number_volumes: number of volumes uploaded and downloaded.
+        :param volume_size_mb: size of each volume in MB.
+        :param number_metadata_files: number of small files sent in a single list.
+        :param number_transfers: number of volumes transferred at the same time.
+        """
+        self.stand_in_server = stand_in_server
+        self.work_path = work_path
+        self.logger = logger
+        self.transfer_backend = transfer_backend
+        self.number_volumes = number_volumes
+        self.volume_size = int(volume_size_mb * BYTES_PER_MB)
+        self.number_metadata_files = number_metadata_files
+        self.number_transfers = max(1, number_transfers)
+
+        self.source_path = os.path.join(work_path, 'source')
+        self.temp_path = os.path.join(work_path, 'temp')
+        self.download_path = os.path.join(work_path, 'download')
+
+        self.offsite_config = OffsiteConfig('127.0.0.1', 'benchmark', '/benchmark', 'rpc_bkps',
+                                            1, stand_in_server.account_url,
+                                            BENCHMARK_CONTAINER,
+                                            transfer_backend=transfer_backend)
+        self.remote_az_path = os.path.join(self.offsite_config.full_container_path,
+                                           BENCHMARK_CUSTOMER, BENCHMARK_BACKUP_TAG)
+
+        self.volume_md5_dict = {}
+
+    def prepare(self):
+        """Create the container and the files to be transferred."""
+        for folder_path in [self.source_path, self.temp_path, self.download_path]:
+            if not os.path.exists(folder_path):
+                os.makedirs(folder_path)
+
+        if BENCHMARK_CONTAINER not in self.stand_in_server.storage.container_dict:
+            self.stand_in_server.storage.create_container(BENCHMARK_CONTAINER)
+
+        for index in range(self.number_volumes):
+            volume_name = "volume{}.tar".format(index)
+            self.volume_md5_dict[volume_name] = create_random_file(
+                os.path.join(self.source_path, volume_name), self.volume_size)
+
+        for index in range(self.number_metadata_files):
+            create_random_file(os.path.join(self.source_path, "metadata{}".format(index)),
+                               METADATA_FILE_SIZE)
+
+    def get_backup_handler(self):
+        """
+        Get the handler which uploads the volumes, as created by the upload operation.
+
+        :return: LocalBackupHandler object.
+        """
+        return LocalBackupHandler(self.offsite_config, OnsiteConfig(self.temp_path),
+                                  EnmConfig(BENCHMARK_CUSTOMER, self.source_path), None, 1, 1,
+                                  self.number_transfers, self.logger)
+
+    def run_stage(self, name, function, argument_list, num_bytes, number_files=None):
+        """
+        Run a function for each argument, number_transfers at a time, and measure the stage.
+
+        :param name: name of the stage.
+        :param function: function returning an error message, or None if it succeeded.
+        :param argument_list: list of arguments, one for each call.
+        :param num_bytes: number of bytes transferred by the stage.
+        :param number_files: number of files transferred, defaults to one for each argument.
+        :return: StageResult object.
+        """
+        self.stand_in_server.reset_stats()
+
+        thread_pool = ThreadPool(self.number_transfers)
+        try:
+            start_time = time.time()
+            error_list = [error for error in thread_pool.map(function, argument_list) if error]
+            elapsed_time = time.time() - start_time
+        finally:
+            thread_pool.terminate()
+
+        request_count_dict, _, _ = self.stand_in_server.reset_stats()
+
+        stage_result = StageResult(name, self.transfer_backend,
+                                   number_files or len(argument_list), num_bytes, elapsed_time,
+                                   request_count_dict, error_list)
+        self.logger.info("Stage result: {}".format(stage_result))
+
+        return stage_result
+
+    def run_upload_stage(self):
+        """
+        Upload the volumes as the upload operation does, from copies in the temporary folder.
+
+        :return: StageResult object.
+        """
+        backup_handler = self.get_backup_handler()
+
+        temp_volume_path_list = []
+        for volume_name in sorted(self.volume_md5_dict):
+            temp_volume_path = os.path.join(self.temp_path, volume_name)
+            shutil.copyfile(os.path.join(self.source_path, volume_name), temp_volume_path)
+            temp_volume_path_list.append(temp_volume_path)
+
+        def upload_volume(temp_volume_path):
+            """Upload a volume, returning its error message, if any."""
+            _, volume_output = backup_handler.transfer_backup_volume_to_offsite(
+                os.path.basename(temp_volume_path), VolumeResult(), temp_volume_path,
+                self.offsite_config.full_path, self.remote_az_path)
+
+            return None if volume_output.status else volume_output.output
+
+        return self.run_stage(UPLOAD_STAGE, upload_volume, temp_volume_path_list,
+                              self.number_volumes * self.volume_size)
+
+    def run_download_stage(self):
+        """
+        Download the volumes as the download operation does, checking their content.
+
+        :return: StageResult object.
+        """
+        def download_volume(volume_name):
+            """Download a volume, returning its error message, if any."""
+            _, _, volume_output, _ = download_volume_from_offsite(
+                volume_name, volume_name, self.offsite_config.full_path, self.download_path,
+                os.path.join(self.remote_az_path, volume_name),
+                transfer_backend=self.transfer_backend)
+
+            if not volume_output.status:
+                return volume_output.output
+
+            if get_file_md5(os.path.join(self.download_path, volume_name)) != \
+                    self.volume_md5_dict[volume_name]:
+                return "Content of downloaded volume '{}' does not match.".format(volume_name)
+
+            return None
+
+        return self.run_stage(DOWNLOAD_STAGE, download_volume, sorted(self.volume_md5_dict),
+                              self.number_volumes * self.volume_size)
+
+    def run_metadata_stage(self):
+        """
+        Send the small metadata files in a single list, as done for the backup metadata.
+
+        :return: StageResult object.
+        """
+        transfer_pair_list = [(os.path.join(self.source_path, "metadata{}".format(index)),
+                               os.path.join(self.remote_az_path, 'metadata'))
+                              for index in range(self.number_metadata_files)]
+
+        def upload_metadata(pair_list):
+            """Upload the list of files, returning the errors, if any."""
+            result_dict = get_transfer_manager(self.transfer_backend).transfer_file_list(
+                pair_list)
+
+            return "; ".join("{}: {}".format(source_path, error) for source_path, error
+                             in sorted(result_dict.items()) if error) or None
+
+        return self.run_stage(METADATA_STAGE, upload_metadata, [transfer_pair_list],
+                              self.number_metadata_files * METADATA_FILE_SIZE,
+                              self.number_metadata_files)
+
+    def run(self):
+        """
+        Run all stages of the benchmark, downloading only the volumes uploaded.
+
+        :return: list of StageResult objects.
+        """
+        self.prepare()
+
+        stage_result_list = [self.run_upload_stage()]
+
+        if stage_result_list[0].is_success:
+            stage_result_list.append(self.run_download_stage())
+
+        stage_result_list.append(self.run_metadata_stage())
+
+        return stage_result_list
+
+
+def parse_arguments(arg_list=None):
+    """
+    Parse the arguments of the benchmark.
+
+    :param arg_list: list of arguments, defaults to the command line.
+    :return: parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the off-site transfers against a "
+                                                 "local blob stand-in server.")
+
+    parser.add_argument("--transfer_backend", default=NATIVE_TRANSFER_BACKEND,
+                        choices=TRANSFER_BACKENDS,
+                        help="Backend used by the transfers. azcopy needs the binary in the "
+                             "PATH.")
+    parser.add_argument("--number_volumes", type=int, default=DEFAULT_NUMBER_VOLUMES,
+                        help="Number of volumes uploaded and downloaded.")
+    parser.add_argument("--volume_size_mb", type=float, default=DEFAULT_VOLUME_SIZE_MB,
+                        help="Size of each volume in MB. Blobs are kept in memory.")
+    parser.add_argument("--number_metadata_files", type=int,
+                        default=DEFAULT_NUMBER_METADATA_FILES,
+                        help="Number of small files sent in a single list.")
+    parser.add_argument("--number_transfers", type=int, default=DEFAULT_NUMBER_TRANSFERS,
+                        help="Number of volumes transferred at the same time.")
+    parser.add_argument("--latency_ms", type=float, default=0,
+                        help="Milliseconds added to every request by the stand-in server.")
+    parser.add_argument("--bandwidth_mbps", type=float, default=None,
+                        help="Megabits per second shared by all connections, unlimited by "
+                             "default.")
+    parser.add_argument("--work_path", default=None,
+                        help="Folder for the files of the benchmark, a temporary one by "
+                             "default.")
+    parser.add_argument("--output_file", default=None,
+                        help="Json file to store the result of each stage.")
+
+    return parser.parse_args(arg_list)
+
+
+def main(arg_list=None):
+    """
+    Run the benchmark and report the throughput of each stage.
+
+    :param arg_list: list of arguments, defaults to the command line.
+    :return: 0 if every stage succeeded, 1 otherwise.
+    """
+    args = parse_arguments(arg_list)
+    logger = CustomLogger(SCRIPT_FILE, "", log_level=logging.INFO)
+
+    work_path = args.work_path or tempfile.mkdtemp(prefix='bur_benchmark_')
+
+    stand_in_server = BlobStandInServer(args.latency_ms / 1000.0, args.bandwidth_mbps)
+    stand_in_server.start()
+
+    try:
+        logger.info("Running benchmark against stand-in server {}.".format(stand_in_server))
+
+        stage_result_list = TransferBenchmark(
+            stand_in_server, work_path, logger, args.transfer_backend, args.number_volumes,
+            args.volume_size_mb, args.number_metadata_files, args.number_transfers).run()
+    finally:
+        stand_in_server.stop()
+        if args.work_path is None:
+            shutil.rmtree(work_path, ignore_errors=True)
+
+    for stage_result in stage_result_list:
+        logger.info(stage_result)
+
+    if args.output_file:
+        with open(args.output_file, 'w') as output_file:
+            json.dump({'latency_ms': args.latency_ms,
+                       'bandwidth_mbps': args.bandwidth_mbps,
+                       'volume_size_mb': args.volume_size_mb,
+                       'number_transfers': args.number_transfers,
+                       'stages': [stage_result.to_dict() for stage_result
+                                  in stage_result_list]}, output_file, indent=2)
+
+    return 0 if all(stage_result.is_success for stage_result in stage_result_list) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,715 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+# pylint: disable=invalid-name,too-many-arguments,too-many-return-statements
+
+"""
+Local stand-in of the Azure blob service, used to run transfers without a storage account.
+
+It keeps the blobs in memory and answers the container, blob and block requests sent by the
+transfer backends, with an optional latency added to each request and an optional bandwidth
+shared by all connections.
+"""
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from email.utils import formatdate
+from SocketServer import ThreadingMixIn
+import socket
+import threading
+import time
+from urllib import unquote
+from urlparse import parse_qs, urlparse
+import uuid
+import xml.etree.ElementTree as ElementTree
+
+from backup.bandwidth import BandwidthLimiter, BandwidthProfile, HOURS_PER_DAY
+from backup.blob_manager import get_content_md5
+
+STAND_IN_HOST = '127.0.0.1'
+STAND_IN_ACCOUNT = 'devstoreaccount1'
+STAND_IN_API_VERSION = '2019-02-02'
+
+# Azure returns the MD5 of a range only for ranges up to 4MB.
+MAX_RANGE_MD5_SIZE = 4 * 1024 * 1024
+
+
+class StandInError(Exception):
+    """Error answered to a request, with the status and code Azure would send."""
+
+    def __init__(self, status_code, error_code, message=""):
+        """
+        Initialize Stand-in Error object.
+
+        :param status_code: HTTP status of the response.
+        :param error_code: Azure error code, sent in the x-ms-error-code header.
+        :param message: description of the error.
+        """
+        super(StandInError, self).__init__(message or error_code)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+class StandInBlob(object):
+    """Committed content of a blob."""
+
+    def __init__(self, data, content_md5=None, committed_block_list=None):
+        """
+        Initialize Stand-in Blob object.
+
+        :param data: content of the blob.
+        :param content_md5: MD5 of the whole content, computed when not informed.
+        :param committed_block_list: list of tuples (block id, block data) of the blob.
+        """
+        self.data = data
+        self.content_md5 = content_md5 or get_content_md5(data)
+        self.committed_block_list = committed_block_list or []
+        self.etag = '"{}"'.format(uuid.uuid4().hex)
+        self.last_modified = formatdate(usegmt=True)
+
+
+class BlobStandInStorage(object):
+    """In-memory containers, blobs and uncommitted blocks, safe to be used by many threads."""
+
+    def __init__(self):
+        """Initialize Blob Stand-in Storage object."""
+        self.container_dict = {}
+        self.uncommitted_block_dict = {}
+        self.lock = threading.Lock()
+
+    def get_container(self, container_name):
+        """
+        Get the blobs of a container.
+
+        :param container_name: name of the container.
+        :return: dictionary with the StandInBlob of each blob name.
+        :raise StandInError: if the container does not exist.
+        """
+        if container_name not in self.container_dict:
+            raise StandInError(404, 'ContainerNotFound')
+
+        return self.container_dict[container_name]
+
+    def get_blob(self, container_name, blob_name):
+        """
+        Get a blob of a container.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :return: StandInBlob object.
+        :raise StandInError: if the container or the blob does not exist.
+        """
+        with self.lock:
+            blob_dict = self.get_container(container_name)
+
+            if blob_name not in blob_dict:
+                raise StandInError(404, 'BlobNotFound')
+
+            return blob_dict[blob_name]
+
+    def create_container(self, container_name):
+        """
+        Create an empty container.
+
+        :param container_name: name of the container.
+        :raise StandInError: if the container already exists.
+        """
+        with self.lock:
+            if container_name in self.container_dict:
+                raise StandInError(409, 'ContainerAlreadyExists')
+
+            self.container_dict[container_name] = {}
+
+    def delete_container(self, container_name):
+        """
+        Delete a container with all its blobs.
+
+        :param container_name: name of the container.
+        :raise StandInError: if the container does not exist.
+        """
+        with self.lock:
+            self.get_container(container_name)
+            del self.container_dict[container_name]
+
+            for block_key in list(self.uncommitted_block_dict.keys()):
+                if block_key[0] == container_name:
+                    del self.uncommitted_block_dict[block_key]
+
+    def list_blobs(self, container_name, prefix=""):
+        """
+        List the blobs of a container, in name order.
+
+        :param container_name: name of the container.
+        :param prefix: only blobs whose name starts with it are listed.
+        :return: list of tuples (blob name, StandInBlob).
+        :raise StandInError: if the container does not exist.
+        """
+        with self.lock:
+            blob_dict = self.get_container(container_name)
+
+            return sorted((blob_name, blob) for blob_name, blob in blob_dict.items()
+                          if blob_name.startswith(prefix))
+
+    def put_blob(self, container_name, blob_name, data):
+        """
+        Create or replace a blob, dropping its uncommitted blocks.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :param data: content of the blob.
+        :return: StandInBlob object.
+        :raise StandInError: if the container does not exist.
+        """
+        with self.lock:
+            blob_dict = self.get_container(container_name)
+            blob = StandInBlob(data)
+
+            blob_dict[blob_name] = blob
+            self.uncommitted_block_dict.pop((container_name, blob_name), None)
+
+            return blob
+
+    def delete_blob(self, container_name, blob_name):
+        """
+        Delete a blob with its uncommitted blocks.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :raise StandInError: if the container or the blob does not exist.
+        """
+        with self.lock:
+            blob_dict = self.get_container(container_name)
+
+            if blob_dict.pop(blob_name, None) is None:
+                raise StandInError(404, 'BlobNotFound')
+
+            self.uncommitted_block_dict.pop((container_name, blob_name), None)
+
+    def put_block(self, container_name, blob_name, block_id, data):
+        """
+        Keep a block to be committed later, replacing an uncommitted block with the same id.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :param block_id: base64 encoded id of the block.
+        :param data: content of the block.
+        :raise StandInError: if the container does not exist.
+        """
+        with self.lock:
+            self.get_container(container_name)
+
+            self.uncommitted_block_dict.setdefault((container_name, blob_name), {})[
+                block_id] = data
+
+    def get_block_list(self, container_name, blob_name):
+        """
+        Get the committed and uncommitted blocks of a blob.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :return: tuple (committed list, uncommitted list), both of tuples (block id, size).
+        :raise StandInError: if the container does not exist, or neither the blob nor its
+        uncommitted blocks do.
+        """
+        with self.lock:
+            blob = self.get_container(container_name).get(blob_name)
+            block_dict = self.uncommitted_block_dict.get((container_name, blob_name))
+
+            if blob is None and block_dict is None:
+                raise StandInError(404, 'BlobNotFound')
+
+            committed_list = [(block_id, len(data)) for block_id, data
+                              in (blob.committed_block_list if blob else [])]
+            uncommitted_list = [(block_id, len(data)) for block_id, data
+                                in sorted((block_dict or {}).items())]
+
+            return committed_list, uncommitted_list
+
+    def put_block_list(self, container_name, blob_name, block_reference_list):
+        """
+        Commit the blob made of the informed blocks, in order.
+
+        Latest references the uncommitted block with the id, if any, otherwise the committed one.
+
+        :param container_name: name of the container.
+        :param blob_name: name of the blob.
+        :param block_reference_list: list of tuples (Latest, Committed or Uncommitted, block id).
+        :return: StandInBlob object.
+        :raise StandInError: if the container or any of the blocks does not exist.
+        """
+        with self.lock:
+            blob_dict = self.get_container(container_name)
+
+            uncommitted_dict = self.uncommitted_block_dict.get((container_name, blob_name), {})
+            committed_dict = dict(blob_dict[blob_name].committed_block_list
+                                  if blob_name in blob_dict else [])
+
+            block_list = []
+            for reference, block_id in block_reference_list:
+                if reference != 'Committed' and block_id in uncommitted_dict:
+                    block_list.append((block_id, uncommitted_dict[block_id]))
+                elif reference != 'Uncommitted' and block_id in committed_dict:
+                    block_list.append((block_id, committed_dict[block_id]))
+                else:
+                    raise StandInError(400, 'InvalidBlockList')
+
+            blob = StandInBlob("".join(data for _, data in block_list),
+                               committed_block_list=block_list)
+
+            blob_dict[blob_name] = blob
+            self.uncommitted_block_dict.pop((container_name, blob_name), None)
+
+            return blob
+
+
+def parse_range_header(range_header, blob_size):
+    """
+    Get the bytes of a blob requested by a range header.
+
+    :param range_header: value like 'bytes=0-1023' or 'bytes=1024-'.
+    :param blob_size: size of the blob.
+    :return: tuple (first byte, last byte) of the range.
+    :raise StandInError: if the range is not valid for the blob.
+    """
+    try:
+        first_byte, last_byte = range_header.split('=', 1)[1].split('-', 1)
+        first_byte = int(first_byte)
+        last_byte = min(int(last_byte), blob_size - 1) if last_byte else blob_size - 1
+    except (IndexError, ValueError):
+        raise StandInError(400, 'InvalidRange', range_header)
+
+    if first_byte >= blob_size or first_byte > last_byte:
+        raise StandInError(416, 'InvalidRange', range_header)
+
+    return first_byte, last_byte
+
+
+def get_error_xml(stand_in_error):
+    """
+    Get the body of an error response.
+
+    :param stand_in_error: StandInError object.
+    :return: xml document.
+    """
+    return '<?xml version="1.0" encoding="utf-8"?><Error><Code>{}</Code><Message>{}</Message>' \
+           '</Error>'.format(stand_in_error.error_code, stand_in_error.__str__())
+
+
+def get_block_list_response_xml(committed_list, uncommitted_list, block_list_type):
+    """
+    Get the body of a get block list response.
+
+    :param committed_list: list of tuples (block id, size) of the committed blocks.
+    :param uncommitted_list: list of tuples (block id, size) of the uncommitted blocks.
+    :param block_list_type: committed, uncommitted or all.
+    :return: xml document.
+    """
+    def get_blocks_xml(tag, block_list):
+        """Get the element holding a list of blocks."""
+        return "<{0}>{1}</{0}>".format(tag, "".join(
+            "<Block><Name>{}</Name><Size>{}</Size></Block>".format(block_id, size)
+            for block_id, size in block_list))
+
+    committed_xml = uncommitted_xml = ""
+    if block_list_type in ('committed', 'all'):
+        committed_xml = get_blocks_xml('CommittedBlocks', committed_list)
+    if block_list_type in ('uncommitted', 'all'):
+        uncommitted_xml = get_blocks_xml('UncommittedBlocks', uncommitted_list)
+
+    return '<?xml version="1.0" encoding="utf-8"?><BlockList>{}{}</BlockList>'.format(
+        committed_xml, uncommitted_xml)
+
+
+def get_blob_list_response_xml(container_url, prefix, blob_tuple_list):
+    """
+    Get the body of a list blobs response.
+
+    :param container_url: url of the listed container.
+    :param prefix: prefix used to filter the blobs.
+    :param blob_tuple_list: list of tuples (blob name, StandInBlob).
+    :return: xml document.
+    """
+    return '<?xml version="1.0" encoding="utf-8"?><EnumerationResults ContainerName="{}">' \
+           '<Prefix>{}</Prefix><Blobs>{}</Blobs><NextMarker /></EnumerationResults>'.format(
+               container_url, prefix, "".join(
+                   "<Blob><Name>{}</Name><Properties><Last-Modified>{}</Last-Modified>"
+                   "<Etag>{}</Etag><Content-Length>{}</Content-Length>"
+                   "<Content-MD5>{}</Content-MD5><BlobType>BlockBlob</BlobType>"
+                   "</Properties></Blob>".format(blob_name, blob.last_modified, blob.etag,
+                                                 len(blob.data), blob.content_md5)
+                   for blob_name, blob in blob_tuple_list))
+
+
+class BlobStandInRequestHandler(BaseHTTPRequestHandler):
+    """Answer the requests of the blob service, over persistent connections."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        """Keep the connection, so that it can be closed when the server stops."""
+        BaseHTTPRequestHandler.setup(self)
+        self.server.stand_in_server.add_connection(self.connection)
+
+    def finish(self):
+        """Forget the connection closed by the client."""
+        self.server.stand_in_server.remove_connection(self.connection)
+        BaseHTTPRequestHandler.finish(self)
+
+    def log_message(self, *args):
+        """Do not log every request, which would slow down the benchmarks."""
+
+    def do_HEAD(self):
+        """Answer a request for the properties of a blob."""
+        self.handle_request(self.head_blob)
+
+    def do_GET(self):
+        """Answer a request to read a blob, list a container or list the blocks of a blob."""
+        self.handle_request(self.get_resource)
+
+    def do_PUT(self):
+        """Answer a request to create a container, a blob, a block or a block list."""
+        self.handle_request(self.put_resource)
+
+    def do_DELETE(self):
+        """Answer a request to delete a container or a blob."""
+        self.handle_request(self.delete_resource)
+
+    def handle_request(self, operation):
+        """
+        Run an operation on the storage and send its response.
+
+        :param operation: method receiving the parsed request, returning the tuple (status,
+        headers, body) of the response.
+        """
+        stand_in_server = self.server.stand_in_server
+
+        url = urlparse(self.path)
+        path_list = unquote(url.path).lstrip('/').split('/', 2)
+        container_name = path_list[1] if len(path_list) > 1 else ""
+        blob_name = path_list[2] if len(path_list) > 2 else ""
+        param_dict = {name: value_list[0] for name, value_list
+                      in parse_qs(url.query, keep_blank_values=True).items()}
+
+        data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        stand_in_server.wait_request(len(data))
+
+        try:
+            status_code, header_dict, body = operation(container_name, blob_name, param_dict,
+                                                       data)
+        except StandInError as stand_in_error:
+            status_code = stand_in_error.status_code
+            header_dict = {'x-ms-error-code': stand_in_error.error_code,
+                           'Content-Type': 'application/xml'}
+            body = get_error_xml(stand_in_error)
+
+        stand_in_server.count_request(self.command, param_dict.get('comp') or
+                                      param_dict.get('restype') or 'blob', len(data),
+                                      0 if self.command == 'HEAD' else len(body))
+
+        self.send_response(status_code)
+        self.send_header('x-ms-request-id', uuid.uuid4().hex)
+        self.send_header('x-ms-version', STAND_IN_API_VERSION)
+        self.send_header('Date', formatdate(usegmt=True))
+        for name, value in header_dict.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in header_dict:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if self.command != 'HEAD':
+            stand_in_server.throttle(len(body))
+            self.wfile.write(body)
+
+    def head_blob(self, container_name, blob_name, param_dict, data):
+        """
+        Get the properties of a blob.
+
+        :return: tuple (status, headers, body) of the response.
+        """
+        del param_dict, data
+        blob = self.server.stand_in_server.storage.get_blob(container_name, blob_name)
+
+        return 200, get_blob_header_dict(blob, len(blob.data)), ""
+
+    def get_resource(self, container_name, blob_name, param_dict, data):
+        """
+        Read a blob or a range of it, list the blobs of a container or the blocks of a blob.
+
+        :return: tuple (status, headers, body) of the response.
+        """
+        del data
+        storage = self.server.stand_in_server.storage
+
+        if param_dict.get('restype') == 'container' and param_dict.get('comp') == 'list':
+            prefix = param_dict.get('prefix', "")
+            return 200, {'Content-Type': 'application/xml'}, get_blob_list_response_xml(
+                self.server.stand_in_server.get_container_url(container_name), prefix,
+                storage.list_blobs(container_name, prefix))
+
+        if param_dict.get('comp') == 'blocklist':
+            committed_list, uncommitted_list = storage.get_block_list(container_name, blob_name)
+            return 200, {'Content-Type': 'application/xml'}, get_block_list_response_xml(
+                committed_list, uncommitted_list, param_dict.get('blocklisttype', 'committed'))
+
+        blob = storage.get_blob(container_name, blob_name)
+
+        range_header = self.headers.get('x-ms-range') or self.headers.get('Range')
+        if not range_header:
+            return 200, get_blob_header_dict(blob, len(blob.data)), blob.data
+
+        first_byte, last_byte = parse_range_header(range_header, len(blob.data))
+        body = blob.data[first_byte:last_byte + 1]
+
+        header_dict = get_blob_header_dict(blob, len(body))
+        header_dict['Content-Range'] = "bytes {}-{}/{}".format(first_byte, last_byte,
+                                                               len(blob.data))
+        del header_dict['Content-MD5']
+
+        if self.headers.get('x-ms-range-get-content-md5') == 'true':
+            if len(body) > MAX_RANGE_MD5_SIZE:
+                raise StandInError(400, 'OutOfRangeInput', range_header)
+            header_dict['Content-MD5'] = get_content_md5(body)
+
+        return 206, header_dict, body
+
+    def put_resource(self, container_name, blob_name, param_dict, data):
+        """
+        Create a container, a blob, an uncommitted block or commit a block list.
+
+        :return: tuple (status, headers, body) of the response.
+        :raise StandInError: if the Content-MD5 of the request does not match its body.
+        """
+        storage = self.server.stand_in_server.storage
+
+        content_md5 = self.headers.get('Content-MD5')
+        if content_md5 and content_md5 != get_content_md5(data):
+            raise StandInError(400, 'Md5Mismatch')
+
+        if param_dict.get('restype') == 'container':
+            storage.create_container(container_name)
+            return 201, {}, ""
+
+        if param_dict.get('comp') == 'block':
+            if not param_dict.get('blockid'):
+                raise StandInError(400, 'InvalidQueryParameterValue', 'blockid')
+
+            storage.put_block(container_name, blob_name, param_dict['blockid'], data)
+            return 201, {}, ""
+
+        if param_dict.get('comp') == 'blocklist':
+            try:
+                block_reference_list = [(element.tag, element.text) for element
+                                        in ElementTree.fromstring(data)]
+            except ElementTree.ParseError:
+                raise StandInError(400, 'InvalidXmlDocument')
+
+            blob = storage.put_block_list(container_name, blob_name, block_reference_list)
+            return 201, {'ETag': blob.etag, 'Last-Modified': blob.last_modified}, ""
+
+        if not self.headers.get('x-ms-blob-type'):
+            raise StandInError(400, 'MissingRequiredHeader', 'x-ms-blob-type')
+
+        blob = storage.put_blob(container_name, blob_name, data)
+        return 201, {'ETag': blob.etag, 'Last-Modified': blob.last_modified,
+                     'Content-MD5': blob.content_md5}, ""
+
+    def delete_resource(self, container_name, blob_name, param_dict, data):
+        """
+        Delete a container or a blob.
+
+        :return: tuple (status, headers, body) of the response.
+        """
+        del data
+        storage = self.server.stand_in_server.storage
+
+        if param_dict.get('restype') == 'container':
+            storage.delete_container(container_name)
+        else:
+            storage.delete_blob(container_name, blob_name)
+
+        return 202, {}, ""
+
+
+def get_blob_header_dict(blob, content_length):
+    """
+    Get the headers describing a blob in a response.
+
+    :param blob: StandInBlob object.
+    :param content_length: size of the body of the response.
+    :return: dictionary of headers.
+    """
+    return {'Content-Length': str(content_length),
+            'Content-MD5': blob.content_md5,
+            'Content-Type': 'application/octet-stream',
+            'ETag': blob.etag,
+            'Last-Modified': blob.last_modified,
+            'Accept-Ranges': 'bytes',
+            'x-ms-blob-type': 'BlockBlob'}
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server answering each connection in its own thread."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class BlobStandInServer(object):
+    """
+    Stand-in of an Azure storage account, listening on a local port.
+
+    Blob urls are http://127.0.0.1:<port>/<account>/<container>/<blob>, in the same form used by
+    the storage emulators, so that account_url can be set as the storage account of the
+    off-site configuration. Sas tokens are accepted and ignored.
+    """
+
+    def __init__(self, latency=0.0, bandwidth_mbps=None, port=0):
+        """
+        Initialize Blob Stand-in Server object.
+
+        :param latency: seconds added to every request, as the round trip to the storage.
+        :param bandwidth_mbps: rate in megabits per second shared by all connections, None if
+        not limited.
+        :param port: port to listen on, 0 to use any free port.
+        """
+        self.latency = latency
+        self.storage = BlobStandInStorage()
+
+        self.bandwidth_limiter = None
+        if bandwidth_mbps is not None:
+            self.bandwidth_limiter = BandwidthLimiter(
+                BandwidthProfile([bandwidth_mbps] * HOURS_PER_DAY), 1)
+
+        self.http_server = ThreadingHTTPServer((STAND_IN_HOST, port), BlobStandInRequestHandler)
+        self.http_server.stand_in_server = self
+        self.thread = None
+        self.connection_set = set()
+
+        self.stats_lock = threading.Lock()
+        self.request_count_dict = {}
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    @property
+    def account_url(self):
+        """Get the url of the storage account."""
+        return "http://{}:{}/{}".format(STAND_IN_HOST, self.http_server.server_address[1],
+                                        STAND_IN_ACCOUNT)
+
+    def get_container_url(self, container_name):
+        """
+        Get the url of a container.
+
+        :param container_name: name of the container.
+        :return: container url.
+        """
+        return "{}/{}".format(self.account_url, container_name)
+
+    def start(self):
+        """Start answering requests in a background thread."""
+        self.thread = threading.Thread(target=self.http_server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop answering requests, closing the listening socket and the open connections."""
+        self.http_server.shutdown()
+        self.http_server.server_close()
+
+        with self.stats_lock:
+            connection_list = list(self.connection_set)
+
+        for connection in connection_list:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def add_connection(self, connection):
+        """
+        Keep a connection being answered.
+
+        :param connection: socket of the connection.
+        """
+        with self.stats_lock:
+            self.connection_set.add(connection)
+
+    def remove_connection(self, connection):
+        """
+        Forget a connection no longer answered.
+
+        :param connection: socket of the connection.
+        """
+        with self.stats_lock:
+            self.connection_set.discard(connection)
+
+    def wait_request(self, num_bytes):
+        """
+        Delay a request by the latency and the time its body takes at the bandwidth.
+
+        :param num_bytes: size of the body of the request.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        self.throttle(num_bytes)
+
+    def throttle(self, num_bytes):
+        """
+        Wait until the bandwidth allows the informed amount of data to be sent.
+
+        :param num_bytes: number of bytes about to be sent or just received.
+        """
+        if self.bandwidth_limiter is not None and num_bytes:
+            self.bandwidth_limiter.consume(num_bytes)
+
+    def count_request(self, method, operation, bytes_received, bytes_sent):
+        """
+        Count a request answered, by method and operation.
+
+        :param method: HTTP method.
+        :param operation: comp or restype of the request, 'blob' for plain blob requests.
+        :param bytes_received: size of the body of the request.
+        :param bytes_sent: size of the body of the response.
+        """
+        with self.stats_lock:
+            request_key = "{} {}".format(method, operation)
+            self.request_count_dict[request_key] = self.request_count_dict.get(request_key,
+                                                                               0) + 1
+            self.bytes_received += bytes_received
+            self.bytes_sent += bytes_sent
+
+    def reset_stats(self):
+        """
+        Get the request counts since the last reset and start counting again.
+
+        :return: tuple (request count dictionary, bytes received, bytes sent).
+        """
+        with self.stats_lock:
+            stats = self.request_count_dict, self.bytes_received, self.bytes_sent
+            self.request_count_dict = {}
+            self.bytes_received = 0
+            self.bytes_sent = 0
+
+            return stats
+
+    def __str__(self):
+        """Represent Blob Stand-in Server object as string."""
+        return "({}, latency: {}s, bandwidth: {})".format(
+            self.account_url, self.latency,
+            self.bandwidth_limiter.bandwidth_profile if self.bandwidth_limiter else "unlimited")
+
+    def __repr__(self):
+        """Represent Blob Stand-in Server object."""
+        return self.__str__()
@@ -0,0 +1,366 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.azcopy_manager.py script."""
+
+from io import BytesIO
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from backup.azcopy_manager import AzCopyManager, AzCopyOutputParser, AzCopyStreamDownload, \
+    check_transfer_result_dict, JOB_JOURNAL_SUFFIX, read_job_journal, sastoken, write_job_journal
+from backup.exceptions import AzCopyException
+
+MOCK_PACKAGE = 'backup.azcopy_manager.'
+MOCK_POPEN = MOCK_PACKAGE + 'Popen'
+
+MOCK_JOB_ID = '1a2b3c4d-0000-1111-2222-333344445555'
+MOCK_DESTINATION = 'https://mock.blob.core.windows.net/container'
+
+COMPLETED_OUTPUT = "Job {} has started\nFinal Job Status: Completed\n".format(MOCK_JOB_ID)
+FAILED_JOB_OUTPUT = "Job {} has started\nFinal Job Status: Failed\n".format(MOCK_JOB_ID)
+INTERRUPTED_OUTPUT = "Job {} has started\nfailed to perform copy command\n".format(MOCK_JOB_ID)
+RESUME_NOT_FOUND_OUTPUT = "failed to resume job: cannot find job\n"
+FAILED_OUTPUT = "Final Job Status: Failed\n"
+
+
+def get_json_line(message_type, message_content):
+    """
+    Get a line of the azcopy json output.
+
+    :param message_type: type of the message.
+    :param message_content: content of the message, serialized if it is not a string.
+    :return: line as written by azcopy.
+    """
+    if not isinstance(message_content, str):
+        message_content = json.dumps(message_content)
+
+    return json.dumps({"TimeStamp": "2020-01-01T00:00:00Z", "MessageType": message_type,
+                       "MessageContent": message_content})
+
+
+JSON_OUTPUT = "\n".join([
+    get_json_line("Init", {"JobID": MOCK_JOB_ID, "LogFileLocation": "/tmp"}),
+    get_json_line("Progress", {"JobID": MOCK_JOB_ID, "TotalTransfers": 1, "TransfersCompleted": 0,
+                               "TransfersFailed": 0, "TotalBytesTransferred": 250,
+                               "TotalBytesExpected": 1000}),
+    get_json_line("EndOfJob", {"JobID": MOCK_JOB_ID, "JobStatus": "Completed",
+                               "TotalTransfers": 1, "TransfersCompleted": 1,
+                               "TransfersFailed": 0, "TransfersSkipped": 0,
+                               "TotalBytesTransferred": 1000, "TotalBytesExpected": 1000})])
+
+
+def get_mock_process(output):
+    """
+    Get a mocked azcopy process writing the informed output.
+
+    :param output: output of the process.
+    :return: mocked process.
+    """
+    mock_process = mock.Mock()
+    mock_process.stdout.readline.side_effect = [line + '\n' for line in
+                                                output.splitlines()] + ['']
+    return mock_process
+
+
+class AzCopyManagerTransferResumableTestCase(unittest.TestCase):
+    """Test cases for resumable uploads of AzCopyManager class."""
+
+    def setUp(self):
+        """Create a temporary archive to be uploaded."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.temp_dir, 'volume.tar')
+        self.journal_path = self.source_path + JOB_JOURNAL_SUFFIX
+
+        with open(self.source_path, 'w') as source_file:
+            source_file.write('data')
+
+    def tearDown(self):
+        """Remove the temporary archive."""
+        shutil.rmtree(self.temp_dir)
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_completed_removes_journal(self, mock_popen):
+        """Test if the journal of a completed upload is removed."""
+        mock_popen.return_value = get_mock_process(COMPLETED_OUTPUT)
+
+        azcopy_output = AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION,
+                                                    resumable=True)
+
+        self.assertEqual("Completed", azcopy_output.summary_dict["Final Job Status"])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_interrupted_keeps_journal(self, mock_popen):
+        """Test if the job of an interrupted upload is recorded for the next try."""
+        mock_popen.return_value = get_mock_process(INTERRUPTED_OUTPUT)
+
+        with self.assertRaises(AzCopyException):
+            AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION, resumable=True)
+
+        self.assertEqual(MOCK_JOB_ID, read_job_journal(self.journal_path))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_failed_without_error_keeps_journal(self, mock_popen):
+        """Test if an upload that fails without an error message raises and keeps the job."""
+        mock_popen.return_value = get_mock_process(FAILED_JOB_OUTPUT)
+
+        with self.assertRaises(AzCopyException) as context:
+            AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION, resumable=True)
+
+        self.assertIn(MOCK_JOB_ID, str(context.exception))
+        self.assertIn("Failed", str(context.exception))
+        self.assertEqual(MOCK_JOB_ID, read_job_journal(self.journal_path))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_resumes_recorded_job(self, mock_popen):
+        """Test if a recorded job is resumed instead of starting a new copy."""
+        write_job_journal(self.journal_path, MOCK_JOB_ID)
+        mock_popen.return_value = get_mock_process("Final Job Status: Completed\n")
+
+        AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION, resumable=True)
+
+        command = mock_popen.call_args[0][0]
+        self.assertEqual(['azcopy', 'jobs', 'resume', MOCK_JOB_ID, '--destination-sas',
+                          sastoken.lstrip('?')], command[:6])
+        self.assertEqual(1, mock_popen.call_count)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_job_not_resumable(self, mock_popen):
+        """Test if the upload starts again when the recorded job cannot be resumed."""
+        write_job_journal(self.journal_path, 'unknown-job')
+        mock_popen.side_effect = [get_mock_process(RESUME_NOT_FOUND_OUTPUT),
+                                  get_mock_process(COMPLETED_OUTPUT)]
+
+        AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION, resumable=True)
+
+        self.assertEqual('copy', mock_popen.call_args[0][0][1])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_not_resumable(self, mock_popen):
+        """Test if no journal is kept when the transfer is not resumable."""
+        mock_popen.return_value = get_mock_process(INTERRUPTED_OUTPUT)
+
+        with self.assertRaises(AzCopyException):
+            AzCopyManager.transfer_file(self.source_path, MOCK_DESTINATION)
+
+        self.assertFalse(os.path.exists(self.journal_path))
+
+
+class AzCopyManagerTransferFileListTestCase(unittest.TestCase):
+    """Test cases for transfer_file_list method of AzCopyManager class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.source_dir = '/tmp/backup'
+        self.file_name_list = ['metadata_0.tar', 'metadata_1.tar']
+        self.transfer_pair_list = [(os.path.join(self.source_dir, file_name), MOCK_DESTINATION)
+                                   for file_name in self.file_name_list]
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_list_single_job(self, mock_popen):
+        """Test if files of the same folder are transferred by a single job."""
+        mock_popen.return_value = get_mock_process(COMPLETED_OUTPUT)
+
+        result_dict = AzCopyManager.transfer_file_list(self.transfer_pair_list)
+
+        command = mock_popen.call_args[0][0]
+        self.assertEqual(1, mock_popen.call_count)
+        self.assertEqual(os.path.join(self.source_dir, '*'), command[2])
+        self.assertEqual(['--include-path', 'metadata_0.tar;metadata_1.tar'], command[-2:])
+        self.assertEqual({source_path: None for source_path, _ in self.transfer_pair_list},
+                         result_dict)
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_list_one_job_per_folder(self, mock_popen):
+        """Test if files of different folders are transferred by different jobs."""
+        mock_popen.side_effect = [get_mock_process(COMPLETED_OUTPUT),
+                                  get_mock_process(COMPLETED_OUTPUT)]
+
+        self.transfer_pair_list.append(('/tmp/other/metadata_2.tar', MOCK_DESTINATION))
+
+        result_dict = AzCopyManager.transfer_file_list(self.transfer_pair_list)
+
+        self.assertEqual(2, mock_popen.call_count)
+        self.assertEqual('/tmp/other/metadata_2.tar', mock_popen.call_args[0][0][2])
+        self.assertTrue(check_transfer_result_dict(result_dict))
+
+    @mock.patch(MOCK_POPEN)
+    def test_transfer_file_list_failed_job_per_file_result(self, mock_popen):
+        """Test if each file is transferred on its own when the single job fails."""
+        mock_popen.side_effect = [get_mock_process(FAILED_OUTPUT),
+                                  get_mock_process(COMPLETED_OUTPUT),
+                                  get_mock_process(FAILED_OUTPUT)]
+
+        result_dict = AzCopyManager.transfer_file_list(self.transfer_pair_list)
+
+        self.assertEqual(3, mock_popen.call_count)
+        self.assertIsNone(result_dict[self.transfer_pair_list[0][0]])
+        self.assertIsNotNone(result_dict[self.transfer_pair_list[1][0]])
+
+        with self.assertRaises(AzCopyException):
+            check_transfer_result_dict(result_dict)
+
+
+class AzCopyManagerRemoveDirListTestCase(unittest.TestCase):
+    """Test cases for remove_dir_list method of AzCopyManager class."""
+
+    @mock.patch(MOCK_POPEN)
+    def test_remove_dir_list_single_job(self, mock_popen):
+        """Test if all folders are removed by a single recursive job."""
+        mock_popen.return_value = get_mock_process(COMPLETED_OUTPUT)
+
+        result_dict = AzCopyManager.remove_dir_list(MOCK_DESTINATION, ['customer/bkp1',
+                                                                       'customer/bkp2/'])
+
+        command = mock_popen.call_args[0][0]
+        self.assertEqual(['azcopy', 'rm', MOCK_DESTINATION + sastoken, '--recursive=true'],
+                         command[:4])
+        self.assertEqual(['--include-path', 'customer/bkp1;customer/bkp2'], command[-2:])
+        self.assertEqual({'customer/bkp1': None, 'customer/bkp2/': None}, result_dict)
+
+    @mock.patch(MOCK_POPEN)
+    def test_remove_dir_list_failed_job_per_folder_result(self, mock_popen):
+        """Test if each folder is removed on its own when the single job fails."""
+        mock_popen.side_effect = [get_mock_process(FAILED_OUTPUT),
+                                  get_mock_process(FAILED_OUTPUT),
+                                  get_mock_process(COMPLETED_OUTPUT)]
+
+        result_dict = AzCopyManager.remove_dir_list(MOCK_DESTINATION, ['customer/bkp1',
+                                                                       'customer/bkp2'])
+
+        self.assertEqual(MOCK_DESTINATION + '/customer/bkp2' + sastoken,
+                         mock_popen.call_args[0][0][2])
+        self.assertIsNotNone(result_dict['customer/bkp1'])
+        self.assertIsNone(result_dict['customer/bkp2'])
+
+
+class AzCopyStreamDownloadTestCase(unittest.TestCase):
+    """Test cases for AzCopyStreamDownload class."""
+
+    @staticmethod
+    def get_mock_pipe_process(data, ret_code):
+        """
+        Get a mocked azcopy process writing the blob data to its stdout.
+
+        :param data: data of the blob.
+        :param ret_code: return code of the process.
+        :return: mocked process.
+        """
+        mock_process = mock.Mock()
+        mock_process.stdout = BytesIO(data)
+        mock_process.wait.return_value = ret_code
+        return mock_process
+
+    @mock.patch(MOCK_POPEN)
+    def test_stream_download_reads_blob_from_stdout(self, mock_popen):
+        """Test if the blob is read from azcopy stdout, which is read to its end when finished."""
+        mock_process = self.get_mock_pipe_process('data', 0)
+        mock_popen.return_value = mock_process
+
+        download_stream = AzCopyManager.get_download_stream(MOCK_DESTINATION + '/volume.tar', 10)
+
+        self.assertEqual('da', download_stream.start().read(2))
+        download_stream.finish()
+
+        self.assertEqual(['azcopy', 'copy', MOCK_DESTINATION + '/volume.tar' + sastoken,
+                          '--from-to', 'BlobPipe'], mock_popen.call_args[0][0][:5])
+        self.assertEqual(['--cap-mbps', '10'], mock_popen.call_args[0][0][-2:])
+        self.assertTrue(mock_process.stdout.closed)
+
+    @mock.patch(MOCK_POPEN)
+    def test_stream_download_failure(self, mock_popen):
+        """Test if an exception is raised when azcopy fails to download the blob."""
+        mock_popen.return_value = self.get_mock_pipe_process('', 1)
+
+        download_stream = AzCopyManager.get_download_stream(MOCK_DESTINATION + '/volume.tar')
+        download_stream.start()
+
+        with self.assertRaises(AzCopyException):
+            download_stream.finish()
+
+    def test_stream_download_not_url(self):
+        """Test if only blobs can be read as a stream."""
+        with self.assertRaises(AzCopyException):
+            AzCopyStreamDownload('/local/volume.tar')
+
+
+class AzCopyOutputParserTestCase(unittest.TestCase):
+    """Test cases for AzCopyOutputParser class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.azcopy_output_parser = AzCopyOutputParser()
+
+    def test_parse_line_json_progress(self):
+        """Test if a progress message is turned into a progress event."""
+        line_list = JSON_OUTPUT.splitlines()
+
+        self.assertIsNone(self.azcopy_output_parser.parse_line(line_list[0], 100.0))
+        azcopy_progress = self.azcopy_output_parser.parse_line(line_list[1], 110.0)
+
+        self.assertEqual(MOCK_JOB_ID, azcopy_progress.job_id)
+        self.assertFalse(azcopy_progress.is_finished)
+        self.assertEqual(250, azcopy_progress.bytes_done)
+        self.assertEqual(10.0, azcopy_progress.elapsed_time)
+        self.assertEqual(30.0, azcopy_progress.eta_seconds)
+        self.assertIsNone(self.azcopy_output_parser.get_output().summary_dict["Final Job Status"])
+
+    def test_parse_line_json_end_of_job(self):
+        """Test if the summary is filled by the last message of the job."""
+        line_list = JSON_OUTPUT.splitlines()
+
+        self.azcopy_output_parser.parse_line(line_list[0], 0.0)
+        azcopy_progress = self.azcopy_output_parser.parse_line(line_list[2], 60.0)
+
+        summary_dict = self.azcopy_output_parser.get_output().summary_dict
+
+        self.assertTrue(azcopy_progress.is_finished)
+        self.assertEqual("Completed", summary_dict["Final Job Status"])
+        self.assertEqual("1000", summary_dict["TotalBytesTransferred"])
+        self.assertEqual("1.0000", summary_dict["Elapsed Time (Minutes)"])
+
+    def test_parse_line_json_error(self):
+        """Test if an error message is kept as the error of the output."""
+        self.azcopy_output_parser.parse_line(get_json_line("Error", "failed to copy: denied"))
+
+        self.assertEqual("failed to copy: denied",
+                         self.azcopy_output_parser.get_output().error_msg)
+
+    def test_parse_line_text(self):
+        """Test if the text output is still understood."""
+        for line in COMPLETED_OUTPUT.splitlines():
+            self.assertIsNone(self.azcopy_output_parser.parse_line(line))
+
+        self.assertEqual(MOCK_JOB_ID, self.azcopy_output_parser.job_id)
+        self.assertEqual("Completed",
+                         self.azcopy_output_parser.get_output().summary_dict["Final Job Status"])
+
+    @mock.patch(MOCK_POPEN)
+    def test_run_command_reports_progress(self, mock_popen):
+        """Test if the progress events are sent to the callback while the job runs."""
+        mock_popen.return_value = get_mock_process(JSON_OUTPUT)
+        mock_on_job_started = mock.Mock()
+        mock_on_progress = mock.Mock()
+
+        azcopy_output = AzCopyManager('source', MOCK_DESTINATION).run_command(
+            ['azcopy'], mock_on_job_started, mock_on_progress)
+
+        mock_on_job_started.assert_called_once_with(MOCK_JOB_ID)
+        self.assertEqual(2, mock_on_progress.call_count)
+        self.assertTrue(mock_on_progress.call_args[0][0].is_finished)
+        self.assertEqual("Completed", azcopy_output.summary_dict["Final Job Status"])
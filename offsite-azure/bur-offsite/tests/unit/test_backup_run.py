@@ -0,0 +1,95 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.backup_run.py script."""
+
+import threading
+import unittest
+
+import mock
+
+from backup.backup_run import BackupRun
+from backup.exceptions import ExceptionCodes, UploadBackupException
+from backup.volume_result import VolumeResult
+
+MOCK_BACKUP_NAME = 'mock_backup_name'
+MOCK_VOLUME_NAME = 'mock_volume'
+
+
+def get_backup_run():
+    """
+    Get an instance of BackupRun to perform tests.
+
+    :return: BackupRun instance.
+    """
+    return BackupRun(MOCK_BACKUP_NAME, 'mock_local_path', 'mock_tmp_path', 'mock_remote_path',
+                     'mock_az_path')
+
+
+class BackupRunWaitVolumesTestCase(unittest.TestCase):
+    """Test cases for wait_volumes method of BackupRun class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.backup_run = get_backup_run()
+
+    def test_wait_volumes_no_volumes(self):
+        """Test if a backup without volumes to process returns as soon as it is submitted."""
+        self.backup_run.set_all_volumes_submitted()
+
+        self.assertEqual({}, self.backup_run.wait_volumes())
+
+    def test_wait_volumes_pending_volume(self):
+        """Test if the results are returned only after the pending volumes are finished."""
+        volume_result = VolumeResult(MOCK_VOLUME_NAME, True)
+
+        self.backup_run.add_pending_volume()
+        self.backup_run.set_all_volumes_submitted()
+
+        def finish_volume():
+            """Finish the pending volume from another thread."""
+            self.backup_run.set_volume_output(MOCK_VOLUME_NAME, volume_result)
+            self.backup_run.finish_pending_volume()
+
+        finisher = threading.Timer(0.05, finish_volume)
+        finisher.start()
+
+        self.assertEqual({MOCK_VOLUME_NAME: volume_result}, self.backup_run.wait_volumes())
+        finisher.join()
+
+    def test_wait_volumes_transfer_called_back(self):
+        """Test if a transferred volume keeps the result stored by the transfer callback."""
+        volume_result = VolumeResult(MOCK_VOLUME_NAME, True)
+        mock_async_result = mock.Mock()
+
+        self.backup_run.add_transfer(MOCK_VOLUME_NAME, VolumeResult(MOCK_VOLUME_NAME, True),
+                                     mock_async_result)
+        self.backup_run.set_volume_output(MOCK_VOLUME_NAME, volume_result)
+        self.backup_run.set_all_volumes_submitted()
+
+        self.assertEqual({MOCK_VOLUME_NAME: volume_result}, self.backup_run.wait_volumes())
+        mock_async_result.wait.assert_called_once_with()
+        self.assertFalse(mock_async_result.get.called)
+
+    def test_wait_volumes_transfer_failed_without_callback(self):
+        """Test if a transfer job that raised is reported as a failed volume."""
+        mock_async_result = mock.Mock()
+        mock_async_result.get.side_effect = UploadBackupException(
+            ExceptionCodes.CannotUnwrapperObject)
+
+        self.backup_run.add_transfer(MOCK_VOLUME_NAME, VolumeResult(MOCK_VOLUME_NAME, True),
+                                     mock_async_result)
+        self.backup_run.set_all_volumes_submitted()
+
+        volume_result = self.backup_run.wait_volumes()[MOCK_VOLUME_NAME]
+
+        self.assertFalse(volume_result.status)
+        self.assertEqual(MOCK_VOLUME_NAME, volume_result.volume_path)
+        self.assertTrue(volume_result.output.startswith("Error while transferring volume. "))
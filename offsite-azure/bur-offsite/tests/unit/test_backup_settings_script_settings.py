@@ -157,3 +157,130 @@ class ScriptSettingsGetConfigDetails(unittest.TestCase):
             self.script_settings._get_config_details()
 
         self.assertEqual(ExceptionCodes.ConfigurationFileParsingError, cex.exception.code)
+
+
+class ScriptSettingsGetCustomerWeight(unittest.TestCase):
+    """Class for unit testing the _get_customer_weight from ScriptSetting class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        with mock.patch(MOCK_LOGGER) as logger:
+            with mock.patch(MOCK_SCRIPT_SETTINGS + '._get_config_details') as mock_get_config:
+                mock_get_config.return_value = ConfigParser()
+                self.script_settings = ScriptSettings(CONFIG_FILE_NAME, logger)
+
+        self.script_settings.config.add_section('CUSTOMER_0')
+
+    def test_get_customer_weight_not_informed(self):
+        """Assert if the default weight is used when the option is not in the section."""
+        self.assertEqual(1, self.script_settings._get_customer_weight('CUSTOMER_0'))
+
+    def test_get_customer_weight(self):
+        """Assert if the informed weight is returned as an integer."""
+        self.script_settings.config.set('CUSTOMER_0', 'WEIGHT', '3')
+
+        self.assertEqual(3, self.script_settings._get_customer_weight('CUSTOMER_0'))
+
+    def test_get_customer_weight_invalid(self):
+        """Assert if raises an exception when the weight is not a positive integer."""
+        for invalid_weight in ['0', 'heavy']:
+            self.script_settings.config.set('CUSTOMER_0', 'WEIGHT', invalid_weight)
+
+            with self.assertRaises(Exception) as cex:
+                self.script_settings._get_customer_weight('CUSTOMER_0')
+
+            self.assertEqual(ExceptionCodes.ConfigurationFileOptionError, cex.exception.code)
+
+
+class ScriptSettingsGetOnsiteConfig(unittest.TestCase):
+    """Class for unit testing the get_onsite_config from ScriptSetting class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        with mock.patch(MOCK_LOGGER) as logger:
+            with mock.patch(MOCK_SCRIPT_SETTINGS + '._get_config_details') as mock_get_config:
+                mock_get_config.return_value = ConfigParser()
+                self.script_settings = ScriptSettings(CONFIG_FILE_NAME, logger)
+
+        self.script_settings.config.add_section('ONSITE_PARAMS')
+        self.script_settings.config.set('ONSITE_PARAMS', 'BKP_TEMP_FOLDER', '/mock/temp')
+
+    def test_get_onsite_config_without_temp_budget(self):
+        """Assert if the temporary space is not limited when the budget is not informed."""
+        onsite_config = self.script_settings.get_onsite_config()
+
+        self.assertEqual('/mock/temp', onsite_config.temp_path)
+        self.assertIsNone(onsite_config.temp_budget_mb)
+
+    def test_get_onsite_config_with_temp_budget(self):
+        """Assert if the informed temporary space budget is returned as an integer."""
+        self.script_settings.config.set('ONSITE_PARAMS', 'BKP_TEMP_BUDGET_MB', '500000')
+
+        self.assertEqual(500000, self.script_settings.get_onsite_config().temp_budget_mb)
+
+    def test_get_onsite_config_invalid_temp_budget(self):
+        """Assert if raises an exception when the budget is not a positive integer."""
+        for invalid_budget in ['0', 'large']:
+            self.script_settings.config.set('ONSITE_PARAMS', 'BKP_TEMP_BUDGET_MB', invalid_budget)
+
+            with self.assertRaises(Exception) as cex:
+                self.script_settings.get_onsite_config()
+
+            self.assertEqual(ExceptionCodes.ConfigurationFileOptionError, cex.exception.code)
+
+
+class ScriptSettingsGetOffsiteConfig(unittest.TestCase):
+    """Class for unit testing the get_offsite_config from ScriptSetting class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        with mock.patch(MOCK_LOGGER) as logger:
+            with mock.patch(MOCK_SCRIPT_SETTINGS + '._get_config_details') as mock_get_config:
+                mock_get_config.return_value = ConfigParser()
+                self.script_settings = ScriptSettings(CONFIG_FILE_NAME, logger)
+
+        self.script_settings.config.add_section('OFFSITE_CONN')
+        for option, value in [('IP', '127.0.0.1'), ('USER', 'mock_user'),
+                              ('BKP_PATH', '/mock/path'), ('BKP_DIR', 'mock_dir'),
+                              ('RETENTION', '3'), ('STORAGE_ACCOUNT', 'mock_account'),
+                              ('CONTAINER_NAME', 'mock_container')]:
+            self.script_settings.config.set('OFFSITE_CONN', option, value)
+
+    def test_get_offsite_config_without_bandwidth_profile(self):
+        """Assert if the transfers are not limited when the profile is not informed."""
+        self.assertIsNone(self.script_settings.get_offsite_config().bandwidth_profile)
+
+    def test_get_offsite_config_with_bandwidth_profile(self):
+        """Assert if the informed bandwidth profile is parsed."""
+        self.script_settings.config.set('OFFSITE_CONN', 'BANDWIDTH_PROFILE', '08-18:200')
+
+        bandwidth_profile = self.script_settings.get_offsite_config().bandwidth_profile
+
+        self.assertEqual(200, bandwidth_profile.hourly_rate_list[8])
+        self.assertIsNone(bandwidth_profile.hourly_rate_list[19])
+
+    def test_get_offsite_config_transfer_backend(self):
+        """Assert if azcopy is the default backend and the informed one is used."""
+        self.assertEqual('azcopy', self.script_settings.get_offsite_config().transfer_backend)
+
+        self.script_settings.config.set('OFFSITE_CONN', 'TRANSFER_BACKEND', 'native')
+
+        self.assertEqual('native', self.script_settings.get_offsite_config().transfer_backend)
+
+    def test_get_offsite_config_invalid_transfer_backend(self):
+        """Assert if raises an exception when the transfer backend is not known."""
+        self.script_settings.config.set('OFFSITE_CONN', 'TRANSFER_BACKEND', 'ftp')
+
+        with self.assertRaises(Exception) as cex:
+            self.script_settings.get_offsite_config()
+
+        self.assertEqual(ExceptionCodes.ConfigurationFileOptionError, cex.exception.code)
+
+    def test_get_offsite_config_invalid_bandwidth_profile(self):
+        """Assert if raises an exception when the bandwidth profile cannot be parsed."""
+        self.script_settings.config.set('OFFSITE_CONN', 'BANDWIDTH_PROFILE', '18-08:200')
+
+        with self.assertRaises(Exception) as cex:
+            self.script_settings.get_offsite_config()
+
+        self.assertEqual(ExceptionCodes.ConfigurationFileOptionError, cex.exception.code)
@@ -0,0 +1,132 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.bandwidth.py script."""
+
+import pickle
+import unittest
+
+import mock
+
+from backup.bandwidth import BandwidthLimiter, BandwidthProfile, BYTES_PER_MEGABIT, \
+    parse_bandwidth_profile, ThrottledWriter
+
+MOCK_PACKAGE = 'backup.bandwidth.'
+
+
+def get_constant_profile(rate_mbps):
+    """
+    Get a bandwidth profile with the same rate for every hour.
+
+    :param rate_mbps: rate of every hour.
+    :return: BandwidthProfile object.
+    """
+    return BandwidthProfile([rate_mbps] * 24)
+
+
+class ParseBandwidthProfileTestCase(unittest.TestCase):
+    """Test cases for parse_bandwidth_profile function."""
+
+    def test_parse_bandwidth_profile(self):
+        """Test if ranges and single hours are set, and other hours are not limited."""
+        bandwidth_profile = parse_bandwidth_profile('08-18:200, 22:800')
+
+        self.assertEqual([None] * 8 + [200] * 11 + [None] * 3 + [800, None],
+                         bandwidth_profile.hourly_rate_list)
+
+    def test_parse_bandwidth_profile_invalid(self):
+        """Test if invalid ranges and rates raise ValueError."""
+        for invalid_profile in ['18-08:200', '08-24:200', '08:0', '08', '08-10-12:100', 'a:1']:
+            with self.assertRaises(ValueError):
+                parse_bandwidth_profile(invalid_profile)
+
+
+class BandwidthProfileTestCase(unittest.TestCase):
+    """Test cases for BandwidthProfile class."""
+
+    @mock.patch(MOCK_PACKAGE + 'time.localtime')
+    def test_get_rate_mbps(self, mock_localtime):
+        """Test if the rate of the current hour is returned."""
+        mock_localtime.return_value.tm_hour = 9
+
+        self.assertEqual(200, parse_bandwidth_profile('08-18:200').get_rate_mbps())
+
+
+class BandwidthLimiterTestCase(unittest.TestCase):
+    """Test cases for BandwidthLimiter class."""
+
+    def test_get_transfer_cap_mbps(self):
+        """Test if the rate is split between the transfers running at the same time."""
+        self.assertEqual(50, BandwidthLimiter(get_constant_profile(200), 4).get_transfer_cap_mbps())
+        self.assertEqual(1, BandwidthLimiter(get_constant_profile(2), 4).get_transfer_cap_mbps())
+
+    def test_get_transfer_cap_mbps_not_limited(self):
+        """Test if no cap is returned for hours without limit."""
+        self.assertIsNone(BandwidthLimiter(get_constant_profile(None),
+                                           4).get_transfer_cap_mbps())
+
+    @mock.patch(MOCK_PACKAGE + 'time.sleep')
+    @mock.patch(MOCK_PACKAGE + 'time.time')
+    def test_consume_sleeps_when_bucket_is_empty(self, mock_time, mock_sleep):
+        """Test if the burst is allowed at once and the data beyond it waits for tokens."""
+        mock_time.return_value = 100.0
+        bandwidth_limiter = BandwidthLimiter(get_constant_profile(8), 1)
+
+        self.assertEqual(0, bandwidth_limiter.consume(BYTES_PER_MEGABIT * 8))
+        self.assertFalse(mock_sleep.called)
+
+        self.assertEqual(0.5, bandwidth_limiter.consume(BYTES_PER_MEGABIT * 4))
+        mock_sleep.assert_called_once_with(0.5)
+
+    @mock.patch(MOCK_PACKAGE + 'time.sleep')
+    @mock.patch(MOCK_PACKAGE + 'time.time')
+    def test_consume_sleeps_without_lock(self, mock_time, mock_sleep):
+        """Test if the lock is released while waiting for tokens."""
+        mock_time.return_value = 100.0
+        bandwidth_limiter = BandwidthLimiter(get_constant_profile(8), 1)
+        lock_held_list = []
+        mock_sleep.side_effect = lambda _: lock_held_list.append(bandwidth_limiter.lock.locked())
+
+        bandwidth_limiter.consume(BYTES_PER_MEGABIT * 12)
+
+        self.assertEqual([False], lock_held_list)
+
+    @mock.patch(MOCK_PACKAGE + 'time.sleep')
+    def test_consume_not_limited(self, mock_sleep):
+        """Test if data is not delayed in hours without limit."""
+        bandwidth_limiter = BandwidthLimiter(get_constant_profile(None), 1)
+
+        self.assertEqual(0, bandwidth_limiter.consume(BYTES_PER_MEGABIT * 1000))
+        self.assertFalse(mock_sleep.called)
+
+    def test_pickle_bandwidth_limiter(self):
+        """Test if the limiter can be sent to worker processes."""
+        bandwidth_limiter = pickle.loads(pickle.dumps(BandwidthLimiter(get_constant_profile(8),
+                                                                       2)))
+
+        self.assertEqual(4, bandwidth_limiter.get_transfer_cap_mbps())
+        self.assertEqual(0, bandwidth_limiter.consume(1))
+
+
+class ThrottledWriterTestCase(unittest.TestCase):
+    """Test cases for ThrottledWriter class."""
+
+    def test_write(self):
+        """Test if the written data is consumed from the limiter before being written."""
+        mock_file = mock.Mock()
+        mock_limiter = mock.Mock()
+
+        throttled_writer = ThrottledWriter(mock_file, mock_limiter)
+        throttled_writer.write('data')
+        throttled_writer.close()
+
+        mock_limiter.consume.assert_called_once_with(4)
+        mock_file.write.assert_called_once_with('data')
+        mock_file.close.assert_called_once_with()
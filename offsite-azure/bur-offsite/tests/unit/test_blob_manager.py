@@ -0,0 +1,388 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.blob_manager.py script."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+
+from backup.azcopy_manager import AzCopyManager, sastoken
+from backup.blob_manager import BLOCK_JOURNAL_SUFFIX, BlobManager, get_blob_url, get_block_id, \
+    get_content_md5, get_transfer_manager, parse_blob_list_xml, parse_block_list_xml
+from backup.constants import NATIVE_TRANSFER_BACKEND
+from backup.exceptions import BlobTransferException, ExceptionCodes
+
+MOCK_PACKAGE = 'backup.blob_manager.'
+MOCK_CONTAINER = 'https://mock.blob.core.windows.net/container'
+
+BLOCK_SIZE = 10
+
+
+class MockResponse(object):
+    """Response of the in-memory blob storage."""
+
+    def __init__(self, status_code, content='', headers=None):
+        """
+        Initialize Mock Response object.
+
+        :param status_code: HTTP status of the response.
+        :param content: body of the response.
+        :param headers: headers of the response.
+        """
+        self.status_code = status_code
+        self.content = content
+        self.text = content
+        self.headers = headers or {}
+
+
+class MockBlobSession(object):
+    """In-memory blob storage answering the requests sent by BlobManager."""
+
+    def __init__(self):
+        """Initialize Mock Blob Session object."""
+        self.blob_dict = {}
+        self.block_dict = {}
+        self.request_list = []
+        self.failure_list = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, params=None, headers=None, data=None, timeout=None):
+        """Answer a request as the storage would do."""
+        blob_name = url.split('?')[0]
+        params = params or {}
+
+        with self.lock:
+            self.request_list.append((method, params.get('comp')))
+            if self.failure_list:
+                return MockResponse(self.failure_list.pop(0))
+
+        if 'Content-MD5' in headers and get_content_md5(data) != headers['Content-MD5']:
+            return MockResponse(400, 'Md5Mismatch')
+
+        if method == 'PUT' and params.get('comp') == 'block':
+            with self.lock:
+                self.block_dict.setdefault(blob_name, {})[params['blockid']] = data
+            return MockResponse(201)
+
+        if method == 'PUT' and params.get('comp') == 'blocklist':
+            block_id_list = [block_id.split('</Latest>')[0] for block_id
+                             in data.split('<Latest>')[1:]]
+            block_dict = self.block_dict.pop(blob_name, {})
+            self.blob_dict[blob_name] = "".join(block_dict[block_id]
+                                                for block_id in block_id_list)
+            return MockResponse(201)
+
+        if method == 'PUT':
+            self.blob_dict[blob_name] = data
+            return MockResponse(201)
+
+        if method == 'GET' and params.get('comp') == 'list':
+            name_list = sorted(name[len(blob_name) + 1:] for name in self.blob_dict
+                               if name.startswith(blob_name + '/' + params['prefix']))
+            first_index = int(params.get('marker', 0))
+            next_index = first_index + params['maxresults']
+            return MockResponse(200, '<EnumerationResults><Blobs>{}</Blobs><NextMarker>{}'
+                                     '</NextMarker></EnumerationResults>'.format(
+                                         "".join("<Blob><Name>{}</Name></Blob>".format(name)
+                                                 for name in name_list[first_index:next_index]),
+                                         next_index if next_index < len(name_list) else ''))
+
+        if method == 'GET' and params.get('comp') == 'blocklist':
+            return MockResponse(200, '<BlockList><UncommittedBlocks>{}</UncommittedBlocks>'
+                                     '</BlockList>'.format("".join(
+                                         "<Block><Name>{}</Name><Size>{}</Size></Block>".format(
+                                             block_id, len(block_data)) for block_id, block_data
+                                         in self.block_dict.get(blob_name, {}).items())))
+
+        if blob_name not in self.blob_dict:
+            return MockResponse(404, 'BlobNotFound')
+
+        if method == 'DELETE':
+            del self.blob_dict[blob_name]
+            return MockResponse(202)
+
+        content = self.blob_dict[blob_name]
+
+        if method == 'HEAD':
+            return MockResponse(200, headers={'Content-Length': str(len(content))})
+
+        first_byte, last_byte = headers['x-ms-range'].split('=')[1].split('-')
+        content = content[int(first_byte):int(last_byte) + 1]
+
+        return MockResponse(206, content, {'Content-MD5': get_content_md5(content)})
+
+
+class BlobManagerTransferFileTestCase(unittest.TestCase):
+    """Test cases for transfer_file method of BlobManager class."""
+
+    def setUp(self):
+        """Create a temporary folder and an in-memory storage."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.mock_session = MockBlobSession()
+
+        session_patcher = mock.patch(MOCK_PACKAGE + 'get_blob_session',
+                                     return_value=self.mock_session)
+        session_patcher.start()
+        self.addCleanup(session_patcher.stop)
+
+        for name, value in [('BLOCK_SIZE', BLOCK_SIZE), ('RANGE_SIZE', BLOCK_SIZE),
+                            ('RETRY_WAIT_TIME', 0)]:
+            constant_patcher = mock.patch(MOCK_PACKAGE + name, value)
+            constant_patcher.start()
+            self.addCleanup(constant_patcher.stop)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.temp_dir)
+
+    def create_file(self, file_name, content):
+        """
+        Create a file to be uploaded.
+
+        :param file_name: name of the file.
+        :param content: content of the file.
+        :return: path of the file.
+        """
+        file_path = os.path.join(self.temp_dir, file_name)
+        with open(file_path, 'wb') as source_file:
+            source_file.write(content)
+
+        return file_path
+
+    def test_transfer_file_small_upload(self):
+        """Test if a file up to one block is uploaded by a single request."""
+        source_path = self.create_file('small.tar', 'data')
+
+        azcopy_output = BlobManager.transfer_file(source_path, MOCK_CONTAINER)
+
+        self.assertEqual('data', self.mock_session.blob_dict[MOCK_CONTAINER + '/small.tar'])
+        self.assertEqual([('PUT', None)], self.mock_session.request_list)
+        self.assertEqual('Completed', azcopy_output.summary_dict['Final Job Status'])
+
+    def test_transfer_file_block_upload_and_download(self):
+        """Test if a big file is uploaded in blocks and downloaded in ranges unchanged."""
+        content = ''.join(chr(index % 256) for index in range(95))
+        source_path = self.create_file('volume.tar', content)
+        mock_on_progress = mock.Mock()
+
+        BlobManager.transfer_file(source_path, MOCK_CONTAINER, on_progress=mock_on_progress)
+
+        self.assertEqual(content, self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'])
+        self.assertEqual(10, self.mock_session.request_list.count(('PUT', 'block')))
+        self.assertTrue(mock_on_progress.call_args[0][0].is_finished)
+        self.assertEqual(95, mock_on_progress.call_args[0][0].bytes_done)
+
+        download_dir = os.path.join(self.temp_dir, 'download')
+        os.mkdir(download_dir)
+
+        BlobManager.transfer_file(MOCK_CONTAINER + '/volume.tar', download_dir)
+
+        with open(os.path.join(download_dir, 'volume.tar'), 'rb') as downloaded_file:
+            self.assertEqual(content, downloaded_file.read())
+
+    def test_transfer_file_retries_failed_block(self):
+        """Test if a block is sent again when the storage fails for a while."""
+        source_path = self.create_file('volume.tar', 'x' * 25)
+        self.mock_session.failure_list = [503, 500]
+
+        BlobManager.transfer_file(source_path, MOCK_CONTAINER)
+
+        self.assertEqual('x' * 25, self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'])
+
+    def interrupt_upload(self, source_path, block_data):
+        """
+        Leave the first block of an upload uncommitted, recorded in the journal of the file.
+
+        :param source_path: path of the file being uploaded.
+        :param block_data: data of the first block sent.
+        """
+        self.mock_session.block_dict[MOCK_CONTAINER + '/volume.tar'] = {
+            get_block_id(0): block_data}
+
+        with open(source_path + BLOCK_JOURNAL_SUFFIX, 'w') as journal_file:
+            journal_file.write("{} {}\n".format(get_block_id(0), get_content_md5(block_data)))
+
+    def test_transfer_file_resumes_uncommitted_blocks(self):
+        """Test if a resumable upload does not send again the blocks already uploaded."""
+        source_path = self.create_file('volume.tar', 'a' * 10 + 'b' * 10 + 'c' * 5)
+        self.interrupt_upload(source_path, 'a' * 10)
+
+        BlobManager.transfer_file(source_path, MOCK_CONTAINER, resumable=True)
+
+        self.assertEqual(2, self.mock_session.request_list.count(('PUT', 'block')))
+        self.assertEqual('a' * 10 + 'b' * 10 + 'c' * 5,
+                         self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'])
+        self.assertFalse(os.path.exists(source_path + BLOCK_JOURNAL_SUFFIX))
+
+    def test_transfer_file_resume_changed_file(self):
+        """Test if blocks left by an upload of an older file of the same name are sent again."""
+        source_path = self.create_file('volume.tar', 'a' * 10 + 'b' * 10 + 'c' * 5)
+        self.interrupt_upload(source_path, 'A' * 10)
+
+        BlobManager.transfer_file(source_path, MOCK_CONTAINER, resumable=True)
+
+        self.assertEqual(3, self.mock_session.request_list.count(('PUT', 'block')))
+        self.assertEqual('a' * 10 + 'b' * 10 + 'c' * 5,
+                         self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'])
+
+    def test_transfer_file_resume_without_journal(self):
+        """Test if uncommitted blocks not recorded by this server are sent again."""
+        source_path = self.create_file('volume.tar', 'a' * 10 + 'b' * 10 + 'c' * 5)
+        self.mock_session.block_dict[MOCK_CONTAINER + '/volume.tar'] = {get_block_id(0): 'a' * 10}
+
+        BlobManager.transfer_file(source_path, MOCK_CONTAINER, resumable=True)
+
+        self.assertEqual(3, self.mock_session.request_list.count(('PUT', 'block')))
+        self.assertNotIn(('GET', 'blocklist'), self.mock_session.request_list)
+
+    def test_transfer_file_download_corrupted_range(self):
+        """Test if a range whose data does not match its MD5 fails after all tries."""
+        self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'] = 'data'
+
+        with mock.patch(MOCK_PACKAGE + 'get_content_md5', return_value='corrupted'):
+            with self.assertRaises(BlobTransferException) as cex:
+                BlobManager(MOCK_CONTAINER + '/volume.tar', os.path.join(self.temp_dir,
+                                                                          'volume.tar')).download()
+
+        self.assertEqual(ExceptionCodes.BlobChecksumMismatch, cex.exception.code)
+
+    def test_transfer_file_download_missing_blob(self):
+        """Test if the download of a missing blob fails without leaving a partial file."""
+        with self.assertRaises(BlobTransferException) as cex:
+            BlobManager.transfer_file(MOCK_CONTAINER + '/missing.tar', self.temp_dir)
+
+        self.assertEqual(ExceptionCodes.BlobTransferFailed, cex.exception.code)
+        self.assertEqual([], os.listdir(self.temp_dir))
+
+    def test_download_stream_reads_in_order(self):
+        """Test if the ranges of a blob are read in order, whatever the size of each read."""
+        content = 'abcdefghij' * 3 + 'xyz'
+        self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'] = content
+
+        download_stream = BlobManager.get_download_stream(MOCK_CONTAINER + '/volume.tar')
+        stream = download_stream.start()
+
+        self.assertEqual(content[:3], stream.read(3))
+        self.assertEqual(content[3:18], stream.read(15))
+        self.assertEqual(content[18:], stream.read())
+        self.assertEqual('', stream.read(1))
+
+        azcopy_output = download_stream.finish()
+
+        self.assertEqual('33', azcopy_output.summary_dict['TotalBytesTransferred'])
+        self.assertEqual(4, self.mock_session.request_list.count(('GET', None)))
+        self.assertEqual([], os.listdir(self.temp_dir))
+
+    def test_download_stream_part_of_blob(self):
+        """Test if only the informed part of a blob is read when an offset and size are given."""
+        content = 'abcdefghij' * 3 + 'xyz'
+        self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'] = content
+
+        download_stream = BlobManager.get_download_stream(MOCK_CONTAINER + '/volume.tar',
+                                                          offset=12, size=15)
+
+        self.assertEqual(content[12:27], download_stream.start().read())
+
+        azcopy_output = download_stream.finish()
+
+        self.assertEqual('15', azcopy_output.summary_dict['TotalBytesTransferred'])
+        self.assertEqual(2, self.mock_session.request_list.count(('GET', None)))
+
+    def test_download_stream_corrupted_range(self):
+        """Test if reading a range whose data does not match its MD5 fails."""
+        self.mock_session.blob_dict[MOCK_CONTAINER + '/volume.tar'] = 'data'
+
+        download_stream = BlobManager.get_download_stream(MOCK_CONTAINER + '/volume.tar')
+
+        with mock.patch(MOCK_PACKAGE + 'get_content_md5', return_value='corrupted'):
+            stream = download_stream.start()
+
+            with self.assertRaises(BlobTransferException) as cex:
+                stream.read()
+
+        download_stream.abort()
+
+        self.assertEqual(ExceptionCodes.BlobChecksumMismatch, cex.exception.code)
+
+    def test_transfer_file_list(self):
+        """Test if every file of the list is transferred and gets its result."""
+        transfer_pair_list = [(self.create_file('file_{}'.format(index), str(index)),
+                               MOCK_CONTAINER) for index in range(3)]
+
+        result_dict = BlobManager.transfer_file_list(transfer_pair_list)
+
+        self.assertEqual({source_path: None for source_path, _ in transfer_pair_list},
+                         result_dict)
+        self.assertEqual('2', self.mock_session.blob_dict[MOCK_CONTAINER + '/file_2'])
+
+    def test_remove_dir_list(self):
+        """Test if every blob under the folders is deleted, listing them by pages."""
+        for blob_name in ['bkp1/volume_0', 'bkp1/volume_1', 'bkp1/sub/volume_2', 'bkp10/volume',
+                          'bkp2/volume']:
+            self.mock_session.blob_dict[MOCK_CONTAINER + '/customer/' + blob_name] = 'data'
+
+        with mock.patch(MOCK_PACKAGE + 'LIST_PAGE_SIZE', 2):
+            result_dict = BlobManager.remove_dir_list(MOCK_CONTAINER, ['customer/bkp1',
+                                                                       'customer/bkp3'])
+
+        self.assertEqual({'customer/bkp1': None, 'customer/bkp3': None}, result_dict)
+        self.assertEqual([MOCK_CONTAINER + '/customer/bkp10/volume',
+                          MOCK_CONTAINER + '/customer/bkp2/volume'],
+                         sorted(self.mock_session.blob_dict))
+        self.assertEqual(3, self.mock_session.request_list.count(('DELETE', None)))
+
+    def test_remove_dir_list_list_failure(self):
+        """Test if a folder whose blobs cannot be listed gets its error message."""
+        self.mock_session.blob_dict[MOCK_CONTAINER + '/customer/bkp1/volume'] = 'data'
+        self.mock_session.failure_list = [403]
+
+        result_dict = BlobManager.remove_dir_list(MOCK_CONTAINER, ['customer/bkp1'])
+
+        self.assertIsNotNone(result_dict['customer/bkp1'])
+        self.assertIn(MOCK_CONTAINER + '/customer/bkp1/volume', self.mock_session.blob_dict)
+
+
+class BlobManagerHelpersTestCase(unittest.TestCase):
+    """Test cases for the helper functions of blob_manager.py script."""
+
+    def test_parse_block_list_xml(self):
+        """Test if the size of each uncommitted block is read."""
+        block_list_xml = '<BlockList><UncommittedBlocks><Block><Name>MDA=</Name>' \
+                         '<Size>10</Size></Block></UncommittedBlocks></BlockList>'
+
+        self.assertEqual({'MDA=': 10}, parse_block_list_xml(block_list_xml))
+
+    def test_parse_blob_list_xml(self):
+        """Test if the blob names and the marker of the next page are read."""
+        self.assertEqual((['a', 'b'], 'marker'), parse_blob_list_xml(
+            '<EnumerationResults><Blobs><Blob><Name>a</Name></Blob><Blob><Name>b</Name></Blob>'
+            '</Blobs><NextMarker>marker</NextMarker></EnumerationResults>'))
+        self.assertEqual(([], None), parse_blob_list_xml(
+            '<EnumerationResults><Blobs /><NextMarker /></EnumerationResults>'))
+
+    def test_get_blob_url(self):
+        """Test if the blob name is quoted and the sas token kept."""
+        self.assertEqual(MOCK_CONTAINER + '/bkp/a%20b?sig=1',
+                         get_blob_url(MOCK_CONTAINER + '?sig=1', 'bkp/a b'))
+
+    def test_get_transfer_manager(self):
+        """Test if the transfer manager is chosen by the configured backend."""
+        self.assertEqual(BlobManager, get_transfer_manager(NATIVE_TRANSFER_BACKEND))
+        self.assertEqual(AzCopyManager, get_transfer_manager('azcopy'))
+
+    def test_transfer_file_not_url(self):
+        """Test if a transfer between local paths is refused."""
+        with self.assertRaises(BlobTransferException):
+            BlobManager.transfer_file('/tmp/source', '/tmp/destination' + sastoken)
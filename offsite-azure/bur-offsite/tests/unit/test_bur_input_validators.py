@@ -15,7 +15,8 @@ import unittest
 import mock
 
 import backup.bur_input_validators as validators
-from backup.constants import DEFAULT_NUM_PROCESSORS, DEFAULT_NUM_THREADS
+from backup.constants import DEFAULT_MIN_CONCURRENCY, DEFAULT_NUM_CUSTOMERS, \
+    DEFAULT_NUM_PROCESSORS, DEFAULT_NUM_THREADS
 from backup.exceptions import BackupSettingsException, InputValidatorsException
 from backup.main import SCRIPT_OPERATIONS
 
@@ -436,3 +437,49 @@ class BurInputValidatorsValidateNumberOfThreads(unittest.TestCase):
         self.assertEqual(expected_value, result)
         self.mock_logger.warning.assert_called_with("Invalid number of threads: 0. "
                                                     "Changed to: {}.".format(DEFAULT_NUM_THREADS))
+
+
+class BurInputValidatorsValidateNumberOfCustomers(unittest.TestCase):
+    """Class for unit testing validate_number_of_customers function."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        with mock.patch(MOCK_LOGGER) as logger:
+            self.mock_logger = logger
+
+    def test_validate_number_of_customers(self):
+        """Assert if returns a validated number of customers."""
+        result = validators.validate_number_of_customers("3", self.mock_logger)
+
+        self.assertEqual(3, result)
+        self.mock_logger.info.assert_called_with("Valid number of customers: 3.")
+
+    def test_validate_number_of_customers_invalid_values(self):
+        """Assert if updates invalid informed values to DEFAULT_NUM_CUSTOMERS value."""
+        for mock_customer_count in ["value", 0]:
+            result = validators.validate_number_of_customers(mock_customer_count,
+                                                             self.mock_logger)
+
+            self.assertEqual(DEFAULT_NUM_CUSTOMERS, result)
+            self.mock_logger.warning.assert_called_with(
+                "Invalid number of customers: {}. Changed to: {}.".format(mock_customer_count,
+                                                                       DEFAULT_NUM_CUSTOMERS))
+
+
+class BurInputValidatorsValidateMinConcurrency(unittest.TestCase):
+    """Class for unit testing validate_min_concurrency function."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        with mock.patch(MOCK_LOGGER) as logger:
+            self.mock_logger = logger
+
+    def test_validate_min_concurrency(self):
+        """Assert if returns a validated minimum concurrency."""
+        self.assertEqual(2, validators.validate_min_concurrency("2", self.mock_logger))
+
+    def test_validate_min_concurrency_invalid_values(self):
+        """Assert if updates invalid informed values to DEFAULT_MIN_CONCURRENCY value."""
+        for mock_min_concurrency in ["value", 0]:
+            self.assertEqual(DEFAULT_MIN_CONCURRENCY, validators.validate_min_concurrency(
+                mock_min_concurrency, self.mock_logger))
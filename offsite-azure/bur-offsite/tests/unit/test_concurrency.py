@@ -0,0 +1,203 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.concurrency.py script."""
+
+import threading
+import unittest
+
+import mock
+
+from backup.concurrency import AdaptiveLimit, BYTES_PER_MB, ConcurrencyController, \
+    read_cpu_times
+from backup.resource_budget import TempSpaceBudget
+
+MOCK_PACKAGE = 'backup.concurrency.'
+
+
+class ReadCpuTimesTestCase(unittest.TestCase):
+    """Test cases for read_cpu_times function."""
+
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    def test_read_cpu_times(self, mock_open):
+        """Test if idle and iowait are counted as idle time."""
+        mock_open.return_value.__enter__.return_value.readline.return_value = \
+            'cpu  10 0 10 70 10 0 0 0 0 0\n'
+
+        self.assertEqual((80, 100), read_cpu_times())
+
+    def test_read_cpu_times_not_available(self):
+        """Test if None is returned when the statistics file cannot be read."""
+        self.assertIsNone(read_cpu_times('/mock/not/found'))
+
+
+class AdaptiveLimitTestCase(unittest.TestCase):
+    """Test cases for AdaptiveLimit class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.adaptive_limit = AdaptiveLimit('mock_stage', 1, 8, 0.01)
+
+    def test_init_starts_halfway(self):
+        """Test if the limit starts halfway between its bounds."""
+        self.assertEqual(4, self.adaptive_limit.limit)
+        self.assertEqual(2, AdaptiveLimit('mock_stage', 2, 2).limit)
+
+    def test_adjust_additive_increase(self):
+        """Test if the limit grows by one while jobs are waiting."""
+        self.assertEqual((4, 5, "jobs waiting for a slot"), self.adaptive_limit.adjust(10, True))
+        self.assertEqual(5, self.adaptive_limit.adjust(10, False)[1])
+
+    def test_adjust_multiplicative_decrease_on_congestion(self):
+        """Test if the limit is halved on congestion, within the bounds."""
+        self.assertEqual((4, 2, "mock congestion"),
+                         self.adaptive_limit.adjust(10, True, "mock congestion"))
+        self.assertEqual(1, self.adaptive_limit.adjust(10, True, "mock congestion")[1])
+        self.assertEqual(1, self.adaptive_limit.adjust(10, True, "mock congestion")[1])
+
+    def test_adjust_decrease_when_throughput_keeps_dropping_after_increase(self):
+        """Test if increases that made the throughput drop for several intervals are undone."""
+        self.adaptive_limit.adjust(100, True)
+
+        self.assertEqual((5, 6), self.adaptive_limit.adjust(50, True)[:2])
+
+        previous_limit, new_limit, reason = self.adaptive_limit.adjust(40, True)
+
+        self.assertEqual((6, 3), (previous_limit, new_limit))
+        self.assertIn("throughput dropped", reason)
+
+    def test_adjust_not_sampled(self):
+        """Test if an interval without a throughput sample does not count as a drop."""
+        self.adaptive_limit.adjust(100, True)
+        self.adaptive_limit.adjust(50, True)
+
+        self.assertEqual((6, 7), self.adaptive_limit.adjust(None, True)[:2])
+
+    def test_update_throughput_merges_intervals_without_completed_jobs(self):
+        """Test if intervals in which running jobs did not finish are merged with the next."""
+        self.adaptive_limit.acquire('job_0', 60 * BYTES_PER_MB)
+
+        self.assertIsNone(self.adaptive_limit.update_throughput(0, 30))
+        self.assertIsNone(self.adaptive_limit.update_throughput(0, 30))
+        self.assertEqual(1, self.adaptive_limit.update_throughput(
+            self.adaptive_limit.release('job_0'), 0))
+        self.assertEqual(0.5, self.adaptive_limit.update_throughput(0, 30))
+
+    def test_acquire_waits_for_release(self):
+        """Test if a job waits for a slot and counts the size of the released jobs."""
+        self.adaptive_limit.set_limit(1)
+        self.adaptive_limit.acquire('job_0', BYTES_PER_MB)
+
+        waiting_job = threading.Thread(target=self.adaptive_limit.acquire, args=('job_1',))
+        waiting_job.start()
+        waiting_job.join(0.1)
+        self.assertTrue(waiting_job.is_alive())
+
+        self.adaptive_limit.release('job_0')
+        waiting_job.join()
+
+        self.assertEqual((BYTES_PER_MB, True), self.adaptive_limit.take_sample())
+        self.assertEqual((0, True), self.adaptive_limit.take_sample())
+
+    def test_acquire_reclaims_failed_job(self):
+        """Test if the slot of a job that failed without calling back is reclaimed."""
+        mock_async_result = mock.Mock()
+        mock_async_result.ready.return_value = True
+        mock_async_result.successful.return_value = False
+
+        self.adaptive_limit.set_limit(1)
+        self.adaptive_limit.acquire('job_0', BYTES_PER_MB)
+        self.adaptive_limit.set_job('job_0', mock_async_result)
+
+        self.adaptive_limit.acquire('job_1')
+
+        self.assertEqual(['job_1'], self.adaptive_limit.job_dict.keys())
+        self.assertEqual(0, self.adaptive_limit.take_sample()[0])
+
+
+class ConcurrencyControllerTestCase(unittest.TestCase):
+    """Test cases for ConcurrencyController class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.process_limit = AdaptiveLimit('process', 1, 8)
+        self.transfer_limit = AdaptiveLimit('transfer', 1, 8)
+        self.temp_space_budget = TempSpaceBudget(100)
+
+        with mock.patch(MOCK_PACKAGE + 'read_cpu_times') as mock_read_cpu_times:
+            mock_read_cpu_times.return_value = (0, 0)
+            self.controller = ConcurrencyController(mock.Mock(), self.process_limit,
+                                                    self.transfer_limit, self.temp_space_budget)
+
+    @mock.patch(MOCK_PACKAGE + 'read_load_ratio')
+    @mock.patch(MOCK_PACKAGE + 'read_cpu_times')
+    def test_adjust_busy_cpu(self, mock_read_cpu_times, mock_read_load_ratio):
+        """Test if the processing stage keeps growing while the CPU is busy but not overloaded."""
+        mock_read_cpu_times.return_value = (5, 100)
+        mock_read_load_ratio.return_value = 1.0
+        self.process_limit.is_saturated = True
+        self.transfer_limit.is_saturated = True
+
+        decision_list = self.controller.adjust()
+
+        self.assertEqual(('process', 4, 5, "jobs waiting for a slot"), decision_list[0])
+        self.assertEqual(('transfer', 4, 5, "jobs waiting for a slot"), decision_list[1])
+        self.assertEqual(2, self.controller.logger.info.call_count)
+
+    @mock.patch(MOCK_PACKAGE + 'read_load_ratio')
+    @mock.patch(MOCK_PACKAGE + 'read_cpu_times')
+    def test_adjust_high_load(self, mock_read_cpu_times, mock_read_load_ratio):
+        """Test if the processing stage is reduced once when the load exceeds the cores."""
+        mock_read_cpu_times.return_value = (0, 100)
+        mock_read_load_ratio.return_value = 2.0
+        self.process_limit.is_saturated = True
+
+        self.assertEqual(('process', 4, 2, "load at 200% of the CPU cores"),
+                         self.controller.adjust()[0])
+
+        self.process_limit.is_saturated = True
+
+        self.assertEqual(('process', 2, 3, "jobs waiting for a slot"),
+                         self.controller.adjust()[0])
+
+    @mock.patch(MOCK_PACKAGE + 'read_load_ratio', mock.Mock(return_value=None))
+    @mock.patch(MOCK_PACKAGE + 'read_cpu_times')
+    def test_adjust_temp_space_pressure(self, mock_read_cpu_times):
+        """Test if the processing stage is reduced when the transfers are behind."""
+        mock_read_cpu_times.return_value = None
+        self.temp_space_budget.reserve('volume_0', 95)
+        self.process_limit.is_saturated = True
+
+        decision_list = self.controller.adjust()
+
+        self.assertEqual(('process', 4, 2, "temporary space budget at 95%"), decision_list[0])
+        self.assertEqual(('transfer', 4, 4, "jobs not waiting for a slot"), decision_list[1])
+
+    @mock.patch(MOCK_PACKAGE + 'time.time')
+    @mock.patch(MOCK_PACKAGE + 'read_load_ratio', mock.Mock(return_value=None))
+    @mock.patch(MOCK_PACKAGE + 'read_cpu_times', mock.Mock(return_value=None))
+    def test_adjust_jobs_spanning_several_intervals(self, mock_time):
+        """Test if jobs finishing every few intervals at a steady rate do not reduce the limit."""
+        self.controller.last_adjust_time = 0
+
+        transfer_limit_list = []
+        for interval in range(12):
+            if interval % 3 == 0:
+                for job_index in list(self.transfer_limit.job_dict):
+                    self.transfer_limit.release(job_index)
+                for job_index in range(self.transfer_limit.limit):
+                    self.transfer_limit.acquire(job_index, 90 * BYTES_PER_MB)
+
+            self.transfer_limit.is_saturated = True
+            mock_time.return_value = (interval + 1) * 30
+
+            transfer_limit_list.append(self.controller.adjust()[1][2])
+
+        self.assertEqual([5, 6, 7] + [8] * 9, transfer_limit_list)
@@ -0,0 +1,201 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.file_scheduler.py script."""
+
+import logging
+import threading
+import unittest
+
+import mock
+
+from backup.concurrency import AdaptiveLimit
+from backup.file_scheduler import FileScheduler, VolumeTask
+
+logging.disable(logging.CRITICAL)
+
+MOCK_MAX_JOBS = 3
+MOCK_NUMBER_FILES = 5
+
+
+def get_file_scheduler(process_file_function, on_volume_processed, on_file_ready=None,
+                       file_limit=None):
+    """
+    Get an instance of FileScheduler to perform tests.
+
+    :return: FileScheduler instance.
+    """
+    with mock.patch('backup.thread_pool.CustomLogger'):
+        with mock.patch('backup.file_scheduler.CustomLogger'):
+            return FileScheduler(mock.Mock(), process_file_function, MOCK_MAX_JOBS,
+                                 on_volume_processed, on_file_ready, file_limit=file_limit)
+
+
+def get_volume_file_list(volume_name):
+    """
+    Get the list of file paths of a mocked volume.
+
+    :return: list of file paths.
+    """
+    return ["{}/file{}".format(volume_name, index) for index in range(MOCK_NUMBER_FILES)]
+
+
+class FileSchedulerTestCase(unittest.TestCase):
+    """Class for testing FileScheduler class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        self.finished_volume_list = []
+        self.mutex = threading.Lock()
+
+    def on_volume_processed(self, volume_task):
+        """Store the finished volume, asserting it is complete."""
+        self.assertTrue(volume_task.is_finished())
+        with self.mutex:
+            self.finished_volume_list.append(volume_task)
+
+    def test_add_volume_processes_all_files(self):
+        """Assert if every volume is dispatched once, after all its files were processed."""
+        ready_file_list = []
+        scheduler = get_file_scheduler(
+            lambda file_path, output_path: output_path + '/' + file_path,
+            self.on_volume_processed,
+            lambda volume_task, file_path: ready_file_list.append(file_path))
+
+        volume_task_list = [VolumeTask('volume{}'.format(index), 'volume{}'.format(index),
+                                       'tmp') for index in range(3)]
+        for volume_task in volume_task_list:
+            scheduler.add_volume(volume_task, iter(get_volume_file_list(volume_task.volume_name)))
+        scheduler.shutdown()
+
+        self.assertEqual(sorted(volume_task_list), sorted(self.finished_volume_list))
+        self.assertEqual(3 * MOCK_NUMBER_FILES, len(ready_file_list))
+        for volume_task in volume_task_list:
+            self.assertEqual(MOCK_NUMBER_FILES, volume_task.processed_file_count)
+            self.assertEqual([], volume_task.error_list)
+
+    def test_add_volume_limits_concurrency(self):
+        """Assert if no more than max_jobs files are processed at a time for all volumes."""
+        running = [0, 0]
+
+        def process_file(file_path, _):
+            """Track the number of files being processed at the same time."""
+            with self.mutex:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.005)
+            with self.mutex:
+                running[0] -= 1
+            return file_path
+
+        scheduler = get_file_scheduler(process_file, self.on_volume_processed)
+
+        for index in range(4):
+            scheduler.add_volume(VolumeTask('volume{}'.format(index), '', 'tmp'),
+                                 get_volume_file_list('volume{}'.format(index)))
+        scheduler.shutdown()
+
+        self.assertEqual(4, len(self.finished_volume_list))
+        self.assertTrue(running[1] <= MOCK_MAX_JOBS)
+
+    def test_add_volume_file_limit(self):
+        """Assert if the file limit keeps the files processed at a time below max_jobs."""
+        running = [0, 0]
+
+        def process_file(file_path, _):
+            """Track the number of files being processed at the same time."""
+            with self.mutex:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.005)
+            with self.mutex:
+                running[0] -= 1
+            return file_path
+
+        file_limit = AdaptiveLimit('process', 1, 1)
+        scheduler = get_file_scheduler(process_file, self.on_volume_processed,
+                                       file_limit=file_limit)
+
+        for index in range(2):
+            scheduler.add_volume(VolumeTask('volume{}'.format(index), '', 'tmp'),
+                                 get_volume_file_list('volume{}'.format(index)))
+        scheduler.shutdown()
+
+        self.assertEqual(2, len(self.finished_volume_list))
+        self.assertEqual(1, running[1])
+        self.assertEqual({}, file_limit.job_dict)
+
+    def test_add_volume_file_error(self):
+        """Assert if a failed file is reported in its volume only."""
+        def process_file(file_path, _):
+            """Fail to process a single file."""
+            if file_path == 'volume0/file0':
+                raise ValueError("mock error")
+            return file_path
+
+        scheduler = get_file_scheduler(process_file, self.on_volume_processed)
+
+        failed_volume = scheduler.add_volume(VolumeTask('volume0', '', 'tmp'),
+                                             get_volume_file_list('volume0'))
+        valid_volume = scheduler.add_volume(VolumeTask('volume1', '', 'tmp'),
+                                            get_volume_file_list('volume1'))
+        scheduler.shutdown()
+
+        self.assertEqual(1, len(failed_volume.error_list))
+        self.assertIn("mock error", failed_volume.error_list[0])
+        self.assertEqual([], valid_volume.error_list)
+        self.assertEqual(2, len(self.finished_volume_list))
+
+    def test_add_volume_slow_file_ready(self):
+        """Assert if a volume slow to take its files does not hold the files of other volumes."""
+        release_event = threading.Event()
+        ready_file_list = []
+
+        def on_file_ready(volume_task, file_path):
+            """Block the files of the first volume until released."""
+            if volume_task.volume_name == 'volume0':
+                release_event.wait(10)
+            ready_file_list.append(file_path)
+
+        scheduler = get_file_scheduler(lambda file_path, _: file_path, self.on_volume_processed,
+                                       on_file_ready)
+
+        slow_volume = scheduler.add_volume(VolumeTask('volume0', '', 'tmp'),
+                                           get_volume_file_list('volume0'))
+        other_volume = scheduler.add_volume(VolumeTask('volume1', '', 'tmp'),
+                                            get_volume_file_list('volume1'))
+
+        for _ in range(100):
+            if self.finished_volume_list:
+                break
+            release_event.wait(0.05)
+
+        self.assertEqual([other_volume], self.finished_volume_list)
+
+        release_event.set()
+        scheduler.shutdown()
+
+        self.assertEqual([other_volume, slow_volume], self.finished_volume_list)
+        self.assertEqual(2 * MOCK_NUMBER_FILES, len(ready_file_list))
+
+    def test_add_volume_already_failed_or_empty(self):
+        """Assert if failed and empty volumes are dispatched without processing files."""
+        process_file = mock.Mock()
+        scheduler = get_file_scheduler(process_file, self.on_volume_processed)
+
+        failed_volume = VolumeTask('volume0', '', 'tmp')
+        failed_volume.error_list.append("mock error")
+
+        scheduler.add_volume(failed_volume, get_volume_file_list('volume0'))
+        scheduler.add_volume(VolumeTask('volume1', '', 'tmp'), [])
+        scheduler.shutdown()
+
+        self.assertEqual(2, len(self.finished_volume_list))
+        process_file.assert_not_called()
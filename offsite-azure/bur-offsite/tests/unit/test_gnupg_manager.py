@@ -15,12 +15,20 @@
 
 """Module for testing backup.gnupg_manager.py script."""
 
+from io import BytesIO
+import hashlib
 import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
 import unittest
 
 import mock
 
-from backup.exceptions import ExceptionCodes, GnupgException, UtilsException
+from backup.exceptions import BlobTransferException, ExceptionCodes, GnupgException, \
+    UtilsException
 from backup.gnupg_manager import GnupgManager
 
 logging.disable(logging.CRITICAL)
@@ -349,33 +357,158 @@ class GnupgManagerCompressEncryptFileListTestCase(unittest.TestCase):
 
         self.assertIn(expected_error_msg, raised.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'ThreadPool')
+    @mock.patch(MOCK_PACKAGE + 'ThreadPoolExecutor')
     @mock.patch(MOCK_PACKAGE + 'os')
     @mock.patch(MOCK_IS_DIR)
     @mock.patch(MOCK_IS_VALID_PATH)
     def test_compress_encrypt_file_list_success_case(self, mock_is_valid_path, mock_is_dir,
-                                                     mock_os, mock_thread_pool):
+                                                     mock_os, mock_executor):
         """Assert if it returns True when all the files from list are encrypted and compressed."""
         mock_is_dir.return_value = True
         mock_is_valid_path.return_value = True
         mock_file_list = ['file0', 'file1', 'file2']
         mock_os.listdir.return_value = mock_file_list
-        mock_thread_pool.create_thread.return_value = None
+        mock_executor.submit.return_value = None
         mock_os.path.join.side_effect = ['mock_path/file0', 'mock_path/file1', 'mock_path/file2']
-        mock_create_thread_calls = []
+        mock_submit_calls = []
 
         for file_name in mock_file_list:
             source_file_path = "{}/{}".format(MOCK_SOURCE_DIR, file_name)
 
-            mock_create_thread_calls.append(
-                mock.call().create_thread("{}-Thread".format(file_name),
-                                          self.gnupg_manager.compress_encrypt_file,
-                                          source_file_path, MOCK_OUTPUT_PATH))
+            mock_submit_calls.append(
+                mock.call().submit("{}-Thread".format(file_name),
+                                   self.gnupg_manager.stream_compress_encrypt_file,
+                                   source_file_path, MOCK_OUTPUT_PATH))
 
         result = self.gnupg_manager.compress_encrypt_file_list(MOCK_SOURCE_DIR, MOCK_OUTPUT_PATH,
                                                                MOCK_NUMBER_THREADS)
         self.assertTrue(result)
-        mock_thread_pool.assert_has_calls(mock_create_thread_calls)
+        mock_executor.assert_has_calls(mock_submit_calls)
+
+    @mock.patch(MOCK_PACKAGE + 'ThreadPoolExecutor')
+    @mock.patch(MOCK_PACKAGE + 'os')
+    @mock.patch(MOCK_IS_DIR)
+    @mock.patch(MOCK_IS_VALID_PATH)
+    def test_compress_encrypt_file_list_no_stream_success_case(self, mock_is_valid_path,
+                                                               mock_is_dir, mock_os,
+                                                               mock_executor):
+        """Assert if the two step compress_encrypt_file is used when stream is disabled."""
+        mock_is_dir.return_value = True
+        mock_is_valid_path.return_value = True
+        mock_os.listdir.return_value = ['file0']
+        mock_os.path.join.side_effect = ['mock_path/file0']
+
+        result = self.gnupg_manager.compress_encrypt_file_list(MOCK_SOURCE_DIR, MOCK_OUTPUT_PATH,
+                                                               MOCK_NUMBER_THREADS, stream=False)
+        self.assertTrue(result)
+        mock_executor.assert_has_calls([
+            mock.call().submit("file0-Thread", self.gnupg_manager.compress_encrypt_file,
+                               'mock_path/file0', MOCK_OUTPUT_PATH),
+            mock.call().shutdown()])
+
+
+class GnupgManagerStreamCompressEncryptFileTestCase(unittest.TestCase):
+    """Class for testing stream_compress_encrypt_file() method from GnupgManager class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        self.gnupg_manager = get_gnupg_manager()
+        self.expected_output = "{}/{}.gz.gpg".format(MOCK_OUTPUT_PATH, MOCK_FILE_PATH)
+
+    @staticmethod
+    def get_mock_process(ret_code):
+        """
+        Get a mocked Popen object which returns the informed code when waited.
+
+        :param ret_code: return code of the mocked process.
+        :return: mocked process.
+        """
+        mock_process = mock.MagicMock()
+        mock_process.wait.return_value = ret_code
+        return mock_process
+
+    def test_stream_compress_encrypt_file_empty_output_path(self):
+        """Assert if it raises an exception when output_path is empty."""
+        with self.assertRaises(UtilsException) as raised:
+            self.gnupg_manager.stream_compress_encrypt_file(MOCK_FILE_PATH, '')
+
+        self.assertIn("Value not informed.", raised.exception.message)
+
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_IS_VALID_PATH)
+    def test_stream_compress_encrypt_file_success_case(self, mock_is_valid_path, mock_popen,
+                                                       mock_open):
+        """Assert if gzip output is piped into gpg and the encrypted file path is returned."""
+        mock_is_valid_path.return_value = True
+        mock_gzip_process = self.get_mock_process(0)
+        mock_popen.side_effect = [mock_gzip_process, self.get_mock_process(0)]
+
+        result = self.gnupg_manager.stream_compress_encrypt_file(MOCK_FILE_PATH, MOCK_OUTPUT_PATH)
+
+        self.assertEqual(self.expected_output, result)
+        self.assertEqual(2, mock_popen.call_count)
+        self.assertEqual(["gzip", "-c"], mock_popen.call_args_list[0][0][0])
+        self.assertEqual(mock_gzip_process.stdout, mock_popen.call_args_list[1][1]['stdin'])
+        self.assertNotIn(MOCK_FILE_PATH, mock_popen.call_args_list[1][0][0])
+        mock_gzip_process.stdout.close.assert_called_once_with()
+        self.assertTrue(mock_open.called)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_IS_VALID_PATH)
+    def test_stream_compress_encrypt_file_gzip_failure_exception(self, mock_is_valid_path,
+                                                                 mock_popen, mock_open,
+                                                                 mock_remove_path):
+        """Assert if it raises an exception and removes the output when gzip fails."""
+        mock_is_valid_path.return_value = True
+        mock_open.return_value = mock.MagicMock()
+        mock_popen.side_effect = [self.get_mock_process(1), self.get_mock_process(0)]
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_compress_encrypt_file(MOCK_FILE_PATH, MOCK_OUTPUT_PATH)
+
+        self.assertEqual(ExceptionCodes.GzipCommandError, raised.exception.code)
+        mock_remove_path.assert_called_once_with(self.expected_output)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_IS_VALID_PATH)
+    def test_stream_compress_encrypt_file_gpg_not_started(self, mock_is_valid_path, mock_popen,
+                                                          mock_open, mock_remove_path):
+        """Assert if the running gzip process is killed and waited when gpg cannot be started."""
+        mock_is_valid_path.return_value = True
+        mock_gzip_process = self.get_mock_process(0)
+        mock_gzip_process.poll.return_value = None
+        mock_popen.side_effect = [mock_gzip_process, OSError("No such file or directory")]
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_compress_encrypt_file(MOCK_FILE_PATH, MOCK_OUTPUT_PATH)
+
+        self.assertEqual(ExceptionCodes.EncryptError, raised.exception.code)
+        mock_gzip_process.kill.assert_called_once_with()
+        mock_gzip_process.wait.assert_called_once_with()
+        mock_remove_path.assert_called_once_with(self.expected_output)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_IS_VALID_PATH)
+    def test_stream_compress_encrypt_file_encrypt_failure_exception(self, mock_is_valid_path,
+                                                                    mock_popen, mock_open,
+                                                                    mock_remove_path):
+        """Assert if it raises an exception and removes the output when gpg fails."""
+        mock_is_valid_path.return_value = True
+        mock_open.return_value = mock.MagicMock()
+        mock_popen.side_effect = [self.get_mock_process(0), self.get_mock_process(2)]
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_compress_encrypt_file(MOCK_FILE_PATH, MOCK_OUTPUT_PATH)
+
+        self.assertEqual(ExceptionCodes.EncryptError, raised.exception.code)
+        mock_remove_path.assert_called_once_with(self.expected_output)
 
 
 class GnupgManagerDecryptFileTestCase(unittest.TestCase):
@@ -562,23 +695,23 @@ class GnupgManagerDecryptDecompressFileListTestCase(unittest.TestCase):
 
         self.assertIn("Path informed is not a valid existent folder.", raised.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'ThreadPool')
+    @mock.patch(MOCK_PACKAGE + 'ThreadPoolExecutor')
     @mock.patch(MOCK_PACKAGE + 'os')
     @mock.patch(MOCK_IS_DIR)
     def test_decrypt_decompress_file_list_success_case(self, mock_is_dir, mock_os,
-                                                       mock_thread_pool):
+                                                       mock_executor):
         """Test when the list of files were successfully processed by the pool."""
         mock_is_dir.return_value = True
         mock_file_list = ['file0', 'file1', 'file2']
         mock_os.listdir.return_value = mock_file_list
-        mock_thread_pool.create_thread.return_value = None
+        mock_executor.submit.return_value = None
         mock_os.path.join.side_effect = ['mock_path/file0', 'mock_path/file1', 'mock_path/file2']
-        mock_create_thread_calls = []
+        mock_submit_calls = []
 
         for file_name in mock_file_list:
             source_file_path = "{}/{}".format(MOCK_SOURCE_DIR, file_name)
 
-            mock_create_thread_calls.append(mock.call().create_thread("{}-Thread".format(
+            mock_submit_calls.append(mock.call().submit("{}-Thread".format(
                 file_name), self.gnupg_manager.decrypt_decompress_file, source_file_path))
 
         decrypt_decompress_result = self.gnupg_manager.decrypt_decompress_file_list(
@@ -586,7 +719,284 @@ class GnupgManagerDecryptDecompressFileListTestCase(unittest.TestCase):
 
         self.assertTrue(decrypt_decompress_result)
 
-        mock_thread_pool.assert_has_calls(mock_create_thread_calls)
+        mock_executor.assert_has_calls(mock_submit_calls)
+
+
+class GnupgManagerStreamDecryptDecompressFileTestCase(unittest.TestCase):
+    """Class for testing stream_decrypt_decompress_file() method from GnupgManager class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        self.gnupg_manager = get_gnupg_manager()
+        self.mock_gpg_process = GnupgManagerStreamCompressEncryptFileTestCase.get_mock_process(0)
+
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_stream_decrypt_decompress_file_success_case(self, mock_popen, mock_open):
+        """Assert if the stream is written into gpg and gpg output is piped into gzip."""
+        mock_popen.side_effect = [self.mock_gpg_process,
+                                  GnupgManagerStreamCompressEncryptFileTestCase.get_mock_process(0)]
+
+        result = self.gnupg_manager.stream_decrypt_decompress_file(iter(['data0', 'data1']),
+                                                                   MOCK_FILE_PATH)
+
+        self.assertEqual(MOCK_FILE_PATH, result)
+        self.assertEqual(['gpg', '--decrypt'], mock_popen.call_args_list[0][0][0])
+        self.assertEqual(['gzip', '-dc'], mock_popen.call_args_list[1][0][0])
+        self.assertEqual(self.mock_gpg_process.stdout, mock_popen.call_args_list[1][1]['stdin'])
+        self.mock_gpg_process.stdin.write.assert_has_calls([mock.call('data0'),
+                                                            mock.call('data1')])
+        self.mock_gpg_process.stdin.close.assert_called_once_with()
+        self.assertTrue(mock_open.called)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_stream_decrypt_decompress_file_broken_pipe(self, mock_popen, mock_open,
+                                                        mock_remove_path):
+        """Assert if the stream is read to its end and the processes are killed on a write error."""
+        mock_gzip_process = GnupgManagerStreamCompressEncryptFileTestCase.get_mock_process(0)
+        mock_gzip_process.poll.return_value = None
+        self.mock_gpg_process.stdin.write.side_effect = IOError("Broken pipe")
+        mock_popen.side_effect = [self.mock_gpg_process, mock_gzip_process]
+        chunk_iterator = iter(['data0', 'data1', 'data2'])
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_decrypt_decompress_file(chunk_iterator, MOCK_FILE_PATH)
+
+        self.assertEqual(ExceptionCodes.DecryptError, raised.exception.code)
+        self.assertEqual([], list(chunk_iterator))
+        mock_gzip_process.kill.assert_called_once_with()
+        mock_remove_path.assert_called_once_with(MOCK_FILE_PATH)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'open', create=True)
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_stream_decrypt_decompress_file_gzip_failure(self, mock_popen, mock_open,
+                                                         mock_remove_path):
+        """Assert if it raises an exception and removes the output when gzip fails."""
+        mock_popen.side_effect = [self.mock_gpg_process,
+                                  GnupgManagerStreamCompressEncryptFileTestCase.get_mock_process(1)]
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_decrypt_decompress_file(iter(['data0']), MOCK_FILE_PATH)
+
+        self.assertEqual(ExceptionCodes.GunzipCommandError, raised.exception.code)
+        mock_remove_path.assert_called_once_with(MOCK_FILE_PATH)
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_stream_decrypt_decompress_file_output_not_opened(self, mock_popen):
+        """Assert if the stream is read to its end when the output file cannot be opened."""
+        output_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_path)
+        chunk_iterator = iter(['data0', 'data1'])
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.stream_decrypt_decompress_file(chunk_iterator, output_path)
+
+        self.assertEqual(ExceptionCodes.DecryptError, raised.exception.code)
+        self.assertEqual([], list(chunk_iterator))
+        self.assertTrue(os.path.isdir(output_path))
+        mock_popen.assert_not_called()
+
+
+class GnupgManagerDecryptDecompressFileObjectTestCase(unittest.TestCase):
+    """Class for testing decrypt_decompress_file_object() method from GnupgManager class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        self.gnupg_manager = get_gnupg_manager()
+        self.decrypted_data_list = []
+
+    def mock_decrypt(self, chunk_iterator, output_file_path):
+        """
+        Replace stream_decrypt_decompress_file, keeping the data received.
+
+        :param chunk_iterator: iterable with the encrypted data.
+        :param output_file_path: path of the decompressed file.
+        :return: path of the processed file.
+        """
+        self.decrypted_data_list.append(b''.join(chunk_iterator))
+        return output_file_path
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    def test_decrypt_decompress_file_object_checksum(self, mock_remove_path):
+        """Assert if the data is checked against its md5 and the output removed on mismatch."""
+        with mock.patch.object(self.gnupg_manager, 'stream_decrypt_decompress_file',
+                               side_effect=self.mock_decrypt):
+            self.assertEqual(MOCK_FILE_PATH, self.gnupg_manager.decrypt_decompress_file_object(
+                BytesIO(b'data'), MOCK_FILE_PATH, hashlib.md5(b'data').hexdigest()))
+
+            with self.assertRaises(GnupgException) as raised:
+                self.gnupg_manager.decrypt_decompress_file_object(BytesIO(b'data'),
+                                                                  MOCK_FILE_PATH, 'other')
+
+        self.assertEqual([b'data', b'data'], self.decrypted_data_list)
+        self.assertEqual(ExceptionCodes.BlobChecksumMismatch, raised.exception.code)
+        mock_remove_path.assert_called_once_with(MOCK_FILE_PATH)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    def test_decrypt_decompress_file_object_read_error(self, mock_remove_path):
+        """Assert if an error reading the data is raised instead of the decryption error."""
+        mock_file_object = mock.Mock()
+        mock_file_object.read.side_effect = BlobTransferException(
+            ExceptionCodes.BlobTransferFailed)
+
+        with mock.patch.object(self.gnupg_manager, 'stream_decrypt_decompress_file',
+                               side_effect=self.mock_failed_decrypt):
+            with self.assertRaises(BlobTransferException):
+                self.gnupg_manager.decrypt_decompress_file_object(mock_file_object,
+                                                                  MOCK_FILE_PATH)
+
+        mock_remove_path.assert_called_once_with(MOCK_FILE_PATH)
+
+    @staticmethod
+    def mock_failed_decrypt(chunk_iterator, output_file_path):
+        """
+        Replace stream_decrypt_decompress_file, failing as gpg does when its input ends too soon.
+
+        :param chunk_iterator: iterable with the encrypted data.
+        :param output_file_path: path of the decompressed file.
+        :raise GnupgException: always.
+        """
+        for _ in chunk_iterator:
+            pass
+
+        raise GnupgException(ExceptionCodes.DecryptError, output_file_path)
+
+
+class GnupgManagerDecryptDecompressTarStreamTestCase(unittest.TestCase):
+    """Class for testing decrypt_decompress_tar_stream() method from GnupgManager class."""
+
+    def setUp(self):
+        """Set up the test variables."""
+        self.gnupg_manager = get_gnupg_manager()
+        self.output_path = tempfile.mkdtemp()
+        self.decrypted_data_dict = {}
+
+        logger_patcher = mock.patch('backup.thread_pool.CustomLogger')
+        logger_patcher.start()
+        self.addCleanup(logger_patcher.stop)
+
+    def tearDown(self):
+        """Remove the output folder."""
+        shutil.rmtree(self.output_path)
+
+    def mock_decrypt(self, chunk_iterator, output_file_path):
+        """
+        Replace stream_decrypt_decompress_file, keeping the data received for each file.
+
+        :param chunk_iterator: iterable with the encrypted data.
+        :param output_file_path: path of the decompressed file.
+        :return: path of the processed file.
+        """
+        self.decrypted_data_dict[os.path.relpath(output_file_path, self.output_path)] = \
+            b''.join(chunk_iterator)
+        return output_file_path
+
+    @staticmethod
+    def get_tar_stream(member_list):
+        """
+        Build an archive with the informed members.
+
+        :param member_list: list of tuples (member name, data or None for a folder).
+        :return: file object with the archive.
+        """
+        stream_buffer = BytesIO()
+        archive = tarfile.open(fileobj=stream_buffer, mode='w')
+
+        for member_name, member_data in member_list:
+            tar_member = tarfile.TarInfo(member_name)
+            if member_data is None:
+                tar_member.type = tarfile.DIRTYPE
+                archive.addfile(tar_member)
+            else:
+                tar_member.size = len(member_data)
+                archive.addfile(tar_member, BytesIO(member_data))
+
+        archive.close()
+        stream_buffer.seek(0)
+
+        return stream_buffer
+
+    def test_decrypt_decompress_tar_stream_success_case(self):
+        """Assert if each encrypted member is sent to be restored as it is read."""
+        tar_stream = self.get_tar_stream([('volume', None), ('volume/file0.gz.gpg', 'data0'),
+                                          ('volume/file1.gz.gpg', 'data1')])
+
+        with mock.patch.object(self.gnupg_manager, 'stream_decrypt_decompress_file',
+                               side_effect=self.mock_decrypt):
+            self.assertTrue(self.gnupg_manager.decrypt_decompress_tar_stream(
+                tar_stream, self.output_path, MOCK_NUMBER_THREADS))
+
+        self.assertTrue(os.path.isdir(os.path.join(self.output_path, 'volume')))
+        self.assertEqual({'volume/file0': 'data0', 'volume/file1': 'data1'},
+                         self.decrypted_data_dict)
+
+    def test_decrypt_decompress_tar_stream_invalid_members(self):
+        """Assert if members out of the output folder or not encrypted are reported."""
+        tar_stream = self.get_tar_stream([('../file0.gz.gpg', 'data0'), ('volume/file1', 'data1'),
+                                          ('volume/file2.gz.gpg', 'data2')])
+
+        with mock.patch.object(self.gnupg_manager, 'stream_decrypt_decompress_file',
+                               side_effect=self.mock_decrypt):
+            with self.assertRaises(GnupgException) as raised:
+                self.gnupg_manager.decrypt_decompress_tar_stream(tar_stream, self.output_path,
+                                                                 MOCK_NUMBER_THREADS)
+
+        self.assertIn('../file0.gz.gpg', raised.exception.message)
+        self.assertIn('volume/file1', raised.exception.message)
+        self.assertEqual({'volume/file2': 'data2'}, self.decrypted_data_dict)
+
+    def test_decrypt_decompress_tar_stream_member_filter(self):
+        """Assert if members refused by the filter are skipped, even when invalid."""
+        tar_stream = self.get_tar_stream([('volume/file0.gz.gpg', 'data0'),
+                                          ('volume/file1', 'data1'),
+                                          ('volume/file2.gz.gpg', 'data2')])
+
+        with mock.patch.object(self.gnupg_manager, 'stream_decrypt_decompress_file',
+                               side_effect=self.mock_decrypt):
+            self.assertTrue(self.gnupg_manager.decrypt_decompress_tar_stream(
+                tar_stream, self.output_path, MOCK_NUMBER_THREADS,
+                member_filter=lambda member_name: member_name.endswith('file2.gz.gpg')))
+
+        self.assertEqual({'volume/file2': 'data2'}, self.decrypted_data_dict)
+
+    @mock.patch(MOCK_PACKAGE + 'STREAM_QUEUE_CHUNKS', 1)
+    def test_decrypt_decompress_tar_stream_output_not_opened(self):
+        """Assert if the archive is still read when a member bigger than the queue fails at once."""
+        os.makedirs(os.path.join(self.output_path, 'volume', 'file0'))
+        tar_stream = self.get_tar_stream([('volume/file0.gz.gpg', b'0' * 3 * 1024 * 1024),
+                                          ('volume/file1.gz.gpg', 'data1')])
+        error_list = []
+
+        def restore_volume():
+            """Restore the archive, keeping the error raised."""
+            try:
+                self.gnupg_manager.decrypt_decompress_tar_stream(tar_stream, self.output_path,
+                                                                 MOCK_NUMBER_THREADS)
+            except GnupgException as restore_exp:
+                error_list.append(restore_exp)
+
+        restore_thread = threading.Thread(target=restore_volume)
+        restore_thread.daemon = True
+        restore_thread.start()
+        restore_thread.join(30)
+
+        self.assertFalse(restore_thread.is_alive())
+        self.assertEqual(1, len(error_list))
+        self.assertIn('volume/file0', error_list[0].message)
+
+    @mock.patch(MOCK_IS_DIR)
+    def test_decrypt_decompress_tar_stream_output_path_not_dir(self, mock_is_dir):
+        """Assert if it raises an exception when the output path is not a folder."""
+        mock_is_dir.return_value = False
+
+        with self.assertRaises(GnupgException) as raised:
+            self.gnupg_manager.decrypt_decompress_tar_stream(BytesIO(), MOCK_OUTPUT_PATH,
+                                                             MOCK_NUMBER_THREADS)
+
+        self.assertEqual(ExceptionCodes.InvalidFolder, raised.exception.code)
 
 
 class GnupgManagerOnFileProcessedTestCase(unittest.TestCase):
@@ -610,3 +1020,25 @@ class GnupgManagerOnFileProcessedTestCase(unittest.TestCase):
                               None]
         on_file_processed_result = self.gnupg_manager.on_file_processed(mock_thread_output, [])
         self.assertTrue(on_file_processed_result)
+
+    def test_on_file_processed_calls_on_file_ready(self):
+        """Test if the processed file path is handed to on_file_ready when informed."""
+        mock_thread_output = ['mock_thread_name', 'mock_elapsed_time', 'mock_result', None]
+        mock_on_file_ready = mock.Mock()
+
+        on_file_processed_result = self.gnupg_manager.on_file_processed(mock_thread_output, [],
+                                                                        mock_on_file_ready)
+        self.assertTrue(on_file_processed_result)
+        mock_on_file_ready.assert_called_once_with('mock_result')
+
+    def test_on_file_processed_on_file_ready_error(self):
+        """Test if an error raised by on_file_ready is added to the job error list."""
+        mock_thread_output = ['mock_thread_name', 'mock_elapsed_time', 'mock_result', None]
+        mock_on_file_ready = mock.Mock(side_effect=UtilsException(ExceptionCodes.CannotRemoveFile))
+        job_error_list = []
+
+        on_file_processed_result = self.gnupg_manager.on_file_processed(mock_thread_output,
+                                                                        job_error_list,
+                                                                        mock_on_file_ready)
+        self.assertFalse(on_file_processed_result)
+        self.assertEqual(1, len(job_error_list))
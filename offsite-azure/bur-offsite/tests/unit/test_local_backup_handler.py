@@ -13,19 +13,26 @@
 """This module is for unit tests from the local_backup_handler.py script."""
 
 import logging
+import os
 import unittest
 
 import mock
 
+from backup.azcopy_manager import AzCopyManager
+from backup.backup_run import BackupRun
 from backup.backup_settings import EnmConfig
 from backup.constants import BACKUP_META_FILE, BUR_FILE_LIST_DESCRIPTOR_FILE_NAME,\
-    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, PROCESSED_VOLUME_ENDS_WITH, SUCCESS_FLAG_FILE,\
-    VOLUME_OUTPUT_KEYS
-from backup.exceptions import ExceptionCodes, GnupgException, RsyncException, \
+    BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, PROCESSED_VOLUME_ENDS_WITH, SUCCESS_FLAG_FILE
+from backup.exceptions import AzCopyException, ExceptionCodes, RsyncException, \
     UploadBackupException, UtilsException
-from backup.local_backup_handler import LocalBackupHandler, \
-    unwrapper_local_backup_handler_function, VOLUME_CALLBACK_OUTPUT_INDEX
+from backup.file_scheduler import VolumeTask
+from backup.local_backup_handler import init_local_backup_handler_worker, LocalBackupHandler, \
+    run_volume_transfer_task, TEMP_SPACE_ARCHIVE_FACTOR, VOLUME_CALLBACK_OUTPUT_INDEX, \
+    VolumeTransferTask, WORKER_CONTEXT
+from backup.resource_budget import TempSpaceBudget
 from backup.utils.decorator import get_undecorated_class_method
+from backup.utils.remote import RemotePathStat
+from backup.volume_result import VolumeResult
 
 logging.disable(logging.CRITICAL)
 
@@ -59,84 +66,78 @@ def get_local_backup_handler():
         with mock.patch(MOCK_PACKAGE + 'CustomLogger') as mock_logger:
             with mock.patch(MOCK_PACKAGE + 'dill.dumps'):
                 with mock.patch('backup.backup_settings.OnsiteConfig') as mock_onsite_cfg:
+                    mock_onsite_cfg.temp_budget_mb = None
                     local_bkp_handler = LocalBackupHandler(mock_offsite_config, mock_onsite_cfg,
                                                            customer_enmaas_cfg, mock_gnupg_manager,
                                                            MOCK_PARALLELISM_CONSTANT,
                                                            MOCK_PARALLELISM_CONSTANT,
                                                            MOCK_PARALLELISM_CONSTANT, mock_logger)
-    local_bkp_handler.backup_output_dict = {}
-
     return local_bkp_handler
 
 
-class LocalBackupHandlerUnwrapperProcessBackupVolumeTestCase(unittest.TestCase):
-    """Test cases for unwrapper_local_backup_handler_function function."""
+def get_backup_run():
+    """
+    Get a backup run of mock_backup_name to perform tests.
+
+    :return: BackupRun object.
+    """
+    return BackupRun(MOCK_BACKUP_NAME, MOCK_LOCAL_BACKUP_PATH, MOCK_TMP_BKP_PATH,
+                     MOCK_REMOTE_BKP_PATH, 'mock_az_path')
+
+
+class LocalBackupHandlerRunVolumeTransferTaskTestCase(unittest.TestCase):
+    """Test cases for run_volume_transfer_task function."""
 
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
+        self.transfer_task = VolumeTransferTask(MOCK_VOLUME_NAME, {}, '', MOCK_REMOTE_BKP_PATH,
+                                                '')
+
+    def tearDown(self):
+        """Clear the worker context."""
+        WORKER_CONTEXT.clear()
 
     @mock.patch(MOCK_PACKAGE + 'dill.loads')
-    def test_unwrapper_local_backup_handler_function_invalid_local_bkp_handler_instance_exception(
+    def test_run_volume_transfer_task_invalid_local_bkp_handler_instance_exception(
             self, mock_dill_loads):
-        """Test when an invalid instance of local backup handler is loaded by dill."""
+        """Test when an invalid instance of local backup handler is loaded by the worker."""
         mock_dill_loads.return_value = None
 
-        with self.assertRaises(Exception) as raised:
-            unwrapper_local_backup_handler_function(None, '')
-
-        self.assertEqual("Could not unwrap backup handler object.", raised.exception.message)
-
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_volume')
-    @mock.patch(MOCK_PACKAGE + 'dill.loads')
-    def test_unwrapper_local_backup_handler_function_valid_instance_process_volume(
-            self, mock_dill_loads, mock_process_volume):
-        """Test when a valid local backup handler is loaded and the function is process_volume."""
-        mock_process_volume.return_value = {}
-        mock_process_volume.__name__ = "process_volume"
+        init_local_backup_handler_worker('')
 
-        self.local_bkp_handler.process_volume = mock_process_volume
+        with self.assertRaises(UploadBackupException) as raised:
+            run_volume_transfer_task(self.transfer_task)
 
-        mock_dill_loads.return_value = self.local_bkp_handler
+        self.assertEqual("Could not unwrap backup handler object.", raised.exception.message)
 
-        unwrapper_result = unwrapper_local_backup_handler_function(self.local_bkp_handler,
-                                                                   'process_volume', '',
-                                                                   MOCK_VOLUME_NAME, '',
-                                                                   MOCK_REMOTE_BKP_PATH)
+    def test_run_volume_transfer_task_worker_not_initialized_exception(self):
+        """Test when the worker process was not initialized."""
+        with self.assertRaises(UploadBackupException) as raised:
+            run_volume_transfer_task(self.transfer_task)
 
-        self.assertIsNotNone(unwrapper_result, "Should not have returned None.")
-        self.assertEqual(
-            MOCK_VOLUME_NAME, unwrapper_result[VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_NAME.value - 1])
-        self.assertEqual({}, unwrapper_result[VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_OUTPUT.value - 1])
-        self.assertEqual(MOCK_REMOTE_BKP_PATH, unwrapper_result[
-            VOLUME_CALLBACK_OUTPUT_INDEX.REMOTE_BACKUP_PATH.value - 1])
+        self.assertEqual(ExceptionCodes.CannotUnwrapperObject, raised.exception.code)
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.transfer_backup_volume_to_offsite')
     @mock.patch(MOCK_PACKAGE + 'dill.loads')
-    def test_unwrapper_local_backup_handler_function_valid_instance_transfer_backup(
-            self, mock_dill_loads, mock_transfer_backup_volume_to_offsite):
-        """
-        Test loading local backup handler for the transfer_backup_volume_to_offsite function.
-
-        Test when a valid local backup handler is loaded and the function is
-        transfer_backup_volume_to_offsite.
-        """
-        mock_transfer_backup_volume_to_offsite.return_value = (MOCK_VOLUME_NAME, {})
-        mock_transfer_backup_volume_to_offsite.__name__ = "transfer_backup_volume_to_offsite"
+    def test_run_volume_transfer_task_valid_instance(self, mock_dill_loads):
+        """Test if the handler is loaded once and reused by every task of the worker."""
+        self.local_bkp_handler.transfer_backup_volume_to_offsite = mock.Mock(
+            return_value=(MOCK_VOLUME_NAME, {}))
+        mock_dill_loads.return_value = self.local_bkp_handler
 
-        self.local_bkp_handler.transfer_backup_volume_to_offsite = \
-            mock_transfer_backup_volume_to_offsite
+        init_local_backup_handler_worker('mock_serialized_object')
 
-        mock_dill_loads.return_value = self.local_bkp_handler
+        for _ in range(2):
+            transfer_result = run_volume_transfer_task(self.transfer_task)
 
-        unwrapper_result = unwrapper_local_backup_handler_function(
-            self.local_bkp_handler, 'transfer_backup_volume_to_offsite', '', MOCK_VOLUME_NAME,
-            '', MOCK_REMOTE_BKP_PATH)
+            self.assertEqual(MOCK_VOLUME_NAME, transfer_result[
+                VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_NAME.value - 1])
+            self.assertEqual({}, transfer_result[
+                VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_OUTPUT.value - 1])
 
-        self.assertIsNotNone(unwrapper_result, "Should not have returned None.")
-        self.assertEqual(
-            MOCK_VOLUME_NAME, unwrapper_result[VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_NAME.value - 1])
-        self.assertEqual({}, unwrapper_result[VOLUME_CALLBACK_OUTPUT_INDEX.VOLUME_OUTPUT.value - 1])
+        mock_dill_loads.assert_called_once_with('mock_serialized_object')
+        self.local_bkp_handler.transfer_backup_volume_to_offsite.assert_called_with(
+            MOCK_VOLUME_NAME, {}, '', MOCK_REMOTE_BKP_PATH, '')
 
 
 class LocalBackupHandlerProcessBackupListTestCase(unittest.TestCase):
@@ -193,23 +194,24 @@ class LocalBackupHandlerProcessBackupListTestCase(unittest.TestCase):
 
         self.assertEqual(expected_exception_code, raised.exception.code.value)
 
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'os')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.stop_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_backup')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_create_offsite_onsite_base_paths')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_and_validate_onsite_backups_list')
-    def test_process_backup_list_create_onsite_backup_temporary_folder_fails(
+    def test_process_backup_list_start_backup_exception(
             self, mock_get_and_validate_onsite_backups_list,
-            mock_validate_offsite_onsite_customer_paths, mock_os, mock_create_path):
-        """Test when there is a problem to create the onsite backup temporary folder."""
+            mock_validate_offsite_onsite_customer_paths, mock_start_backup, mock_start_pools,
+            mock_stop_pools):
+        """Test when one of the backups cannot be started."""
         mock_bkp_list = ['backup0']
         mock_get_and_validate_onsite_backups_list.return_value = mock_bkp_list
         mock_validate_offsite_onsite_customer_paths.return_value = True
+        mock_start_backup.side_effect = UploadBackupException(ExceptionCodes.CannotCreatePath,
+                                                              'temp_path')
 
         calls = [mock.call("Doing backup of: mock_customer, directories: {}".format(mock_bkp_list))]
 
-        mock_os.path.join.side_effect = ['remote_path', 'temp_path']
-        mock_create_path.return_value = False
-
         expected_exception_code = ExceptionCodes.ProcessBackupListErrors.value
 
         with self.assertRaises(UploadBackupException) as raised:
@@ -217,99 +219,87 @@ class LocalBackupHandlerProcessBackupListTestCase(unittest.TestCase):
 
         self.assertEqual(expected_exception_code, raised.exception.code.value)
         self.local_bkp_handler.logger.log_info.assert_has_calls(calls)
+        mock_start_pools.assert_called_once_with()
+        mock_stop_pools.assert_called_once_with()
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'os')
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.stop_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.finish_backup')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_backup')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_create_offsite_onsite_base_paths')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_and_validate_onsite_backups_list')
-    def test_process_backup_list_backup_process_bkp_exception(
+    def test_process_backup_list_finish_backup_exception(
             self, mock_get_and_validate_onsite_backups_list,
-            mock_validate_offsite_onsite_customer_paths, mock_os, mock_create_path,
-            mock_create_remote_dir, mock_process_backup):
-        """Test when one of the backups fails while executing process_backup method."""
-        mock_bkp_list = ['backup0']
+            mock_validate_offsite_onsite_customer_paths, mock_start_backup, mock_finish_backup,
+            mock_start_pools, mock_stop_pools, mock_remove_path):
+        """Test when one of the backups fails while being finished, but the others are kept."""
+        mock_bkp_list = ['backup0', 'backup1']
         mock_get_and_validate_onsite_backups_list.return_value = mock_bkp_list
         mock_validate_offsite_onsite_customer_paths.return_value = True
-        mock_os.path.join.return_value = ''
-        mock_create_path.return_value = True
-        mock_create_remote_dir.return_value = True
-
-        mock_expected_error_msg = "Mock process backup exception."
-        mock_process_backup.side_effect = UploadBackupException(
-            ExceptionCodes.ProcessBackupListErrors, mock_expected_error_msg)
-
-        expected_exception_code = ExceptionCodes.ProcessBackupListErrors.value
+        mock_backup_run_list = [mock.Mock(), mock.Mock()]
+        mock_start_backup.side_effect = mock_backup_run_list
+        mock_finish_backup.side_effect = [UploadBackupException(parameters=['mock error']),
+                                          None]
+        mock_remove_path.return_value = True
 
         with self.assertRaises(UploadBackupException) as raised:
             self.local_bkp_handler.process_backup_list()
 
-        self.assertEqual(expected_exception_code, raised.exception.code.value)
+        self.assertEqual(ExceptionCodes.ProcessBackupListErrors.value,
+                         raised.exception.code.value)
+        self.assertIn('mock error', raised.exception.message)
+        self.assertEqual(2, mock_finish_backup.call_count)
+        mock_remove_path.assert_called_once_with(mock_backup_run_list[1].temp_backup_path)
+        mock_stop_pools.assert_called_once_with()
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'os')
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.stop_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.finish_backup')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_backup')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_create_offsite_onsite_base_paths')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_and_validate_onsite_backups_list')
-    def test_process_backup_list_process_backup_called_for_all(
+    def test_process_backup_list_backups_pipelined_in_order(
             self, mock_get_and_validate_onsite_backups_list,
-            mock_validate_offsite_onsite_customer_paths, mock_os, mock_create_path,
-            mock_create_remote_dir, mock_process_backup):
-        """process_backup should be called for all valid backups to be processed from scratch."""
+            mock_validate_offsite_onsite_customer_paths, mock_start_backup, mock_finish_backup,
+            mock_start_pools, mock_stop_pools, mock_remove_path):
+        """Test if a backup is started before the previous one is finished, in order."""
         mock_bkp_list = ['backup0', 'backup1', 'backup2']
         mock_get_and_validate_onsite_backups_list.return_value = mock_bkp_list
         mock_validate_offsite_onsite_customer_paths.return_value = True
-        mock_os.path.join.return_value = ''
-        mock_create_path.return_value = True
-        mock_create_remote_dir.return_value = True
+        mock_backup_run_dict = {backup_name: mock.Mock() for backup_name in mock_bkp_list}
+        mock_start_backup.side_effect = mock_backup_run_dict.get
+        mock_remove_path.return_value = True
 
-        process_backup_calls = [mock.call('backup0', '', ''),
-                                mock.call('backup1', '', ''),
-                                mock.call('backup2', '', '')]
+        call_tracker = mock.Mock()
+        call_tracker.attach_mock(mock_start_backup, 'start_backup')
+        call_tracker.attach_mock(mock_finish_backup, 'finish_backup')
 
         process_bkp_list_return = self.local_bkp_handler.process_backup_list()
 
-        self.assertTrue(process_bkp_list_return, "Should have returned true.")
-        mock_process_backup.assert_has_calls(process_backup_calls)
+        self.assertEqual(mock_bkp_list, process_bkp_list_return)
+        self.assertEqual([mock.call.start_backup('backup0'),
+                          mock.call.start_backup('backup1'),
+                          mock.call.finish_backup(mock_backup_run_dict['backup0']),
+                          mock.call.start_backup('backup2'),
+                          mock.call.finish_backup(mock_backup_run_dict['backup1']),
+                          mock.call.finish_backup(mock_backup_run_dict['backup2'])],
+                         call_tracker.mock_calls)
+        mock_start_pools.assert_called_once_with()
+        mock_stop_pools.assert_called_once_with()
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_create_offsite_onsite_base_paths')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_and_validate_onsite_backups_list')
-    def test_process_backup_list_with_valid_backup_tag(
-            self, mock_get_and_validate_onsite_backups_list,
-            mock_validate_offsite_onsite_customer_paths, mock_os, mock_create_path,
-            mock_create_remote_dir, mock_process_backup, mock_remove_path):
-        """Test when the backup identified by the backup tag is successfully processed."""
-        mock_backup_tag = ['backup1']
-        mock_get_and_validate_onsite_backups_list.return_value = mock_backup_tag
-        mock_validate_offsite_onsite_customer_paths.return_value = True
-        mock_os.path.join.return_value = ''
-        mock_create_path.return_value = True
-        mock_create_remote_dir.return_value = True
-        mock_remove_path.return_value = True
-
-        process_bkp_list_return = self.local_bkp_handler.process_backup_list('backup1')
-
-        self.assertTrue(process_bkp_list_return, "Should have returned true.")
-        mock_process_backup.assert_any_call('backup1', '', '')
-
-    @mock.patch(MOCK_PACKAGE + 'remove_path')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'os')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.stop_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_pools')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.finish_backup')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_backup')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_create_offsite_onsite_base_paths')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_and_validate_onsite_backups_list')
     def test_process_backup_list_with_valid_backup_tag_remove_tmp_fails(
             self, mock_get_and_validate_onsite_backups_list,
-            mock_validate_offsite_onsite_customer_paths, mock_os, mock_create_path,
-            mock_create_remote_dir, mock_process_backup, mock_remove_path):
+            mock_validate_offsite_onsite_customer_paths, mock_start_backup, mock_finish_backup,
+            mock_start_pools, mock_stop_pools, mock_remove_path):
         """
         Test when removing the onsite temporary folder fails.
 
@@ -319,16 +309,15 @@ class LocalBackupHandlerProcessBackupListTestCase(unittest.TestCase):
         mock_backup_tag = ['backup1']
         mock_get_and_validate_onsite_backups_list.return_value = mock_backup_tag
         mock_validate_offsite_onsite_customer_paths.return_value = True
-        mock_os.path.join.return_value = ''
-        mock_create_path.return_value = True
-        mock_create_remote_dir.return_value = True
+        mock_start_backup.return_value.temp_backup_path = ''
         mock_remove_path.return_value = False
         calls = [mock.call("Error while removing temporary backup folder ''.")]
 
         process_bkp_list_return = self.local_bkp_handler.process_backup_list('backup1')
 
         self.assertTrue(process_bkp_list_return, "Should have returned true.")
-        mock_process_backup.assert_any_call('backup1', '', '')
+        mock_start_backup.assert_called_once_with('backup1')
+        mock_finish_backup.assert_called_once_with(mock_start_backup.return_value)
         self.local_bkp_handler.logger.error.assert_has_calls(calls)
 
 
@@ -431,11 +420,11 @@ class LocalBackupHandlerValidateOffsiteOnsiteCustomerPathsTestCase(unittest.Test
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
 
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
+    @mock.patch(MOCK_PACKAGE + 'create_remote_dir_list')
     def test_validate_offsite_onsite_customer_paths_remote_dir_creation_exception(
-            self, mock_create_remote_dir):
+            self, mock_create_remote_dir_list):
         """Test when there is a problem creating the remote directory."""
-        mock_create_remote_dir.return_value = False
+        mock_create_remote_dir_list.return_value = ['remote/path']
 
         expected_exception_code = ExceptionCodes.CannotCreatePath.value
 
@@ -445,11 +434,11 @@ class LocalBackupHandlerValidateOffsiteOnsiteCustomerPathsTestCase(unittest.Test
         self.assertEqual(expected_exception_code, raised.exception.code.value)
 
     @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
+    @mock.patch(MOCK_PACKAGE + 'create_remote_dir_list')
     def test_validate_offsite_onsite_customer_paths_root_temp_dir_creation_exception(
-            self, mock_create_remote_dir, mock_create_path):
+            self, mock_create_remote_dir_list, mock_create_path):
         """Test when there is a problem creating the local temporary root directory."""
-        mock_create_remote_dir.return_value = True
+        mock_create_remote_dir_list.return_value = []
         mock_create_path.return_value = False
 
         expected_exception_code = ExceptionCodes.CannotCreatePath.value
@@ -460,11 +449,11 @@ class LocalBackupHandlerValidateOffsiteOnsiteCustomerPathsTestCase(unittest.Test
         self.assertEqual(expected_exception_code, raised.exception.code.value)
 
     @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
+    @mock.patch(MOCK_PACKAGE + 'create_remote_dir_list')
     def test_validate_offsite_onsite_customer_paths_customer_dir_creation_exception(
-            self, mock_create_remote_dir, mock_create_path):
+            self, mock_create_remote_dir_list, mock_create_path):
         """Test when there is a problem creating the local temporary customer directory."""
-        mock_create_remote_dir.return_value = True
+        mock_create_remote_dir_list.return_value = []
         mock_create_path.side_effect = [True, False]
 
         expected_exception_code = ExceptionCodes.CannotCreatePath.value
@@ -475,17 +464,33 @@ class LocalBackupHandlerValidateOffsiteOnsiteCustomerPathsTestCase(unittest.Test
         self.assertEqual(expected_exception_code, raised.exception.code.value)
 
     @mock.patch(MOCK_PACKAGE + 'create_path')
-    @mock.patch(MOCK_PACKAGE + 'create_remote_dir')
+    @mock.patch(MOCK_PACKAGE + 'create_remote_dir_list')
     def test_validate_offsite_onsite_customer_paths_success_case(
-            self, mock_create_remote_dir, mock_create_path):
+            self, mock_create_remote_dir_list, mock_create_path):
         """Test when the validation occurred successfully."""
-        mock_create_remote_dir.return_value = True
+        mock_create_remote_dir_list.return_value = []
         mock_create_path.side_effect = [True, True]
 
         validation_return = self.local_bkp_handler.validate_create_offsite_onsite_base_paths()
 
         self.assertTrue(validation_return, "Should have returned true.")
 
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    @mock.patch(MOCK_PACKAGE + 'create_remote_dir_list')
+    def test_validate_offsite_onsite_customer_paths_backup_dirs_created_at_once(
+            self, mock_create_remote_dir_list, mock_create_path):
+        """Test if the customer and backup folders are created by a single remote command."""
+        mock_create_remote_dir_list.return_value = []
+        mock_create_path.return_value = True
+
+        self.local_bkp_handler.validate_create_offsite_onsite_base_paths(['backup0', 'backup1'])
+
+        remote_root_path = self.local_bkp_handler.remote_root_path
+        mock_create_remote_dir_list.assert_called_once_with(
+            self.local_bkp_handler.offsite_config.host,
+            [remote_root_path, os.path.join(remote_root_path, 'backup0'),
+             os.path.join(remote_root_path, 'backup1')])
+
 
 class LocalBackupHandlerGetListProcessedVolsNamesOffsiteTestCase(unittest.TestCase):
     """Test cases for get_list_processed_vols_names_offsite method under local_backup_handler.py."""
@@ -546,230 +551,257 @@ class LocalBackupHandlerGetListProcessedVolsNamesOffsiteTestCase(unittest.TestCa
         self.assertEqual(expected_exception_code, raised.exception.code.value)
 
 
-class LocalBackupHandlerProcessBackupTestCase(unittest.TestCase):
-    """Test cases for process_backup method located in local_backup_handler.py."""
+class LocalBackupHandlerStartPoolsTestCase(unittest.TestCase):
+    """Test cases for start_pools and stop_pools methods located in local_backup_handler.py."""
 
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
-        self.local_bkp_handler.process_backup = get_undecorated_class_method(
-            self.local_bkp_handler.process_backup, self.local_bkp_handler)
 
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_check_disk_space_failed(self, mock_os,
-                                                    mock_check_local_disk_space_for_upload):
-        """Test when checking disk space fails."""
-        mock_os.path.join.return_value = ''
+    @mock.patch(MOCK_PACKAGE + 'FileScheduler')
+    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
+    def test_start_stop_pools(self, mock_mp_pool, mock_file_scheduler):
+        """Test if the shared pools are started once and waited for when stopped."""
+        self.local_bkp_handler.start_pools()
+
+        mock_mp_pool.assert_called_once_with(MOCK_PARALLELISM_CONSTANT,
+                                             init_local_backup_handler_worker,
+                                             (self.local_bkp_handler.serialized_object,))
+        mock_file_scheduler.assert_called_once_with(
+            self.local_bkp_handler.logger,
+            self.local_bkp_handler.gpg_manager.stream_compress_encrypt_file,
+            MOCK_PARALLELISM_CONSTANT * MOCK_PARALLELISM_CONSTANT,
+            self.local_bkp_handler.finish_volume, None, MOCK_PARALLELISM_CONSTANT, None)
+
+        self.local_bkp_handler.stop_pools()
+
+        mock_file_scheduler.return_value.shutdown.assert_called_once_with()
+        mock_mp_pool.return_value.close.assert_called_once_with()
+        mock_mp_pool.return_value.join.assert_called_once_with()
+        self.assertIsNone(self.local_bkp_handler.file_scheduler)
+        self.assertIsNone(self.local_bkp_handler.transfer_pool)
+        self.assertIsNone(self.local_bkp_handler.temp_space_budget)
+
+    @mock.patch(MOCK_PACKAGE + 'ConcurrencyController')
+    @mock.patch(MOCK_PACKAGE + 'FileScheduler')
+    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
+    def test_start_stop_pools_adaptive_concurrency(self, mock_mp_pool, mock_file_scheduler,
+                                                   mock_concurrency_controller):
+        """Test if the stages are limited and adjusted while the pools run."""
+        self.local_bkp_handler.adaptive_concurrency = True
+
+        self.local_bkp_handler.start_pools()
+
+        process_limit = mock_file_scheduler.call_args[0][6]
+        self.assertEqual(MOCK_PARALLELISM_CONSTANT * MOCK_PARALLELISM_CONSTANT,
+                         process_limit.maximum)
+        self.assertEqual(MOCK_PARALLELISM_CONSTANT,
+                         self.local_bkp_handler.transfer_limit.maximum)
+        mock_concurrency_controller.assert_called_once_with(
+            self.local_bkp_handler.logger, process_limit, self.local_bkp_handler.transfer_limit,
+            None)
+        mock_concurrency_controller.return_value.start.assert_called_once_with()
+
+        self.local_bkp_handler.stop_pools()
+
+        mock_concurrency_controller.return_value.stop.assert_called_once_with()
+        self.assertIsNone(self.local_bkp_handler.transfer_limit)
+        self.assertIsNone(self.local_bkp_handler.concurrency_controller)
+
+    @mock.patch(MOCK_PACKAGE + 'FileScheduler')
+    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
+    def test_start_pools_temp_budget(self, mock_mp_pool, mock_file_scheduler):
+        """Test if the temp space budget is the smallest between the configured and shared."""
+        self.local_bkp_handler.onsite_config.temp_budget_mb = 5000
+        self.local_bkp_handler.temp_space_mb = 2000
 
-        mock_expected_error_msg = "Mock disk space error message"
-        mock_check_local_disk_space_for_upload.side_effect = Exception(mock_expected_error_msg)
+        self.local_bkp_handler.start_pools()
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_backup('', '', '')
+        self.assertEqual(2000, self.local_bkp_handler.temp_space_budget.budget_mb)
 
-        self.assertEqual(mock_expected_error_msg, cex.exception.message)
+        self.local_bkp_handler.stop_pools()
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_descriptor_file_or_volume_list_is_empty(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes):
-        """Test when descriptor file or volume list is empty."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
 
-        mock_expected_error_message = "Mock empty list error."
-        mock_validate_already_processed_volumes.side_effect = Exception(mock_expected_error_message)
+class LocalBackupHandlerStartBackupTestCase(unittest.TestCase):
+    """Test cases for start_backup method located in local_backup_handler.py."""
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_backup(MOCK_BACKUP_NAME, '', '')
+    def setUp(self):
+        """Set up the test constants."""
+        self.local_bkp_handler = get_local_backup_handler()
+        self.local_bkp_handler.file_scheduler = mock.Mock()
 
-        self.assertEqual(mock_expected_error_message, cex.exception.message)
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_start_backup_create_temporary_folder_fails(self, mock_create_path):
+        """Test when there is a problem to create the onsite backup temporary folder."""
+        mock_create_path.return_value = False
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_bur_descriptors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_volume_to_be_processed_list_is_empty(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes, mock_check_backup_output_errors,
-            mock_process_backup_metadata_files, mock_process_bur_descriptors):
-        """Test when there is no volume to be processed."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
+        with self.assertRaises(UploadBackupException) as raised:
+            self.local_bkp_handler.start_backup(MOCK_BACKUP_NAME)
 
-        mock_validate_already_processed_volumes.return_value = \
-            (['file0', 'file1'], ['volume0', 'volume1'], [])
+        self.assertEqual(ExceptionCodes.CannotCreatePath.value, raised.exception.code.value)
 
-        mock_check_backup_output_errors.return_value = True
-        mock_process_backup_metadata_files.return_value = []
-        mock_process_bur_descriptors.return_value = True
+    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_start_backup_check_disk_space_failed(self, mock_create_path,
+                                                  mock_check_local_disk_space_for_upload):
+        """Test when checking disk space fails."""
+        mock_create_path.return_value = True
+        mock_check_local_disk_space_for_upload.side_effect = UtilsException(
+            ExceptionCodes.NotEnoughFreeDiskSpace)
 
-        process_backup_return = self.local_bkp_handler.process_backup(MOCK_BACKUP_NAME, '', '')
+        with self.assertRaises(UtilsException):
+            self.local_bkp_handler.start_backup(MOCK_BACKUP_NAME)
 
-        self.assertIsNotNone(process_backup_return, "Should have returned a tuple.")
+        self.assertFalse(self.local_bkp_handler.file_scheduler.add_volume.called)
 
-        self.assertEqual("{}_{}".format(MOCK_CUSTOMER_NAME, MOCK_BACKUP_NAME),
-                         process_backup_return[0])
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
+    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_start_backup_volume_list_is_empty(self, mock_create_path,
+                                               mock_check_local_disk_space_for_upload,
+                                               mock_validate_already_processed_volumes):
+        """Test when the volume list of the backup cannot be read."""
+        mock_create_path.return_value = True
+        mock_validate_already_processed_volumes.side_effect = UploadBackupException(
+            ExceptionCodes.NoVolumeListForBackup, MOCK_LOCAL_BACKUP_PATH)
 
-        self.assertIsNotNone(process_backup_return[1], "Should not return None.")
+        with self.assertRaises(UploadBackupException) as raised:
+            self.local_bkp_handler.start_backup(MOCK_BACKUP_NAME)
 
-        self.assertGreater(process_backup_return[2], 0.0, "Time should be bigger than zero.")
+        self.assertEqual(ExceptionCodes.NoVolumeListForBackup.value, raised.exception.code.value)
 
-    @mock.patch(MOCK_PACKAGE + 'unwrapper_local_backup_handler_function')
-    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_bur_descriptors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
+    @mock.patch(MOCK_PACKAGE + 'GnupgManager.get_source_file_list')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_volume')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
     @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    def test_process_backup_check_async_calls_per_volume(
-            self, mock_check_local_disk_space_for_upload, mock_validate_already_processed_volumes,
-            mock_check_backup_output_errors, mock_process_backup_metadata_files,
-            mock_process_bur_descriptors, mock_mp_pool,
-            mock_unwrapper_local_backup_handler_function):
-        """Test the async calls to process the volumes were triggered."""
-        mock_check_local_disk_space_for_upload.return_value = True
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_start_backup_check_volumes_scheduled(
+            self, mock_create_path, mock_check_local_disk_space_for_upload,
+            mock_validate_already_processed_volumes, mock_start_volume, mock_get_source_file_list):
+        """Test the files of every volume are scheduled in the shared file scheduler."""
+        mock_create_path.return_value = True
 
         mock_volume_list = ['path/to/volume0', 'path/to/volume1']
-        mock_validate_already_processed_volumes.return_value = (['file0', 'file1'], [],
-                                                                mock_volume_list)
+        mock_validate_already_processed_volumes.return_value = mock_volume_list
+        mock_get_source_file_list.side_effect = lambda volume_path: iter(
+            [('file0', volume_path + '/file0')])
 
-        mock_unwrapper_local_backup_handler_function.return_value = None
-        mock_pool_apply_async = mock_mp_pool.return_value.apply_async
-        mock_pool_close = mock_mp_pool.return_value.close
-        mock_pool_join = mock_mp_pool.return_value.join
+        calls = [mock.call("Processing list of volumes: {}.".format(mock_volume_list))]
 
-        mock_check_backup_output_errors.return_value = True
-        mock_process_backup_metadata_files.return_value = []
-        mock_process_bur_descriptors.return_value = True
+        backup_run = self.local_bkp_handler.start_backup(MOCK_BACKUP_NAME)
 
-        self.local_bkp_handler.process_backup(MOCK_BACKUP_NAME, MOCK_TMP_BKP_PATH,
-                                              MOCK_REMOTE_BKP_PATH)
+        self.assertEqual(MOCK_BACKUP_NAME, backup_run.backup_folder_name)
+        self.assertEqual(os.path.join(MOCK_LOCAL_BACKUP_PATH, MOCK_BACKUP_NAME),
+                         backup_run.local_backup_path)
+        self.assertTrue(backup_run.all_volumes_submitted)
+        self.assertEqual(2, backup_run.pending_volume_count)
 
-        for idx in [0, 1]:
-            volume_path = 'path/to/volume' + str(idx)
-            volume_name = 'volume' + str(idx)
-            tmp_volume_path = MOCK_TMP_BKP_PATH + '/volume' + str(idx)
+        mock_add_volume = self.local_bkp_handler.file_scheduler.add_volume
+        self.assertEqual(2, mock_add_volume.call_count)
 
-            mock_pool_apply_async.assert_any_call(
-                mock_unwrapper_local_backup_handler_function,
-                (self.local_bkp_handler.serialized_object, 'process_volume', volume_path,
-                 volume_name, tmp_volume_path, MOCK_REMOTE_BKP_PATH),
-                callback=self.local_bkp_handler.on_volume_ready)
+        for idx, volume_path in enumerate(mock_volume_list):
+            mock_start_volume.assert_any_call(volume_path, backup_run)
 
-        assert mock_pool_close.called
-        assert mock_pool_join.called
+            volume_task, file_path_list = mock_add_volume.call_args_list[idx][0]
+            self.assertEqual(mock_start_volume.return_value, volume_task)
+            self.assertEqual([volume_path + '/file0'], list(file_path_list))
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
+        self.local_bkp_handler.logger.info.assert_has_calls(calls)
+
+    @mock.patch(MOCK_PACKAGE + 'get_size_on_disk')
+    @mock.patch(MOCK_PACKAGE + 'GnupgManager.get_source_file_list')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.start_volume')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
     @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_backup_output_errors_failed_exception(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes, mock_check_backup_output_errors):
-        """Test when there were errors in the backup upload process."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
-        mock_validate_already_processed_volumes.return_value = \
-            (['file0', 'file1'], ['volume0', 'volume1'], [])
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_start_backup_reserves_temp_space(
+            self, mock_create_path, mock_check_local_disk_space_for_upload,
+            mock_validate_already_processed_volumes, mock_start_volume, mock_get_source_file_list,
+            mock_get_size_on_disk):
+        """Test if each volume reserves temp space for its files and archive before starting."""
+        mock_create_path.return_value = True
+        mock_validate_already_processed_volumes.return_value = ['path/to/volume0']
+        mock_get_source_file_list.return_value = iter([])
+        mock_get_size_on_disk.return_value = 100
 
-        mock_expected_error_message = "Mock error exception."
-        mock_check_backup_output_errors.side_effect = Exception(mock_expected_error_message)
+        self.local_bkp_handler.temp_space_budget = mock.Mock()
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_backup('', '', '')
+        self.local_bkp_handler.start_backup(MOCK_BACKUP_NAME)
 
-        self.assertEqual(mock_expected_error_message, cex.exception.message)
+        self.local_bkp_handler.temp_space_budget.reserve.assert_called_once_with(
+            (MOCK_BACKUP_NAME, 'volume0'), 100 * TEMP_SPACE_ARCHIVE_FACTOR)
+        mock_get_size_on_disk.assert_called_once_with('path/to/volume0')
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_backup_process_backup_metadata_failed_exception(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes, mock_check_backup_output_errors,
-            mock_process_backup_metadata_files):
-        """Test when there is a problem to process backup metadata files."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
-        mock_validate_already_processed_volumes.return_value = \
-            (['file0', 'file1'], ['volume0', 'volume1'], [])
-        mock_check_backup_output_errors.return_value = True
 
-        mock_expected_error_message = "Mock error exception."
-        mock_process_backup_metadata_files.side_effect = Exception(mock_expected_error_message)
+class LocalBackupHandlerFinishBackupTestCase(unittest.TestCase):
+    """Test cases for finish_backup method located in local_backup_handler.py."""
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_backup('', '', '')
+    def setUp(self):
+        """Set up the test constants."""
+        self.local_bkp_handler = get_local_backup_handler()
+        self.local_bkp_handler.finish_backup = get_undecorated_class_method(
+            self.local_bkp_handler.finish_backup, self.local_bkp_handler)
 
-        self.assertEqual(mock_expected_error_message, cex.exception.message)
+        self.backup_run = BackupRun(MOCK_BACKUP_NAME, MOCK_LOCAL_BACKUP_PATH, MOCK_TMP_BKP_PATH,
+                                    MOCK_REMOTE_BKP_PATH, 'mock_az_path')
+        self.backup_run.file_path_list = ['file0', 'file1']
+        self.backup_run.volume_path_list = ['path/to/volume0', 'path/to/volume1']
+        self.backup_run.set_volume_output('volume0', VolumeResult('volume0.tar', True))
+        self.backup_run.set_all_volumes_submitted()
 
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_bur_descriptors')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_process_bur_descriptors_failed_exception(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes, mock_check_backup_output_errors,
-            mock_process_backup_metadata_files, mock_process_bur_descriptors):
-        """Test when there is a problem to process BUR descriptor files."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
-        mock_validate_already_processed_volumes.return_value = \
-            (['file0', 'file1'], ['volume0', 'volume1'], [])
-        mock_check_backup_output_errors.return_value = True
-        mock_process_backup_metadata_files.return_value = []
-
-        mock_expected_error_message = "Mock error exception."
-        mock_process_bur_descriptors.side_effect = Exception(mock_expected_error_message)
+    def test_finish_backup_backup_output_errors_failed_exception(
+            self, mock_process_backup_metadata_files):
+        """Test when there were errors in the backup upload process."""
+        self.backup_run.set_volume_output('volume1', VolumeResult().set_error('mock error'))
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_backup('', '', '')
+        with self.assertRaises(UploadBackupException) as raised:
+            self.local_bkp_handler.finish_backup(self.backup_run)
 
-        self.assertEqual(mock_expected_error_message, cex.exception.message)
+        self.assertIn('mock error', raised.exception.message)
+        self.assertFalse(mock_process_backup_metadata_files.called)
 
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_bur_descriptors')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.check_backup_output_errors')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.validate_already_processed_volumes')
-    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_upload')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_process_backup_check_volume_to_process_not_empty_success_case(
-            self, mock_os, mock_check_local_disk_space_for_upload,
-            mock_validate_already_processed_volumes, mock_check_backup_output_errors,
-            mock_process_backup_metadata_files, mock_process_bur_descriptors):
-        """Test when process backup executes normally."""
-        mock_os.path.join.return_value = ''
-        mock_check_local_disk_space_for_upload.return_value = True
-        mock_validate_already_processed_volumes.return_value = \
-            (['file0', 'file1'], ['volume0', 'volume1'], ['volume0', 'volume1'])
-        mock_check_backup_output_errors.return_value = True
-        mock_process_backup_metadata_files.return_value = []
-        mock_process_bur_descriptors.return_value = True
+    def test_finish_backup_process_backup_metadata_failed_exception(
+            self, mock_process_backup_metadata_files, mock_process_bur_descriptors):
+        """Test when there is a problem to process backup metadata files."""
+        mock_process_backup_metadata_files.side_effect = UploadBackupException(
+            ExceptionCodes.CannotRemoveFile, 'file0')
 
-        calls = [mock.call("Processing list of volumes: ['volume0', 'volume1'].")]
+        with self.assertRaises(UploadBackupException):
+            self.local_bkp_handler.finish_backup(self.backup_run)
 
-        with mock.patch(MOCK_PACKAGE + 'mp.Pool'):
-            process_backup_return = self.local_bkp_handler.process_backup(MOCK_BACKUP_NAME, '', '')
+        self.assertFalse(mock_process_bur_descriptors.called)
 
-        self.assertIsNotNone(process_backup_return, "Should have returned a tuple.")
+    @mock.patch(MOCK_PACKAGE + 'get_size_on_disk')
+    @mock.patch(MOCK_PACKAGE + 'record_offsite_backup')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_bur_descriptors')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.process_backup_metadata_files')
+    def test_finish_backup_success_case(self, mock_process_backup_metadata_files,
+                                        mock_process_bur_descriptors, mock_record_offsite_backup,
+                                        mock_get_size_on_disk):
+        """Test when the backup finishes normally and is recorded in the off-site catalog."""
+        mock_process_backup_metadata_files.return_value = ['file0.gz.gpg.tar', 'file1']
+        mock_get_size_on_disk.return_value = 10
 
-        self.assertEqual("{}_{}".format(MOCK_CUSTOMER_NAME, MOCK_BACKUP_NAME),
-                         process_backup_return[0])
+        finish_backup_return = self.local_bkp_handler.finish_backup(self.backup_run)
 
-        self.assertIsNotNone(process_backup_return[1], "Should not return None.")
+        self.assertEqual("{}_{}".format(MOCK_CUSTOMER_NAME, MOCK_BACKUP_NAME),
+                         finish_backup_return[0])
+        self.assertEqual(self.backup_run.backup_output_dict, finish_backup_return[1])
+        self.assertGreater(finish_backup_return[2], 0.0, "Time should be bigger than zero.")
 
-        self.assertGreater(process_backup_return[2], 0.0, "Time should be bigger than zero.")
+        mock_process_backup_metadata_files.assert_called_once_with(
+            ['file0', 'file1'], MOCK_TMP_BKP_PATH, MOCK_REMOTE_BKP_PATH, 'mock_az_path')
+        mock_process_bur_descriptors.assert_called_once_with(
+            [(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, ['file0.gz.gpg.tar', 'file1']),
+             (BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, ['volume0', 'volume1'])],
+            MOCK_TMP_BKP_PATH, MOCK_REMOTE_BKP_PATH, 'mock_az_path')
 
-        self.local_bkp_handler.logger.info.assert_has_calls(calls)
+        backup_entry = mock_record_offsite_backup.call_args[0][0]
+        self.assertEqual((MOCK_BACKUP_NAME, MOCK_CUSTOMER_NAME, MOCK_REMOTE_BKP_PATH,
+                          'mock_az_path', 10, ['volume0', 'volume1']), backup_entry[:6])
 
 
 class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCase):
@@ -778,6 +810,8 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
+        self.backup_run = BackupRun(MOCK_BACKUP_NAME, MOCK_TMP_BKP_PATH, MOCK_TMP_BKP_PATH,
+                                    MOCK_REMOTE_BKP_PATH, '')
 
     @mock.patch(MOCK_PACKAGE + 'get_folder_file_lists_from_dir')
     def test_validate_already_processed_volumes_empty_volume_list_exception(
@@ -788,7 +822,7 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
 
         with self.assertRaises(UploadBackupException) as raised:
             self.local_bkp_handler.validate_already_processed_volumes(
-                MOCK_TMP_BKP_PATH, '', '')
+                self.backup_run)
 
         self.assertEqual(expected_error_msg, raised.exception.message)
 
@@ -801,7 +835,7 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
 
         with self.assertRaises(UploadBackupException) as raised:
             self.local_bkp_handler.validate_already_processed_volumes(
-                MOCK_TMP_BKP_PATH, '', '')
+                self.backup_run)
 
         self.assertEqual(expected_error_msg, raised.exception.message)
 
@@ -822,12 +856,13 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
         mock_os.path.exists.return_value = False
 
         validation_return = self.local_bkp_handler.validate_already_processed_volumes(
-            MOCK_TMP_BKP_PATH, '', '')
+            self.backup_run)
 
-        self.assertIsNotNone(validation_return, "Should have returned a tuple.")
-        self.assertEqual(file_list, validation_return[0], "Should have returned the file list.")
-        self.assertEqual(volume_list, validation_return[1], "Should have returned the volume list.")
-        self.assertEqual(volume_list, validation_return[2], "Should have returned the volume list.")
+        self.assertEqual(file_list, self.backup_run.file_path_list,
+                         "Should have stored the file list.")
+        self.assertEqual(volume_list, self.backup_run.volume_path_list,
+                         "Should have stored the volume list.")
+        self.assertEqual(volume_list, validation_return, "Should have returned the volume list.")
 
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_list_processed_vols_names_offsite')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.on_volume_ready')
@@ -856,15 +891,16 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
         volume_to_process_list = ['volume1', 'volume3']
 
         validation_return = self.local_bkp_handler.validate_already_processed_volumes(
-            MOCK_TMP_BKP_PATH, '', '')
+            self.backup_run)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-        self.assertIsNotNone(validation_return, "Should have returned a tuple.")
-        self.assertEqual(file_list, validation_return[0], "Should have returned a file list.")
-        self.assertEqual(volume_list, validation_return[1], "Should have returned a volume list.")
-        self.assertEqual(volume_to_process_list, validation_return[2], "Should have returned a "
-                                                                       "volume list.")
+        self.assertEqual(file_list, self.backup_run.file_path_list,
+                         "Should have stored the file list.")
+        self.assertEqual(volume_list, self.backup_run.volume_path_list,
+                         "Should have stored the volume list.")
+        self.assertEqual(volume_to_process_list, validation_return,
+                         "Should have returned a volume list.")
 
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_list_processed_vols_names_offsite')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
@@ -888,14 +924,15 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
                  mock.call("Cleaning up unfinished volume 'tmp/volume3'.")]
 
         validation_return = self.local_bkp_handler.validate_already_processed_volumes(
-            MOCK_TMP_BKP_PATH, '', '')
+            self.backup_run)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-        self.assertIsNotNone(validation_return, "Should have returned a tuple.")
-        self.assertEqual(file_list, validation_return[0], "Should have returned a file list.")
-        self.assertEqual(volume_list, validation_return[1], "Should have returned a volume list.")
-        self.assertEqual(volume_list, validation_return[2], "Should have returned a volume list.")
+        self.assertEqual(file_list, self.backup_run.file_path_list,
+                         "Should have stored the file list.")
+        self.assertEqual(volume_list, self.backup_run.volume_path_list,
+                         "Should have stored the volume list.")
+        self.assertEqual(volume_list, validation_return, "Should have returned a volume list.")
 
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_list_processed_vols_names_offsite')
     @mock.patch(MOCK_PACKAGE + 'os')
@@ -915,25 +952,24 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
                  mock.call("Found already uploaded volume 'volume1'. Skipping it.")]
 
         validation_return = self.local_bkp_handler.validate_already_processed_volumes(
-            MOCK_TMP_BKP_PATH, '', '')
+            self.backup_run)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-        self.assertIsNotNone(validation_return, "Should have returned a tuple.")
-        self.assertEqual(file_list, validation_return[0], "Should have returned a file list.")
-        self.assertEqual(volume_list, validation_return[1], "Should have returned a volume list.")
-        self.assertEqual([], validation_return[2], "Should have returned empty.")
+        self.assertEqual(file_list, self.backup_run.file_path_list,
+                         "Should have stored the file list.")
+        self.assertEqual(volume_list, self.backup_run.volume_path_list,
+                         "Should have stored the volume list.")
+        self.assertEqual([], validation_return, "Should have returned empty.")
 
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.on_volume_ready')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_empty_volume_output')
     @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_list_processed_vols_names_offsite')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'os')
     @mock.patch(MOCK_PACKAGE + 'get_folder_file_lists_from_dir')
     def test_validate_already_processed_volumes_existing_uploaded_processed_unfinished_volumes(
             self, mock_get_folder_file_lists_from_dir, mock_os, mock_remove_path,
-            mock_get_list_processed_vols_names_offsite, mock_get_empty_volume_output,
-            mock_on_volume_ready):
+            mock_get_list_processed_vols_names_offsite, mock_on_volume_ready):
         """Test when there are existing uploaded, processed and unfinished volumes in the system."""
         file_list = ['file0', 'file1']
         volume_list = ['volume0', 'volume1', 'volume2', 'volume3', 'volume4', 'volume5']
@@ -945,7 +981,6 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
         mock_get_list_processed_vols_names_offsite.return_value = uploaded_volumes
         mock_os.path.basename.side_effect = volume_list
         mock_os.path.exists.side_effect = [True, True, False, True, False, True]
-        mock_get_empty_volume_output.return_value = {}
         mock_on_volume_ready.return_value = None
         mock_remove_path.return_value = None
         mock_os.path.join.side_effect = ['tmp/volume2.tar', 'tmp/volume3.tar',
@@ -964,15 +999,16 @@ class LocalBackupHandlerValidateAlreadyProcessedVolumesTestCase(unittest.TestCas
         volume_to_process_list = ['volume4', 'volume5']
 
         validation_return = self.local_bkp_handler.validate_already_processed_volumes(
-            MOCK_TMP_BKP_PATH, '', '')
+            self.backup_run)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-        self.assertIsNotNone(validation_return, "Should have returned a tuple.")
-        self.assertEqual(file_list, validation_return[0], "Should have returned a file list.")
-        self.assertEqual(volume_list, validation_return[1], "Should have returned a volume list.")
-        self.assertEqual(volume_to_process_list, validation_return[2], "Should have returned a "
-                                                                       "volume list.")
+        self.assertEqual(file_list, self.backup_run.file_path_list,
+                         "Should have stored the file list.")
+        self.assertEqual(volume_list, self.backup_run.volume_path_list,
+                         "Should have stored the volume list.")
+        self.assertEqual(volume_to_process_list, validation_return,
+                         "Should have returned a volume list.")
 
 
 class LocalBackupHandlerProcessBurDescriptorsTestCase(unittest.TestCase):
@@ -982,57 +1018,64 @@ class LocalBackupHandlerProcessBurDescriptorsTestCase(unittest.TestCase):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.create_transfer_pickle_file')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.create_transfer_pickle_files')
     def test_process_bur_descriptors_transferring_exception(
-            self, mock_create_transfer_pickle_file, mock_check_remote_path_exists):
+            self, mock_create_transfer_pickle_files, mock_get_remote_path_stats):
         """Test when there is an error while creating the file list descriptor."""
         calls = [mock.call("Creating and sending BUR file descriptor file '{}' to off-site."
                            .format(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME))]
 
-        mock_check_remote_path_exists.return_value = False
+        mock_get_remote_path_stats.return_value = {}
 
         mock_expected_error_msg = "Mock error message."
-        mock_create_transfer_pickle_file.side_effect = Exception(mock_expected_error_msg)
+        mock_create_transfer_pickle_files.side_effect = Exception(mock_expected_error_msg)
 
         with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.process_bur_descriptors(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME,
-                                                           '', '', '')
+            self.local_bkp_handler.process_bur_descriptors(
+                [(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, [])], '', '', '')
 
         self.assertEqual(mock_expected_error_msg, cex.exception.message)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     def test_process_bur_descriptors_already_uploaded_descriptor(
-            self, mock_check_remote_path_exists):
+            self, mock_get_remote_path_stats):
         """Test when the descriptor file is already on off-site."""
         calls = [mock.call("Backup descriptor {} was already uploaded to off-site."
                            .format(BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME))]
 
-        mock_check_remote_path_exists.return_value = True
+        mock_get_remote_path_stats.side_effect = lambda host, path_list: {
+            path: RemotePathStat(False, 1, 0) for path in path_list}
 
-        self.local_bkp_handler.process_bur_descriptors(BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, '',
-                                                       '', '')
+        self.local_bkp_handler.process_bur_descriptors(
+            [(BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, [])], '', '', '')
 
         self.local_bkp_handler.logger.warning.assert_has_calls(calls)
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
-    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.create_transfer_pickle_file')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.create_transfer_pickle_files')
     def test_process_bur_descriptors_success_case(
-            self, mock_create_transfer_pickle_file, mock_check_remote_path_exists):
+            self, mock_create_transfer_pickle_files, mock_get_remote_path_stats):
         """Test when the descriptor was created and uploaded successfully."""
         calls = [mock.call("Creating and sending BUR file descriptor file '{}' to off-site."
                            .format(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME))]
 
-        mock_check_remote_path_exists.return_value = False
-        mock_create_transfer_pickle_file.return_value = True
+        mock_get_remote_path_stats.return_value = {}
+        mock_create_transfer_pickle_files.return_value = True
 
         process_descriptor_result = self.local_bkp_handler.process_bur_descriptors(
-            BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, '', '', '')
+            [(BUR_FILE_LIST_DESCRIPTOR_FILE_NAME, ['file0']),
+             (BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME, ['volume0'])], 'tmp', '', 'az')
 
         self.assertTrue(process_descriptor_result, "Should have returned True.")
 
+        mock_create_transfer_pickle_files.assert_called_once_with(
+            [(os.path.join('tmp', BUR_FILE_LIST_DESCRIPTOR_FILE_NAME), ['file0']),
+             (os.path.join('tmp', BUR_VOLUME_LIST_DESCRIPTOR_FILE_NAME), ['volume0'])],
+            'az', None, AzCopyManager)
+
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
 
@@ -1043,18 +1086,18 @@ class LocalBackupHandlerProcessBackupMetadataFilesTestCase(unittest.TestCase):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'compress_file')
     def test_process_backup_metadata_files_all_valid_files_processed(
             self, mock_compress_file, mock_remove_path, mock_transfer_file,
-            mock_check_remote_path_exists):
+            mock_get_remote_path_stats):
         """Test when all files are processed correctly."""
-        mock_check_remote_path_exists.return_value = False
+        mock_get_remote_path_stats.return_value = {}
         mock_file_list = [SUCCESS_FLAG_FILE, BACKUP_META_FILE]
 
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file.return_value = BACKUP_META_FILE
+        self.local_bkp_handler.gpg_manager.stream_compress_encrypt_file.return_value = BACKUP_META_FILE
 
         mock_target_dir = "{}:{}".format(self.local_bkp_handler.offsite_config.host,
                                          MOCK_REMOTE_BKP_PATH)
@@ -1080,12 +1123,12 @@ class LocalBackupHandlerProcessBackupMetadataFilesTestCase(unittest.TestCase):
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
     @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     def test_process_backup_metadata_files_compression_encryption_exception(
-            self, mock_check_remote_path_exists, mock_transfer_file):
+            self, mock_get_remote_path_stats, mock_transfer_file):
         """Test when one of the files could not be encrypted."""
-        mock_check_remote_path_exists.return_value = False
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file.side_effect = \
+        mock_get_remote_path_stats.return_value = {}
+        self.local_bkp_handler.gpg_manager.stream_compress_encrypt_file.side_effect = \
             Exception("Mock error message.")
         mock_transfer_file.return_value = None
 
@@ -1097,12 +1140,12 @@ class LocalBackupHandlerProcessBackupMetadataFilesTestCase(unittest.TestCase):
 
     @mock.patch(MOCK_PACKAGE + 'compress_file')
     @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     def test_process_backup_metadata_files_archiving_exception(
-            self, mock_check_remote_path_exists, mock_transfer_file, mock_compress_file):
+            self, mock_get_remote_path_stats, mock_transfer_file, mock_compress_file):
         """Test when one of the files could not be archived."""
-        mock_check_remote_path_exists.return_value = False
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file.return_value = BACKUP_META_FILE
+        mock_get_remote_path_stats.return_value = {}
+        self.local_bkp_handler.gpg_manager.stream_compress_encrypt_file.return_value = BACKUP_META_FILE
         mock_compress_file.side_effect = Exception("Mock error message.")
         mock_transfer_file.return_value = None
 
@@ -1112,18 +1155,18 @@ class LocalBackupHandlerProcessBackupMetadataFilesTestCase(unittest.TestCase):
 
         self.assertIn("Mock error message.", raised.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'compress_file')
     def test_process_backup_metadata_files_file_removal_exception(
             self, mock_compress_file, mock_remove_path, mock_transfer_file,
-            mock_check_remote_path_exists):
+            mock_get_remote_path_stats):
         """Test when one of the files is processed but could not be removed."""
-        mock_check_remote_path_exists.return_value = False
+        mock_get_remote_path_stats.return_value = {}
         mock_file_list = [SUCCESS_FLAG_FILE, BACKUP_META_FILE]
 
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file.return_value = BACKUP_META_FILE
+        self.local_bkp_handler.gpg_manager.stream_compress_encrypt_file.return_value = BACKUP_META_FILE
         mock_compress_file.return_value = ''
         mock_remove_path.return_value = False
         mock_transfer_file.return_value = None
@@ -1133,11 +1176,12 @@ class LocalBackupHandlerProcessBackupMetadataFilesTestCase(unittest.TestCase):
 
         self.assertIn("File cannot be removed.", raised.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'check_remote_path_exists')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
     def test_process_backup_metadata_files_all_files_already_uploaded(
-            self, mock_check_remote_path_exists):
+            self, mock_get_remote_path_stats):
         """Test when one of the files is processed but could not be removed."""
-        mock_check_remote_path_exists.return_value = True
+        mock_get_remote_path_stats.side_effect = lambda host, path_list: {
+            path: RemotePathStat(False, 1, 0) for path in path_list}
 
         calls = [mock.call("Backup metadata BACKUP_OK was already uploaded to off-site."),
                  mock.call("Backup metadata {} was already uploaded to off-site."
@@ -1157,12 +1201,13 @@ class LocalBackupHandlerOnVolumeReadyTestCase(unittest.TestCase):
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
+        self.backup_run = get_backup_run()
 
     def test_on_volume_ready_failed_processing(self):
         """Test when there is a problem in the volume processing."""
-        mock_volume_output = {VOLUME_OUTPUT_KEYS.status.name: False}
+        mock_volume_output = VolumeResult(MOCK_VOLUME_NAME)
 
-        mock_process_result = (MOCK_VOLUME_NAME, mock_volume_output, '')
+        mock_process_result = (MOCK_VOLUME_NAME, mock_volume_output, self.backup_run)
 
         on_volume_ready_result = self.local_bkp_handler.on_volume_ready(mock_process_result)
 
@@ -1170,6 +1215,8 @@ class LocalBackupHandlerOnVolumeReadyTestCase(unittest.TestCase):
             MOCK_VOLUME_NAME))]
 
         self.assertFalse(on_volume_ready_result, "Should have returned false.")
+        self.assertEqual({MOCK_VOLUME_NAME: mock_volume_output},
+                         self.backup_run.backup_output_dict)
 
         self.local_bkp_handler.logger.error.assert_has_calls(calls)
 
@@ -1178,14 +1225,12 @@ class LocalBackupHandlerOnVolumeReadyTestCase(unittest.TestCase):
     def test_on_volume_ready_successful_processing(self, mock_get_formatted_size_on_disk,
                                                    mock_mp_pool):
         """Test when the volume was processed correctly and it was sent to the transfer pool."""
-        mock_volume_output = {VOLUME_OUTPUT_KEYS.status.name: True,
-                              VOLUME_OUTPUT_KEYS.volume_path.name: MOCK_VOLUME_NAME}
+        mock_volume_output = VolumeResult(MOCK_VOLUME_NAME, True)
 
         mock_get_formatted_size_on_disk.return_value = 'mock_size'
 
-        mock_process_result = (MOCK_VOLUME_NAME, mock_volume_output, '')
+        mock_process_result = (MOCK_VOLUME_NAME, mock_volume_output, self.backup_run)
 
-        mock_mp_pool.return_value.apply_async = None
         self.local_bkp_handler.transfer_pool = mock_mp_pool
 
         on_volume_ready_result = self.local_bkp_handler.on_volume_ready(mock_process_result)
@@ -1194,9 +1239,62 @@ class LocalBackupHandlerOnVolumeReadyTestCase(unittest.TestCase):
                            "Starting to send it.".format(MOCK_VOLUME_NAME))]
 
         self.assertTrue(on_volume_ready_result, "Should have returned true.")
+        self.assertEqual([(MOCK_VOLUME_NAME, mock_volume_output,
+                           mock_mp_pool.apply_async.return_value)],
+                         self.backup_run.transfer_result_list)
+
+        transfer_task = mock_mp_pool.apply_async.call_args[0][1][0]
+        self.assertEqual(VolumeTransferTask(MOCK_VOLUME_NAME, mock_volume_output,
+                                            MOCK_VOLUME_NAME, MOCK_REMOTE_BKP_PATH,
+                                            'mock_az_path'), transfer_task)
+
+        callback = mock_mp_pool.apply_async.call_args[1]['callback']
+        callback((MOCK_VOLUME_NAME, mock_volume_output))
+        self.assertEqual({MOCK_VOLUME_NAME: mock_volume_output},
+                         self.backup_run.backup_output_dict)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
+    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
+    def test_on_volume_ready_already_streamed(self, mock_mp_pool):
+        """Test when the volume was streamed to off-site while being processed."""
+        mock_volume_output = VolumeResult(MOCK_VOLUME_NAME, True)
+        mock_volume_output.rsync_output = 'mock_azcopy_output'
+
+        mock_process_result = (MOCK_VOLUME_NAME, mock_volume_output, self.backup_run)
+
+        self.local_bkp_handler.transfer_pool = mock_mp_pool
+
+        on_volume_ready_result = self.local_bkp_handler.on_volume_ready(mock_process_result)
+
+        self.assertTrue(on_volume_ready_result, "Should have returned true.")
+        self.assertFalse(mock_mp_pool.apply_async.called)
+        self.assertEqual(mock_volume_output,
+                         self.backup_run.backup_output_dict[MOCK_VOLUME_NAME])
+
+    @mock.patch(MOCK_PACKAGE + 'mp.Pool')
+    @mock.patch(MOCK_PACKAGE + 'get_formatted_size_on_disk')
+    def test_on_volume_ready_releases_temp_space(self, mock_get_formatted_size_on_disk,
+                                                 mock_mp_pool):
+        """Test if the temp space of a volume is released only once it is transferred."""
+        mock_volume_output = VolumeResult(MOCK_VOLUME_NAME, True)
+        volume_key = (MOCK_BACKUP_NAME, MOCK_VOLUME_NAME)
+
+        self.local_bkp_handler.transfer_pool = mock_mp_pool
+        self.local_bkp_handler.temp_space_budget = TempSpaceBudget(1000)
+        self.local_bkp_handler.temp_space_budget.reserve(volume_key, 100)
+
+        self.local_bkp_handler.on_volume_ready((MOCK_VOLUME_NAME, mock_volume_output,
+                                                self.backup_run))
+
+        self.assertEqual([100, mock_mp_pool.apply_async.return_value],
+                         self.local_bkp_handler.temp_space_budget.reservation_dict[volume_key])
+
+        callback = mock_mp_pool.apply_async.call_args[1]['callback']
+        callback((MOCK_VOLUME_NAME, mock_volume_output))
+
+        self.assertEqual(0, self.local_bkp_handler.temp_space_budget.used_mb)
+
 
 class LocalBackupHandlerCheckBackupOutputErrorsTestCase(unittest.TestCase):
     """Test cases for get_backup_output_errors method located in local_backup_handler.py."""
@@ -1208,18 +1306,14 @@ class LocalBackupHandlerCheckBackupOutputErrorsTestCase(unittest.TestCase):
     def test_check_backup_output_errors_failed_volume(self):
         """Tests that when there are failed volumes on the batch, these are detected."""
         mock_bkp_out_per_vol_dic_with_error = {
-            'volume0': {'status': False,
-                        'output': 'some error in volume 0'},
-            'volume1': {'status': True,
-                        'output': ''},
-            'volume2': {'status': False,
-                        'output': 'some error in volume 2'}
+            'volume0': VolumeResult().set_error('some error in volume 0'),
+            'volume1': VolumeResult(status=True),
+            'volume2': VolumeResult().set_error('some error in volume 2')
         }
 
-        self.local_bkp_handler.backup_output_dict = mock_bkp_out_per_vol_dic_with_error
-
         with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.check_backup_output_errors()
+            self.local_bkp_handler.check_backup_output_errors(
+                mock_bkp_out_per_vol_dic_with_error)
 
         self.assertIn("'some error in volume 0'", cex.exception.message)
         self.assertIn("'some error in volume 2'", cex.exception.message)
@@ -1227,115 +1321,252 @@ class LocalBackupHandlerCheckBackupOutputErrorsTestCase(unittest.TestCase):
     def test_check_backup_output_errors_no_errors(self):
         """Tests that no error message is returned when no backup is provided."""
         mock_bkp_out_per_vol_dic_no_error = {
-            'volume0': {'status': True,
-                        'output': 'some error in volume 0'},
-            'volume1': {'status': True,
-                        'output': ''},
+            'volume0': VolumeResult(status=True),
+            'volume1': VolumeResult(status=True),
         }
-        self.local_bkp_handler.backup_output_dict = mock_bkp_out_per_vol_dic_no_error
+        self.assertTrue(self.local_bkp_handler.check_backup_output_errors(
+            mock_bkp_out_per_vol_dic_no_error))
 
-        self.assertTrue(self.local_bkp_handler.check_backup_output_errors())
 
-
-class LocalBackupHandlerProcessVolumeTestCase(unittest.TestCase):
-    """Test cases for process_volume method located in local_backup_handler.py."""
+class LocalBackupHandlerStartVolumeTestCase(unittest.TestCase):
+    """Test cases for start_volume method located in local_backup_handler.py."""
 
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
+        self.backup_run = get_backup_run()
 
     @mock.patch(MOCK_PACKAGE + 'create_path')
-    def test_process_volume_temp_backup_folder_not_created_exception(
-            self, mock_create_path):
+    def test_start_volume_temp_backup_folder_not_created_exception(self, mock_create_path):
         """Test when the temporary folder could no be created."""
         mock_create_path.return_value = False
-        expected_error_message = "Error while processing volume. " \
-                                 "Error Code 35. Path informed cannot be created."
 
-        processed_volume = self.local_bkp_handler.process_volume(MOCK_VOLUME_NAME, '')
+        volume_task = self.local_bkp_handler.start_volume('path/to/' + MOCK_VOLUME_NAME,
+                                                          self.backup_run)
 
-        self.assertTrue(isinstance(processed_volume, dict))
-        self.assertTrue(VOLUME_OUTPUT_KEYS.output.name in processed_volume.keys())
-        self.assertEqual(expected_error_message, processed_volume[VOLUME_OUTPUT_KEYS.output.name])
-        self.assertFalse(processed_volume[VOLUME_OUTPUT_KEYS.status.name])
+        self.assertEqual(["Error Code 35. Path informed cannot be created. "
+                          "({}/{})".format(MOCK_TMP_BKP_PATH, MOCK_VOLUME_NAME)],
+                         volume_task.error_list)
 
+    @mock.patch(MOCK_PACKAGE + 'AzCopyStreamTransfer')
     @mock.patch(MOCK_PACKAGE + 'create_path')
-    def test_process_volume_compress_encrypt_file_list_exception(self, mock_create_path):
-        """Test when the compress_encrypt_file_list function raised a problem."""
+    def test_start_volume_successful_scenario(self, mock_create_path, mock_stream_transfer):
+        """Test when the volume is ready to have its files processed."""
         mock_create_path.return_value = True
 
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file_list.side_effect = \
-            GnupgException(ExceptionCodes.EncryptError)
+        volume_task = self.local_bkp_handler.start_volume('path/to/' + MOCK_VOLUME_NAME,
+                                                          self.backup_run)
 
-        expected_error_msg = "Error while processing volume. " \
-                             "Error Code 68. File encryption could not be completed."
+        self.assertEqual(MOCK_VOLUME_NAME, volume_task.volume_name)
+        self.assertEqual(MOCK_TMP_BKP_PATH + '/' + MOCK_VOLUME_NAME, volume_task.output_path)
+        self.assertEqual([], volume_task.error_list)
+        self.assertEqual(self.backup_run, volume_task.context['backup_run'])
+        self.assertFalse(mock_stream_transfer.called)
 
-        processed_volume = self.local_bkp_handler.process_volume(MOCK_VOLUME_NAME, '')
 
-        self.assertEqual(expected_error_msg, processed_volume[VOLUME_OUTPUT_KEYS.output.name])
-        self.assertFalse(processed_volume[VOLUME_OUTPUT_KEYS.status.name])
+class LocalBackupHandlerArchiveVolumeTestCase(unittest.TestCase):
+    """Test cases for archive_volume method located in local_backup_handler.py."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.local_bkp_handler = get_local_backup_handler()
+        self.volume_task = VolumeTask(MOCK_VOLUME_NAME, 'path/to/' + MOCK_VOLUME_NAME,
+                                      MOCK_TMP_BKP_PATH + '/' + MOCK_VOLUME_NAME)
+
+    def test_archive_volume_file_error(self):
+        """Test when a file of the volume could not be processed."""
+        self.volume_task.error_list.append('mock encryption error')
+
+        processed_volume = self.local_bkp_handler.archive_volume(self.volume_task)
+
+        self.assertIn('mock encryption error', processed_volume.output)
+        self.assertTrue(processed_volume.output.startswith(
+            "Error while processing volume. "))
+        self.assertFalse(processed_volume.status)
 
     @mock.patch(MOCK_PACKAGE + 'compress_file')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    def test_process_volume_compress_file_exception(
-            self, mock_create_path, mock_compress_file):
+    def test_archive_volume_compress_file_exception(self, mock_compress_file):
         """Test when the compression of the processed volume raised a problem."""
-        mock_create_path.return_value = True
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file_list.return_value = True
-
         mock_compress_file.side_effect = UtilsException(ExceptionCodes.GzipCommandError)
 
         expected_error_msg = "Error while processing volume. " \
                              "Error Code 48. Gzip command returned error code."
 
-        processed_volume = self.local_bkp_handler.process_volume(MOCK_VOLUME_NAME, '')
+        processed_volume = self.local_bkp_handler.archive_volume(self.volume_task)
 
-        self.assertEqual(expected_error_msg, processed_volume[VOLUME_OUTPUT_KEYS.output.name])
-        self.assertFalse(processed_volume[VOLUME_OUTPUT_KEYS.status.name])
+        self.assertEqual(expected_error_msg, processed_volume.output)
+        self.assertFalse(processed_volume.status)
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'compress_file')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    def test_process_volume_temp_backup_folder_not_removed_exception(
-            self, mock_create_path, mock_compress_file, mock_remove_path):
+    def test_archive_volume_temp_backup_folder_not_removed_exception(
+            self, mock_compress_file, mock_remove_path):
         """Test when the temporary folder could not be removed."""
-        mock_create_path.return_value = True
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file_list.return_value = True
         mock_compress_file.return_value = ''
         mock_remove_path.return_value = False
 
         expected_error_msg = "Error while processing volume. " \
-                             "Error Code 60. Path(s) informed cannot be removed."
+                             "Error Code 60. Path(s) informed cannot be removed. " \
+                             "({}/{})".format(MOCK_TMP_BKP_PATH, MOCK_VOLUME_NAME)
 
-        processed_volume = self.local_bkp_handler.process_volume(MOCK_VOLUME_NAME, '')
+        processed_volume = self.local_bkp_handler.archive_volume(self.volume_task)
 
-        self.assertEqual(expected_error_msg, processed_volume[VOLUME_OUTPUT_KEYS.output.name])
-        self.assertFalse(processed_volume[VOLUME_OUTPUT_KEYS.status.name])
+        self.assertEqual(expected_error_msg, processed_volume.output)
+        self.assertFalse(processed_volume.status)
 
+    @mock.patch(MOCK_PACKAGE + 'remove_job_journal')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'compress_file')
-    @mock.patch(MOCK_PACKAGE + 'create_path')
-    def test_process_volume_successful_scenario(
-            self, mock_create_path, mock_compress_file, mock_remove_path):
-        """Test when the volume was processed successfully."""
-        mock_create_path.return_value = True
-        self.local_bkp_handler.gpg_manager.compress_encrypt_file_list.return_value = True
-
+    def test_archive_volume_successful_scenario(self, mock_compress_file, mock_remove_path,
+                                                mock_remove_job_journal):
+        """Test when the volume was archived successfully."""
         mock_tar_volume_name = 'tar_volume'
         mock_compress_file.return_value = mock_tar_volume_name
+        mock_remove_path.return_value = True
+        self.volume_task.processing_time = 2.0
+
+        processed_volume = self.local_bkp_handler.archive_volume(self.volume_task)
+
+        self.assertEqual(mock_tar_volume_name, processed_volume.volume_path)
+        self.assertEqual(2.0, processed_volume.processing_time)
+        self.assertTrue(processed_volume.status,
+                        "Should have returned status=True.")
+        mock_remove_job_journal.assert_has_calls([mock.call('tar_volume.azcopy_job'),
+                                                  mock.call('tar_volume.blocks')])
 
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'compress_file')
+    @mock.patch(MOCK_PACKAGE + 'tar_file_with_toc')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.get_volume_original_size_dict')
+    def test_archive_volume_seekable_archive(self, mock_get_volume_original_size_dict,
+                                             mock_tar_file_with_toc, mock_compress_file,
+                                             mock_remove_path):
+        """Test if the table of contents is written while the volume is archived."""
+        self.local_bkp_handler.seekable_archive = True
+        mock_tar_file_with_toc.return_value = 'tar_volume', 'tar_volume.toc'
         mock_remove_path.return_value = True
 
-        processed_volume = self.local_bkp_handler.process_volume(MOCK_VOLUME_NAME, '')
+        processed_volume = self.local_bkp_handler.archive_volume(self.volume_task)
 
-        self.assertTrue(VOLUME_OUTPUT_KEYS.volume_path.name in processed_volume.keys(),
-                        "Should have returned a dict with volume_path key.")
+        self.assertEqual('tar_volume', processed_volume.volume_path)
+        self.assertTrue(processed_volume.status)
+        mock_tar_file_with_toc.assert_called_once_with(
+            self.volume_task.output_path, MOCK_TMP_BKP_PATH,
+            mock_get_volume_original_size_dict.return_value, get_elapsed_time=[])
+        mock_compress_file.assert_not_called()
 
-        self.assertEqual(mock_tar_volume_name, processed_volume[
-            VOLUME_OUTPUT_KEYS.volume_path.name], "Should have returned status=True.")
 
-        self.assertTrue(processed_volume[VOLUME_OUTPUT_KEYS.status.name],
-                        "Should have returned status=True.")
+class LocalBackupHandlerFinishVolumeTestCase(unittest.TestCase):
+    """Test cases for finish_volume method located in local_backup_handler.py."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.local_bkp_handler = get_local_backup_handler()
+        self.backup_run = get_backup_run()
+        self.backup_run.add_pending_volume()
+        self.volume_task = VolumeTask(MOCK_VOLUME_NAME, 'path/to/' + MOCK_VOLUME_NAME,
+                                      MOCK_TMP_BKP_PATH + '/' + MOCK_VOLUME_NAME,
+                                      {'backup_run': self.backup_run})
+
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.on_volume_ready')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.archive_volume')
+    def test_finish_volume_sends_to_transfer(self, mock_archive_volume, mock_on_volume_ready):
+        """Test if the archived volume is handed to on_volume_ready."""
+        self.assertEqual(mock_on_volume_ready.return_value,
+                         self.local_bkp_handler.finish_volume(self.volume_task))
+
+        mock_archive_volume.assert_called_once_with(self.volume_task)
+        mock_on_volume_ready.assert_called_once_with(
+            (MOCK_VOLUME_NAME, mock_archive_volume.return_value, self.backup_run))
+        self.assertEqual(0, self.backup_run.pending_volume_count)
+
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.on_volume_ready')
+    @mock.patch(MOCK_PACKAGE + 'LocalBackupHandler.archive_volume')
+    def test_finish_volume_unexpected_exception(self, mock_archive_volume, mock_on_volume_ready):
+        """Test if the volume leaves the backup run even when it cannot be finished."""
+        mock_archive_volume.side_effect = ValueError('mock error')
+
+        with self.assertRaises(ValueError):
+            self.local_bkp_handler.finish_volume(self.volume_task)
+
+        self.assertFalse(mock_on_volume_ready.called)
+        self.assertEqual(0, self.backup_run.pending_volume_count)
+
+
+class LocalBackupHandlerStreamVolumeTestCase(unittest.TestCase):
+    """Test cases for the stream upload of volumes located in local_backup_handler.py."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.local_bkp_handler = get_local_backup_handler()
+        self.local_bkp_handler.stream_upload = True
+
+    def start_stream_volume(self):
+        """
+        Start a volume in stream mode.
+
+        :return: VolumeTask object.
+        """
+        return self.local_bkp_handler.start_volume('path/to/' + MOCK_VOLUME_NAME,
+                                                   get_backup_run())
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'close_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'add_file_to_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'open_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'AzCopyStreamTransfer')
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_stream_volume_successful_scenario(self, mock_create_path, mock_stream_transfer,
+                                               mock_open_tar_stream, mock_add_file_to_tar_stream,
+                                               mock_close_tar_stream, mock_remove_path):
+        """Test when the volume was processed and streamed successfully."""
+        mock_create_path.return_value = True
+        mock_remove_path.return_value = True
+        mock_stream_transfer.return_value.finish.return_value = 'mock_azcopy_output'
+
+        volume_task = self.start_stream_volume()
+        self.local_bkp_handler.on_volume_file_ready(volume_task, 'mock_file.gz.gpg')
+        processed_volume = self.local_bkp_handler.finish_stream_volume(volume_task)
+
+        self.assertTrue(processed_volume.status)
+        self.assertEqual(MOCK_VOLUME_NAME + PROCESSED_VOLUME_ENDS_WITH,
+                         processed_volume.volume_path)
+        self.assertEqual('mock_azcopy_output',
+                         processed_volume.rsync_output)
+        mock_stream_transfer.assert_called_once_with(MOCK_VOLUME_NAME + PROCESSED_VOLUME_ENDS_WITH,
+                                                     'mock_az_path')
+        mock_open_tar_stream.assert_called_once_with(
+            mock_stream_transfer.return_value.start.return_value)
+        mock_add_file_to_tar_stream.assert_called_with(
+            mock_open_tar_stream.return_value, 'mock_file.gz.gpg', arc_dir=MOCK_VOLUME_NAME,
+            remove_added=True)
+        mock_close_tar_stream.assert_called_once_with(mock_open_tar_stream.return_value)
+        self.assertFalse(mock_stream_transfer.return_value.abort.called)
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'close_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'add_file_to_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'open_tar_stream')
+    @mock.patch(MOCK_PACKAGE + 'AzCopyStreamTransfer')
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    def test_stream_volume_file_error(self, mock_create_path, mock_stream_transfer,
+                                      mock_open_tar_stream, mock_add_file_to_tar_stream,
+                                      mock_close_tar_stream, mock_remove_path):
+        """Test when a file failed, so the transfer is aborted before closing the stream."""
+        mock_create_path.return_value = True
+
+        volume_task = self.start_stream_volume()
+        volume_task.error_list.append('mock encryption error')
+        processed_volume = self.local_bkp_handler.finish_stream_volume(volume_task)
+
+        self.assertFalse(processed_volume.status)
+        self.assertTrue(processed_volume.output.startswith(
+            "Error while streaming volume. "))
+        self.assertIsNone(processed_volume.rsync_output)
+        mock_stream_transfer.return_value.abort.assert_called_once_with()
+        self.assertFalse(mock_close_tar_stream.called)
+        self.assertFalse(mock_stream_transfer.return_value.finish.called)
+        mock_remove_path.assert_called_once_with(volume_task.output_path)
 
 
 class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase):
@@ -1351,7 +1582,7 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
         """Test when there is a problem to transfer the volume to off-site."""
         mock_transfer_file.side_effect = RsyncException
         expected_error_msg = "Error while transferring volume. Error Code 30. Something went wrong."
-        mock_vol_output = {}
+        mock_vol_output = VolumeResult()
 
         transfer_result = \
             self.local_bkp_handler.transfer_backup_volume_to_offsite(
@@ -1360,12 +1591,10 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
         self.assertIsNotNone(transfer_result)
         self.assertEqual(MOCK_VOLUME_NAME, transfer_result[0])
         self.assertEqual(mock_vol_output, transfer_result[1])
-        self.assertTrue(VOLUME_OUTPUT_KEYS.status.name in mock_vol_output.keys())
-        self.assertFalse(mock_vol_output[VOLUME_OUTPUT_KEYS.status.name])
-        self.assertTrue(VOLUME_OUTPUT_KEYS.output.name in mock_vol_output.keys())
-        self.assertEqual(expected_error_msg, mock_vol_output[VOLUME_OUTPUT_KEYS.output.name])
-        self.assertTrue(VOLUME_OUTPUT_KEYS.rsync_output.name in mock_vol_output.keys())
-        self.assertTrue(VOLUME_OUTPUT_KEYS.transfer_time.name in mock_vol_output.keys())
+        self.assertFalse(mock_vol_output.status)
+        self.assertEqual(expected_error_msg, mock_vol_output.output)
+        self.assertIsNone(mock_vol_output.rsync_output)
+        self.assertEqual(0.0, mock_vol_output.transfer_time)
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
@@ -1374,7 +1603,7 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
         """Test when there is a problem to remove transferred file from NFS."""
         mock_transfer_file.return_value = None
         mock_remove_path.return_value = False
-        mock_volume_output = {}
+        mock_volume_output = VolumeResult()
         expected_error_msg = "Error while transferring volume. Error Code 60. " \
                              "Path(s) informed cannot be removed. (mock_tmp_bkp_path)"
         calls = [mock.call("Volume 'mock_tmp_bkp_path' was successfully transferred to off-site "
@@ -1386,7 +1615,7 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
 
         self.assertIsInstance(transfer_result, tuple)
         self.assertEqual(MOCK_VOLUME_NAME, transfer_result[0])
-        self.assertEqual(expected_error_msg, mock_volume_output[VOLUME_OUTPUT_KEYS.output.name])
+        self.assertEqual(expected_error_msg, mock_volume_output.output)
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
@@ -1398,7 +1627,7 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
         mock_remove_path.return_value = True
         calls = [mock.call("Volume 'mock_tmp_bkp_path' was successfully transferred to off-site "
                            "for customer mock_customer.")]
-        mock_vol_output = {}
+        mock_vol_output = VolumeResult()
 
         transfer_result = \
             self.local_bkp_handler.transfer_backup_volume_to_offsite(
@@ -1406,24 +1635,42 @@ class LocalBackupHandlerTransferBackupVolumeToOffsiteTestCase(unittest.TestCase)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
-        self.assertTrue(VOLUME_OUTPUT_KEYS.status.name in mock_vol_output.keys(),
-                        "Should have returned a dict with status key.")
-
-        self.assertTrue(mock_vol_output[VOLUME_OUTPUT_KEYS.status.name],
+        self.assertTrue(mock_vol_output.status,
                         "Should have returned status=True.")
 
-        self.assertTrue(VOLUME_OUTPUT_KEYS.output.name in mock_vol_output.keys(),
-                        "Should have returned a dict with output key.")
+        self.assertEqual("", mock_vol_output.output)
+
+        self.assertTrue(transfer_result, "Should have returned True.")
+
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    def test_transfer_backup_volume_to_offsite_cap_at_transfer_time(self, mock_remove_path):
+        """Test if the rate of the transfer is taken when the transfer starts."""
+        mock_remove_path.return_value = True
+        self.local_bkp_handler.transfer_manager = mock.Mock()
+        self.local_bkp_handler.bandwidth_limiter = mock.Mock()
+        self.local_bkp_handler.bandwidth_limiter.get_transfer_cap_mbps.return_value = 10
+
+        self.local_bkp_handler.transfer_backup_volume_to_offsite(
+            MOCK_VOLUME_NAME, VolumeResult(), MOCK_TMP_BKP_PATH, '', MOCK_REMOTE_BKP_PATH)
 
-        self.assertEqual("", mock_vol_output[VOLUME_OUTPUT_KEYS.output.name])
+        self.assertEqual(10, self.local_bkp_handler.transfer_manager.transfer_file.call_args[0][2])
 
-        self.assertTrue(VOLUME_OUTPUT_KEYS.rsync_output.name in mock_vol_output.keys(),
-                        "Should have returned a dict with rsync_output key.")
+    @mock.patch(MOCK_PACKAGE + 'remove_path')
+    @mock.patch(MOCK_PACKAGE + 'os.path.exists')
+    def test_transfer_volume_toc(self, mock_exists, mock_remove_path):
+        """Test if the table of contents is transferred and removed only when it was written."""
+        self.local_bkp_handler.transfer_manager = mock.Mock()
+        mock_exists.side_effect = [False, True]
+        mock_remove_path.return_value = True
 
-        self.assertTrue(VOLUME_OUTPUT_KEYS.transfer_time.name in mock_vol_output.keys(),
-                        "Should have returned a dict with transfer_time key.")
+        self.assertFalse(self.local_bkp_handler.transfer_volume_toc('volume.tar',
+                                                                    MOCK_REMOTE_BKP_PATH))
+        self.assertTrue(self.local_bkp_handler.transfer_volume_toc('volume.tar',
+                                                                   MOCK_REMOTE_BKP_PATH, 10))
 
-        self.assertTrue(transfer_result, "Should have returned True.")
+        self.local_bkp_handler.transfer_manager.transfer_file.assert_called_once_with(
+            'volume.tar.toc', MOCK_REMOTE_BKP_PATH, 10)
+        mock_remove_path.assert_called_once_with('volume.tar.toc')
 
 
 class LocalBackupHandlerCleanLocalBackupTestCase(unittest.TestCase):
@@ -1475,10 +1722,12 @@ class LocalBackupHandlerCleanLocalBackupTestCase(unittest.TestCase):
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
+    @mock.patch(MOCK_PACKAGE + 'evict_hash_cache_path')
     @mock.patch(MOCK_PACKAGE + 'remove_path')
     @mock.patch(MOCK_PACKAGE + 'os')
-    def test_clean_local_backup_remove_backup_success_case(self, mock_os, mock_remove_path):
-        """Test when the backup was successfully deleted."""
+    def test_clean_local_backup_remove_backup_success_case(self, mock_os, mock_remove_path,
+                                                           mock_evict_hash_cache_path):
+        """Test when the backup was successfully deleted and its cached hashes are evicted."""
         mock_os.listdir.return_value = ['bkp0', 'bkp1']
         mock_os.path.isfile.return_value = False
         mock_remove_path.return_value = True
@@ -1493,6 +1742,7 @@ class LocalBackupHandlerCleanLocalBackupTestCase(unittest.TestCase):
 
         self.assertTrue(clean_result[0], "Should have returned True.")
         self.assertEqual(expected_output_message, clean_result[1])
+        mock_evict_hash_cache_path.assert_called_once_with('bkp0', self.local_bkp_handler.logger)
 
         self.local_bkp_handler.logger.info.assert_has_calls(calls)
 
@@ -1580,66 +1830,63 @@ class LocalBackupHandlerGetLocalBackupListTestCase(unittest.TestCase):
         self.assertEqual(['is_valid_first', 'is_valid_second', 'is_valid_third'], get_list_return)
 
 
-class LocalBackupHandlerCreateTransferPickleFileTestCase(unittest.TestCase):
-    """Test Cases for create_transfer_pickle_file method located in local_backup_handler.py."""
+class LocalBackupHandlerCreateTransferPickleFilesTestCase(unittest.TestCase):
+    """Test Cases for create_transfer_pickle_files method located in local_backup_handler.py."""
 
     def setUp(self):
         """Set up the test constants."""
         self.local_bkp_handler = get_local_backup_handler()
 
     @mock.patch(MOCK_PACKAGE + 'create_pickle_file')
-    def test_create_transfer_pickle_file_creation_exception(self, mock_create_pickle_file):
+    def test_create_transfer_pickle_files_creation_exception(self, mock_create_pickle_file):
         """Test when there is an error in the pickle file creation."""
         mock_exception_message = 'Mock create pickle exception.'
         mock_create_pickle_file.side_effect = Exception(mock_exception_message)
 
         with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.create_transfer_pickle_file('', [], '')
+            self.local_bkp_handler.create_transfer_pickle_files([('', [])], '')
 
         self.assertEqual(mock_exception_message, cex.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
+    @mock.patch(MOCK_PACKAGE + 'AzCopyManager.transfer_file_list')
     @mock.patch(MOCK_PACKAGE + 'create_pickle_file')
-    def test_create_transfer_pickle_file_transfer_exception(
+    def test_create_transfer_pickle_files_transfer_exception(
             self, mock_create_pickle_file, mock_transfer_file):
         """Test when there is an error in the transferring of the file."""
         mock_create_pickle_file.return_value = ''
 
-        mock_exception_message = 'Mock transfer exception.'
-        mock_transfer_file.side_effect = Exception(mock_exception_message)
+        mock_transfer_file.return_value = {'': 'Mock transfer error.'}
 
-        with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.create_transfer_pickle_file('', [], '')
-
-        self.assertEqual(mock_exception_message, cex.exception.message)
+        with self.assertRaises(AzCopyException):
+            self.local_bkp_handler.create_transfer_pickle_files([('', [])], '')
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
-    @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
+    @mock.patch(MOCK_PACKAGE + 'AzCopyManager.transfer_file_list')
     @mock.patch(MOCK_PACKAGE + 'create_pickle_file')
-    def test_create_transfer_pickle_file_removal_exception(
+    def test_create_transfer_pickle_files_removal_exception(
             self, mock_create_pickle_file, mock_transfer_file, mock_remove_path):
         """Test when there is an error in the removal of the pickle file."""
         mock_create_pickle_file.return_value = ''
-        mock_transfer_file.return_value = None
+        mock_transfer_file.return_value = {'': None}
 
         mock_exception_message = 'Mock remove exception.'
         mock_remove_path.side_effect = Exception(mock_exception_message)
 
         with self.assertRaises(Exception) as cex:
-            self.local_bkp_handler.create_transfer_pickle_file('', [], '')
+            self.local_bkp_handler.create_transfer_pickle_files([('', [])], '')
 
         self.assertEqual(mock_exception_message, cex.exception.message)
 
     @mock.patch(MOCK_PACKAGE + 'remove_path')
-    @mock.patch(MOCK_PACKAGE + 'RsyncManager.transfer_file')
+    @mock.patch(MOCK_PACKAGE + 'AzCopyManager.transfer_file_list')
     @mock.patch(MOCK_PACKAGE + 'create_pickle_file')
-    def test_create_transfer_pickle_file_successful_case(
+    def test_create_transfer_pickle_files_successful_case(
             self, mock_create_pickle_file, mock_transfer_file, mock_remove_path):
         """Test when the pickle file was created, transferred and removed successfully."""
         mock_create_pickle_file.return_value = ''
-        mock_transfer_file.return_value = None
+        mock_transfer_file.return_value = {'': None}
         mock_remove_path.return_value = True
 
-        result = self.local_bkp_handler.create_transfer_pickle_file('', [], '')
+        result = self.local_bkp_handler.create_transfer_pickle_files([('', [])], '')
 
         self.assertTrue(result, "Should have returned true.")
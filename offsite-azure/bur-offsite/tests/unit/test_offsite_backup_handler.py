@@ -13,17 +13,22 @@
 """Module for testing backup/offsite_backup_handler.py script."""
 
 import collections
+import os
+import shutil
+import tempfile
 import unittest
 
 import mock
 
 from backup.backup_settings import EnmConfig
-from backup.constants import VOLUME_OUTPUT_KEYS
-from backup.exceptions import DownloadBackupException, ExceptionCodes, RsyncException, \
-    UtilsException
-from backup.offsite_backup_handler import download_volume_from_offsite, OffsiteBackupHandler, \
-    unwrapper_process_volume_function
+from backup.exceptions import BlobTransferException, DownloadBackupException, ExceptionCodes, \
+    GnupgException, RsyncException, UtilsException
+from backup.offsite_backup_handler import download_volume_from_offsite, get_file_member_filter, \
+    init_offsite_backup_handler_worker, OffsiteBackupHandler, run_volume_process_task, \
+    run_volume_stream_task, VolumeProcessTask, VolumeStreamTask, WORKER_CONTEXT
+from backup.utils.compress import TarTocEntry
 from backup.utils.decorator import get_undecorated_class_method
+from backup.volume_result import VolumeResult
 
 MOCK_PACKAGE = 'backup.offsite_backup_handler.'
 
@@ -41,12 +46,26 @@ MOCK_FILE_LIST_DESCRIPTOR_FILE_PATH = 'mock_file_list_descriptor_file'
 MOCK_SUCCESS_FLAG = 'mock_success_flag'
 MOCK_FILE = 'mock_file'
 MOCK_RETENTION = 4
+MOCK_REMOTE_ROOT_PATH = '/mock/offsite/rpath'
+MOCK_CUSTOMER_ROOT_PATH = MOCK_REMOTE_ROOT_PATH + '/' + MOCK_CUSTOMER_NAME
+MOCK_CONTAINER_PATH = 'https://mock.blob.core.windows.net/container'
 
 NUMBER_THREADS = 1
 NUMBER_PROCESSORS = 1
 NUMBER_TRANSFER_PROCESSORS = 1
 
 
+def get_backup_age_dict(backup_path_list):
+    """
+    Get the age of a list of backups, from the newest to the oldest.
+
+    :param backup_path_list: list of backup paths.
+    :return: dictionary with the age of each backup path.
+    """
+    return {backup_path: float(len(backup_path_list) - index)
+            for index, backup_path in enumerate(backup_path_list)}
+
+
 def create_offsite_bkp_object():
     """Create an OffsiteBackupHandler object for tests."""
     with mock.patch('backup.gnupg_manager.GnupgManager') as mock_gnupg_manager:
@@ -67,7 +86,10 @@ def create_offsite_bkp_object():
                                                        NUMBER_THREADS,
                                                        NUMBER_PROCESSORS,
                                                        NUMBER_TRANSFER_PROCESSORS,
-                                                       logger)
+                                                       logger,
+                                                       offsite_catalog_path=None)
+    offsite_bkp_handler.remote_root_backup_path = MOCK_REMOTE_ROOT_PATH
+    offsite_bkp_handler.remote_container_path = MOCK_CONTAINER_PATH
     return offsite_bkp_handler
 
 
@@ -103,57 +125,107 @@ class OffsiteBkpHandlerDownloadVolumeFromOffsiteTestCase(unittest.TestCase):
 
         mock_transfer_file.return_value = rsync_sample_output
 
-        volume_output_expected_result = dict()
-
-        volume_output_expected_result[
-            VOLUME_OUTPUT_KEYS.status.name] = True
-        volume_output_expected_result[
-            VOLUME_OUTPUT_KEYS.rsync_output.name] = rsync_sample_output
-        volume_output_expected_result[
-            VOLUME_OUTPUT_KEYS.transfer_time.name] = 0.0
+        volume_output_expected_result = VolumeResult(status=True)
+        volume_output_expected_result.rsync_output = rsync_sample_output
 
         result = download_volume_from_offsite(MOCK_VOLUME, MOCK_VOLUME, MOCK_BKP_PATH,
                                               MOCK_BKP_DESTINATION)
 
         self.assertEqual(MOCK_VOLUME, result[0])
         self.assertEqual(MOCK_VOLUME, result[1])
-        self.assertEqual(dict, type(result[2]))
+        self.assertEqual(VolumeResult, type(result[2]))
         self.assertEqual(volume_output_expected_result, result[2])
         self.assertEqual(MOCK_BKP_DESTINATION, result[3])
 
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    @mock.patch(MOCK_PACKAGE + 'get_transfer_manager')
+    def test_download_volume_from_offsite_cap_when_started(self, mock_get_transfer_manager,
+                                                            mock_progress_monitor):
+        """Test if the rate of the download is taken from the limiter when the download starts."""
+        mock_limiter = mock.Mock()
+        mock_limiter.get_transfer_cap_mbps.side_effect = [10, 20]
+
+        for _ in range(2):
+            download_volume_from_offsite(MOCK_VOLUME, MOCK_VOLUME, MOCK_BKP_PATH,
+                                         MOCK_BKP_DESTINATION, MOCK_REMOTE_DIR,
+                                         bandwidth_limiter=mock_limiter, transfer_backend='native')
+
+        mock_get_transfer_manager.assert_called_with('native')
+        self.assertEqual([mock.call(MOCK_REMOTE_DIR, MOCK_BKP_DESTINATION, cap_mbps,
+                                    on_progress=mock_progress_monitor.return_value)
+                          for cap_mbps in [10, 20]],
+                         mock_get_transfer_manager.return_value.transfer_file.call_args_list)
+
+
+class OffsiteBkpHandlerGetFileMemberFilterTestCase(unittest.TestCase):
+    """Class to test get_file_member_filter() function."""
 
-class OffsiteBkpHandlerUnwrapperProcessVolumeTestCase(unittest.TestCase):
-    """Test cases for unwrapper_local_backup_handler_function function."""
+    def test_get_file_member_filter(self):
+        """Test if only the file and the metadata file of the volume are restored."""
+        member_filter = get_file_member_filter(MOCK_VOLUME, MOCK_FILE)
+
+        self.assertTrue(member_filter('mock_volume/mock_file.gz.gpg'))
+        self.assertTrue(member_filter('./mock_volume/volume_metadata.gz.gpg'))
+        self.assertFalse(member_filter('mock_volume'))
+        self.assertFalse(member_filter('mock_volume/other_file.gz.gpg'))
+        self.assertFalse(member_filter('mock_volume/sub/mock_file.gz.gpg'))
+        self.assertFalse(member_filter('other_volume/volume_metadata.gz.gpg'))
+
+
+class OffsiteBkpHandlerRunVolumeProcessTaskTestCase(unittest.TestCase):
+    """Test cases for run_volume_process_task function."""
 
     def setUp(self):
         """Set up the test constants."""
         self.offsite_bkp_handler = create_offsite_bkp_object()
 
+    def tearDown(self):
+        """Clear the worker context."""
+        WORKER_CONTEXT.clear()
+
     @mock.patch(MOCK_PACKAGE + 'dill.loads')
-    def test_unwrapper_process_volume_function_invalid_instance_exception(
-            self, mock_dill_loads):
-        """Test when an invalid instance of offsite_backup_handler is loaded by dill."""
+    def test_run_volume_process_task_invalid_instance_exception(self, mock_dill_loads):
+        """Test when an invalid instance of offsite_backup_handler is loaded by the worker."""
         mock_dill_loads.return_value = None
         expected_error_msg = "Could not unwrap backup handler object."
 
+        init_offsite_backup_handler_worker('')
+
         with self.assertRaises(DownloadBackupException) as cex:
-            unwrapper_process_volume_function(None, '')
+            run_volume_process_task(VolumeProcessTask(MOCK_VOLUME, MOCK_BKP_DESTINATION, {}))
 
         self.assertEqual(expected_error_msg, cex.exception.message)
 
-    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.process_volume')
     @mock.patch(MOCK_PACKAGE + 'dill.loads')
-    def test_unwrapper_process_volume_function_valid_instance(
-            self, mock_dill_loads, mock_process_volume):
-        """Test when a valid instance of offsite backup handler is loaded by dill."""
-        mock_process_volume.return_value = None
-        self.offsite_bkp_handler.process_volume = mock_process_volume
+    def test_run_volume_process_task_valid_instance(self, mock_dill_loads):
+        """Test if the handler is loaded once and reused by every task of the worker."""
+        self.offsite_bkp_handler.process_volume = mock.Mock(return_value=None)
+        mock_dill_loads.return_value = self.offsite_bkp_handler
+
+        init_offsite_backup_handler_worker('mock_serialized_object')
 
+        for _ in range(2):
+            result = run_volume_process_task(VolumeProcessTask(MOCK_VOLUME, MOCK_BKP_DESTINATION,
+                                                               {}))
+            self.assertIsNone(result, "Should have returned None.")
+
+        mock_dill_loads.assert_called_once_with('mock_serialized_object')
+        self.offsite_bkp_handler.process_volume.assert_called_with(MOCK_VOLUME,
+                                                                   MOCK_BKP_DESTINATION, {}, None)
+
+    @mock.patch(MOCK_PACKAGE + 'dill.loads')
+    def test_run_volume_stream_task_valid_instance(self, mock_dill_loads):
+        """Test if the stream task is run by the handler loaded by the worker."""
+        self.offsite_bkp_handler.process_volume_stream = mock.Mock(return_value=None)
         mock_dill_loads.return_value = self.offsite_bkp_handler
 
-        result = unwrapper_process_volume_function(self.offsite_bkp_handler, '')
+        init_offsite_backup_handler_worker('mock_serialized_object')
+
+        self.assertIsNone(run_volume_stream_task(VolumeStreamTask(
+            MOCK_VOLUME, MOCK_REMOTE_DIR, MOCK_BKP_DESTINATION)))
 
-        self.assertIsNone(result, "Should have returned None.")
+        self.offsite_bkp_handler.process_volume_stream.assert_called_once_with(
+            MOCK_VOLUME, MOCK_REMOTE_DIR, MOCK_BKP_DESTINATION, None)
 
 
 class OffsiteBkpHandlerExecuteDownloadBkpFromOffsiteTestCase(unittest.TestCase):
@@ -280,12 +352,10 @@ class OffsiteBkpHandlerGetOffsiteBkpDictTestCase(unittest.TestCase):
         """Set up the test constants."""
         self.offsite_bkp_handler = create_offsite_bkp_object()
 
-    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_get_offsite_bkp_dict_none_config_return_value(self, mock_os, mock_run_remote_command):
+    @mock.patch(MOCK_PACKAGE + 'get_remote_sub_dir_dict')
+    def test_get_offsite_bkp_dict_none_config_return_value(self, mock_get_remote_sub_dir_dict):
         """Test the info log and the return value when customer_config_query=None."""
-        mock_os.path.join.return_value = MOCK_BKP_DESTINATION
-        mock_run_remote_command.return_value = ("MOCK_BKP_DESTINATION", "")
+        mock_get_remote_sub_dir_dict.return_value = {MOCK_CUSTOMER_ROOT_PATH: []}
 
         enm_config = EnmConfig(MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION)
         self.offsite_bkp_handler.customer_config_dict = {MOCK_CUSTOMER_NAME: enm_config}
@@ -297,37 +367,33 @@ class OffsiteBkpHandlerGetOffsiteBkpDictTestCase(unittest.TestCase):
 
         self.offsite_bkp_handler.logger.info.assert_has_calls(calls)
 
-    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_get_offsite_bkp_dict_stdout_return_value(self, mock_os, mock_run_remote_command):
+    @mock.patch(MOCK_PACKAGE + 'get_remote_sub_dir_dict')
+    def test_get_offsite_bkp_dict_stdout_return_value(self, mock_get_remote_sub_dir_dict):
         """Test the return value when customer_config_query is not None."""
         enm_config = EnmConfig(MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION)
         self.offsite_bkp_handler.customer_config_dict = {MOCK_CUSTOMER_NAME: enm_config}
 
-        mock_os.path.join.return_value = MOCK_BKP_DESTINATION
-        mock_run_remote_command.return_value = ("MOCK_BKP_DESTINATION", "")
+        mock_get_remote_sub_dir_dict.return_value = {
+            MOCK_CUSTOMER_ROOT_PATH: [(MOCK_BKP_PATH, 1.0)]}
 
         result = self.offsite_bkp_handler.get_offsite_backup_dict([enm_config])
 
-        self.assertEqual(1, len(result[MOCK_CUSTOMER_NAME]))
+        self.assertEqual([MOCK_BKP_PATH], result[MOCK_CUSTOMER_NAME])
 
-    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_get_offsite_bkp_dict_empty_stdout_return_value(self, mock_os, mock_run_remote_command):
-        """Test the return value when stdout is empty."""
+    @mock.patch(MOCK_PACKAGE + 'get_remote_sub_dir_dict')
+    def test_get_offsite_bkp_dict_empty_stdout_return_value(self, mock_get_remote_sub_dir_dict):
+        """Test the return value when there is no backup on off-site."""
         enm_config = EnmConfig(MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION)
         self.offsite_bkp_handler.customer_config_dict = {MOCK_CUSTOMER_NAME: enm_config}
 
-        mock_os.path.join.return_value = MOCK_BKP_DESTINATION
-        mock_run_remote_command.return_value = ("", "")
+        mock_get_remote_sub_dir_dict.return_value = {MOCK_CUSTOMER_ROOT_PATH: []}
 
         result = self.offsite_bkp_handler.get_offsite_backup_dict()
 
         self.assertEqual(0, len(result[MOCK_CUSTOMER_NAME]))
 
-    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
-    @mock.patch(MOCK_PACKAGE + 'os')
-    def test_get_offsite_bkp_dict_returned_dictionary(self, mock_os, mock_run_remote_command):
+    @mock.patch(MOCK_PACKAGE + 'get_remote_sub_dir_dict')
+    def test_get_offsite_bkp_dict_returned_dictionary(self, mock_get_remote_sub_dir_dict):
         """Test the returned dictionary is as expected when customer_config_query is None."""
         enm_config_0 = EnmConfig("customer_0", MOCK_BKP_DESTINATION)
         enm_config_1 = EnmConfig("customer_1", MOCK_BKP_DESTINATION)
@@ -339,9 +405,9 @@ class OffsiteBkpHandlerGetOffsiteBkpDictTestCase(unittest.TestCase):
         expected_dictionary["customer_0"] = ["path0_1", "path0_2"]
         expected_dictionary["customer_1"] = ["path1_1", "path1_2"]
 
-        mock_os.path.join.return_value = MOCK_BKP_DESTINATION
-        mock_run_remote_command.return_value = (
-            "path0_1\npath0_2\nEND-OF-COMMAND\npath1_1\npath1_2\nEND-OF-COMMAND\n", "")
+        mock_get_remote_sub_dir_dict.return_value = {
+            MOCK_REMOTE_ROOT_PATH + "/customer_0": [("path0_1", 2.0), ("path0_2", 1.0)],
+            MOCK_REMOTE_ROOT_PATH + "/customer_1": [("path1_1", 2.0), ("path1_2", 1.0)]}
 
         result = self.offsite_bkp_handler.get_offsite_backup_dict()
 
@@ -350,6 +416,73 @@ class OffsiteBkpHandlerGetOffsiteBkpDictTestCase(unittest.TestCase):
         self.assertEqual(expected_dictionary["customer_1"], result["customer_1"])
 
 
+class OffsiteBkpHandlerOffsiteCatalogTestCase(unittest.TestCase):
+    """Class for testing the use of the off-site catalog by OffsiteBackupHandler class."""
+
+    def setUp(self):
+        """Set up a handler using a catalog in a temporary folder."""
+        self.test_dir = tempfile.mkdtemp()
+
+        self.offsite_bkp_handler = create_offsite_bkp_object()
+        self.offsite_bkp_handler.offsite_catalog_path = os.path.join(self.test_dir,
+                                                                     'catalog.db')
+        self.offsite_bkp_handler.customer_config_dict = {
+            MOCK_CUSTOMER_NAME: EnmConfig(MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION)}
+
+        sub_dir_patcher = mock.patch(MOCK_PACKAGE + 'get_remote_sub_dir_dict')
+        self.mock_get_remote_sub_dir_dict = sub_dir_patcher.start()
+        self.addCleanup(sub_dir_patcher.stop)
+
+        self.mock_get_remote_sub_dir_dict.return_value = {MOCK_CUSTOMER_ROOT_PATH: [
+            (MOCK_CUSTOMER_ROOT_PATH + '/backup_2', 2.0),
+            (MOCK_CUSTOMER_ROOT_PATH + '/backup_1', 1.0)]}
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_get_offsite_bkp_dict_queries_offsite_once(self):
+        """Test if off-site is only queried again while the catalog is stale or on refresh."""
+        expected_list = [MOCK_CUSTOMER_ROOT_PATH + '/backup_2',
+                         MOCK_CUSTOMER_ROOT_PATH + '/backup_1']
+
+        self.assertEqual(expected_list, self.offsite_bkp_handler.get_offsite_backup_dict()[
+            MOCK_CUSTOMER_NAME])
+        self.assertEqual(expected_list, self.offsite_bkp_handler.get_offsite_backup_dict()[
+            MOCK_CUSTOMER_NAME])
+        self.assertEqual(1, self.mock_get_remote_sub_dir_dict.call_count)
+
+        self.mock_get_remote_sub_dir_dict.return_value = {MOCK_CUSTOMER_ROOT_PATH: []}
+
+        self.assertEqual([], self.offsite_bkp_handler.get_offsite_backup_dict(refresh=True)[
+            MOCK_CUSTOMER_NAME])
+
+    def test_find_offsite_backup_refreshes_missing_tag(self):
+        """Test if a tag missing from the catalog is looked up again on off-site."""
+        self.offsite_bkp_handler.get_offsite_backup_dict()
+
+        self.mock_get_remote_sub_dir_dict.return_value[MOCK_CUSTOMER_ROOT_PATH].insert(
+            0, (MOCK_CUSTOMER_ROOT_PATH + '/backup_3', 3.0))
+
+        self.assertEqual((MOCK_CUSTOMER_NAME, MOCK_CUSTOMER_ROOT_PATH + '/backup_3',
+                          MOCK_CONTAINER_PATH + '/mock_customer/backup_3'),
+                         self.offsite_bkp_handler.find_offsite_backup(None, 'backup_3'))
+        self.assertEqual(2, self.mock_get_remote_sub_dir_dict.call_count)
+
+        self.assertEqual(("", "", ""), self.offsite_bkp_handler.find_offsite_backup(None,
+                                                                                     'backup_4'))
+
+    def test_remove_offsite_catalog_backups(self):
+        """Test if backups removed from off-site are no longer listed."""
+        self.offsite_bkp_handler.get_offsite_backup_dict()
+
+        self.assertEqual(1, self.offsite_bkp_handler.remove_offsite_catalog_backups(
+            [MOCK_CUSTOMER_ROOT_PATH + '/backup_1/']))
+
+        self.assertEqual([MOCK_CUSTOMER_ROOT_PATH + '/backup_2'],
+                         self.offsite_bkp_handler.get_offsite_backup_dict()[MOCK_CUSTOMER_NAME])
+
+
 class OffsiteBkpHandlerDownloadProcessBkpTestCase(unittest.TestCase):
     """Class to test download_process_backup() method from OffsiteBackupHandler class."""
 
@@ -519,6 +652,37 @@ class OffsiteBkpHandlerDownloadProcessBkpTestCase(unittest.TestCase):
         self.assertEqual(expected_error_msg, cex.exception.message)
 
 
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.check_backup_download_errors')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.process_backup_metadata_files')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.check_volumes_for_download')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.check_offsite_backup_success_flag')
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    @mock.patch(MOCK_PACKAGE + 'check_local_disk_space_for_download')
+    def test_download_process_backup_stream_restore(
+            self, mock_check_local_disk_space_for_download, mock_create_path,
+            mock_check_offsite_backup_success_flag, mock_check_volumes_for_download,
+            mock_process_backup_metadata_files, mock_check_backup_download_errors):
+        """Assert if the missing volumes are restored while downloaded, by the stream pool."""
+        volume_list = ['volume1.tar', 'volume2.tar']
+        mock_check_volumes_for_download.return_value = volume_list, volume_list
+        self.offsite_bkp_handler.stream_restore = True
+
+        with mock.patch(MOCK_PACKAGE + 'mp.Pool') as mock_pool:
+            self.offsite_bkp_handler.download_process_backup(MOCK_CUSTOMER_NAME, MOCK_BKP_TAG,
+                                                             MOCK_BKP_PATH, MOCK_BKP_DESTINATION,
+                                                             MOCK_CONTAINER_PATH)
+
+        stream_call_list = mock_pool.return_value.apply_async.call_args_list
+
+        self.assertEqual(2, len(stream_call_list))
+        self.assertEqual(run_volume_stream_task, stream_call_list[0][0][0])
+        self.assertEqual(VolumeStreamTask('volume2.tar', MOCK_CONTAINER_PATH + '/volume2.tar',
+                                          os.path.join(MOCK_BKP_DESTINATION, MOCK_BKP_TAG)),
+                         stream_call_list[1][0][1][0])
+        self.assertEqual(self.offsite_bkp_handler.on_volume_processed,
+                         stream_call_list[1][1]['callback'])
+
+
 class OffsiteBkpHandlerCheckOffsiteBackupSuccessFlagTestCase(unittest.TestCase):
     """Class to test check_offsite_backup_success_flag() method from OffsiteBackupHandler class."""
 
@@ -752,9 +916,7 @@ class OffsiteBkpHandlerOnVolumeDownloadedTestCase(unittest.TestCase):
 
     def test_on_volume_downloaded_failed_download(self):
         """Test to check when the callback when the download is failed."""
-        mock_volume_output = {VOLUME_OUTPUT_KEYS.status.name: False,
-                              VOLUME_OUTPUT_KEYS.rsync_output.name: None,
-                              VOLUME_OUTPUT_KEYS.transfer_time.name: 0.0}
+        mock_volume_output = VolumeResult()
 
         mock_backup_output_dict = {'mock_volume': mock_volume_output}
 
@@ -781,7 +943,7 @@ class OffsiteBkpHandlerOnVolumeDownloadedTestCase(unittest.TestCase):
         self.offsite_bkp_handler.process_pool = mock_mp_pool
 
         mock_download_volume_from_offsite_return = [MOCK_VOLUME, MOCK_VOLUME,
-                                                    {VOLUME_OUTPUT_KEYS.status.name: True},
+                                                    VolumeResult(status=True),
                                                     MOCK_BKP_DESTINATION]
 
         result = self.offsite_bkp_handler.on_volume_downloaded(
@@ -847,6 +1009,38 @@ class OffsiteBkpHandlerProcessBkpMetadataFilesTestCase(unittest.TestCase):
         self.offsite_bkp_handler.logger.info.assert_has_calls(calls)
 
 
+    @mock.patch(MOCK_PACKAGE + 'check_is_processed_volume')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.retrieve_remote_pickle_file_content')
+    def test_check_volumes_for_download_selected_volume(
+            self, mock_retrieve_remote_pickle_file_content, mock_check_is_processed_volume):
+        """Test if only the volume to be restored is checked and downloaded."""
+        mock_retrieve_remote_pickle_file_content.return_value = ['volume1', 'volume2']
+        mock_check_is_processed_volume.return_value = False
+        self.offsite_bkp_handler.restore_volume_name = 'volume2'
+
+        volume_list, missing_volume_list = self.offsite_bkp_handler.check_volumes_for_download(
+            MOCK_REMOTE_DIR, MOCK_CONTAINER_PATH, MOCK_BKP_DOWNLOAD)
+
+        self.assertEqual(['volume2'], volume_list)
+        self.assertEqual(['volume2.tar'], missing_volume_list)
+        mock_check_is_processed_volume.assert_called_once_with(
+            os.path.join(MOCK_BKP_DOWNLOAD, 'volume2'), self.offsite_bkp_handler.logger)
+
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.retrieve_remote_pickle_file_content')
+    def test_check_volumes_for_download_selected_volume_not_found_exception(
+            self, mock_retrieve_remote_pickle_file_content):
+        """Assert if raises an exception when the volume to be restored is not in the backup."""
+        mock_retrieve_remote_pickle_file_content.return_value = ['volume1']
+        self.offsite_bkp_handler.restore_volume_name = 'volume2'
+
+        with self.assertRaises(DownloadBackupException) as raised:
+            self.offsite_bkp_handler.check_volumes_for_download(
+                MOCK_REMOTE_DIR, MOCK_CONTAINER_PATH, MOCK_BKP_DOWNLOAD)
+
+        self.assertEqual("Volume not found in the backup. (['volume2', 'mock_remote_dir'])",
+                         raised.exception.message)
+
+
 class OffsiteBkpHandlerCheckBackupDownloadErrorsTestCase(unittest.TestCase):
     """Class to test check_backup_download_errors() method from OffsiteBackupHandler class."""
 
@@ -857,7 +1051,7 @@ class OffsiteBkpHandlerCheckBackupDownloadErrorsTestCase(unittest.TestCase):
     @mock.patch(MOCK_PACKAGE + 'os')
     def test_check_backup_download_errors_output_exception(self, mock_os):
         """Test to check the raise of exception and error log."""
-        mock_dict = {MOCK_CUSTOMER_NAME: {'status': False, 'output': 'mock_output'}}
+        mock_dict = {MOCK_CUSTOMER_NAME: VolumeResult().set_error('mock_output')}
         calls = [mock.call('mock_output')]
         expected_error_msg = "Failed to process downloaded backup. (['mock_output'])"
 
@@ -899,7 +1093,7 @@ class OffsiteBkpHandlerCheckBackupDownloadErrorsTestCase(unittest.TestCase):
                              "(mock_bkp_dest)"
 
         self.offsite_handler.backup_output_dict = \
-            {MOCK_CUSTOMER_NAME: {'status': True, 'output': 'mock_output'}}
+            {MOCK_CUSTOMER_NAME: VolumeResult(status=True)}
 
         with self.assertRaises(DownloadBackupException) as cex:
             self.offsite_handler.check_backup_download_errors(
@@ -917,13 +1111,33 @@ class OffsiteBkpHandlerCheckBackupDownloadErrorsTestCase(unittest.TestCase):
         mock_validate_backup_per_volume.return_value = True
 
         self.offsite_handler.backup_output_dict = \
-            {MOCK_CUSTOMER_NAME: {'status': True, 'output': 'mock_output'}}
+            {MOCK_CUSTOMER_NAME: VolumeResult(status=True)}
 
         result = self.offsite_handler.check_backup_download_errors(
             MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION, [MOCK_VOLUME])
 
         self.assertTrue(result)
 
+    @mock.patch(MOCK_PACKAGE + 'validate_volume_file_metadata')
+    @mock.patch(MOCK_PACKAGE + 'validate_backup_per_volume')
+    @mock.patch(MOCK_PACKAGE + 'os.path.exists')
+    def test_check_backup_download_errors_selected_file(
+            self, mock_exists, mock_validate_backup_per_volume,
+            mock_validate_volume_file_metadata):
+        """Test if only the restored file is validated against the volume metadata."""
+        mock_exists.return_value = True
+        mock_validate_volume_file_metadata.return_value = True
+        self.offsite_handler.restore_volume_name = MOCK_VOLUME
+        self.offsite_handler.restore_file_name = MOCK_FILE
+
+        self.assertTrue(self.offsite_handler.check_backup_download_errors(
+            MOCK_CUSTOMER_NAME, MOCK_BKP_DESTINATION, [MOCK_VOLUME]))
+
+        mock_validate_backup_per_volume.assert_not_called()
+        mock_validate_volume_file_metadata.assert_called_once_with(
+            os.path.join(MOCK_BKP_DESTINATION, MOCK_VOLUME), MOCK_FILE,
+            self.offsite_handler.logger, {})
+
 
 class OffsiteBkpHandlerProcessVolumeTestCase(unittest.TestCase):
     """Class to test execute_download_backup_from_offsite method from OffsiteBackupHandler class."""
@@ -945,7 +1159,8 @@ class OffsiteBkpHandlerProcessVolumeTestCase(unittest.TestCase):
         calls = [mock.call("Extracting volume mock_bkp_path."),
                  mock.call("Decrypting and decompressing files from volume 'mock_bkp_path'.")]
 
-        self.assertTrue(self.offsite_bkp_handler.process_volume(MOCK_VOLUME, MOCK_BKP_PATH, {}))
+        self.assertTrue(self.offsite_bkp_handler.process_volume(MOCK_VOLUME, MOCK_BKP_PATH,
+                                                              VolumeResult()))
 
         self.offsite_bkp_handler.logger.info.assert_has_calls(calls)
 
@@ -960,11 +1175,193 @@ class OffsiteBkpHandlerProcessVolumeTestCase(unittest.TestCase):
                     "Path informed is not a valid formatted folder or file. (mock_volume)."
         output = "Error while processing volume. {}".format(error_msg)
 
-        result = self.offsite_bkp_handler.process_volume(MOCK_VOLUME, MOCK_BKP_PATH, {})
+        result = self.offsite_bkp_handler.process_volume(MOCK_VOLUME, MOCK_BKP_PATH,
+                                                         VolumeResult())
 
         self.assertIsNotNone(result, "Should have returned a tuple.")
         self.assertEqual(MOCK_VOLUME, result[0])
-        self.assertEqual(output, result[1]['output'])
+        self.assertEqual(output, result[1].output)
+        self.assertFalse(result[1].status)
+
+    def test_process_volume_file_not_found(self):
+        """Test if the archive is removed and the error reported when the file is not restored."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        archive_path = os.path.join(temp_dir, MOCK_VOLUME + '.tar')
+        open(archive_path, 'w').close()
+
+        volume_name, volume_output = self.offsite_bkp_handler.process_volume(
+            MOCK_VOLUME + '.tar', temp_dir, VolumeResult(), MOCK_FILE)
+
+        self.assertEqual(MOCK_VOLUME + '.tar', volume_name)
+        self.assertFalse(volume_output.status)
+        self.assertIn("File not found in the volume.", volume_output.output)
+        self.assertFalse(os.path.exists(archive_path))
+
+        tar_stream_call = self.offsite_bkp_handler.gpg_manager.decrypt_decompress_tar_stream
+        member_filter = tar_stream_call.call_args[1]['member_filter']
+        self.assertTrue(member_filter('mock_volume/mock_file.gz.gpg'))
+
+
+class OffsiteBkpHandlerProcessVolumeStreamTestCase(unittest.TestCase):
+    """Class to test process_volume_stream method from OffsiteBackupHandler class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.offsite_bkp_handler = create_offsite_bkp_object()
+        self.offsite_bkp_handler.transfer_manager = mock.Mock()
+        self.mock_download_stream = \
+            self.offsite_bkp_handler.transfer_manager.get_download_stream.return_value
+
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    def test_process_volume_stream_success(self, mock_progress_monitor):
+        """Test if the volume is restored from the download stream, which is then finished."""
+        self.offsite_bkp_handler.bandwidth_limiter = mock.Mock()
+        self.offsite_bkp_handler.bandwidth_limiter.get_transfer_cap_mbps.return_value = 10
+
+        volume_name, volume_output = self.offsite_bkp_handler.process_volume_stream(
+            MOCK_VOLUME + '.tar', MOCK_REMOTE_DIR, MOCK_BKP_PATH)
+
+        self.assertEqual(MOCK_VOLUME, volume_name)
+        self.assertTrue(volume_output.status)
+        self.assertEqual(self.mock_download_stream.finish.return_value,
+                         volume_output.rsync_output)
+        self.offsite_bkp_handler.transfer_manager.get_download_stream.assert_called_once_with(
+            MOCK_REMOTE_DIR, 10, on_progress=mock_progress_monitor.return_value)
+        self.offsite_bkp_handler.gpg_manager.decrypt_decompress_tar_stream.assert_called_once_with(
+            self.mock_download_stream.start.return_value, MOCK_BKP_PATH, NUMBER_THREADS,
+            member_filter=None, get_elapsed_time=[])
+        self.mock_download_stream.abort.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    def test_process_volume_stream_restore_failure(self, mock_progress_monitor):
+        """Test if the download is aborted when the volume cannot be restored."""
+        self.offsite_bkp_handler.gpg_manager.decrypt_decompress_tar_stream.side_effect = \
+            GnupgException(ExceptionCodes.DecryptError, MOCK_FILE)
+
+        _, volume_output = self.offsite_bkp_handler.process_volume_stream(
+            MOCK_VOLUME + '.tar', MOCK_REMOTE_DIR, MOCK_BKP_PATH)
+
+        self.assertFalse(volume_output.status)
+        self.assertIn("Error while streaming volume.", volume_output.output)
+        self.mock_download_stream.abort.assert_called_once_with()
+        self.mock_download_stream.finish.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    def test_process_volume_stream_download_failure(self, mock_progress_monitor):
+        """Test if a failure to start the download is reported in the volume output."""
+        self.mock_download_stream.start.side_effect = BlobTransferException(
+            ExceptionCodes.BlobTransferFailed, MOCK_REMOTE_DIR)
+
+        _, volume_output = self.offsite_bkp_handler.process_volume_stream(
+            MOCK_VOLUME + '.tar', MOCK_REMOTE_DIR, MOCK_BKP_PATH)
+
+        self.assertFalse(volume_output.status)
+        self.offsite_bkp_handler.gpg_manager.decrypt_decompress_tar_stream.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    def test_process_volume_stream_file_not_found(self, mock_progress_monitor):
+        """Test if the download is aborted when the file is not found in the volume."""
+        _, volume_output = self.offsite_bkp_handler.process_volume_stream(
+            MOCK_VOLUME + '.tar', MOCK_REMOTE_DIR, MOCK_BKP_PATH, file_name=MOCK_FILE)
+
+        self.assertFalse(volume_output.status)
+        self.assertIn("File not found in the volume.", volume_output.output)
+        self.mock_download_stream.abort.assert_called_once_with()
+        self.assertIsNotNone(self.offsite_bkp_handler.gpg_manager.decrypt_decompress_tar_stream
+                             .call_args[1]['member_filter'])
+
+
+class OffsiteBkpHandlerRestoreFileFromTocTestCase(unittest.TestCase):
+    """Class to test restore_file_from_toc method from OffsiteBackupHandler class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.offsite_bkp_handler = create_offsite_bkp_object()
+        self.offsite_bkp_handler.offsite_config.transfer_backend = 'native'
+        self.remote_volume_path = MOCK_CONTAINER_PATH + '/mock_volume.tar'
+        self.toc_entry_dict = {member_name: TarTocEntry(member_name, offset, 10, 20, 'md5')
+                               for offset, member_name in enumerate([
+                                   'mock_volume/mock_file.gz.gpg',
+                                   'mock_volume/mock_volume_metadata.gz.gpg',
+                                   'mock_volume/other_file.gz.gpg'])}
+
+    @mock.patch(MOCK_PACKAGE + 'create_path')
+    @mock.patch(MOCK_PACKAGE + 'TransferProgressMonitor')
+    @mock.patch(MOCK_PACKAGE + 'BlobManager.get_download_stream')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.read_volume_toc')
+    def test_restore_file_from_toc_success(self, mock_read_volume_toc, mock_get_download_stream,
+                                           mock_progress_monitor, mock_create_path):
+        """Test if only the file and the volume metadata are read, each by a ranged read."""
+        mock_read_volume_toc.return_value = self.toc_entry_dict
+
+        self.assertTrue(self.offsite_bkp_handler.restore_file_from_toc(
+            self.remote_volume_path, MOCK_BKP_PATH, MOCK_FILE, 10))
+
+        self.assertEqual([mock.call(self.remote_volume_path, 10,
+                                    on_progress=mock_progress_monitor.return_value, offset=0,
+                                    size=10),
+                          mock.call(self.remote_volume_path, 10,
+                                    on_progress=mock_progress_monitor.return_value, offset=1,
+                                    size=10)], mock_get_download_stream.call_args_list)
+        self.offsite_bkp_handler.gpg_manager.decrypt_decompress_file_object.assert_has_calls([
+            mock.call(mock_get_download_stream.return_value.start.return_value,
+                      MOCK_BKP_PATH + '/mock_volume/mock_file', 'md5'),
+            mock.call(mock_get_download_stream.return_value.start.return_value,
+                      MOCK_BKP_PATH + '/mock_volume/mock_volume_metadata', 'md5')])
+        self.assertEqual(2, mock_get_download_stream.return_value.finish.call_count)
+
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.read_volume_toc')
+    def test_restore_file_from_toc_file_not_found_exception(self, mock_read_volume_toc):
+        """Assert if raises an exception when the file is not listed in the table of contents."""
+        mock_read_volume_toc.return_value = self.toc_entry_dict
+
+        with self.assertRaises(DownloadBackupException) as raised:
+            self.offsite_bkp_handler.restore_file_from_toc(self.remote_volume_path,
+                                                           MOCK_BKP_PATH, 'missing_file')
+
+        self.assertEqual(ExceptionCodes.NoSuchFile, raised.exception.code)
+        self.offsite_bkp_handler.gpg_manager.decrypt_decompress_file_object.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.read_volume_toc')
+    def test_restore_file_from_toc_not_available(self, mock_read_volume_toc):
+        """Test if the whole archive is read without a table of contents or ranged reads."""
+        mock_read_volume_toc.return_value = None
+
+        self.assertFalse(self.offsite_bkp_handler.restore_file_from_toc(
+            self.remote_volume_path, MOCK_BKP_PATH, MOCK_FILE))
+
+        self.offsite_bkp_handler.offsite_config.transfer_backend = 'azcopy'
+
+        self.assertFalse(self.offsite_bkp_handler.restore_file_from_toc(
+            self.remote_volume_path, MOCK_BKP_PATH, MOCK_FILE))
+        mock_read_volume_toc.assert_called_once_with(self.remote_volume_path)
+
+    @mock.patch(MOCK_PACKAGE + 'BlobManager.get_download_stream')
+    def test_read_volume_toc_missing(self, mock_get_download_stream):
+        """Test if a volume uploaded without a table of contents is reported and ignored."""
+        mock_get_download_stream.return_value.start.side_effect = BlobTransferException(
+            ExceptionCodes.BlobTransferFailed, 'not found')
+
+        self.assertIsNone(self.offsite_bkp_handler.read_volume_toc(self.remote_volume_path))
+
+        mock_get_download_stream.assert_called_once_with(self.remote_volume_path + '.toc')
+        mock_get_download_stream.return_value.abort.assert_called_once_with()
+        self.assertEqual(1, self.offsite_bkp_handler.logger.warning.call_count)
+
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.restore_file_from_toc')
+    def test_process_volume_stream_file_from_toc(self, mock_restore_file_from_toc):
+        """Test if the archive is not streamed when the file was restored by ranged reads."""
+        self.offsite_bkp_handler.transfer_manager = mock.Mock()
+        mock_restore_file_from_toc.return_value = True
+
+        volume_name, volume_output = self.offsite_bkp_handler.process_volume_stream(
+            'mock_volume.tar', self.remote_volume_path, MOCK_BKP_PATH, file_name=MOCK_FILE)
+
+        self.assertEqual(MOCK_VOLUME, volume_name)
+        self.assertTrue(volume_output.status)
+        self.offsite_bkp_handler.transfer_manager.get_download_stream.assert_not_called()
 
 
 class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
@@ -974,13 +1371,12 @@ class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
         """Set up the test constants."""
         self.offsite_bkp_handler = create_offsite_bkp_object()
 
-    @mock.patch(MOCK_PACKAGE + 'sort_remote_folders_by_content')
-    @mock.patch(MOCK_PACKAGE + 'is_remote_folder_empty')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_backup_ages')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_offsite_backup_dict')
     @mock.patch(MOCK_PACKAGE + 'get_values_from_dict')
     def test_get_backup_dir_list_to_cleanup_one_customer_zero_backup_to_remove(
             self, mock_get_values_from_dict, mock_get_offsite_bkp_dict,
-            mock_is_remote_folder_empty, mock_sort_remote_folders_by_content):
+            mock_get_remote_backup_ages):
         """
         Test to check when no backup should be deleted according to the retention policy.
 
@@ -992,20 +1388,18 @@ class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
         mock_bkp_list_offsite = ['/path/bkp1', '/path/bkp2', '/path/bkp3', '/path/bkp4']
         mock_get_offsite_bkp_dict.return_value = {MOCK_CUSTOMER_NAME: mock_bkp_list_offsite}
 
-        mock_is_remote_folder_empty.return_value = False
-        mock_sort_remote_folders_by_content.return_value = mock_bkp_list_offsite
+        mock_get_remote_backup_ages.return_value = get_backup_age_dict(mock_bkp_list_offsite)
 
         expected_backup_to_be_deleted = []
         self.assertEqual(expected_backup_to_be_deleted,
                          self.offsite_bkp_handler.get_backup_dir_list_to_cleanup(MOCK_RETENTION))
 
-    @mock.patch(MOCK_PACKAGE + 'sort_remote_folders_by_content')
-    @mock.patch(MOCK_PACKAGE + 'is_remote_folder_empty')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_backup_ages')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_offsite_backup_dict')
     @mock.patch(MOCK_PACKAGE + 'get_values_from_dict')
     def test_get_backup_dir_list_to_cleanup_one_customer_empty_backups(
             self, mock_get_values_from_dict, mock_get_offsite_bkp_dict,
-            mock_is_remote_folder_empty, mock_sort_remote_folders_by_content):
+            mock_get_remote_backup_ages):
         """
         Test to check when no backup should be deleted according to the retention policy.
 
@@ -1017,20 +1411,18 @@ class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
         mock_bkp_list_offsite = ['/path/bkp1', '/path/bkp2', '/path/bkp3', '/path/bkp4']
         mock_get_offsite_bkp_dict.return_value = {MOCK_CUSTOMER_NAME: mock_bkp_list_offsite}
 
-        mock_is_remote_folder_empty.return_value = True
-        mock_sort_remote_folders_by_content.return_value = mock_bkp_list_offsite
+        mock_get_remote_backup_ages.return_value = {}
 
         expected_backup_to_be_deleted = []
         self.assertEqual(expected_backup_to_be_deleted,
                          self.offsite_bkp_handler.get_backup_dir_list_to_cleanup(MOCK_RETENTION))
 
-    @mock.patch(MOCK_PACKAGE + 'sort_remote_folders_by_content')
-    @mock.patch(MOCK_PACKAGE + 'is_remote_folder_empty')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_backup_ages')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_offsite_backup_dict')
     @mock.patch(MOCK_PACKAGE + 'get_values_from_dict')
     def test_get_backup_dir_list_to_cleanup_one_customer_remove_backup(
             self, mock_get_values_from_dict, mock_get_offsite_bkp_dict,
-            mock_is_remote_folder_empty, mock_sort_remote_folders_by_content):
+            mock_get_remote_backup_ages):
         """
         Test to check when there are backups to be deleted according to the retention policy.
 
@@ -1043,20 +1435,18 @@ class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
                                  '/path/bkp5', '/path/bkp6']
         mock_get_offsite_bkp_dict.return_value = {MOCK_CUSTOMER_NAME: mock_bkp_list_offsite}
 
-        mock_is_remote_folder_empty.return_value = False
-        mock_sort_remote_folders_by_content.return_value = mock_bkp_list_offsite
+        mock_get_remote_backup_ages.return_value = get_backup_age_dict(mock_bkp_list_offsite)
 
         expected_backup_to_be_deleted = ['/path/bkp5', '/path/bkp6']
         self.assertEqual(expected_backup_to_be_deleted,
                          self.offsite_bkp_handler.get_backup_dir_list_to_cleanup(MOCK_RETENTION))
 
-    @mock.patch(MOCK_PACKAGE + 'sort_remote_folders_by_content')
-    @mock.patch(MOCK_PACKAGE + 'is_remote_folder_empty')
+    @mock.patch(MOCK_PACKAGE + 'get_remote_backup_ages')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_offsite_backup_dict')
     @mock.patch(MOCK_PACKAGE + 'get_values_from_dict')
     def test_get_backup_dir_list_to_cleanup_multiple_customers_remove_backup(
             self, mock_get_values_from_dict, mock_get_offsite_bkp_dict,
-            mock_is_remote_folder_empty, mock_sort_remote_folders_by_content):
+            mock_get_remote_backup_ages):
         """
         Test to check when there are backups to be deleted according to the retention policy.
 
@@ -1075,8 +1465,7 @@ class OffsiteBkpHandlerGetBkpDirListToCleanupTestCase(unittest.TestCase):
         mock_get_offsite_bkp_dict.return_value = {mock_customer_name_1: mock_bkp_list_offsite,
                                                   mock_customer_name_2: mock_bkp_list_offsite}
 
-        mock_is_remote_folder_empty.return_value = False
-        mock_sort_remote_folders_by_content.return_value = mock_bkp_list_offsite
+        mock_get_remote_backup_ages.return_value = get_backup_age_dict(mock_bkp_list_offsite)
 
         expected_backup_to_be_deleted = ['/path/bkp5', '/path/bkp5']
         self.assertEqual(expected_backup_to_be_deleted,
@@ -1089,6 +1478,8 @@ class OffsiteBkpHandlerCleanOffsiteBkpTestCase(unittest.TestCase):
     def setUp(self):
         """Set up the test constants."""
         self.offsite_bkp_handler = create_offsite_bkp_object()
+        self.offsite_bkp_handler.transfer_manager = mock.Mock()
+        self.mock_remove_dir_list = self.offsite_bkp_handler.transfer_manager.remove_dir_list
 
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_backup_dir_list_to_cleanup')
     def test_clean_offsite_backup_check_return_value_no_removal(self, mock_get_bkp_dir_list):
@@ -1102,56 +1493,74 @@ class OffsiteBkpHandlerCleanOffsiteBkpTestCase(unittest.TestCase):
                          result[1])
         self.assertEqual([], result[2])
 
-    @mock.patch('backup.utils.remote.validate_removed_dir_list')
+    @mock.patch(MOCK_PACKAGE + 'remove_remote_dir')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_backup_dir_list_to_cleanup')
     def test_clean_offsite_backup_check_return_value_not_removed(self,
                                                                  mock_get_bkp_dir_list,
-                                                                 mock_validate_removed_dir_list):
+                                                                 mock_remove_remote_dir):
         """Test to check the return value if no backup was removed."""
         mock_get_bkp_dir_list.return_value = [MOCK_BKP_PATH]
-        mock_validate_removed_dir_list.return_value = (MOCK_BKP_DESTINATION, MOCK_BKP_PATH)
-
-        self.offsite_bkp_handler.offsite_config.host = '127.0.0.1'
+        mock_remove_remote_dir.return_value = ([MOCK_BKP_DESTINATION], [MOCK_BKP_PATH])
+        self.mock_remove_dir_list.return_value = {MOCK_BKP_PATH: None}
 
         result = self.offsite_bkp_handler.clean_offsite_backup(4)
 
         self.assertFalse(result[0])
         self.assertEqual("Following backups were not removed: mock_bkp_dest", result[1])
-        self.assertEqual(MOCK_BKP_PATH, result[2])
+        self.assertEqual([MOCK_BKP_PATH], result[2])
 
-    @mock.patch('backup.utils.remote.validate_removed_dir_list')
+    @mock.patch(MOCK_PACKAGE + 'remove_remote_dir')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_backup_dir_list_to_cleanup')
     def test_clean_offsite_backup_check_return_value_cleanup_error(self,
                                                                    mock_get_bkp_dir_list,
-                                                                   mock_validate_removed_dir_list):
+                                                                   mock_remove_remote_dir):
         """Test to check the return value if there occurred cleanup error."""
         mock_get_bkp_dir_list.return_value = [MOCK_BKP_PATH]
-        mock_validate_removed_dir_list.return_value = (MOCK_BKP_PATH, "")
-
-        self.offsite_bkp_handler.offsite_config.host = '127.0.0.1'
+        mock_remove_remote_dir.return_value = ([MOCK_BKP_PATH], [])
+        self.mock_remove_dir_list.return_value = {MOCK_BKP_PATH: None}
 
         result = self.offsite_bkp_handler.clean_offsite_backup(4)
 
         self.assertFalse(result[0])
         self.assertEqual("Following backups were not removed: mock_bkp_path", result[1])
-        self.assertEqual('', result[2])
+        self.assertEqual([], result[2])
 
-    @mock.patch('backup.utils.remote.validate_removed_dir_list')
+    @mock.patch(MOCK_PACKAGE + 'remove_remote_dir')
     @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_backup_dir_list_to_cleanup')
     def test_clean_offsite_backup_check_return_value_success(self,
                                                              mock_get_bkp_dir_list,
-                                                             mock_validate_removed_dir_list):
+                                                             mock_remove_remote_dir):
         """Test to check the return value if removal was successful."""
         mock_get_bkp_dir_list.return_value = [MOCK_BKP_PATH]
-        mock_validate_removed_dir_list.return_value = ("", "")
-
-        self.offsite_bkp_handler.offsite_config.host = '127.0.0.1'
+        mock_remove_remote_dir.return_value = ([], [MOCK_BKP_PATH])
+        self.mock_remove_dir_list.return_value = {MOCK_BKP_PATH: None}
 
         result = self.offsite_bkp_handler.clean_offsite_backup(4)
 
         self.assertTrue(result[0])
         self.assertEqual("Off-site clean up finished successfully.", result[1])
-        self.assertEqual('', result[2])
+        self.assertEqual([MOCK_BKP_PATH], result[2])
+
+    @mock.patch(MOCK_PACKAGE + 'remove_remote_dir')
+    @mock.patch(MOCK_PACKAGE + 'OffsiteBackupHandler.get_backup_dir_list_to_cleanup')
+    def test_clean_offsite_backup_blob_removal_error(self, mock_get_bkp_dir_list,
+                                                     mock_remove_remote_dir):
+        """Test if the folder of a backup is kept when its blobs could not be removed."""
+        backup_path_list = [MOCK_CUSTOMER_ROOT_PATH + '/bkp1', MOCK_CUSTOMER_ROOT_PATH + '/bkp2']
+        mock_get_bkp_dir_list.return_value = backup_path_list
+        mock_remove_remote_dir.return_value = ([], backup_path_list[1:])
+        self.mock_remove_dir_list.return_value = {MOCK_CUSTOMER_NAME + '/bkp1': 'mock error',
+                                                  MOCK_CUSTOMER_NAME + '/bkp2': None}
+
+        result = self.offsite_bkp_handler.clean_offsite_backup(4)
+
+        self.mock_remove_dir_list.assert_called_once_with(
+            MOCK_CONTAINER_PATH, [MOCK_CUSTOMER_NAME + '/bkp1', MOCK_CUSTOMER_NAME + '/bkp2'])
+        mock_remove_remote_dir.assert_called_once_with(mock.ANY, backup_path_list[1:])
+        self.assertFalse(result[0])
+        self.assertEqual("Following backups were not removed: {}".format(backup_path_list[0]),
+                         result[1])
+        self.assertEqual(backup_path_list[1:], result[2])
 
 
 class OffsiteBkpHandlerRetrieveRemotePickleFileContentTestCase(unittest.TestCase):
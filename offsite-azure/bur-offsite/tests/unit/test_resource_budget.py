@@ -0,0 +1,195 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.resource_budget.py script."""
+
+import threading
+import unittest
+
+import mock
+
+from backup.resource_budget import ResourceBudget, split_by_weight, TempSpaceBudget
+
+
+class SplitByWeightTestCase(unittest.TestCase):
+    """Test cases for split_by_weight function."""
+
+    def test_split_by_weight_largest_remainder(self):
+        """Test if the units left by rounding down go to the largest remainders."""
+        self.assertEqual([3, 2], split_by_weight(5, [1, 1]))
+        self.assertEqual([4, 3, 3], split_by_weight(10, [1, 1, 1]))
+        self.assertEqual([3, 5], split_by_weight(8, [1, 2]))
+
+    def test_split_by_weight_at_least_one_unit(self):
+        """Test if every part gets a unit, even when there are fewer units than parts."""
+        self.assertEqual([1, 1, 1], split_by_weight(2, [1, 1, 1]))
+
+
+class ResourceBudgetAcquireTestCase(unittest.TestCase):
+    """Test cases for acquire and release methods of ResourceBudget class."""
+
+    def test_acquire_equal_weights(self):
+        """Test if customers with the same weight running together get the same share."""
+        resource_budget = ResourceBudget(2, 8, 8, 1000)
+        resource_budget.add_customer('customer_0')
+        resource_budget.add_customer('customer_1')
+        resource_budget.add_customer('customer_2')
+
+        first_share = resource_budget.acquire('customer_0')
+        second_share = resource_budget.acquire('customer_1')
+
+        for customer_share in [first_share, second_share]:
+            self.assertEqual(4, customer_share.number_processors)
+            self.assertEqual(4, customer_share.number_transfer_processors)
+            self.assertEqual(500, customer_share.temp_space_mb)
+
+    def test_acquire_weighted_share(self):
+        """Test if the resources are split proportionally to the weight of the customers."""
+        resource_budget = ResourceBudget(2, 9, 6)
+        resource_budget.add_customer('customer_0', 2)
+        resource_budget.add_customer('customer_1', 1)
+
+        first_share = resource_budget.acquire('customer_0')
+        second_share = resource_budget.acquire('customer_1')
+
+        self.assertEqual(6, first_share.number_processors)
+        self.assertEqual(4, first_share.number_transfer_processors)
+        self.assertIsNone(first_share.temp_space_mb)
+        self.assertEqual(3, second_share.number_processors)
+        self.assertEqual(2, second_share.number_transfer_processors)
+
+    def test_acquire_uneven_split(self):
+        """Test if the units that do not split evenly are not left unused."""
+        resource_budget = ResourceBudget(3, 5, 10)
+        for customer_index in range(3):
+            resource_budget.add_customer('customer_{}'.format(customer_index))
+
+        share_list = [resource_budget.acquire('customer_{}'.format(customer_index))
+                      for customer_index in range(3)]
+
+        self.assertEqual([2, 2, 1], [customer_share.number_processors
+                                     for customer_share in share_list])
+        self.assertEqual([4, 3, 3], [customer_share.number_transfer_processors
+                                     for customer_share in share_list])
+
+    def test_acquire_not_blocking(self):
+        """Test if None is returned instead of waiting when there are no free resources."""
+        resource_budget = ResourceBudget(2, 1, 1)
+        resource_budget.add_customer('customer_0')
+        resource_budget.add_customer('customer_1')
+
+        first_share = resource_budget.acquire('customer_0')
+
+        self.assertIsNone(resource_budget.acquire('customer_1', blocking=False))
+
+        resource_budget.release(first_share)
+
+        self.assertEqual(1, resource_budget.acquire('customer_1',
+                                                    blocking=False).number_processors)
+
+    def test_acquire_single_customer_gets_everything(self):
+        """Test if the last customer to run gets all the released resources."""
+        resource_budget = ResourceBudget(2, 4, 4, 1000)
+        resource_budget.add_customer('customer_0')
+        resource_budget.add_customer('customer_1')
+
+        resource_budget.release(resource_budget.acquire('customer_0'))
+        customer_share = resource_budget.acquire('customer_1')
+
+        self.assertEqual(4, customer_share.number_processors)
+        self.assertEqual(1000, customer_share.temp_space_mb)
+
+    def test_acquire_waits_for_release(self):
+        """Test if a customer waits until there are free resources to start."""
+        resource_budget = ResourceBudget(2, 1, 1)
+        resource_budget.add_customer('customer_0')
+        resource_budget.add_customer('customer_1')
+
+        first_share = resource_budget.acquire('customer_0')
+        self.assertEqual(1, first_share.number_processors)
+
+        second_share_list = []
+        waiting_customer = threading.Thread(
+            target=lambda: second_share_list.append(resource_budget.acquire('customer_1')))
+        waiting_customer.start()
+        waiting_customer.join(0.1)
+
+        self.assertTrue(waiting_customer.is_alive())
+
+        resource_budget.release(first_share)
+        waiting_customer.join()
+
+        self.assertEqual(1, second_share_list[0].number_processors)
+
+
+class TempSpaceBudgetTestCase(unittest.TestCase):
+    """Test cases for TempSpaceBudget class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.temp_space_budget = TempSpaceBudget(100, 0.01)
+
+    def reserve_in_thread(self, key, size_mb):
+        """
+        Reserve space from another thread, which is left waiting if there is no space.
+
+        :param key: identification of the volume.
+        :param size_mb: space to be reserved.
+        :return: the thread reserving the space.
+        """
+        waiting_volume = threading.Thread(target=self.temp_space_budget.reserve,
+                                          args=(key, size_mb))
+        waiting_volume.start()
+        waiting_volume.join(0.1)
+
+        return waiting_volume
+
+    def test_reserve_waits_for_release(self):
+        """Test if a volume waits until enough space is released."""
+        self.temp_space_budget.reserve('volume_0', 60)
+
+        waiting_volume = self.reserve_in_thread('volume_1', 60)
+        self.assertTrue(waiting_volume.is_alive())
+
+        self.assertEqual(60, self.temp_space_budget.release('volume_0'))
+        waiting_volume.join()
+
+        self.assertEqual(60, self.temp_space_budget.used_mb)
+
+    def test_reserve_volume_bigger_than_budget(self):
+        """Test if a volume bigger than the budget is admitted when no space is held."""
+        self.temp_space_budget.reserve('volume_0', 150)
+
+        self.assertEqual(150, self.temp_space_budget.used_mb)
+
+    def test_release_unknown_volume(self):
+        """Test if releasing a volume twice does not give back its space again."""
+        self.temp_space_budget.reserve('volume_0', 60)
+
+        self.assertEqual(60, self.temp_space_budget.release('volume_0'))
+        self.assertEqual(0, self.temp_space_budget.release('volume_0'))
+        self.assertEqual(0, self.temp_space_budget.used_mb)
+
+    def test_reserve_reclaims_failed_transfer(self):
+        """Test if the space of a transfer job that failed without calling back is reclaimed."""
+        mock_async_result = mock.Mock()
+        mock_async_result.ready.return_value = False
+
+        self.temp_space_budget.reserve('volume_0', 60)
+        self.temp_space_budget.set_transfer('volume_0', mock_async_result)
+
+        waiting_volume = self.reserve_in_thread('volume_1', 60)
+        self.assertTrue(waiting_volume.is_alive())
+
+        mock_async_result.successful.return_value = False
+        mock_async_result.ready.return_value = True
+        waiting_volume.join()
+
+        self.assertEqual({'volume_1': [60, None]}, self.temp_space_budget.reservation_dict)
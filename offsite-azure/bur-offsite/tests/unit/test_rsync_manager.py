@@ -378,6 +378,20 @@ class RsyncManagerSendTestCase(unittest.TestCase):
         self.assertEqual(str(self.rsync_output), str(result))
 
 
+class RsyncManagerGetBwlimitArgsTestCase(unittest.TestCase):
+    """This is a scenario to test the rate limit arguments of rsync."""
+
+    def test_get_bwlimit_args_not_limited(self):
+        """Assert if no argument is added when the rate is not limited."""
+        self.assertEqual([], RsyncManager(FAKE_SOURCE, FAKE_TARGET, FAKE_TRIES).get_bwlimit_args())
+
+    def test_get_bwlimit_args(self):
+        """Assert if the rate in megabits per second is converted to KiB per second."""
+        rsync = RsyncManager(FAKE_SOURCE, FAKE_TARGET, FAKE_TRIES, cap_mbps=8)
+
+        self.assertEqual(['--bwlimit=976'], rsync.get_bwlimit_args())
+
+
 class RsyncManagerSendRetryRsyncExceptionTestCase(unittest.TestCase):
     """
     Scenario for send method in RsyncManager.
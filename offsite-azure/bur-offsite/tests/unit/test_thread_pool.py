@@ -0,0 +1,137 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.thread_pool.py script."""
+
+import logging
+import threading
+import unittest
+
+import mock
+
+from backup.thread_pool import Future, THREAD_OUTPUT_INDEX, ThreadPoolExecutor
+
+logging.disable(logging.CRITICAL)
+
+MOCK_PACKAGE = 'backup.thread_pool.'
+MOCK_NUMBER_THREADS = 2
+
+
+def get_executor(callback=None, *callback_args):
+    """
+    Get an instance of ThreadPoolExecutor to perform tests.
+
+    :return: ThreadPoolExecutor instance.
+    """
+    with mock.patch(MOCK_PACKAGE + 'CustomLogger'):
+        return ThreadPoolExecutor(mock.Mock(), MOCK_NUMBER_THREADS, callback, *callback_args)
+
+
+class FutureTestCase(unittest.TestCase):
+    """Class for testing Future class."""
+
+    def test_wait_timeout_not_done(self):
+        """Assert if wait returns False when the job is not finished before the timeout."""
+        future = Future('mock_job')
+
+        self.assertFalse(future.wait(0.01))
+        self.assertIsNone(future.result(0.01))
+
+    def test_result_set_by_other_thread(self):
+        """Assert if a waiting thread is woken up when the result is set."""
+        future = Future('mock_job')
+
+        threading.Timer(0.01, future.set_result, ['mock_result']).start()
+
+        self.assertEqual('mock_result', future.result())
+        self.assertTrue(future.done())
+        self.assertIsNone(future.error_message())
+
+
+class ThreadPoolExecutorTestCase(unittest.TestCase):
+    """Class for testing ThreadPoolExecutor class."""
+
+    def test_submit_returns_job_result(self):
+        """Assert if the futures hold the output of each submitted job."""
+        executor = get_executor()
+
+        future_list = [executor.submit("job-{}".format(index), pow, index, 2)
+                       for index in range(10)]
+        executor.shutdown()
+
+        self.assertEqual([index ** 2 for index in range(10)],
+                         [future.result() for future in future_list])
+
+    def test_submit_job_exception(self):
+        """Assert if an exception raised by the job is stored as its error message."""
+        executor = get_executor()
+
+        future = executor.submit("job", int, "not a number")
+        executor.shutdown()
+
+        self.assertIsNone(future.result())
+        self.assertIn("invalid literal", future.error_message())
+
+    def test_callback_called_for_each_job(self):
+        """Assert if the callback receives the job output and the extra callback arguments."""
+        output_list = []
+        executor = get_executor(lambda thread_output, outputs: outputs.append(thread_output),
+                                output_list)
+
+        for index in range(5):
+            executor.submit("job-{}".format(index), str, index)
+        executor.shutdown()
+
+        self.assertEqual(5, len(output_list))
+        self.assertEqual(set(str(index) for index in range(5)),
+                         set(output[THREAD_OUTPUT_INDEX.TH_RESULT.value - 1]
+                             for output in output_list))
+
+    def test_callback_exception_reported_in_future(self):
+        """Assert if an error raised by the callback does not stop the workers."""
+        executor = get_executor(mock.Mock(side_effect=ValueError("mock error")))
+
+        first_future = executor.submit("job-0", str, 0)
+        second_future = executor.submit("job-1", str, 1)
+        executor.shutdown()
+
+        self.assertIn("mock error", first_future.error_message())
+        self.assertEqual('1', second_future.result())
+
+    def test_submit_blocks_on_bounded_queue(self):
+        """Assert if no more than the queue size plus running jobs are kept in memory."""
+        release_event = threading.Event()
+        executor = get_executor()
+
+        for index in range(executor.jobs_queue.maxsize + MOCK_NUMBER_THREADS):
+            executor.submit("job-{}".format(index), release_event.wait)
+
+        self.assertTrue(executor.jobs_queue.full())
+
+        submit_thread = threading.Thread(target=executor.submit,
+                                         args=("job-blocked", release_event.wait))
+        submit_thread.start()
+        submit_thread.join(0.05)
+        self.assertTrue(submit_thread.is_alive())
+
+        release_event.set()
+        submit_thread.join()
+        executor.shutdown()
+
+        for worker in executor.workers:
+            self.assertFalse(worker.is_alive())
+
+    def test_submit_after_shutdown(self):
+        """Assert if it raises an exception when submitting a job after shutdown."""
+        executor = get_executor()
+        executor.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            executor.submit("job", str, 0)
@@ -0,0 +1,72 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.transfer_progress.py script."""
+
+import unittest
+
+import mock
+
+from backup.azcopy_manager import AzCopyProgress
+from backup.transfer_progress import TransferProgressMonitor
+
+MOCK_TRANSFER_NAME = 'volume.tar'
+
+
+def get_progress(bytes_done, elapsed_time, job_status='InProgress'):
+    """
+    Get a progress event of a single file job.
+
+    :param bytes_done: number of bytes transferred so far.
+    :param elapsed_time: seconds since the job started.
+    :param job_status: status of the job.
+    :return: AzCopyProgress object.
+    """
+    return AzCopyProgress('job', job_status, bytes_done, 1000, 0, 0, 1, elapsed_time)
+
+
+class TransferProgressMonitorTestCase(unittest.TestCase):
+    """Test cases for TransferProgressMonitor class."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.mock_logger = mock.Mock()
+
+        with mock.patch('backup.transfer_progress.time.time', return_value=0.0):
+            self.progress_monitor = TransferProgressMonitor(self.mock_logger, MOCK_TRANSFER_NAME,
+                                                            log_interval=60, stall_timeout=300)
+
+    def test_progress_logged_once_per_interval(self):
+        """Test if the progress is logged at most once per interval, besides the last event."""
+        self.progress_monitor(get_progress(100, 10), 10.0)
+        self.progress_monitor(get_progress(200, 20), 20.0)
+        self.progress_monitor(get_progress(900, 80), 80.0)
+        self.progress_monitor(get_progress(1000, 85, 'Completed'), 85.0)
+
+        self.assertEqual(3, self.mock_logger.info.call_count)
+        self.assertEqual(85, self.progress_monitor.get_elapsed_time())
+
+    def test_stalled_transfer_warned_once(self):
+        """Test if a transfer without progress is warned once, until it progresses again."""
+        self.progress_monitor(get_progress(100, 10), 10.0)
+        self.progress_monitor(get_progress(100, 200), 200.0)
+        self.assertFalse(self.mock_logger.warning.called)
+
+        self.progress_monitor(get_progress(100, 310), 310.0)
+        self.progress_monitor(get_progress(100, 400), 400.0)
+        self.assertEqual(1, self.mock_logger.warning.call_count)
+        self.assertTrue(self.progress_monitor.is_stalled)
+
+        self.progress_monitor(get_progress(200, 410), 410.0)
+        self.assertFalse(self.progress_monitor.is_stalled)
+
+    def test_get_elapsed_time_without_progress(self):
+        """Test if no elapsed time is returned before any progress."""
+        self.assertIsNone(self.progress_monitor.get_elapsed_time())
@@ -0,0 +1,60 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""Module for testing backup.volume_result.py script."""
+
+import pickle
+import unittest
+
+from backup.volume_result import VolumeResult
+
+MOCK_VOLUME_PATH = 'mock_volume.tar'
+
+
+class VolumeResultTestCase(unittest.TestCase):
+    """Test cases for VolumeResult class."""
+
+    def test_volume_result_default_values(self):
+        """Test if a new result starts as a failed volume without output."""
+        volume_result = VolumeResult()
+
+        self.assertFalse(volume_result.status)
+        self.assertEqual("", volume_result.output)
+        self.assertIsNone(volume_result.rsync_output)
+        self.assertEqual(0.0, volume_result.transfer_time)
+        self.assertEqual(0.0, volume_result.checksum_time)
+
+    def test_volume_result_fixed_attributes(self):
+        """Test if attributes out of the known set are rejected."""
+        volume_result = VolumeResult()
+
+        self.assertFalse(hasattr(volume_result, '__dict__'))
+        with self.assertRaises(AttributeError):
+            volume_result.unknown_key = True
+
+    def test_volume_result_set_error(self):
+        """Test if setting an error marks the volume as failed."""
+        volume_result = VolumeResult(MOCK_VOLUME_PATH, True)
+
+        self.assertIs(volume_result, volume_result.set_error('mock error'))
+        self.assertFalse(volume_result.status)
+        self.assertEqual('mock error', volume_result.output)
+
+    def test_volume_result_pickle(self):
+        """Test if the result keeps its values when sent between processes."""
+        volume_result = VolumeResult(MOCK_VOLUME_PATH, True)
+        volume_result.processing_time = 2.0
+        volume_result.rsync_output = 'mock_azcopy_output'
+
+        unpickled_result = pickle.loads(pickle.dumps(volume_result, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(volume_result, unpickled_result)
+        self.assertEqual(MOCK_VOLUME_PATH, unpickled_result.volume_path)
+        self.assertEqual('mock_azcopy_output', unpickled_result.rsync_output)
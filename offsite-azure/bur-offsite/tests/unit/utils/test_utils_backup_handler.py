@@ -16,6 +16,7 @@ import mock
 
 import backup.constants as constants
 import backup.utils.backup_handler as backup_handler
+from backup.volume_result import VolumeResult
 
 MOCK_PACKAGE = 'backup.utils.backup_handler.'
 MOCK_LOGGER_PACKAGE = 'backup.logger.CustomLogger'
@@ -91,6 +92,36 @@ class BackupHandlerCheckLocalDiskSpaceForUpload(unittest.TestCase):
 
         self.assertIn(expected_exception_msg, raised.exception.message)
 
+    @mock.patch(MOCK_PACKAGE + 'get_size_on_disk')
+    @mock.patch(MOCK_PACKAGE + 'get_free_disk_space')
+    def test_check_local_disk_space_for_upload_exceeds_max_space(
+            self, mock_get_free_disk_space, mock_get_size_on_disk):
+        """Test when the disk has free space, but more than the customer may use."""
+        mock_get_free_disk_space.return_value = 3000
+        mock_get_size_on_disk.return_value = 2000
+
+        expected_exception_msg = "Path doesn't have enough disk space for backup."
+
+        with self.assertRaises(Exception) as raised:
+            backup_handler.check_local_disk_space_for_upload(
+                MOCK_LOCAL_BACKUP_PATH, MOCK_TEMP_BACKUP_PATH, self.mock_logger, 1000)
+
+        self.assertIn(expected_exception_msg, raised.exception.message)
+        self.assertIn("Available: 1000", raised.exception.message)
+
+    @mock.patch(MOCK_PACKAGE + 'get_size_on_disk')
+    @mock.patch(MOCK_PACKAGE + 'get_free_disk_space')
+    def test_check_local_disk_space_for_upload_temp_budget(
+            self, mock_get_free_disk_space, mock_get_size_on_disk):
+        """Test when the backup is bigger than the free space, but the temp budget fits in it."""
+        mock_get_free_disk_space.return_value = 1000
+        mock_get_size_on_disk.return_value = 10000
+
+        sut_result = backup_handler.check_local_disk_space_for_upload(
+            MOCK_LOCAL_BACKUP_PATH, MOCK_TEMP_BACKUP_PATH, self.mock_logger, None, 1000)
+
+        self.assertTrue(sut_result)
+
     @mock.patch(MOCK_PACKAGE + 'get_free_disk_space')
     def test_check_local_disk_space_for_upload_invalid_temp_path(
             self, mock_get_free_disk_space):
@@ -650,3 +681,123 @@ class BackupHandlerValidateMetadataContent(unittest.TestCase):
 
         self.assertFalse(sut_result)
         self.mock_logger.error.assert_has_calls(calls)
+
+
+class BackupHandlerValidateMetadataChecksums(unittest.TestCase):
+    """Test cases for validate_metadata_checksums inside backup_handler script."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.mock_logger = get_mock_logger()
+        self.volume_path = '/path/to/customer/back/volume1'
+        self.metadata_json = {constants.META_DATA_KEYS.objects.name: [
+            {'volume_file0.dat': {'md5': '0'}}, {'volume_file1.dat': {'md5': '1'}}]}
+
+    @mock.patch(MOCK_PACKAGE + 'open_hash_cache')
+    @mock.patch(MOCK_PACKAGE + 'verify_checksum_list')
+    def test_validate_metadata_checksums_should_succeed(self, mock_verify_checksum_list,
+                                                        mock_open_hash_cache):
+        """Test if every file in the metadata is verified and the report is stored."""
+        mock_verify_checksum_list.return_value.is_valid.return_value = True
+        checksum_report_dict = {}
+
+        sut_result = backup_handler.validate_metadata_checksums(
+            self.volume_path, self.metadata_json, self.mock_logger, checksum_report_dict)
+
+        self.assertTrue(sut_result)
+        mock_verify_checksum_list.assert_called_once_with(
+            [(self.volume_path + '/volume_file0.dat', '0'),
+             (self.volume_path + '/volume_file1.dat', '1')], self.mock_logger,
+            hash_cache=mock_open_hash_cache.return_value)
+        self.assertEqual({self.volume_path: mock_verify_checksum_list.return_value},
+                         checksum_report_dict)
+        mock_open_hash_cache.return_value.close.assert_called_once_with()
+
+    @mock.patch(MOCK_PACKAGE + 'open_hash_cache')
+    @mock.patch(MOCK_PACKAGE + 'verify_checksum_list')
+    def test_validate_metadata_checksums_without_cache(self, mock_verify_checksum_list,
+                                                       mock_open_hash_cache):
+        """Test if files are still verified when the hash cache cannot be opened."""
+        mock_open_hash_cache.return_value = None
+        mock_verify_checksum_list.return_value.is_valid.return_value = True
+
+        sut_result = backup_handler.validate_metadata_checksums(
+            self.volume_path, self.metadata_json, self.mock_logger)
+
+        self.assertTrue(sut_result)
+        self.assertIsNone(mock_verify_checksum_list.call_args[1]['hash_cache'])
+
+    @mock.patch(MOCK_PACKAGE + 'open_hash_cache')
+    @mock.patch(MOCK_PACKAGE + 'verify_checksum_list')
+    def test_validate_metadata_checksums_mismatch(self, mock_verify_checksum_list, _):
+        """Test if it returns False when any checksum does not match."""
+        mock_verify_checksum_list.return_value.is_valid.return_value = False
+
+        sut_result = backup_handler.validate_metadata_checksums(
+            self.volume_path, self.metadata_json, self.mock_logger)
+
+        self.assertFalse(sut_result)
+
+
+class BackupHandlerValidateVolumeFileMetadata(unittest.TestCase):
+    """Test cases for validate_volume_file_metadata inside backup_handler script."""
+
+    def setUp(self):
+        """Set up the test constants."""
+        self.mock_logger = get_mock_logger()
+        self.volume_path = '/path/to/customer/back/volume1'
+        self.metadata_json = {constants.META_DATA_KEYS.objects.name: [
+            {'volume_file0.dat': {'md5': '0'}}, {'volume_file1.dat': {'md5': '1'}}]}
+
+    @mock.patch(MOCK_PACKAGE + 'validate_metadata_checksums')
+    @mock.patch(MOCK_PACKAGE + 'validate_metadata_content')
+    @mock.patch(MOCK_PACKAGE + 'get_metadata_file_json')
+    def test_validate_volume_file_metadata_should_succeed(
+            self, mock_get_metadata_file_json, mock_validate_metadata_content,
+            mock_validate_metadata_checksums):
+        """Test if only the informed file is validated against the metadata."""
+        mock_get_metadata_file_json.return_value = self.metadata_json
+        mock_validate_metadata_content.return_value = True
+        mock_validate_metadata_checksums.return_value = True
+        file_metadata_json = {constants.META_DATA_KEYS.objects.name: [
+            {'volume_file1.dat': {'md5': '1'}}]}
+
+        self.assertTrue(backup_handler.validate_volume_file_metadata(
+            self.volume_path, 'volume_file1.dat', self.mock_logger, {}))
+
+        mock_validate_metadata_content.assert_called_once_with(
+            self.volume_path, file_metadata_json, self.mock_logger)
+        mock_validate_metadata_checksums.assert_called_once_with(
+            self.volume_path, file_metadata_json, self.mock_logger, {})
+
+    @mock.patch(MOCK_PACKAGE + 'validate_metadata_checksums')
+    @mock.patch(MOCK_PACKAGE + 'get_metadata_file_json')
+    def test_validate_volume_file_metadata_file_not_listed(
+            self, mock_get_metadata_file_json, mock_validate_metadata_checksums):
+        """Test if it returns False when the file is not listed in the metadata."""
+        mock_get_metadata_file_json.return_value = self.metadata_json
+
+        self.assertFalse(backup_handler.validate_volume_file_metadata(
+            self.volume_path, 'volume_file2.dat', self.mock_logger))
+
+        mock_validate_metadata_checksums.assert_not_called()
+
+
+class BackupHandlerAddChecksumOutput(unittest.TestCase):
+    """Test cases for add_checksum_output inside backup_handler script."""
+
+    def test_add_checksum_output_should_update_known_volumes(self):
+        """Test if only volumes with a checksum report are updated."""
+        mock_report = mock.Mock(elapsed_time=2.0)
+        mock_report.get_throughput.return_value = 50.0
+        backup_output_dict = {'volume1': VolumeResult('volume1', True),
+                              'volume2': VolumeResult('volume2', True)}
+
+        sut_result = backup_handler.add_checksum_output(
+            backup_output_dict, MOCK_LOCAL_BACKUP_PATH,
+            {MOCK_LOCAL_BACKUP_PATH + '/volume1': mock_report})
+
+        self.assertEqual(1, sut_result)
+        self.assertEqual(2.0, backup_output_dict['volume1'].checksum_time)
+        self.assertEqual(50.0, backup_output_dict['volume1'].checksum_rate)
+        self.assertEqual(0.0, backup_output_dict['volume2'].checksum_time)
@@ -0,0 +1,136 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""The purpose of this module is to provide unit testing for utils.checksum.py script."""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import backup.utils.checksum as checksum
+from backup.exceptions import UtilsException
+from backup.utils.hash_cache import HashCache
+
+logging.disable(logging.CRITICAL)
+
+MOCK_LOGGER_PACKAGE = 'backup.thread_pool.CustomLogger'
+DEFAULT_FILE_SIZE = 100 * 1024
+NUMBER_FILES = 6
+
+
+class UtilsChecksumTestCase(unittest.TestCase):
+    """Test Cases for checksum utility methods located in utils.checksum.py."""
+
+    def setUp(self):
+        """Create testing scenario."""
+        self.test_dir = tempfile.mkdtemp()
+        self.mock_logger = mock.Mock()
+        self.file_checksum_list = []
+
+        for index in range(NUMBER_FILES):
+            file_path = os.path.join(self.test_dir, "volume_file{}.dat".format(index))
+            content = os.urandom(DEFAULT_FILE_SIZE + index)
+            with open(file_path, 'wb') as test_file:
+                test_file.write(content)
+
+            self.file_checksum_list.append((file_path, hashlib.md5(content).hexdigest()))
+
+    def tearDown(self):
+        """Tear down created scenario."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_get_file_md5_small_buffer(self):
+        """Test if the md5 is the same regardless of the buffer size."""
+        file_path, expected_md5 = self.file_checksum_list[0]
+
+        self.assertEqual((expected_md5, DEFAULT_FILE_SIZE), checksum.get_file_md5(file_path, 1000))
+
+    def test_get_file_md5_missing_file(self):
+        """Test if an exception is raised when the file cannot be read."""
+        with self.assertRaises(UtilsException):
+            checksum.get_file_md5(os.path.join(self.test_dir, "missing_file"))
+
+    @mock.patch(MOCK_LOGGER_PACKAGE)
+    def test_verify_checksum_list_should_succeed(self, _):
+        """Test if all files are hashed and the report is valid."""
+        report = checksum.verify_checksum_list(self.file_checksum_list, self.mock_logger, 3)
+
+        self.assertTrue(report.is_valid())
+        self.assertEqual(NUMBER_FILES, report.checked_file_count)
+        self.assertEqual(sum(DEFAULT_FILE_SIZE + index for index in range(NUMBER_FILES)),
+                         report.total_bytes)
+        self.assertTrue(report.get_throughput() >= 0.0)
+
+    @mock.patch(MOCK_LOGGER_PACKAGE)
+    def test_verify_checksum_list_reports_each_mismatch(self, _):
+        """Test if every corrupted or missing file is reported individually."""
+        corrupted_path = self.file_checksum_list[1][0]
+        with open(corrupted_path, 'r+b') as test_file:
+            test_file.write(b'corrupted')
+
+        missing_path = os.path.join(self.test_dir, "missing_file")
+        file_checksum_list = self.file_checksum_list + [(missing_path, '1')]
+
+        report = checksum.verify_checksum_list(file_checksum_list, self.mock_logger)
+
+        self.assertFalse(report.is_valid())
+        self.assertEqual([corrupted_path], report.mismatch_list)
+        self.assertEqual(1, len(report.error_list))
+        self.assertIn(missing_path, report.error_list[0])
+        self.assertEqual(NUMBER_FILES, report.checked_file_count)
+
+    @mock.patch(MOCK_LOGGER_PACKAGE)
+    def test_verify_checksum_list_is_case_insensitive(self, _):
+        """Test if an upper case md5 in the metadata is accepted."""
+        file_path, expected_md5 = self.file_checksum_list[0]
+
+        report = checksum.verify_checksum_list([(file_path, expected_md5.upper())],
+                                               self.mock_logger)
+
+        self.assertTrue(report.is_valid())
+
+    @mock.patch(MOCK_LOGGER_PACKAGE)
+    def test_verify_checksum_list_with_hash_cache(self, _):
+        """Test if unchanged files are verified from the hash cache without being read."""
+        with HashCache(os.path.join(self.test_dir, 'hash_cache.db')) as hash_cache:
+            first_report = checksum.verify_checksum_list(self.file_checksum_list,
+                                                         self.mock_logger, hash_cache=hash_cache)
+
+            with mock.patch('backup.utils.checksum.get_file_md5') as mock_get_file_md5:
+                second_report = checksum.verify_checksum_list(self.file_checksum_list,
+                                                              self.mock_logger,
+                                                              hash_cache=hash_cache)
+
+        self.assertTrue(first_report.is_valid())
+        self.assertEqual(0, first_report.cached_file_count)
+        self.assertTrue(second_report.is_valid())
+        self.assertEqual(NUMBER_FILES, second_report.cached_file_count)
+        self.assertEqual(0, second_report.total_bytes)
+        mock_get_file_md5.assert_not_called()
+
+    @mock.patch(MOCK_LOGGER_PACKAGE)
+    def test_verify_checksum_list_cached_mismatch(self, _):
+        """Test if a cached md5 that does not match the metadata is reported."""
+        file_path = self.file_checksum_list[0][0]
+
+        with HashCache(os.path.join(self.test_dir, 'hash_cache.db')) as hash_cache:
+            checksum.verify_checksum_list(self.file_checksum_list[:1], self.mock_logger,
+                                          hash_cache=hash_cache)
+
+            report = checksum.verify_checksum_list([(file_path, 'wrong md5')], self.mock_logger,
+                                                   hash_cache=hash_cache)
+
+        self.assertEqual([file_path], report.mismatch_list)
+        self.assertEqual(1, report.cached_file_count)
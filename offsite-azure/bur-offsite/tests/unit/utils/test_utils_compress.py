@@ -11,9 +11,13 @@
 """The purpose of this module is to provide unit testing for utils.compress.py script."""
 
 import binascii
+import hashlib
+from io import BytesIO
 import os
 import shutil
 from subprocess import PIPE, Popen
+import tarfile
+import tempfile
 import unittest
 
 import mock
@@ -183,3 +187,123 @@ class UtilsCompressTestCase(unittest.TestCase):
         """Test if raises exception on invalid decompressed file."""
         with self.assertRaises(Exception):
             ucompress.decompress_file(__file__, self.extract_destination_dir)
+
+    def test_tar_stream_contains_added_files(self):
+        """Test if the files added to a tar stream are archived under the informed directory."""
+        stream_buffer = BytesIO()
+
+        tar_stream = ucompress.open_tar_stream(stream_buffer)
+        ucompress.add_file_to_tar_stream(tar_stream, self.test_dir, 'volume')
+        arc_name = ucompress.add_file_to_tar_stream(tar_stream, self.test_file_path, 'volume')
+        self.assertTrue(ucompress.close_tar_stream(tar_stream))
+
+        self.assertEqual(os.path.join('volume', FILE_NAME), arc_name)
+        self.assertFalse(stream_buffer.closed)
+
+        stream_buffer.seek(0)
+        archive = tarfile.open(fileobj=stream_buffer, mode="r")
+        self.assertEqual(['volume', arc_name], archive.getnames())
+        with open(self.test_file_path, 'rb') as test_f:
+            self.assertEqual(test_f.read(), archive.extractfile(arc_name).read())
+
+    def test_add_file_to_tar_stream_removes_added_file(self):
+        """Test if the file is removed after being added to the stream when requested."""
+        tar_stream = ucompress.open_tar_stream(BytesIO())
+
+        ucompress.add_file_to_tar_stream(tar_stream, self.test_file_path, 'volume', True)
+
+        self.assertFalse(os.path.exists(self.test_file_path))
+
+    def test_add_file_to_tar_stream_write_error(self):
+        """Test if an exception is raised when the file cannot be written to the stream."""
+        mock_tar_stream = mock.Mock()
+        mock_tar_stream.add.side_effect = IOError("Broken pipe")
+
+        with self.assertRaises(ucompress.UtilsException):
+            ucompress.add_file_to_tar_stream(mock_tar_stream, self.test_file_path, 'volume')
+
+        self.assertTrue(os.path.exists(self.test_file_path))
+
+
+    def test_iter_tar_stream_reads_members_in_chunks(self):
+        """Test if the members of a tar stream are read in order, with their data in chunks."""
+        stream_buffer = BytesIO()
+
+        tar_stream = ucompress.open_tar_stream(stream_buffer)
+        ucompress.add_file_to_tar_stream(tar_stream, self.test_dir, 'volume')
+        ucompress.add_file_to_tar_stream(tar_stream, self.test_file_path, 'volume')
+        ucompress.close_tar_stream(tar_stream)
+
+        stream_buffer.seek(0)
+        member_list = [(tar_member.name, member_chunks if member_chunks is None else
+                        list(member_chunks)) for tar_member, member_chunks in
+                       ucompress.iter_tar_stream(stream_buffer, DEFAULT_FILE_SIZE / 4)]
+
+        with open(self.test_file_path, 'rb') as test_f:
+            file_content = test_f.read()
+
+        self.assertEqual(['volume', os.path.join('volume', FILE_NAME)],
+                         [member_name for member_name, _ in member_list])
+        self.assertIsNone(member_list[0][1])
+        self.assertEqual(4, len(member_list[1][1]))
+        self.assertEqual(file_content, b''.join(member_list[1][1]))
+
+    def test_iter_tar_stream_truncated_archive(self):
+        """Test if an exception is raised when the archive ends in the middle of a member."""
+        stream_buffer = BytesIO()
+
+        tar_stream = ucompress.open_tar_stream(stream_buffer)
+        ucompress.add_file_to_tar_stream(tar_stream, self.test_file_path, 'volume')
+        ucompress.close_tar_stream(tar_stream)
+
+        truncated_buffer = BytesIO(stream_buffer.getvalue()[:DEFAULT_FILE_SIZE / 2])
+
+        with self.assertRaises(ucompress.UtilsException):
+            for _, member_chunks in ucompress.iter_tar_stream(truncated_buffer):
+                list(member_chunks)
+
+    def test_tar_file_with_toc_allows_ranged_reads(self):
+        """Test if each member listed in the table of contents is read back at its offset."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        volume_dir = os.path.join(temp_dir, 'volume')
+        os.mkdir(volume_dir)
+        for file_name, content in [('file0.gz.gpg', b'data0'), ('file1.gz.gpg', b'data' * 300)]:
+            with open(os.path.join(volume_dir, file_name), 'wb') as volume_file:
+                volume_file.write(content)
+
+        archive_path, toc_path = ucompress.tar_file_with_toc(volume_dir, temp_dir,
+                                                             {'volume/file0.gz.gpg': 10})
+
+        self.assertEqual(os.path.join(temp_dir, 'volume.tar'), archive_path)
+        self.assertEqual(archive_path + '.toc', toc_path)
+
+        with open(toc_path) as toc_file:
+            toc_entry_dict = ucompress.parse_tar_toc(toc_file.read())
+
+        self.assertEqual(['volume/file0.gz.gpg', 'volume/file1.gz.gpg'], sorted(toc_entry_dict))
+        self.assertEqual(10, toc_entry_dict['volume/file0.gz.gpg'].original_size)
+        self.assertIsNone(toc_entry_dict['volume/file1.gz.gpg'].original_size)
+
+        with open(archive_path, 'rb') as archive_file:
+            for toc_entry in toc_entry_dict.values():
+                archive_file.seek(toc_entry.offset)
+                member_data = archive_file.read(toc_entry.size)
+
+                with open(os.path.join(temp_dir, toc_entry.name), 'rb') as volume_file:
+                    self.assertEqual(volume_file.read(), member_data)
+                self.assertEqual(hashlib.md5(member_data).hexdigest(), toc_entry.md5)
+
+        shutil.rmtree(volume_dir)
+        ucompress.untar_file(archive_path, temp_dir)
+        self.assertEqual(['file0.gz.gpg', 'file1.gz.gpg'], sorted(os.listdir(volume_dir)))
+
+    def test_parse_tar_toc_invalid_content(self):
+        """Test if an exception is raised when the table of contents cannot be read."""
+        for toc_content in ['not json', '{"members": []}', '{"version": 99, "members": []}',
+                            '{"version": 1, "members": [{"name": "file"}]}']:
+            with self.assertRaises(ucompress.UtilsException) as raised:
+                ucompress.parse_tar_toc(toc_content)
+
+            self.assertEqual(ucompress.ExceptionCodes.InvalidArchiveToc, raised.exception.code)
@@ -0,0 +1,99 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""The purpose of this module is to provide unit testing for utils.hash_cache.py script."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import backup.utils.hash_cache as hash_cache
+
+logging.disable(logging.CRITICAL)
+
+MOCK_MD5 = 'd41d8cd98f00b204e9800998ecf8427e'
+
+
+class UtilsHashCacheTestCase(unittest.TestCase):
+    """Test Cases for HashCache class located in utils.hash_cache.py."""
+
+    def setUp(self):
+        """Create testing scenario."""
+        self.test_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.test_dir, 'cache', hash_cache.HASH_CACHE_FILE_NAME)
+        self.backup_path = os.path.join(self.test_dir, 'backup')
+        self.file_path = os.path.join(self.backup_path, 'volume_file0.dat')
+        self.mock_logger = mock.Mock()
+
+        os.makedirs(self.backup_path)
+        with open(self.file_path, 'wb') as test_file:
+            test_file.write(b'content')
+
+    def tearDown(self):
+        """Tear down created scenario."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_lookup_stored_hash(self):
+        """Test if a stored hash is found by a new connection while the file is unchanged."""
+        file_key = hash_cache.get_file_key(self.file_path)
+
+        with hash_cache.HashCache(self.cache_path) as cache:
+            self.assertIsNone(cache.lookup(file_key))
+            self.assertEqual(1, cache.store_list([(self.file_path, file_key, MOCK_MD5)]))
+
+        with hash_cache.HashCache(self.cache_path) as cache:
+            self.assertEqual(MOCK_MD5, cache.lookup(hash_cache.get_file_key(self.file_path)))
+
+    def test_lookup_changed_file(self):
+        """Test if the hash is not returned after the file size or mtime changes."""
+        file_key = hash_cache.get_file_key(self.file_path)
+
+        with hash_cache.HashCache(self.cache_path) as cache:
+            cache.store_list([(self.file_path, file_key, MOCK_MD5)])
+
+            with open(self.file_path, 'ab') as test_file:
+                test_file.write(b'more content')
+
+            self.assertIsNone(cache.lookup(hash_cache.get_file_key(self.file_path)))
+
+            os.utime(self.file_path, (0, 0))
+            self.assertIsNone(cache.lookup(hash_cache.get_file_key(self.file_path)))
+
+    def test_evict_path_removes_folder_content(self):
+        """Test if only the hashes of files under the removed folder are evicted."""
+        other_path = self.backup_path + '_other'
+        with hash_cache.HashCache(self.cache_path) as cache:
+            cache.store_list([(self.file_path, (1, 1, 1, 1), MOCK_MD5),
+                              (os.path.join(other_path, 'file'), (1, 2, 1, 1), MOCK_MD5)])
+
+            self.assertEqual(1, cache.evict_path(self.backup_path + os.sep))
+
+            self.assertIsNone(cache.lookup((1, 1, 1, 1)))
+            self.assertEqual(MOCK_MD5, cache.lookup((1, 2, 1, 1)))
+
+    def test_open_hash_cache_invalid_path(self):
+        """Test if None is returned and a warning logged when the cache cannot be opened."""
+        cache_path = os.path.join(self.file_path, hash_cache.HASH_CACHE_FILE_NAME)
+
+        self.assertIsNone(hash_cache.open_hash_cache(self.mock_logger, cache_path))
+        self.assertTrue(self.mock_logger.warning.called)
+
+    def test_evict_hash_cache_path(self):
+        """Test if the cached hashes of a removed backup are evicted."""
+        with hash_cache.HashCache(self.cache_path) as cache:
+            cache.store_list([(self.file_path, hash_cache.get_file_key(self.file_path),
+                               MOCK_MD5)])
+
+        self.assertEqual(1, hash_cache.evict_hash_cache_path(self.backup_path, self.mock_logger,
+                                                             self.cache_path))
@@ -0,0 +1,116 @@
+##############################################################################
+# COPYRIGHT Ericsson 2018
+#
+# The copyright to the computer program(s) herein is the property of
+# Ericsson Inc. The programs may be used and/or copied only with written
+# permission from Ericsson Inc. or in accordance with the terms and
+# conditions stipulated in the agreement/contract under which the
+# program(s) have been supplied.
+##############################################################################
+
+"""The purpose of this module is to provide unit testing for utils.offsite_catalog.py script."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import backup.utils.offsite_catalog as offsite_catalog
+
+logging.disable(logging.CRITICAL)
+
+MOCK_CUSTOMER = 'customer_0'
+MOCK_OFFSITE_ROOT = '/offsite/rpath/customer_0'
+MOCK_CONTAINER_ROOT = 'https://mock.blob.core.windows.net/container/customer_0'
+
+
+def get_listed_backup(backup_tag, upload_time):
+    """
+    Get a backup as listed from off-site.
+
+    :param backup_tag: backup tag.
+    :param upload_time: modification time of the backup folder.
+    :return: tuple (backup path, container path, modification time).
+    """
+    return (os.path.join(MOCK_OFFSITE_ROOT, backup_tag),
+            os.path.join(MOCK_CONTAINER_ROOT, backup_tag), upload_time)
+
+
+class UtilsOffsiteCatalogTestCase(unittest.TestCase):
+    """Test Cases for OffsiteCatalog class located in utils.offsite_catalog.py."""
+
+    def setUp(self):
+        """Create testing scenario."""
+        self.test_dir = tempfile.mkdtemp()
+        self.catalog_path = os.path.join(self.test_dir, 'catalog',
+                                         offsite_catalog.OFFSITE_CATALOG_FILE_NAME)
+        self.mock_logger = mock.Mock()
+
+    def tearDown(self):
+        """Tear down created scenario."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_is_stale(self):
+        """Test if a customer is stale until refreshed and again after the maximum age."""
+        with offsite_catalog.OffsiteCatalog(self.catalog_path, max_age=10) as catalog:
+            self.assertTrue(catalog.is_stale(MOCK_CUSTOMER))
+
+            catalog.refresh_customer(MOCK_CUSTOMER, [], refresh_time=100)
+
+            self.assertFalse(catalog.is_stale(MOCK_CUSTOMER, current_time=105))
+            self.assertTrue(catalog.is_stale(MOCK_CUSTOMER, current_time=110))
+            self.assertTrue(catalog.is_stale(MOCK_CUSTOMER, current_time=90))
+
+    def test_refresh_customer_keeps_uploaded_details(self):
+        """Test if a refresh adds and removes backups, keeping the details of uploaded ones."""
+        backup_path, container_path, _ = get_listed_backup('backup_1', 1.0)
+        uploaded_entry = offsite_catalog.OffsiteBackupEntry(
+            'backup_1', MOCK_CUSTOMER, backup_path, container_path, 12, ['volume_0'], 50.0,
+            offsite_catalog.BACKUP_STATUS_UPLOADED)
+
+        with offsite_catalog.OffsiteCatalog(self.catalog_path) as catalog:
+            catalog.store_backup(uploaded_entry)
+            catalog.refresh_customer(MOCK_CUSTOMER, [get_listed_backup('backup_0', 60.0)])
+            self.assertIsNone(catalog.find_backup('backup_1'))
+
+            catalog.store_backup(uploaded_entry)
+            self.assertEqual(2, catalog.refresh_customer(MOCK_CUSTOMER, [
+                get_listed_backup('backup_1', 1.0), get_listed_backup('backup_2', 70.0)]))
+
+        with offsite_catalog.OffsiteCatalog(self.catalog_path) as catalog:
+            backup_list = catalog.get_customer_backup_list(MOCK_CUSTOMER)
+
+        self.assertEqual(['backup_2', 'backup_1'], [entry.backup_tag for entry in backup_list])
+        self.assertEqual(uploaded_entry, backup_list[1])
+        self.assertEqual(offsite_catalog.BACKUP_STATUS_LISTED, backup_list[0].status)
+        self.assertIsNone(backup_list[0].volume_list)
+
+    def test_find_backup_by_customer(self):
+        """Test if a tag is only found for the informed customers."""
+        with offsite_catalog.OffsiteCatalog(self.catalog_path) as catalog:
+            catalog.refresh_customer(MOCK_CUSTOMER, [get_listed_backup('backup_0', 1.0)])
+
+            self.assertEqual(MOCK_CUSTOMER, catalog.find_backup('backup_0').customer_name)
+            self.assertIsNone(catalog.find_backup('backup_0', ['customer_1']))
+            self.assertIsNone(catalog.find_backup('backup'))
+
+            self.assertEqual(1, catalog.remove_path_list([os.path.join(MOCK_OFFSITE_ROOT,
+                                                                       'backup_0/')]))
+            self.assertIsNone(catalog.find_backup('backup_0'))
+
+    def test_open_offsite_catalog_invalid_path(self):
+        """Test if an unusable catalog is reported and ignored."""
+        self.assertIsNone(offsite_catalog.open_offsite_catalog(self.mock_logger, None))
+
+        self.assertIsNone(offsite_catalog.open_offsite_catalog(self.mock_logger, self.test_dir))
+        self.assertEqual(1, self.mock_logger.warning.call_count)
+
+        entry = offsite_catalog.OffsiteBackupEntry('backup_0', MOCK_CUSTOMER, '', '', None, None,
+                                                   1.0, offsite_catalog.BACKUP_STATUS_UPLOADED)
+        self.assertFalse(offsite_catalog.record_offsite_backup(entry, self.mock_logger,
+                                                               self.test_dir))
+        self.assertTrue(offsite_catalog.record_offsite_backup(entry, self.mock_logger,
+                                                              self.catalog_path))
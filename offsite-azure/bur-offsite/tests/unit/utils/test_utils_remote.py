@@ -214,6 +214,173 @@ class RemoteRunSshCommandTestCase(unittest.TestCase):
         self.assertEqual("", stdout)
 
 
+class RemoteSshMasterTestCase(unittest.TestCase):
+    """Test Cases for the ssh connection shared by the commands in remote.py utility script."""
+
+    def setUp(self):
+        """Use a temporary folder for the sockets and forget previous failures."""
+        self.control_dir = os.path.join(TMP_DIR, 'ssh')
+
+        control_dir_patcher = mock.patch(MOCK_PACKAGE + 'SSH_CONTROL_DIR', self.control_dir)
+        control_dir_patcher.start()
+        self.addCleanup(control_dir_patcher.stop)
+
+        remote.SSH_MASTER_FAILURE_DICT.clear()
+        self.addCleanup(remote.SSH_MASTER_FAILURE_DICT.clear)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_open_ssh_master_started_once(self, mock_popen):
+        """Assert if the master connection is started once and its socket reused."""
+        control_path = remote.get_ssh_control_path(MOCK_USER_HOST)
+        mock_popen.return_value.wait.side_effect = lambda: open(control_path, 'w').close()
+
+        self.assertEqual(control_path, remote.open_ssh_master(MOCK_USER_HOST))
+        self.assertEqual(control_path, remote.open_ssh_master(MOCK_USER_HOST))
+
+        mock_popen.assert_called_once()
+        self.assertIn('ControlMaster=yes', mock_popen.call_args[0][0])
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_open_ssh_master_not_retried_after_failure(self, mock_popen):
+        """Assert if a host refusing the master connection is not tried again for a while."""
+        self.assertIsNone(remote.open_ssh_master(MOCK_USER_HOST))
+        self.assertIsNone(remote.open_ssh_master(MOCK_USER_HOST))
+
+        mock_popen.assert_called_once()
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_open_ssh_master_control_dir_symlink(self, mock_popen):
+        """Assert if the connection is not shared when the sockets folder is a symbolic link."""
+        target_dir = os.path.join(TMP_DIR, 'target')
+        os.makedirs(target_dir, 0o700)
+        os.symlink(target_dir, self.control_dir)
+
+        self.assertIsNone(remote.open_ssh_master(MOCK_USER_HOST))
+
+        mock_popen.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    def test_open_ssh_master_control_dir_open_to_others(self, mock_popen):
+        """Assert if the connection is not shared when others can access the sockets folder."""
+        os.makedirs(self.control_dir)
+        os.chmod(self.control_dir, 0o777)
+
+        self.assertIsNone(remote.open_ssh_master(MOCK_USER_HOST))
+
+        mock_popen.assert_not_called()
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_PACKAGE + 'open_ssh_master')
+    def test_run_ssh_command_uses_master(self, mock_open_ssh_master, mock_popen):
+        """Assert if the command is sent over the shared connection."""
+        mock_open_ssh_master.return_value = '/tmp/master.sock'
+        mock_popen.return_value.communicate.return_value = "Hello World!\n", ""
+
+        stdout, stderr = remote.run_ssh_command(MOCK_USER_HOST, VALID_COMMAND)
+
+        self.assertEqual(("Hello World!\n", ""), (stdout, stderr))
+        self.assertEqual(['ssh', '-o', 'LogLevel=ERROR', '-o', 'ControlMaster=no', '-o',
+                          'ControlPath=/tmp/master.sock', MOCK_USER_HOST, 'bash'],
+                         mock_popen.call_args[0][0])
+
+    @mock.patch(MOCK_PACKAGE + 'Popen')
+    @mock.patch(MOCK_PACKAGE + 'open_ssh_master')
+    def test_run_ssh_command_stale_master(self, mock_open_ssh_master, mock_popen):
+        """Assert if the socket of a closed master is removed without reporting an error."""
+        create_path(self.control_dir)
+        control_path = os.path.join(self.control_dir, 'master.sock')
+        open(control_path, 'w').close()
+
+        mock_open_ssh_master.return_value = control_path
+        mock_popen.return_value.communicate.return_value = \
+            "Hello World!\n", "Control socket connect({}): Connection refused\r\n".format(
+                control_path)
+
+        stdout, stderr = remote.run_ssh_command(MOCK_USER_HOST, VALID_COMMAND)
+
+        self.assertEqual(("Hello World!\n", ""), (stdout, stderr))
+        self.assertFalse(os.path.exists(control_path))
+
+
+class RemoteBatchQueriesTestCase(unittest.TestCase):
+    """Test Cases for the functions of remote.py utility script handling many paths at once."""
+
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_get_remote_path_stats(self, mock_run_ssh_command):
+        """Assert if every path is checked by a single command and its result parsed."""
+        mock_run_ssh_command.return_value = "0 4096 1600000000 directory\n" \
+                                            "1 10 1600000001 regular file\n" \
+                                            "2 {}\n".format(remote.REMOTE_PATH_MISSING), ""
+
+        result = remote.get_remote_path_stats(MOCK_USER_HOST, ['dir', 'file', 'missing'])
+
+        mock_run_ssh_command.assert_called_once()
+        self.assertEqual({'dir': remote.RemotePathStat(True, 4096, 1600000000),
+                          'file': remote.RemotePathStat(False, 10, 1600000001),
+                          'missing': None}, result)
+
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_get_remote_path_stats_incomplete_output(self, mock_run_ssh_command):
+        """Assert if an exception is raised when a path is missing from the output."""
+        mock_run_ssh_command.return_value = "0 4096 1600000000 directory\n", ""
+
+        with self.assertRaises(UtilsException):
+            remote.get_remote_path_stats(MOCK_USER_HOST, ['dir', 'file'])
+
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_create_remote_dir_list(self, mock_run_ssh_command):
+        """Assert if the directories not available after the command are returned."""
+        mock_run_ssh_command.return_value = "0\n2\n", "mkdir: cannot create directory"
+
+        result = remote.create_remote_dir_list(MOCK_USER_HOST, ['dir0', 'dir1', 'dir2'])
+
+        mock_run_ssh_command.assert_called_once()
+        self.assertEqual(['dir1'], result)
+
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_get_remote_sub_dir_dict(self, mock_run_ssh_command):
+        """Assert if the sub-directories of each directory are sorted from the newest."""
+        mock_run_ssh_command.return_value = "0 10.5 dir0/old\n0 20.0 dir0/new\n2 1.0 dir2/a b\n", ""
+
+        result = remote.get_remote_sub_dir_dict(MOCK_USER_HOST, ['dir0', 'dir1', 'dir2'])
+
+        mock_run_ssh_command.assert_called_once()
+        self.assertEqual({'dir0': [('dir0/new', 20.0), ('dir0/old', 10.5)], 'dir1': [],
+                          'dir2': [('dir2/a b', 1.0)]}, result)
+
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_get_remote_backup_ages(self, mock_run_ssh_command):
+        """Assert if the age of the backups of every directory is read by a single command."""
+        mock_run_ssh_command.return_value = "0 10.500000 bkp 1\n1 20.000000 bkp2\n", ""
+
+        result = remote.get_remote_backup_ages(MOCK_USER_HOST, ['root/c0', 'root/c1'])
+
+        mock_run_ssh_command.assert_called_once()
+        self.assertEqual({'root/c0/bkp 1': 10.5, 'root/c1/bkp2': 20.0}, result)
+
+    @mock.patch(MOCK_PACKAGE + 'get_remote_path_stats')
+    @mock.patch(MOCK_PACKAGE + 'run_ssh_command')
+    def test_remove_remote_dir_batches(self, mock_run_ssh_command, mock_get_remote_path_stats):
+        """Assert if directories are removed by parallel batches and validated at once."""
+        dir_list = ['dir{}'.format(index) for index in range(5)]
+        mock_run_ssh_command.return_value = "", ""
+        mock_get_remote_path_stats.return_value = dict.fromkeys(dir_list)
+        mock_get_remote_path_stats.return_value['dir3'] = remote.RemotePathStat(True, 4096, 1)
+
+        with mock.patch(MOCK_PACKAGE + 'REMOVE_BATCH_SIZE', 2), \
+                mock.patch(MOCK_PACKAGE + 'REMOVE_PARALLEL_BATCHES', 2):
+            result = remote.remove_remote_dir(MOCK_USER_HOST, dir_list)
+
+        self.assertEqual("rm -rf -- dir0 dir1 2>/dev/null &\nrm -rf -- dir2 dir3 2>/dev/null &\n"
+                         "wait\nrm -rf -- dir4 2>/dev/null &\nwait\n",
+                         mock_run_ssh_command.call_args[0][1])
+        self.assertEqual((['dir3'], ['dir0', 'dir1', 'dir2', 'dir4']), result)
+
+
 class RemoteIsRemoteFolderEmpty(unittest.TestCase):
     """Test Cases for is_remote_folder_empty function in remote.py utility script."""
 